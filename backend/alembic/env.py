@@ -24,7 +24,12 @@ import src.models.person
 import src.models.preorder
 import src.models.user
 import src.models.dish_price
-import src.models.refresh_token_session  # noqa: F401
+import src.models.refresh_token_session
+import src.models.order_daily_rollup
+import src.models.change_version
+import src.models.render_job
+import src.models.stored_invoice
+import src.models.import_job  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,32 @@
+"""add change_version
+
+Revision ID: 09f9df23304e
+Revises: a046ea727598
+Create Date: 2026-10-18 14:12:09.384120
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "09f9df23304e"
+down_revision: Union[str, None] = "a046ea727598"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "change_version",
+        sa.Column("scope", sa.String(length=128), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("scope"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("change_version")
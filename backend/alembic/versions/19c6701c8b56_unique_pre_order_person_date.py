@@ -0,0 +1,41 @@
+"""unique pre_order person_id and date
+
+Revision ID: 19c6701c8b56
+Revises: 09b36a3b8536
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "19c6701c8b56"
+down_revision: Union[str, None] = "09b36a3b8536"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Remove duplicate pre-orders, keep the most recently created one
+    op.execute(
+        sa.text(
+            """
+            DELETE FROM pre_order a
+            USING pre_order b
+            WHERE a.person_id = b.person_id
+              AND a.date = b.date
+              AND a.id < b.id
+            """
+        )
+    )
+    op.create_unique_constraint(
+        "uq_preorder_person_date", "pre_order", ["person_id", "date"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_preorder_person_date", "pre_order", type_="unique")
@@ -0,0 +1,30 @@
+"""add replaced_by to refresh_token_session
+
+Revision ID: 1f7d075d0749
+Revises: 09f9df23304e
+Create Date: 2026-10-18 14:48:33.902117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1f7d075d0749"
+down_revision: Union[str, None] = "09f9df23304e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "refresh_token_session",
+        sa.Column("replaced_by", sa.String(length=64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("refresh_token_session", "replaced_by")
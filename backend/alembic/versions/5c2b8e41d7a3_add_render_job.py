@@ -0,0 +1,96 @@
+"""add render_job
+
+Revision ID: 5c2b8e41d7a3
+Revises: 1f7d075d0749
+Create Date: 2026-10-18 16:41:27.902318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5c2b8e41d7a3"
+down_revision: Union[str, None] = "1f7d075d0749"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    sa.Enum(
+        "location_report",
+        "invoice",
+        "group_qr_codes",
+        "employee_qr_codes",
+        name="renderjobtype",
+    ).create(op.get_bind())
+    sa.Enum("pending", "running", "done", "failed", name="renderjobstatus").create(
+        op.get_bind()
+    )
+    op.create_table(
+        "render_job",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column(
+            "job_type",
+            postgresql.ENUM(
+                "location_report",
+                "invoice",
+                "group_qr_codes",
+                "employee_qr_codes",
+                name="renderjobtype",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("params", sa.JSON(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(
+                "pending",
+                "running",
+                "done",
+                "failed",
+                name="renderjobstatus",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("error", sa.String(length=512), nullable=True),
+        sa.Column("download_name", sa.String(length=256), nullable=True),
+        sa.Column("mimetype", sa.String(length=64), nullable=True),
+        sa.Column("result", sa.LargeBinary(), nullable=True),
+        sa.Column("created", sa.DateTime(), nullable=False),
+        sa.Column("finished", sa.DateTime(), nullable=True),
+        sa.Column("expires", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+            name="fk_renderjob_user",
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_render_job_user_id", "render_job", ["user_id"])
+    op.create_index("ix_render_job_expires", "render_job", ["expires"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_render_job_expires", table_name="render_job")
+    op.drop_index("ix_render_job_user_id", table_name="render_job")
+    op.drop_table("render_job")
+    sa.Enum("pending", "running", "done", "failed", name="renderjobstatus").drop(
+        op.get_bind()
+    )
+    sa.Enum(
+        "location_report",
+        "invoice",
+        "group_qr_codes",
+        "employee_qr_codes",
+        name="renderjobtype",
+    ).drop(op.get_bind())
@@ -0,0 +1,53 @@
+"""add stored_invoice
+
+Revision ID: 8e1f4a2c9b6d
+Revises: 5c2b8e41d7a3
+Create Date: 2026-10-18 18:12:03.417625
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e1f4a2c9b6d"
+down_revision: Union[str, None] = "5c2b8e41d7a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    sa.Enum("person", "group", "location", name="invoicescope").create(op.get_bind())
+    op.create_table(
+        "stored_invoice",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column(
+            "scope",
+            postgresql.ENUM(
+                "person", "group", "location", name="invoicescope", create_type=False
+            ),
+            nullable=False,
+        ),
+        sa.Column("scope_id", sa.UUID(), nullable=False),
+        sa.Column("versions", sa.String(length=256), nullable=False),
+        sa.Column("download_name", sa.String(length=256), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("content", sa.LargeBinary(), nullable=False),
+        sa.Column("created", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "month", "scope", "scope_id", name="uq_storedinvoice_month_scope"
+        ),
+    )
+    op.create_index("ix_stored_invoice_month", "stored_invoice", ["month"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stored_invoice_month", table_name="stored_invoice")
+    op.drop_table("stored_invoice")
+    sa.Enum("person", "group", "location", name="invoicescope").drop(op.get_bind())
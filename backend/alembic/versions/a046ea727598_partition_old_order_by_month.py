@@ -0,0 +1,168 @@
+"""partition old_order by month
+
+Revision ID: a046ea727598
+Revises: afd12e53b639
+Create Date: 2026-10-18 13:04:51.702318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a046ea727598"
+down_revision: Union[str, None] = "afd12e53b639"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Keep in sync with OLD_ORDER_PARTITION_MONTHS_AHEAD in src/constants.py
+MONTHS_AHEAD = 3
+
+OLD_ORDER_INDEXES = """
+    CREATE INDEX ix_oldorder_person_date ON old_order (person_id, date);
+    CREATE INDEX ix_oldorder_location_date ON old_order (location_id, date);
+    CREATE INDEX ix_oldorder_date ON old_order (date);
+"""
+
+OLD_ORDER_FOREIGN_KEYS = """
+    ALTER TABLE old_order ADD CONSTRAINT fk_oldorder_person
+        FOREIGN KEY (person_id) REFERENCES person (id)
+        ON UPDATE CASCADE ON DELETE SET NULL;
+    ALTER TABLE old_order ADD CONSTRAINT fk_oldorder_location
+        FOREIGN KEY (location_id) REFERENCES location (id)
+        ON UPDATE CASCADE ON DELETE SET NULL;
+"""
+
+
+def upgrade() -> None:
+    op.execute(sa.text("ALTER TABLE old_order RENAME TO old_order_legacy"))
+    op.execute(
+        sa.text(
+            """
+            ALTER INDEX ix_oldorder_person_date RENAME TO ix_oldorder_legacy_person_date;
+            ALTER INDEX ix_oldorder_location_date RENAME TO ix_oldorder_legacy_location_date;
+            ALTER INDEX ix_oldorder_date RENAME TO ix_oldorder_legacy_date;
+            """
+        )
+    )
+
+    # The partition key has to be part of the primary key
+    op.execute(
+        sa.text(
+            """
+            CREATE TABLE old_order (
+                id INTEGER NOT NULL DEFAULT nextval('old_order_id_seq'),
+                person_id UUID,
+                location_id UUID NOT NULL,
+                date DATE NOT NULL,
+                "nothing" BOOLEAN,
+                main_dish maindish,
+                salad_option BOOLEAN NOT NULL,
+                handed_out BOOLEAN,
+                PRIMARY KEY (id, date)
+            ) PARTITION BY RANGE (date)
+            """
+        )
+    )
+
+    # One partition per month from the first old order up to MONTHS_AHEAD months
+    # in the future, later months are created by the cronjob.
+    op.execute(
+        sa.text(
+            f"""
+            DO $$
+            DECLARE
+                month DATE;
+            BEGIN
+                FOR month IN
+                    SELECT generate_series(
+                        date_trunc('month', LEAST(
+                            COALESCE((SELECT MIN(date) FROM old_order_legacy), CURRENT_DATE),
+                            CURRENT_DATE
+                        )),
+                        date_trunc('month', CURRENT_DATE) + INTERVAL '{MONTHS_AHEAD} months',
+                        INTERVAL '1 month'
+                    )::date
+                LOOP
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF old_order FOR VALUES FROM (%L) TO (%L)',
+                        'old_order_' || to_char(month, 'YYYY_MM'),
+                        month,
+                        (month + INTERVAL '1 month')::date
+                    );
+                END LOOP;
+            END $$;
+            """
+        )
+    )
+    # Safety net in case the cronjob did not run in time
+    op.execute(sa.text("CREATE TABLE old_order_default PARTITION OF old_order DEFAULT"))
+
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO old_order
+                (id, person_id, location_id, date, "nothing", main_dish, salad_option, handed_out)
+            SELECT id, person_id, location_id, date, "nothing", main_dish, salad_option, handed_out
+            FROM old_order_legacy
+            """
+        )
+    )
+    op.execute(sa.text("ALTER SEQUENCE old_order_id_seq OWNED BY old_order.id"))
+    op.execute(sa.text("DROP TABLE old_order_legacy"))
+
+    op.execute(sa.text(OLD_ORDER_FOREIGN_KEYS))
+    op.execute(sa.text(OLD_ORDER_INDEXES))
+
+
+def downgrade() -> None:
+    op.execute(sa.text("ALTER TABLE old_order RENAME TO old_order_partitioned"))
+    op.execute(
+        sa.text(
+            """
+            ALTER INDEX ix_oldorder_person_date RENAME TO ix_oldorder_partitioned_person_date;
+            ALTER INDEX ix_oldorder_location_date RENAME TO ix_oldorder_partitioned_location_date;
+            ALTER INDEX ix_oldorder_date RENAME TO ix_oldorder_partitioned_date;
+            ALTER TABLE old_order_partitioned DROP CONSTRAINT fk_oldorder_person;
+            ALTER TABLE old_order_partitioned DROP CONSTRAINT fk_oldorder_location;
+            """
+        )
+    )
+
+    op.execute(
+        sa.text(
+            """
+            CREATE TABLE old_order (
+                id INTEGER NOT NULL DEFAULT nextval('old_order_id_seq'),
+                person_id UUID,
+                location_id UUID NOT NULL,
+                date DATE NOT NULL,
+                "nothing" BOOLEAN,
+                main_dish maindish,
+                salad_option BOOLEAN NOT NULL,
+                handed_out BOOLEAN,
+                PRIMARY KEY (id)
+            )
+            """
+        )
+    )
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO old_order
+                (id, person_id, location_id, date, "nothing", main_dish, salad_option, handed_out)
+            SELECT id, person_id, location_id, date, "nothing", main_dish, salad_option, handed_out
+            FROM old_order_partitioned
+            """
+        )
+    )
+    op.execute(sa.text("ALTER SEQUENCE old_order_id_seq OWNED BY old_order.id"))
+    # Dropping the parent table drops all attached partitions
+    op.execute(sa.text("DROP TABLE old_order_partitioned"))
+
+    op.execute(sa.text(OLD_ORDER_FOREIGN_KEYS))
+    op.execute(sa.text(OLD_ORDER_INDEXES))
@@ -0,0 +1,64 @@
+"""add order_daily_rollup
+
+Revision ID: afd12e53b639
+Revises: fd80cd620f58
+Create Date: 2026-10-18 12:20:45.118230
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "afd12e53b639"
+down_revision: Union[str, None] = "fd80cd620f58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "order_daily_rollup",
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("location_id", sa.UUID(), nullable=False),
+        sa.Column("rot", sa.Integer(), nullable=False),
+        sa.Column("blau", sa.Integer(), nullable=False),
+        sa.Column("salad", sa.Integer(), nullable=False),
+        sa.Column("nothing", sa.Integer(), nullable=False),
+        sa.Column("handed_out", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["location_id"],
+            ["location.id"],
+            name="fk_orderdailyrollup_location",
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("date", "location_id"),
+    )
+
+    # Backfill the rollup from the existing old orders
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO order_daily_rollup
+                (date, location_id, rot, blau, salad, "nothing", handed_out)
+            SELECT
+                date,
+                location_id,
+                COUNT(*) FILTER (WHERE "nothing" IS NOT TRUE AND main_dish = 'rot'),
+                COUNT(*) FILTER (WHERE "nothing" IS NOT TRUE AND main_dish = 'blau'),
+                COUNT(*) FILTER (WHERE "nothing" IS NOT TRUE AND salad_option),
+                COUNT(*) FILTER (WHERE "nothing" IS TRUE),
+                COUNT(*) FILTER (WHERE handed_out IS TRUE)
+            FROM old_order
+            GROUP BY date, location_id
+            """
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("order_daily_rollup")
@@ -0,0 +1,76 @@
+"""add import_job
+
+Revision ID: b3d9e5f17a20
+Revises: 8e1f4a2c9b6d
+Create Date: 2026-10-18 20:41:27.902114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b3d9e5f17a20"
+down_revision: Union[str, None] = "8e1f4a2c9b6d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    sa.Enum("pending", "running", "done", "failed", name="importjobstatus").create(
+        op.get_bind()
+    )
+    op.create_table(
+        "import_job",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("file_name", sa.String(length=256), nullable=False),
+        sa.Column("mode", sa.String(length=16), nullable=False),
+        sa.Column("hide_missing", sa.Boolean(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(
+                "pending",
+                "running",
+                "done",
+                "failed",
+                name="importjobstatus",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("error", sa.String(length=512), nullable=True),
+        sa.Column("rows_processed", sa.Integer(), nullable=False),
+        sa.Column("created_count", sa.Integer(), nullable=False),
+        sa.Column("updated_count", sa.Integer(), nullable=False),
+        sa.Column("hidden_count", sa.Integer(), nullable=False),
+        sa.Column("unchanged_count", sa.Integer(), nullable=False),
+        sa.Column("error_count", sa.Integer(), nullable=False),
+        sa.Column("errors", sa.JSON(), nullable=False),
+        sa.Column("created", sa.DateTime(), nullable=False),
+        sa.Column("finished", sa.DateTime(), nullable=True),
+        sa.Column("expires", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+            name="fk_importjob_user",
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_import_job_user_id", "import_job", ["user_id"])
+    op.create_index("ix_import_job_expires", "import_job", ["expires"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_import_job_expires", table_name="import_job")
+    op.drop_index("ix_import_job_user_id", table_name="import_job")
+    op.drop_table("import_job")
+    sa.Enum("pending", "running", "done", "failed", name="importjobstatus").drop(
+        op.get_bind()
+    )
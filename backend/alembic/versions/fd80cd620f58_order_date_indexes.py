@@ -0,0 +1,77 @@
+"""order tables: date column as DATE, composite indexes and uniqueness
+
+Revision ID: fd80cd620f58
+Revises: 19c6701c8b56
+Create Date: 2026-10-18 11:02:17.540913
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "fd80cd620f58"
+down_revision: Union[str, None] = "19c6701c8b56"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ORDER_TABLES = ["pre_order", "daily_order", "old_order"]
+
+
+def upgrade() -> None:
+    for table in ORDER_TABLES:
+        op.alter_column(
+            table,
+            "date",
+            existing_type=sa.DateTime(),
+            type_=sa.Date(),
+            existing_nullable=False,
+            postgresql_using="date::date",
+        )
+
+    # pre_order: (person_id, date) is already covered by uq_preorder_person_date
+    op.create_index("ix_preorder_location_date", "pre_order", ["location_id", "date"])
+    op.create_index("ix_preorder_date", "pre_order", ["date"])
+
+    # daily_order: a person may have one order per day instead of one order at all
+    op.drop_constraint("daily_order_person_id_key", "daily_order", type_="unique")
+    op.create_unique_constraint(
+        "uq_dailyorder_person_date", "daily_order", ["person_id", "date"]
+    )
+    op.create_index(
+        "ix_dailyorder_location_date", "daily_order", ["location_id", "date"]
+    )
+    op.create_index("ix_dailyorder_date", "daily_order", ["date"])
+
+    op.create_index("ix_oldorder_person_date", "old_order", ["person_id", "date"])
+    op.create_index("ix_oldorder_location_date", "old_order", ["location_id", "date"])
+    op.create_index("ix_oldorder_date", "old_order", ["date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_oldorder_date", table_name="old_order")
+    op.drop_index("ix_oldorder_location_date", table_name="old_order")
+    op.drop_index("ix_oldorder_person_date", table_name="old_order")
+
+    op.drop_index("ix_dailyorder_date", table_name="daily_order")
+    op.drop_index("ix_dailyorder_location_date", table_name="daily_order")
+    op.drop_constraint("uq_dailyorder_person_date", "daily_order", type_="unique")
+    op.create_unique_constraint(
+        "daily_order_person_id_key", "daily_order", ["person_id"]
+    )
+
+    op.drop_index("ix_preorder_date", table_name="pre_order")
+    op.drop_index("ix_preorder_location_date", table_name="pre_order")
+
+    for table in ORDER_TABLES:
+        op.alter_column(
+            table,
+            "date",
+            existing_type=sa.Date(),
+            type_=sa.DateTime(),
+            existing_nullable=False,
+        )
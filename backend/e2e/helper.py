@@ -1,7 +1,8 @@
 import uuid
 import datetime
 import pytest
-from sqlalchemy import text
+from contextlib import contextmanager
+from sqlalchemy import event, text
 from src.models.dish_price import DishPrice
 from src.models.oldorder import OldOrder
 from src.models.dailyorder import DailyOrder
@@ -12,6 +13,7 @@ from src import app as project_app
 from src.database import create_initial_admin, db as project_db
 from src.models.user import User, UserGroup
 from src.utils.db_utils import insert_mock_data
+from src.utils.dish_price_cache import DishPriceCache
 from src.models.group import Group
 from src.models.employee import Employee
 
@@ -44,6 +46,8 @@ def db(app):
         project_db.session.execute(text("PRAGMA foreign_keys = OFF"))
         yield project_db
         project_db.drop_all()
+        # The change versions start over with the next database
+        DishPriceCache.invalidate()
 
 
 @pytest.fixture(scope="function")
@@ -61,6 +65,21 @@ def login(user: User, client):
     return res
 
 
+@contextmanager
+def record_statements(db):
+    """Collect the SQL statements sent to the database inside the block"""
+    statements = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _record)
+
+
 def join_headers(headers):
     return "; ".join(f"{key}: {value}" for key, value in headers.items())
 
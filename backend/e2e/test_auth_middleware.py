@@ -212,6 +212,15 @@ def describe_auth_middleware():
 
         assert res.status_code == 200
 
+        # Leave the grace period for parallel requests
+        session = db.session.scalars(
+            select(RefreshTokenSession).where(
+                RefreshTokenSession.refresh_token == refresh_token
+            )
+        ).one()
+        session.last_used = datetime.datetime.now() - datetime.timedelta(minutes=1)
+        db.session.commit()
+
         client.delete_cookie(AUTHENTICATION_TOKEN_COOKIE_NAME)
         client.set_cookie(REFRESH_TOKEN_COOKIE_NAME, refresh_token)
 
@@ -221,6 +230,36 @@ def describe_auth_middleware():
         assert res.status_code == 403
         assert res.json["title"] == "Account gesperrt"
 
+    def it_returns_replacement_token_on_parallel_refresh(
+        app, client, user_verwaltung, db
+    ):
+        db.session.add(user_verwaltung)
+        db.session.commit()
+
+        login_res = client.post(
+            "/api/login",
+            json={"username": user_verwaltung.username, "password": PASSWORD},
+        )
+        refresh_token = get_refresh_token(login_res.headers)
+
+        client.delete_cookie(AUTHENTICATION_TOKEN_COOKIE_NAME)
+        res = client.get("/api/is-logged-in")
+
+        assert res.status_code == 200
+        replacement = get_refresh_token(res.headers)
+        assert replacement != refresh_token
+
+        # A second tab sends the old token right after the first one
+        client.delete_cookie(AUTHENTICATION_TOKEN_COOKIE_NAME)
+        client.set_cookie(REFRESH_TOKEN_COOKIE_NAME, refresh_token)
+        res = client.get("/api/is-logged-in")
+
+        assert res.status_code == 200
+        assert get_refresh_token(res.headers) == replacement
+
+        db.session.refresh(user_verwaltung)
+        assert not user_verwaltung.blocked
+
     def it_handles_blocked_user(app, client, user_verwaltung, db):
         db.session.add(user_verwaltung)
         db.session.commit()
@@ -5,6 +5,7 @@ import datetime
 from .helper import *  # for fixtures # noqa: F403
 from .helper import login  # noqa: F401
 from src.models.dailyorder import DailyOrder
+from src.repositories.orders_repository import OrdersRepository
 
 
 def describe_daily_orders():
@@ -41,6 +42,79 @@ def describe_daily_orders():
             assert len(response.json) == 5
             assert db.session.query(DailyOrder).count() == 5
 
+        def it_returns_daily_orders_page_by_page(
+            client,
+            user_verwaltung,
+            user_standortleitung,
+            user_gruppenleitung,
+            location,
+            group,
+            employees,
+            daily_orders,
+            db,
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(user_standortleitung)
+            db.session.add(user_gruppenleitung)
+            db.session.commit()
+            db.session.add(location)
+            db.session.add(group)
+            db.session.commit()
+            db.session.add_all(employees)
+            db.session.commit()
+            db.session.add_all(daily_orders)
+            db.session.commit()
+
+            login(user=user_verwaltung, client=client)
+            response = client.get("/api/daily-orders?limit=3")
+            assert response.status_code == 200
+            assert len(response.json) == 3
+
+            cursor = response.headers["X-Next-Cursor"]
+            response = client.get(f"/api/daily-orders?limit=3&cursor={cursor}")
+            assert response.status_code == 200
+            assert len(response.json) == 2
+            assert "X-Next-Cursor" not in response.headers
+
+        def it_returns_304_until_daily_orders_change(
+            client,
+            user_verwaltung,
+            user_standortleitung,
+            user_gruppenleitung,
+            location,
+            group,
+            employees,
+            daily_orders,
+            db,
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(user_standortleitung)
+            db.session.add(user_gruppenleitung)
+            db.session.commit()
+            db.session.add(location)
+            db.session.add(group)
+            db.session.commit()
+            db.session.add_all(employees)
+            db.session.commit()
+            db.session.add_all(daily_orders)
+            db.session.commit()
+
+            login(user=user_verwaltung, client=client)
+            response = client.get("/api/daily-orders")
+            etag = response.headers["ETag"]
+            assert response.status_code == 200
+
+            response = client.get("/api/daily-orders", headers={"If-None-Match": etag})
+            assert response.status_code == 304
+
+            OrdersRepository.push_dailyorders_to_oldorders(
+                datetime.date.today() + datetime.timedelta(days=1)
+            )
+
+            response = client.get("/api/daily-orders", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.json == []
+
         def it_returns_respective_to_userscope(
             client,
             user_verwaltung,
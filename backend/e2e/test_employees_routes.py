@@ -1,12 +1,41 @@
 """End-to-End tests for the employees routes."""
 
+import datetime
+import os
 import uuid
+
+import pytest
 from .helper import *  # for fixtures # noqa: F403
-from .helper import login
+from .helper import login, record_statements
+from src.constants import (
+    IMPORT_JOB_MAX_PER_USER,
+    IMPORT_JOB_STALE_AFTER,
+    IMPORT_JOB_TTL,
+)
+from src.models.dailyorder import DailyOrder
 from src.models.employee import Employee
+from src.models.import_job import ImportJob, ImportJobStatus
+from src.models.preorder import PreOrder
+from src.repositories.employees_repository import EmployeesRepository
+from src.services.import_jobs_service import ImportJobsService
+from src.utils.pdf_creator import PDFCreationUtils
 from io import BytesIO
 
 
+@pytest.fixture()
+def submitted_import_jobs(mocker):
+    """Collect queued imports instead of running them in background threads"""
+
+    executor = mocker.patch("src.services.import_jobs_service.import_job_executor")
+    return executor.submit
+
+
+def run_submitted_jobs(submitted_jobs):
+    for call in submitted_jobs.call_args_list:
+        func, *args = call.args
+        func(*args)
+
+
 def describe_employees():
     def describe_get():
         def it_returns_all_employees_for_verwaltung(
@@ -24,6 +53,47 @@ def describe_employees():
             assert res.status_code == 200
             assert len(res.json) == len(employees)
 
+        def it_returns_employees_page_by_page(
+            client, user_verwaltung, employees, group, location, db
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.add_all(employees)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            res = client.get("/api/employees?limit=3&with-total=true")
+
+            assert res.status_code == 200
+            assert [e["last_name"] for e in res.json] == [
+                "LastName0",
+                "LastName1",
+                "LastName2",
+            ]
+            assert res.headers["X-Total-Count"] == "5"
+
+            cursor = res.headers["X-Next-Cursor"]
+            res = client.get(f"/api/employees?limit=3&cursor={cursor}")
+
+            assert res.status_code == 200
+            assert [e["last_name"] for e in res.json] == ["LastName3", "LastName4"]
+            assert "X-Next-Cursor" not in res.headers
+            assert "X-Total-Count" not in res.headers
+
+        def it_returns_400_on_invalid_pagination(
+            client, user_verwaltung, employees, group, location, db
+        ):
+            db.session.add(user_verwaltung)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            res = client.get("/api/employees?limit=abc")
+            assert res.status_code == 400
+
+            res = client.get("/api/employees?limit=2&cursor=kaputt")
+            assert res.status_code == 400
+
         def it_returns_employees_filtered_by_first_name(
             client, user_verwaltung, employees, group, location, db
         ):
@@ -591,6 +661,233 @@ def describe_employees():
             employees = db.session.query(Employee).all()
             assert len(employees) == 1
 
+        def it_skips_existing_and_duplicate_employee_numbers(
+            client, user_verwaltung, group, location, employees, db
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.add_all(employees)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            existing = employees[0].employee_number
+            csv_content = (
+                "Kunden-Nr.,Kürzel,Bereich,Gruppe-Nr.,Gruppen-Name 1,Gruppen-Name 2\n"
+                f"{existing},MaxMustermann,{location.location_name},1,{group.group_name},Test\n"
+                f"9001,ErikaMusterfrau,{location.location_name},1,{group.group_name} - Nord,Test\n"
+                f"9001,ErikaMusterfrau,{location.location_name},1,{group.group_name},Test\n"
+            )
+
+            res = client.post(
+                "/api/employees_csv",
+                data={"file": (BytesIO(csv_content.encode("utf-8")), "employees.csv")},
+                content_type="multipart/form-data",
+            )
+
+            assert res.status_code == 200
+            created = db.session.query(Employee).filter_by(employee_number=9001).all()
+            assert len(created) == 1
+            assert (created[0].first_name, created[0].last_name) == (
+                "Erika",
+                "Musterfrau",
+            )
+            assert created[0].type == "employee"
+            assert created[0].group_id == group.id
+            assert db.session.query(Employee).count() == len(employees) + 1
+
+        def it_imports_with_a_constant_number_of_queries(
+            client, user_verwaltung, group, location, db
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            def _import(first_number, rows):
+                csv_content = "Kunden-Nr.,Kürzel,Bereich,Gruppe-Nr.,Gruppen-Name 1,Gruppen-Name 2\n"
+                csv_content += "".join(
+                    f"{first_number + i},MaxMustermann,{location.location_name},1,{group.group_name},Test\n"
+                    for i in range(rows)
+                )
+                with record_statements(db) as statements:
+                    res = client.post(
+                        "/api/employees_csv",
+                        data={
+                            "file": (
+                                BytesIO(csv_content.encode("utf-8")),
+                                "employees.csv",
+                            )
+                        },
+                        content_type="multipart/form-data",
+                    )
+
+                assert res.status_code == 200
+                return len(statements)
+
+            assert _import(1000, 2) == _import(2000, 200)
+            assert db.session.query(Employee).count() == 202
+
+        def it_syncs_only_changed_employees(
+            client, user_verwaltung, group, location, employees, db
+        ):
+            names = [
+                ("Anna", "Alt"),
+                ("Bernd", "Bauer"),
+                ("Clara", "Christ"),
+                ("Emil", "Ernst"),
+                ("Frida", "Fuchs"),
+            ]
+            for employee, (first_name, last_name) in zip(employees, names):
+                employee.first_name = first_name
+                employee.last_name = last_name
+            employees[2].hidden = True
+            db.session.add(user_verwaltung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.add_all(employees)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            csv_content = (
+                "Kunden-Nr.,Kürzel,Bereich,Gruppe-Nr.,Gruppen-Name 1,Gruppen-Name 2\n"
+                f"1000,AnnaAlt,{location.location_name},1,{group.group_name},Test\n"
+                f"1001,BerndBecker,{location.location_name},1,{group.group_name},Test\n"
+                f"1002,ClaraChrist,{location.location_name},1,{group.group_name},Test\n"
+                f"9001,DoraDorn,{location.location_name},1,{group.group_name},Test\n"
+            )
+
+            def _sync():
+                with record_statements(db) as statements:
+                    res = client.post(
+                        "/api/employees_csv?mode=sync&hide-missing=true",
+                        data={
+                            "file": (
+                                BytesIO(csv_content.encode("utf-8")),
+                                "employees.csv",
+                            )
+                        },
+                        content_type="multipart/form-data",
+                    )
+
+                assert res.status_code == 200
+                return res.json, statements
+
+            result, _ = _sync()
+
+            assert result == {"created": 1, "updated": 2, "hidden": 2, "unchanged": 1}
+            db.session.expire_all()
+            assert db.session.get(Employee, employees[1].id).last_name == "Becker"
+            # hidden and in the file again: shown again
+            assert db.session.get(Employee, employees[2].id).hidden is False
+            assert db.session.get(Employee, employees[3].id).hidden is True
+            assert (
+                db.session.query(Employee).filter_by(employee_number=9001).one()
+            ).first_name == "Dora"
+
+            result, statements = _sync()
+
+            assert result == {"created": 0, "updated": 0, "hidden": 0, "unchanged": 4}
+            assert not any(
+                statement.lstrip().upper().startswith(("INSERT", "UPDATE"))
+                and "change_version" not in statement
+                for statement in statements
+            )
+
+        def it_keeps_missing_employees_without_hide_missing(
+            client, user_verwaltung, group, location, employees, db
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.add_all(employees)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            csv_content = (
+                "Kunden-Nr.,Kürzel,Bereich,Gruppe-Nr.,Gruppen-Name 1,Gruppen-Name 2\n"
+                f"9001,DoraDorn,{location.location_name},1,{group.group_name},Test\n"
+            )
+
+            res = client.post(
+                "/api/employees_csv?mode=sync",
+                data={"file": (BytesIO(csv_content.encode("utf-8")), "employees.csv")},
+                content_type="multipart/form-data",
+            )
+
+            assert res.status_code == 200
+            assert res.json["hidden"] == 0
+            assert db.session.query(Employee).filter_by(hidden=True).count() == 0
+
+        def it_leaves_hidden_employees_out_of_lists_and_lookups(
+            client, user_verwaltung, group, location, employees, db
+        ):
+            employees[0].hidden = True
+            db.session.add(user_verwaltung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.add_all(employees)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            res = client.get("/api/employees")
+            assert res.status_code == 200
+            assert str(employees[0].id) not in [employee["id"] for employee in res.json]
+            assert len(res.json) == len(employees) - 1
+
+            res = client.get(f"/api/employees/{employees[0].id}")
+            assert res.status_code == 404
+
+            res = client.post(
+                "/api/employees/qr-codes-by-list",
+                json={"employee_ids": [str(employees[0].id)]},
+            )
+            assert res.status_code == 404
+
+        def it_shows_hidden_employees_again_on_resync(
+            client, user_verwaltung, group, location, employees, db
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.add_all(employees)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+            rows = [
+                f"{employee.employee_number},{employee.first_name}{employee.last_name},"
+                f"{location.location_name},1,{group.group_name},Test\n"
+                for employee in employees
+            ]
+
+            def _sync(rows):
+                csv_content = (
+                    "Kunden-Nr.,Kürzel,Bereich,Gruppe-Nr.,Gruppen-Name 1,Gruppen-Name 2\n"
+                    + "".join(rows)
+                )
+                res = client.post(
+                    "/api/employees_csv?mode=sync&hide-missing=true",
+                    data={
+                        "file": (BytesIO(csv_content.encode("utf-8")), "employees.csv")
+                    },
+                    content_type="multipart/form-data",
+                )
+                assert res.status_code == 200
+                return res.json
+
+            def _listed_ids():
+                res = client.get("/api/employees")
+                return [employee["id"] for employee in res.json]
+
+            assert _sync(rows[1:])["hidden"] == 1
+            assert str(employees[0].id) not in _listed_ids()
+
+            assert _sync(rows)["updated"] == 1
+
+            assert str(employees[0].id) in _listed_ids()
+            res = client.get(f"/api/employees/{employees[0].id}")
+            assert res.status_code == 200
+
         def it_returns_400_for_missing_file(client, user_verwaltung, db):
             db.session.add(user_verwaltung)
             db.session.commit()
@@ -644,6 +941,192 @@ def describe_employees():
 
             assert res.status_code == 403
 
+    def describe_csv_import_jobs():
+        def _upload(client, csv_content, query=""):
+            return client.post(
+                f"/api/employees_csv/jobs{query}",
+                data={"file": (BytesIO(csv_content.encode("utf-8")), "employees.csv")},
+                content_type="multipart/form-data",
+            )
+
+        def it_imports_in_batches_and_reports_faulty_lines(
+            client, user_verwaltung, group, location, db, submitted_import_jobs, mocker
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+            mocker.patch("src.services.import_jobs_service.IMPORT_JOB_BATCH_SIZE", 2)
+            writes = mocker.spy(EmployeesRepository, "sync_employees")
+
+            csv_content = (
+                "Kunden-Nr.,Kürzel,Bereich,Gruppe-Nr.,Gruppen-Name 1,Gruppen-Name 2\n"
+                f"9001,MaxMustermann,{location.location_name},1,{group.group_name},Test\n"
+                f"9002,mustermann,{location.location_name},1,{group.group_name},Test\n"
+                f"9003,ErikaMusterfrau,{location.location_name},1,Unbekannt,Test\n"
+                f"9004,DoraDorn,{location.location_name},1,{group.group_name},Test\n"
+            )
+
+            res = _upload(client, csv_content)
+
+            assert res.status_code == 202
+            assert res.json["status"] == "pending"
+            job_id = res.json["id"]
+            assert res.headers["Location"] == f"/api/employees_csv/jobs/{job_id}"
+            _, _, submitted_id = submitted_import_jobs.call_args.args
+            path = ImportJobsService._get_upload_path(submitted_id)
+            assert os.path.exists(path)
+
+            run_submitted_jobs(submitted_import_jobs)
+
+            res = client.get(f"/api/employees_csv/jobs/{job_id}")
+            assert res.status_code == 200
+            assert res.json["status"] == "done"
+            assert res.json["rows_processed"] == 4
+            assert res.json["created_count"] == 2
+            assert res.json["error_count"] == 2
+            assert [error["line"] for error in res.json["errors"]] == [3, 4]
+            assert "Gruppe Unbekannt" in res.json["errors"][1]["message"]
+            # two full batches and the rest
+            assert writes.call_count == 3
+            assert db.session.query(Employee).count() == 2
+            assert not os.path.exists(path)
+
+        def it_reads_iso_8859_1_with_semicolons(
+            client, user_verwaltung, group, location, db, submitted_import_jobs
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            csv_content = (
+                "Kunden-Nr.;Kürzel;Bereich;Gruppe-Nr.;Gruppen-Name 1;Gruppen-Name 2\n"
+                f"9001;JürgenMüller;{location.location_name};1;{group.group_name};Test\n"
+            )
+
+            res = client.post(
+                "/api/employees_csv/jobs",
+                data={
+                    "file": (BytesIO(csv_content.encode("iso-8859-1")), "employees.csv")
+                },
+                content_type="multipart/form-data",
+            )
+            run_submitted_jobs(submitted_import_jobs)
+
+            res = client.get(res.headers["Location"])
+            assert res.json["created_count"] == 1
+            employee = db.session.query(Employee).one()
+            assert (employee.first_name, employee.last_name) == ("Jürgen", "Müller")
+
+        def it_does_not_hide_missing_employees_after_faulty_rows(
+            client,
+            user_verwaltung,
+            group,
+            location,
+            employees,
+            db,
+            submitted_import_jobs,
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.add_all(employees)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            csv_content = (
+                "Kunden-Nr.,Kürzel,Bereich,Gruppe-Nr.,Gruppen-Name 1,Gruppen-Name 2\n"
+                f"9001,DoraDorn,{location.location_name},1,{group.group_name},Test\n"
+                f"9002,DoraDorn,{location.location_name},1,,Test\n"
+            )
+
+            res = _upload(client, csv_content, "?mode=sync&hide-missing=true")
+            run_submitted_jobs(submitted_import_jobs)
+
+            res = client.get(res.headers["Location"])
+            assert res.json["status"] == "done"
+            assert res.json["created_count"] == 1
+            assert res.json["hidden_count"] == 0
+            assert res.json["errors"][0]["line"] == 3
+            assert db.session.query(Employee).filter_by(hidden=True).count() == 0
+
+        def it_returns_404_for_unknown_jobs(client, user_verwaltung, db):
+            db.session.add(user_verwaltung)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            res = client.get(f"/api/employees_csv/jobs/{uuid.uuid4()}")
+
+            assert res.status_code == 404
+
+        def it_blocks_non_verwaltung_users(
+            client, user_standortleitung, db, submitted_import_jobs
+        ):
+            db.session.add(user_standortleitung)
+            db.session.commit()
+            login(user=user_standortleitung, client=client)
+
+            res = _upload(client, "Kunden-Nr.,Kürzel\n")
+
+            assert res.status_code == 403
+            submitted_import_jobs.assert_not_called()
+
+        def _job(user, status, age=datetime.timedelta()):
+            now = datetime.datetime.now()
+            job = ImportJob(
+                user_id=user.id,
+                file_name="employees.csv",
+                mode="create",
+                hide_missing=False,
+                expires=now + IMPORT_JOB_TTL,
+            )
+            job.status = status
+            job.created = now - age
+            return job
+
+        def it_limits_only_open_jobs(
+            client, user_verwaltung, db, submitted_import_jobs
+        ):
+            db.session.add(user_verwaltung)
+            for status in (ImportJobStatus.done, ImportJobStatus.failed):
+                for _ in range(IMPORT_JOB_MAX_PER_USER):
+                    db.session.add(_job(user_verwaltung, status))
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            assert _upload(client, "Kunden-Nr.,Kürzel\n").status_code == 202
+
+            for _ in range(IMPORT_JOB_MAX_PER_USER - 1):
+                db.session.add(_job(user_verwaltung, ImportJobStatus.pending))
+            db.session.commit()
+
+            assert _upload(client, "Kunden-Nr.,Kürzel\n").status_code == 429
+
+        def it_fails_orphaned_jobs_and_deletes_their_uploads(user_verwaltung, db):
+            db.session.add(user_verwaltung)
+            stale = [
+                _job(user_verwaltung, ImportJobStatus.pending, IMPORT_JOB_STALE_AFTER),
+                _job(user_verwaltung, ImportJobStatus.running, IMPORT_JOB_STALE_AFTER),
+            ]
+            fresh = _job(user_verwaltung, ImportJobStatus.running)
+            done = _job(user_verwaltung, ImportJobStatus.done, IMPORT_JOB_STALE_AFTER)
+            db.session.add_all(stale + [fresh, done])
+            db.session.commit()
+            path = ImportJobsService._get_upload_path(stale[0].id)
+            with open(path, "wb") as upload:
+                upload.write(b"Kunden-Nr.\n")
+
+            assert ImportJobsService.fail_stale_jobs() == 2
+            db.session.expire_all()
+            assert all(job.status == ImportJobStatus.failed for job in stale)
+            assert stale[0].error is not None
+            assert fresh.status == ImportJobStatus.running
+            assert done.status == ImportJobStatus.done
+            assert not os.path.exists(path)
+
     def describe_put():
         def it_updates_employee_for_verwaltung(
             client, user_verwaltung, employees, group, location, db
@@ -752,6 +1235,22 @@ def describe_employees():
             db_employees = db.session.query(Employee).all()
             assert len(db_employees) == len(employees) - 1
 
+        def it_deletes_hidden_employee(
+            client, user_verwaltung, employees, group, location, db
+        ):
+            employees[0].hidden = True
+            db.session.add(user_verwaltung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.add_all(employees)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            res = client.delete(f"/api/employees/{employees[0].id}")
+
+            assert res.status_code == 200
+            assert db.session.query(Employee).count() == len(employees) - 1
+
         def it_returns_404_if_employee_does_not_exist(client, user_verwaltung, db):
             db.session.add(user_verwaltung)
             db.session.commit()
@@ -794,6 +1293,23 @@ def describe_employees():
             db_employees = db.session.query(Employee).all()
             assert len(db_employees) == len(employees) - 2
 
+        def it_deletes_hidden_employees(
+            client, user_verwaltung, employees, group, location, db
+        ):
+            employees[0].hidden = True
+            db.session.add(user_verwaltung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.add_all(employees)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            employee_ids = [str(employees[0].id), str(employees[1].id)]
+            res = client.delete("/api/employees/", json={"employee_ids": employee_ids})
+
+            assert res.status_code == 200
+            assert db.session.query(Employee).count() == len(employees) - 2
+
         def it_returns_400_for_invalid_request_format(client, user_verwaltung, db):
             db.session.add(user_verwaltung)
             db.session.commit()
@@ -822,6 +1338,46 @@ def describe_employees():
             res = client.delete("/api/employees/", json={"employee_ids": employee_ids})
 
             assert res.status_code == 404
+            assert employee_ids[1] in res.json["details"]
+            # all or nothing: the valid employee is still there
+            assert db.session.query(Employee).count() == len(employees)
+
+        def it_deletes_orders_with_a_constant_number_of_queries(
+            client,
+            user_verwaltung,
+            employees,
+            pre_orders,
+            daily_orders,
+            group,
+            location,
+            db,
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.add_all(employees)
+            db.session.add_all(pre_orders)
+            db.session.add_all(daily_orders)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+            employee_ids = [str(employee.id) for employee in employees]
+
+            with record_statements(db) as statements:
+                res = client.delete(
+                    "/api/employees/", json={"employee_ids": employee_ids}
+                )
+
+            assert res.status_code == 200
+            assert db.session.query(Employee).count() == 0
+            assert db.session.query(PreOrder).count() == 0
+            assert db.session.query(DailyOrder).count() == 0
+            deletes = [
+                statement
+                for statement in statements
+                if statement.lstrip().upper().startswith("DELETE")
+            ]
+            # pre_order, daily_order, employee, person
+            assert len(deletes) == 4
 
     def describe_qr_codes():
         def it_returns_qr_codes_for_verwaltung(
@@ -938,3 +1494,51 @@ def describe_employees():
             )
 
             assert res.status_code == 404
+
+        def it_returns_employees_in_input_order_with_constant_queries(
+            client,
+            user_gruppenleitung,
+            employees,
+            employees_alt,
+            group,
+            group_alt,
+            location,
+            db,
+            mocker,
+        ):
+            db.session.add(user_gruppenleitung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.add(group_alt)
+            db.session.add_all(employees)
+            db.session.add_all(employees_alt)
+            db.session.commit()
+            login(user=user_gruppenleitung, client=client)
+            render = mocker.spy(PDFCreationUtils, "create_batch_qr_codes")
+
+            def _request(employee_ids):
+                with record_statements(db) as statements:
+                    res = client.post(
+                        "/api/employees/qr-codes-by-list",
+                        json={"employee_ids": [str(id) for id in employee_ids]},
+                    )
+                return res, statements
+
+            res, few = _request([employees[1].id])
+            assert res.status_code == 200
+
+            employee_ids = [employee.id for employee in reversed(employees)]
+            res, many = _request(employee_ids)
+
+            assert res.status_code == 200
+            assert [
+                employee.id for employee in render.call_args.kwargs["employees"]
+            ] == employee_ids
+            assert len(many) == len(few)
+
+            # employees of another group are out of scope and reported together
+            missing_ids = [employee.id for employee in employees_alt[:2]]
+            res, _ = _request([employees[0].id] + missing_ids)
+
+            assert res.status_code == 404
+            assert all(str(id) in res.json["details"] for id in missing_ids)
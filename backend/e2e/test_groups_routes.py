@@ -267,6 +267,33 @@ def describe_groups():
             assert len(res.json) == 1
             assert res.json[0]["id"] == str(group.id)
 
+        def it_returns_304_if_groups_did_not_change(client, user_verwaltung, group, db):
+            db.session.add(user_verwaltung)
+            db.session.add(group)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            res = client.get("/api/groups")
+            etag = res.headers["ETag"]
+
+            assert res.status_code == 200
+            assert etag
+
+            res = client.get("/api/groups", headers={"If-None-Match": etag})
+
+            assert res.status_code == 304
+            assert res.headers["ETag"] == etag
+            assert res.get_data() == b""
+
+            group.group_name = "Neuer Name"
+            db.session.commit()
+
+            res = client.get("/api/groups", headers={"If-None-Match": etag})
+
+            assert res.status_code == 200
+            assert res.headers["ETag"] != etag
+            assert res.json[0]["group_name"] == "Neuer Name"
+
         def it_blocks_unauthenticated_users(client):
             res = client.get("/api/groups")
 
@@ -1,5 +1,7 @@
 """ ""End-to-End tests for the old_orders routes."""
 
+import datetime
+import json
 import uuid
 from .helper import *  # for fixtures # noqa: F403
 from .helper import login  # noqa: F401
@@ -85,6 +87,99 @@ def describe_old_orders():
             assert len(res.json) == 5
             assert db.session.query(OldOrder).count() == 10
 
+        def it_returns_old_orders_page_by_page(
+            client,
+            user_verwaltung,
+            user_standortleitung,
+            user_gruppenleitung,
+            location,
+            group,
+            employees,
+            old_orders,
+            db,
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(user_standortleitung)
+            db.session.add(user_gruppenleitung)
+            db.session.commit()
+            db.session.add(location)
+            db.session.add(group)
+            db.session.commit()
+            db.session.add_all(employees)
+            db.session.commit()
+            old_orders[0].date = old_orders[0].date + datetime.timedelta(days=1)
+            db.session.add_all(old_orders)
+            db.session.commit()
+
+            login(user=user_verwaltung, client=client)
+
+            ids = []
+            cursor = None
+            for expected in [2, 2, 1]:
+                url = "/api/old-orders?limit=2"
+                if cursor:
+                    url += f"&cursor={cursor}"
+                res = client.get(url)
+
+                assert res.status_code == 200
+                assert len(res.json) == expected
+                ids += [int(order["id"]) for order in res.json]
+                cursor = res.headers.get("X-Next-Cursor")
+
+            assert cursor is None
+            # sorted by date, the moved order is the last one
+            assert ids[-1] == old_orders[0].id
+            assert sorted(ids[:-1]) == ids[:-1]
+            assert len(set(ids)) == 5
+
+        def it_returns_400_on_invalid_cursor(client, user_verwaltung, db):
+            db.session.add(user_verwaltung)
+            db.session.commit()
+
+            login(user=user_verwaltung, client=client)
+
+            res = client.get("/api/old-orders?limit=2&cursor=kaputt")
+            assert res.status_code == 400
+
+            res = client.get("/api/old-orders?limit=0")
+            assert res.status_code == 400
+
+        def it_streams_old_orders_as_ndjson(
+            client,
+            user_verwaltung,
+            user_standortleitung,
+            user_gruppenleitung,
+            location,
+            group,
+            employees,
+            old_orders,
+            db,
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(user_standortleitung)
+            db.session.add(user_gruppenleitung)
+            db.session.commit()
+            db.session.add(location)
+            db.session.add(group)
+            db.session.commit()
+            db.session.add_all(employees)
+            db.session.commit()
+            db.session.add_all(old_orders)
+            db.session.commit()
+
+            login(user=user_verwaltung, client=client)
+
+            res = client.get("/api/old-orders?stream=true")
+
+            assert res.status_code == 200
+            assert res.mimetype == "application/x-ndjson"
+            lines = res.get_data(as_text=True).splitlines()
+            assert len(lines) == 5
+            assert json.loads(lines[0])["location_id"] == str(location.id)
+
+            res = client.get(f"/api/old-orders?stream=true&group-id={uuid.uuid4()}")
+            assert res.status_code == 404
+
         def it_returns_no_old_orders_not_found(
             client,
             user_verwaltung,
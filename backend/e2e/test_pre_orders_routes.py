@@ -3,6 +3,7 @@
 import uuid
 from datetime import date, datetime, time
 import datetime
+from sqlalchemy import delete
 from .helper import *  # for fixtures # noqa: F403
 from .helper import login
 from src.models.preorder import PreOrder
@@ -46,6 +47,102 @@ def describe_pre_orders():
             assert res.status_code == 200
             assert len(res.json) == 6
 
+        def it_returns_pre_orders_page_by_page(
+            client,
+            location,
+            group,
+            employees,
+            user_verwaltung,
+            user_standortleitung,
+            user_gruppenleitung,
+            pre_orders,
+            db,
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(user_standortleitung)
+            db.session.add(user_gruppenleitung)
+            db.session.commit()
+            db.session.add(location)
+            db.session.add(group)
+            db.session.commit()
+            db.session.add_all(employees)
+            db.session.commit()
+            db.session.add_all(pre_orders)
+            db.session.commit()
+
+            login(user=user_verwaltung, client=client)
+
+            res = client.get("/api/pre-orders?limit=4&with-total=true")
+
+            assert res.status_code == 200
+            assert len(res.json) == 4
+            assert res.headers["X-Total-Count"] == str(len(pre_orders))
+
+            res = client.get(
+                f"/api/pre-orders?limit=4&cursor={res.headers['X-Next-Cursor']}"
+            )
+
+            assert res.status_code == 200
+            assert len(res.json) == len(pre_orders) - 4
+            assert "X-Next-Cursor" not in res.headers
+
+        def it_returns_304_if_pre_orders_of_location_did_not_change(
+            client,
+            location,
+            location_alt,
+            user_kuechenpersonal,
+            user_standortleitung,
+            user_standortleitung_alt_location,
+            pre_order,
+            db,
+        ):
+            user_kuechenpersonal.location_id = location.id
+            db.session.add(user_kuechenpersonal)
+            db.session.add(user_standortleitung)
+            db.session.add(user_standortleitung_alt_location)
+            db.session.commit()
+            db.session.add(location)
+            db.session.add(location_alt)
+            db.session.add(pre_order)
+            db.session.commit()
+
+            login(user=user_kuechenpersonal, client=client)
+
+            res = client.get("/api/pre-orders")
+            etag = res.headers["ETag"]
+            assert res.status_code == 200
+            assert len(res.json) == 1
+
+            # Änderungen an anderen Standorten ändern das ETag nicht
+            other = PreOrder(
+                person_id=uuid.uuid4(),
+                location_id=location_alt.id,
+                date=pre_order.date,
+                nothing=False,
+                main_dish=None,
+                salad_option=False,
+            )
+            db.session.add(other)
+            db.session.commit()
+
+            res = client.get("/api/pre-orders", headers={"If-None-Match": etag})
+            assert res.status_code == 304
+
+            # Bulk-Änderungen betreffen alle Standorte
+            db.session.execute(delete(PreOrder).where(PreOrder.id == other.id))
+            db.session.commit()
+
+            res = client.get("/api/pre-orders", headers={"If-None-Match": etag})
+            assert res.status_code == 200
+            etag = res.headers["ETag"]
+
+            pre_order.salad_option = not pre_order.salad_option
+            db.session.commit()
+
+            res = client.get("/api/pre-orders", headers={"If-None-Match": etag})
+            assert res.status_code == 200
+            assert res.headers["ETag"] != etag
+
         def it_pre_orders_respective_to_userscope(
             client,
             location,
@@ -466,6 +563,94 @@ def describe_pre_orders():
             assert res.status_code == 201
             assert db.session.query(PreOrder).count() == 3
 
+        def it_updates_existing_pre_orders_in_one_request(
+            client,
+            location,
+            group,
+            employees,
+            user_verwaltung,
+            user_standortleitung,
+            user_gruppenleitung,
+            pre_orders,
+            db,
+        ):
+            # enforce foreign key constraints just for this test
+            db.session.execute(text("PRAGMA foreign_keys = ON"))  # noqa: F405
+
+            db.session.add(user_verwaltung)
+            db.session.add(user_standortleitung)
+            db.session.add(user_gruppenleitung)
+            db.session.commit()
+            db.session.add(location)
+            db.session.add(group)
+            db.session.commit()
+            db.session.add_all(employees)
+            db.session.commit()
+            order_date = pre_orders[0].date.isoformat()
+            db.session.add_all(pre_orders)
+            db.session.commit()
+
+            login(user=user_gruppenleitung, client=client)
+
+            body = [
+                {
+                    "date": order_date,
+                    "location_id": preorder.location_id,
+                    "main_dish": main_dish,
+                    "nothing": False,
+                    "person_id": preorder.person_id,
+                    "salad_option": False,
+                }
+                for main_dish in ["rot", "blau"]
+                for preorder in pre_orders
+            ]
+
+            res = client.post("/api/pre-orders", json=body)
+            assert res.status_code == 201
+
+            db.session.expire_all()
+            assert db.session.query(PreOrder).count() == 5
+            assert (
+                db.session.query(PreOrder)
+                .filter(PreOrder.main_dish == "blau", PreOrder.salad_option.is_(False))
+                .count()
+                == 5
+            )
+
+        def it_does_not_create_for_hidden_employees_409(
+            client, location, group, employees, user_gruppenleitung, db
+        ):
+            employees[0].hidden = True
+            db.session.add(user_gruppenleitung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.add_all(employees)
+            db.session.commit()
+            login(user=user_gruppenleitung, client=client)
+
+            forward = datetime.date.today().weekday()
+            if forward > 2 and forward < 5:
+                forward = 4
+            else:
+                forward = 2
+
+            body = [
+                {
+                    "date": (
+                        datetime.date.today() + datetime.timedelta(days=forward)
+                    ).isoformat(),
+                    "location_id": location.id,
+                    "main_dish": "rot",
+                    "nothing": False,
+                    "person_id": employees[0].id,
+                    "salad_option": True,
+                }
+            ]
+
+            res = client.post("/api/pre-orders", json=body)
+            assert res.status_code == 409
+            assert db.session.query(PreOrder).count() == 0
+
         def it_does_not_create_based_on_userscope_409(
             client,
             location,
@@ -1087,9 +1272,7 @@ def describe_pre_orders():
 
             login(user=user_verwaltung, client=client)
 
-            dateToCheck = datetime.datetime.combine(
-                datetime.date.today() + datetime.timedelta(days=forward + 1), time(0, 0)
-            )
+            dateToCheck = datetime.date.today() + datetime.timedelta(days=forward + 1)
 
             assert (
                 db.session.query(PreOrder).filter(PreOrder.date == dateToCheck).count()
@@ -0,0 +1,234 @@
+"""End-to-end tests for the render jobs routes."""
+
+import datetime
+import uuid
+
+import pytest
+
+from .helper import *  # for fixtures # noqa: F403
+from .helper import login  # noqa: F401
+from src.constants import (
+    RENDER_JOB_MAX_PER_USER,
+    RENDER_JOB_STALE_AFTER,
+    RENDER_JOB_TTL,
+)
+from src.models.render_job import RenderJob, RenderJobStatus, RenderJobType
+from src.services.render_jobs_service import RenderJobsService
+
+
+@pytest.fixture()
+def submitted_jobs(mocker):
+    """Collect queued jobs instead of running them in background threads"""
+
+    executor = mocker.patch("src.services.render_jobs_service.render_job_executor")
+    return executor.submit
+
+
+def run_submitted_jobs(submitted_jobs):
+    for call in submitted_jobs.call_args_list:
+        func, *args = call.args
+        func(*args)
+
+
+def describe_render_jobs():
+    def describe_create():
+        def it_renders_group_qr_codes_in_background(
+            client, user_verwaltung, group, employees, db, submitted_jobs
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(group)
+            db.session.add_all(employees)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            res = client.post(
+                "/api/render-jobs",
+                json={"job_type": "group_qr_codes", "group_id": str(group.id)},
+            )
+
+            assert res.status_code == 202
+            assert res.json["status"] == "pending"
+            job_id = res.json["id"]
+            assert res.headers["Location"] == f"/api/render-jobs/{job_id}"
+            submitted_jobs.assert_called_once()
+
+            res = client.get(f"/api/render-jobs/{job_id}/download")
+            assert res.status_code == 409
+
+            run_submitted_jobs(submitted_jobs)
+
+            res = client.get(f"/api/render-jobs/{job_id}")
+            assert res.status_code == 200
+            assert res.json["status"] == "done"
+            assert res.json["download_name"] == f"{group.group_name}_qr_codes.pdf"
+
+            res = client.get(f"/api/render-jobs/{job_id}/download")
+            assert res.status_code == 200
+            assert res.mimetype == "application/pdf"
+            assert res.data.startswith(b"%PDF")
+            assert group.group_name in res.headers["Content-Disposition"]
+
+        def it_marks_job_as_failed_on_error(
+            client, user_verwaltung, group, db, submitted_jobs
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(group)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            res = client.post(
+                "/api/render-jobs",
+                json={"job_type": "group_qr_codes", "group_id": str(group.id)},
+            )
+            run_submitted_jobs(submitted_jobs)
+
+            res = client.get(f"/api/render-jobs/{res.json['id']}")
+            assert res.json["status"] == "failed"
+            assert "Mitarbeiter:innen der Gruppe" in res.json["error"]
+
+        def it_returns_400_on_missing_params(client, user_verwaltung, db):
+            db.session.add(user_verwaltung)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            res = client.post("/api/render-jobs", json={"job_type": "invoice"})
+            assert res.status_code == 400
+
+            res = client.post("/api/render-jobs", json={"job_type": "unknown"})
+            assert res.status_code == 400
+
+        def it_returns_403_for_groups_without_access(
+            client, user_gruppenleitung, group, db
+        ):
+            db.session.add(user_gruppenleitung)
+            db.session.add(group)
+            db.session.commit()
+            login(user=user_gruppenleitung, client=client)
+
+            res = client.post(
+                "/api/render-jobs",
+                json={"job_type": "group_qr_codes", "group_id": str(group.id)},
+            )
+
+            assert res.status_code == 403
+
+        def it_limits_jobs_per_user(client, user_verwaltung, group, db, submitted_jobs):
+            db.session.add(user_verwaltung)
+            db.session.add(group)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            for _ in range(RENDER_JOB_MAX_PER_USER):
+                res = client.post(
+                    "/api/render-jobs",
+                    json={"job_type": "group_qr_codes", "group_id": str(group.id)},
+                )
+                assert res.status_code == 202
+
+            res = client.post(
+                "/api/render-jobs",
+                json={"job_type": "group_qr_codes", "group_id": str(group.id)},
+            )
+            assert res.status_code == 429
+
+        def it_does_not_count_finished_jobs(
+            client, user_verwaltung, group, db, submitted_jobs
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(group)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+            for status in (RenderJobStatus.done, RenderJobStatus.failed):
+                for _ in range(RENDER_JOB_MAX_PER_USER):
+                    job = RenderJob(
+                        user_id=user_verwaltung.id,
+                        job_type=RenderJobType.group_qr_codes,
+                        params={},
+                        expires=datetime.datetime.now() + RENDER_JOB_TTL,
+                    )
+                    job.status = status
+                    db.session.add(job)
+            db.session.commit()
+
+            res = client.post(
+                "/api/render-jobs",
+                json={"job_type": "group_qr_codes", "group_id": str(group.id)},
+            )
+            assert res.status_code == 202
+
+    def describe_get():
+        def it_hides_jobs_of_other_users(
+            client, user_verwaltung, user_standortleitung, db
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(user_standortleitung)
+            db.session.commit()
+            job = RenderJob(
+                user_id=user_verwaltung.id,
+                job_type=RenderJobType.group_qr_codes,
+                params={},
+                expires=datetime.datetime.now() + RENDER_JOB_TTL,
+            )
+            db.session.add(job)
+            db.session.commit()
+            login(user=user_standortleitung, client=client)
+
+            assert client.get(f"/api/render-jobs/{job.id}").status_code == 404
+            assert client.get(f"/api/render-jobs/{job.id}/download").status_code == 404
+            assert client.get(f"/api/render-jobs/{uuid.uuid4()}").status_code == 404
+
+    def describe_delete_expired_jobs():
+        def it_deletes_only_expired_jobs(app, user_verwaltung, db):
+            db.session.add(user_verwaltung)
+            db.session.commit()
+            now = datetime.datetime.now()
+            expired = RenderJob(
+                user_id=user_verwaltung.id,
+                job_type=RenderJobType.invoice,
+                params={},
+                expires=now - datetime.timedelta(minutes=1),
+            )
+            active = RenderJob(
+                user_id=user_verwaltung.id,
+                job_type=RenderJobType.invoice,
+                params={},
+                expires=now + RENDER_JOB_TTL,
+            )
+            db.session.add_all([expired, active])
+            db.session.commit()
+
+            assert RenderJobsService.delete_expired_jobs() == 1
+            assert db.session.query(RenderJob).one().id == active.id
+
+    def describe_fail_stale_jobs():
+        def it_fails_only_orphaned_open_jobs(app, user_verwaltung, db):
+            db.session.add(user_verwaltung)
+            db.session.commit()
+            now = datetime.datetime.now()
+
+            def _job(status, age):
+                job = RenderJob(
+                    user_id=user_verwaltung.id,
+                    job_type=RenderJobType.invoice,
+                    params={},
+                    expires=now + RENDER_JOB_TTL,
+                )
+                job.status = status
+                job.created = now - age
+                return job
+
+            stale = [
+                _job(RenderJobStatus.pending, RENDER_JOB_STALE_AFTER * 2),
+                _job(RenderJobStatus.running, RENDER_JOB_STALE_AFTER * 2),
+            ]
+            fresh = _job(RenderJobStatus.running, datetime.timedelta(minutes=1))
+            done = _job(RenderJobStatus.done, RENDER_JOB_STALE_AFTER * 2)
+            db.session.add_all(stale + [fresh, done])
+            db.session.commit()
+
+            assert RenderJobsService.fail_stale_jobs() == 2
+            db.session.expire_all()
+            assert all(job.status == RenderJobStatus.failed for job in stale)
+            assert stale[0].error is not None
+            assert fresh.status == RenderJobStatus.running
+            assert done.status == RenderJobStatus.done
@@ -0,0 +1,544 @@
+""" ""End-to-End tests for the reports routes."""
+
+import datetime
+import io
+import zipfile
+
+import pytest
+from .helper import *  # for fixtures # noqa: F403
+from .helper import login  # noqa: F401
+from src.models.dailyorder import DailyOrder
+from src.models.dish_price import DishPrice
+from src.models.maindish import MainDish
+from src.models.oldorder import OldOrder
+from src.models.order_daily_rollup import OrderDailyRollup
+from src.repositories.orders_repository import OrdersFilters, OrdersRepository
+from src.services.reports_service import ReportsService, rendered_invoices
+from src.utils.pdf_creator import PDFCreationUtils
+
+
+def describe_reports():
+    def describe_get_location_report():
+        def it_counts_orders_of_all_order_tables(
+            client,
+            user_verwaltung,
+            user_standortleitung,
+            user_gruppenleitung,
+            user_kuechenpersonal,
+            location,
+            group,
+            employees,
+            pre_orders,
+            daily_orders,
+            old_orders,
+            db,
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(user_standortleitung)
+            db.session.add(user_gruppenleitung)
+            db.session.add(user_kuechenpersonal)
+            db.session.commit()
+            db.session.add(location)
+            db.session.add(group)
+            db.session.commit()
+            db.session.add_all(employees)
+            db.session.commit()
+            pre_orders[0].nothing = True
+            pre_orders[0].main_dish = None
+            pre_orders[0].salad_option = False
+            db.session.add_all(pre_orders)
+            db.session.add_all(daily_orders)
+            db.session.add_all(old_orders)
+            db.session.commit()
+
+            today = datetime.date.today()
+            filters = OrdersFilters(
+                date_start=today - datetime.timedelta(days=7),
+                date_end=today + datetime.timedelta(days=7),
+            )
+
+            counts = ReportsService._count_location_orders_by_date(filters)
+
+            assert counts[today][location] == {"rot": 5, "blau": 0, "salad_option": 5}
+            assert counts[pre_orders[1].date][location] == {
+                "rot": 4,
+                "blau": 0,
+                "salad_option": 4,
+            }
+
+        def it_reads_closed_days_from_daily_rollup(
+            client,
+            user_verwaltung,
+            user_standortleitung,
+            user_gruppenleitung,
+            location,
+            group,
+            employees,
+            daily_orders,
+            db,
+        ):
+            db.session.add(user_verwaltung)
+            db.session.add(user_standortleitung)
+            db.session.add(user_gruppenleitung)
+            db.session.commit()
+            db.session.add(location)
+            db.session.add(group)
+            db.session.commit()
+            db.session.add_all(employees)
+            db.session.commit()
+
+            yesterday = datetime.date.today() - datetime.timedelta(days=1)
+            for daily_order in daily_orders:
+                daily_order.date = yesterday
+            daily_orders[0].handed_out = True
+            daily_orders[1].nothing = True
+            daily_orders[1].main_dish = None
+            daily_orders[1].salad_option = False
+            db.session.add_all(daily_orders)
+            db.session.commit()
+
+            OrdersRepository.push_dailyorders_to_oldorders(datetime.date.today())
+
+            rollup = db.session.query(OrderDailyRollup).one()
+            assert rollup.date == yesterday
+            assert rollup.location_id == location.id
+            assert (rollup.rot, rollup.blau, rollup.salad) == (4, 0, 4)
+            assert (rollup.nothing, rollup.handed_out) == (1, 1)
+
+            # old orders are no longer counted for closed days
+            db.session.query(OldOrder).delete()
+            db.session.commit()
+
+            counts = ReportsService._count_location_orders_by_date(
+                OrdersFilters(date_start=yesterday, date_end=yesterday)
+            )
+            assert counts[yesterday][location] == {
+                "rot": 4,
+                "blau": 0,
+                "salad_option": 4,
+            }
+
+        def it_returns_pdf_report(
+            client,
+            user_standortleitung,
+            user_kuechenpersonal,
+            location,
+            old_orders,
+            db,
+        ):
+            db.session.add(user_standortleitung)
+            db.session.add(user_kuechenpersonal)
+            db.session.commit()
+            db.session.add(location)
+            db.session.add_all(old_orders)
+            db.session.commit()
+
+            login(user=user_kuechenpersonal, client=client)
+
+            today = datetime.date.today()
+            res = client.get(
+                f"/api/reports/locations?date-start={today - datetime.timedelta(days=7)}&date-end={today}"
+            )
+
+            assert res.status_code == 200
+            assert res.mimetype == "application/pdf"
+
+        def describe_export():
+            @pytest.fixture()
+            def export_setup(
+                client,
+                user_standortleitung,
+                user_kuechenpersonal,
+                location,
+                other_location,
+                group,
+                employees,
+                daily_orders,
+                db,
+            ):
+                db.session.add(user_standortleitung)
+                db.session.add(user_kuechenpersonal)
+                db.session.add_all([location, other_location, group])
+                db.session.commit()
+                db.session.add_all(employees)
+                db.session.add_all(daily_orders)
+                yesterday = datetime.date.today() - datetime.timedelta(days=1)
+                db.session.add_all(
+                    [
+                        OrderDailyRollup(
+                            date=yesterday,
+                            location_id=other_location.id,
+                            rot=2,
+                            blau=3,
+                            salad=1,
+                            nothing=0,
+                            handed_out=0,
+                        ),
+                        OrderDailyRollup(
+                            date=yesterday,
+                            location_id=location.id,
+                            rot=0,
+                            blau=0,
+                            salad=0,
+                            nothing=4,
+                            handed_out=0,
+                        ),
+                    ]
+                )
+                db.session.commit()
+                login(user=user_kuechenpersonal, client=client)
+
+                return yesterday, datetime.date.today(), len(daily_orders)
+
+            def it_streams_csv_rows_per_date_and_location(client, export_setup):
+                yesterday, today, orders = export_setup
+
+                res = client.get(
+                    f"/api/reports/locations?date-start={yesterday}&date-end={today}&format=csv"
+                )
+
+                assert res.status_code == 200
+                assert res.mimetype == "text/csv"
+                assert "attachment" in res.headers["Content-Disposition"]
+                assert res.get_data(as_text=True).lstrip("\ufeff").splitlines() == [
+                    "Datum;Standort;Rot;Blau;Salat",
+                    f"{yesterday};Other Location;2;3;1",
+                    f"{today};Test Location;{orders};0;{orders}",
+                ]
+
+            def it_streams_xlsx_workbook(client, export_setup):
+                yesterday, today, orders = export_setup
+
+                res = client.get(
+                    f"/api/reports/locations?date-start={yesterday}&date-end={today}&format=xlsx"
+                )
+
+                assert res.status_code == 200
+                with zipfile.ZipFile(io.BytesIO(res.data)) as workbook:
+                    assert "xl/workbook.xml" in workbook.namelist()
+                    sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+
+                assert sheet.count("<row ") == 3
+                assert "<t>Other Location</t><" in sheet
+                serial = (today - datetime.date(1899, 12, 30)).days
+                assert f'<c s="1"><v>{serial}</v></c>' in sheet
+
+            def it_rejects_unknown_formats(client, export_setup):
+                yesterday, today, _ = export_setup
+
+                res = client.get(
+                    f"/api/reports/locations?date-start={yesterday}&date-end={today}&format=doc"
+                )
+
+                assert res.status_code == 400
+
+        def it_returns_401_403_on_unauthorized(client, user_gruppenleitung, db):
+            db.session.add(user_gruppenleitung)
+            db.session.commit()
+
+            res = client.get("/api/reports/locations")
+            assert res.status_code == 401
+
+            login(user=user_gruppenleitung, client=client)
+            res = client.get("/api/reports/locations")
+            assert res.status_code == 403
+
+    def describe_get_invoices():
+        @pytest.fixture()
+        def invoice_setup(
+            client,
+            user_verwaltung,
+            user_standortleitung,
+            user_gruppenleitung,
+            location,
+            group,
+            employees,
+            db,
+            mocker,
+        ):
+            rendered_invoices.clear()
+            db.session.add(user_verwaltung)
+            db.session.add(user_standortleitung)
+            db.session.add(user_gruppenleitung)
+            db.session.add(location)
+            db.session.add(group)
+            db.session.add_all(employees)
+            db.session.commit()
+            db.session.add_all(
+                OldOrder(
+                    person_id=employee.id,
+                    location_id=location.id,
+                    date=datetime.date(2025, 3, 10),
+                    nothing=False,
+                    main_dish=MainDish.rot,
+                    salad_option=True,
+                    handed_out=True,
+                )
+                for employee in employees
+            )
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            yield mocker.spy(PDFCreationUtils, "render_pdf_invoice_location")
+            rendered_invoices.clear()
+
+        def _get_march_invoice(client, location):
+            res = client.get(
+                f"/api/invoices?location-id={location.id}"
+                "&date-start=2025-03-01&date-end=2025-03-31"
+            )
+            assert res.status_code == 200
+            assert res.mimetype == "application/pdf"
+            return res
+
+        def _push_daily_orders(employees, location, order_date):
+            OrdersRepository.create_daily_orders(
+                [
+                    DailyOrder(
+                        person_id=employee.id,
+                        location_id=location.id,
+                        date=order_date,
+                        nothing=False,
+                        main_dish=MainDish.blau,
+                        salad_option=False,
+                    )
+                    for employee in employees
+                ]
+            )
+            OrdersRepository.push_dailyorders_to_oldorders(datetime.date.today())
+
+        def it_serves_cached_invoice(client, location, invoice_setup):
+            first = _get_march_invoice(client, location)
+            second = _get_march_invoice(client, location)
+
+            assert invoice_setup.call_count == 1
+            assert first.data == second.data
+            assert first.headers["Content-Disposition"] == (
+                second.headers["Content-Disposition"]
+            )
+
+        def it_renders_again_after_price_change(client, location, db, invoice_setup):
+            _get_march_invoice(client, location)
+
+            db.session.add(
+                DishPrice(
+                    date=datetime.datetime(2025, 1, 1),
+                    main_dish_price=4.5,
+                    salad_price=1.5,
+                    prepayment=20.0,
+                )
+            )
+            db.session.commit()
+            _get_march_invoice(client, location)
+
+            assert invoice_setup.call_count == 2
+
+        def it_renders_again_only_after_backfill_of_billed_month(
+            client, location, employees, invoice_setup
+        ):
+            _get_march_invoice(client, location)
+
+            _push_daily_orders(employees, location, datetime.date(2025, 5, 12))
+            _get_march_invoice(client, location)
+            assert invoice_setup.call_count == 1
+
+            _push_daily_orders(employees, location, datetime.date(2025, 3, 11))
+            _get_march_invoice(client, location)
+            assert invoice_setup.call_count == 2
+
+        def it_streams_large_invoices_without_caching(
+            client, location, invoice_setup, mocker
+        ):
+            mocker.patch("src.services.reports_service.INVOICE_CACHE_MAX_SIZE", 100)
+
+            first = _get_march_invoice(client, location)
+            second = _get_march_invoice(client, location)
+
+            assert invoice_setup.call_count == 2
+            assert first.content_length == len(first.data)
+            assert first.data.startswith(b"%PDF")
+            assert len(second.data) == len(first.data)
+
+        def describe_month_end_invoices():
+            def _store_march_invoices(client):
+                res = client.get("/api/batch/month-end-invoices?month=2025-03")
+                assert res.status_code == 200
+                return res.json["stored"]
+
+            def it_stores_invoices_of_all_scopes(
+                client, location, group, employees, invoice_setup
+            ):
+                stored = _store_march_invoices(client)
+
+                res = client.get("/api/invoices/stored?month=2025-03")
+
+                assert res.status_code == 200
+                assert stored == len(employees) + 2
+                assert len(res.json) == stored
+                assert all(invoice["up_to_date"] for invoice in res.json)
+                assert {
+                    (invoice["scope"], invoice["scope_id"])
+                    for invoice in res.json
+                    if invoice["scope"] != "person"
+                } == {("group", str(group.id)), ("location", str(location.id))}
+
+            def it_stores_large_invoices(client, employees, invoice_setup, mocker):
+                mocker.patch("src.services.reports_service.INVOICE_CACHE_MAX_SIZE", 100)
+
+                stored = _store_march_invoices(client)
+
+                res = client.get("/api/invoices/stored?month=2025-03")
+                assert stored == len(employees) + 2
+                assert len(res.json) == stored
+
+            def it_lists_stored_invoices_by_scope(client, location, invoice_setup):
+                _store_march_invoices(client)
+
+                res = client.get("/api/invoices/stored?month=2025-03&scope=location")
+
+                assert res.status_code == 200
+                assert len(res.json) == 1
+                assert res.json[0]["scope_id"] == str(location.id)
+                assert res.json[0]["month"] == "2025-03"
+
+            def it_replaces_invoices_on_second_run(client, invoice_setup):
+                first = _store_march_invoices(client)
+                second = _store_march_invoices(client)
+
+                res = client.get("/api/invoices/stored?month=2025-03")
+
+                assert first == second
+                assert len(res.json) == first
+
+            def it_downloads_stored_invoice(client, location, invoice_setup):
+                _store_march_invoices(client)
+                invoice = client.get(
+                    "/api/invoices/stored?month=2025-03&scope=location"
+                ).json[0]
+
+                res = client.get(f"/api/invoices/stored/{invoice['id']}")
+
+                assert res.status_code == 200
+                assert res.mimetype == "application/pdf"
+                assert len(res.data) == invoice["size"]
+
+            def it_returns_404_for_unknown_invoice(client, invoice_setup):
+                res = client.get(
+                    "/api/invoices/stored/2f2d1e3c-6a0b-4a54-9a0e-6f1c2b5d9e11"
+                )
+
+                assert res.status_code == 404
+
+            def it_requires_month(client, invoice_setup):
+                res = client.get("/api/invoices/stored")
+
+                assert res.status_code == 400
+
+            def it_serves_stored_invoice_on_demand(client, location, invoice_setup):
+                _store_march_invoices(client)
+                rendered_invoices.clear()
+                invoice_setup.reset_mock()
+
+                res = _get_march_invoice(client, location)
+
+                assert invoice_setup.call_count == 0
+                stored = client.get(
+                    "/api/invoices/stored?month=2025-03&scope=location"
+                ).json[0]
+                assert len(res.data) == stored["size"]
+
+            def it_renders_on_demand_if_stored_invoice_is_outdated(
+                client, location, db, invoice_setup
+            ):
+                _store_march_invoices(client)
+                rendered_invoices.clear()
+                invoice_setup.reset_mock()
+
+                db.session.add(
+                    DishPrice(
+                        date=datetime.datetime(2025, 1, 1),
+                        main_dish_price=4.5,
+                        salad_price=1.5,
+                        prepayment=20.0,
+                    )
+                )
+                db.session.commit()
+                _get_march_invoice(client, location)
+
+                assert invoice_setup.call_count == 1
+                res = client.get("/api/invoices/stored?month=2025-03")
+                assert not any(invoice["up_to_date"] for invoice in res.json)
+
+            def it_renders_partial_months_on_demand(client, location, invoice_setup):
+                _store_march_invoices(client)
+                invoice_setup.reset_mock()
+
+                res = client.get(
+                    f"/api/invoices?location-id={location.id}"
+                    "&date-start=2025-03-01&date-end=2025-03-15"
+                )
+
+                assert res.status_code == 200
+                assert invoice_setup.call_count == 1
+
+        def describe_get_invoice_summary():
+            def it_sums_up_the_invoices_of_a_location(
+                client, location, employees, invoice_setup
+            ):
+                res = client.get(
+                    f"/api/invoices/summary?location-id={location.id}"
+                    "&date-start=2025-03-01&date-end=2025-03-31"
+                )
+
+                assert res.status_code == 200
+                assert len(res.json["persons"]) == len(employees)
+                assert res.json["main"] == len(employees)
+                assert res.json["salad"] == len(employees)
+                assert res.json["charges"] == pytest.approx(len(employees) * 5.6)
+                assert res.json["prepayment"] == pytest.approx(len(employees) * 70)
+                assert invoice_setup.call_count == 0
+
+            def it_returns_line_items_of_a_person(client, employees, invoice_setup):
+                employee = employees[0]
+
+                res = client.get(
+                    f"/api/invoices/summary?person-id={employee.id}"
+                    "&date-start=2025-02-01&date-end=2025-03-31"
+                )
+
+                assert res.status_code == 200
+                invoice = res.json["persons"][0]
+                assert invoice["person"]["id"] == str(employee.id)
+                assert [month["lines"] for month in invoice["months"]][0] == []
+                assert invoice["months"][1]["lines"] == [
+                    {
+                        "kind": "main",
+                        "start": "2025-03-10",
+                        "end": "2025-03-10",
+                        "count": 1,
+                        "price": 4.1,
+                        "total": 4.1,
+                    },
+                    {
+                        "kind": "salad",
+                        "start": "2025-03-10",
+                        "end": "2025-03-10",
+                        "count": 1,
+                        "price": 1.5,
+                        "total": 1.5,
+                    },
+                ]
+                assert invoice["amount"] == pytest.approx(5.6 - 140)
+
+            def it_requires_dates(client, location, invoice_setup):
+                res = client.get(f"/api/invoices/summary?location-id={location.id}")
+
+                assert res.status_code == 400
+
+            def it_returns_404_for_unknown_group(client, invoice_setup):
+                res = client.get(
+                    "/api/invoices/summary?group-id=2f2d1e3c-6a0b-4a54-9a0e-6f1c2b5d9e11"
+                    "&date-start=2025-03-01&date-end=2025-03-31"
+                )
+
+                assert res.status_code == 404
@@ -39,6 +39,31 @@ def describe_users():
             assert len(res.json) == 1
             assert res.json[0]["id"] == str(user_standortleitung.id)
 
+        def it_returns_users_page_by_page(client, user_verwaltung, users, db):
+            db.session.add(user_verwaltung)
+            db.session.add_all(users)
+            db.session.commit()
+            login(user=user_verwaltung, client=client)
+
+            usernames = []
+            cursor = None
+            while True:
+                url = "/api/users?limit=2&with-total=true"
+                if cursor:
+                    url += f"&cursor={cursor}"
+                res = client.get(url)
+
+                assert res.status_code == 200
+                assert res.headers["X-Total-Count"] == str(1 + len(users))
+                usernames += [user["username"] for user in res.json]
+                cursor = res.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+
+            assert usernames == sorted(
+                [user_verwaltung.username] + [user.username for user in users]
+            )
+
         def it_blocks_unauthenticated_users(client):
             res = client.get("/api/users")
 
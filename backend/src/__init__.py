@@ -7,7 +7,11 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 
 from src.logging import LoggingMethod, init_logger
-from src.utils.cronjobs import push_orders_to_next_table, register_cronjobs
+from src.utils.cronjobs import (
+    create_old_order_partitions,
+    push_orders_to_next_table,
+    register_cronjobs,
+)
 from src.utils.db_utils import insert_mock_data
 from src.environment import Environment, get_features
 from src.utils.error import register_error_handlers
@@ -27,6 +31,7 @@ from .routes.daily_orders_routes import daily_orders_routes
 from .routes.old_orders_routes import old_orders_routes
 from .routes.dish_prices_routes import dish_prices_routes
 from .routes.reports_routes import reports_routes
+from .routes.render_jobs_routes import render_jobs_routes
 
 # for production and testing
 from .routes.manual_cronjobs_routes import manual_cronjobs_routes
@@ -130,6 +135,7 @@ def startup() -> None:
     if features.ORDER_MIGRATION_STARTUP:
         # after routes are registered, because error handlers are registered in routes
         app.logger.info("--- Migrating orders on startup  ---")
+        create_old_order_partitions(app)
         push_orders_to_next_table(app)
     else:
         app.logger.info("--- Order migration on startup disabled")
@@ -213,6 +219,7 @@ def register_routes(app: Flask) -> None:
     app.register_blueprint(daily_orders_routes)
     app.register_blueprint(old_orders_routes)
     app.register_blueprint(reports_routes)
+    app.register_blueprint(render_jobs_routes)
     app.register_blueprint(dish_prices_routes)
     app.register_blueprint(manual_cronjobs_routes)
 
@@ -13,10 +13,83 @@ AUTHENTICATION_TOKEN_COOKIE_NAME = "auth_token"
 AUTHENTICATION_TOKEN_AUDIENCE = "grp16-backend"
 """This value will be set in the 'aud' field of the authentication token"""
 
+AUTHENTICATION_TOKEN_CACHE_SIZE = 4096
+"""Maximum number of verified authentication tokens cached per worker"""
+
+QR_CODE_CACHE_SIZE = 4096
+"""Maximum number of rendered QR code images cached per worker"""
+
+QR_CODE_RENDER_MODE = "vector"
+"""How QR codes are drawn into PDFs: "vector" (modules as paths) or "image" (PNG)"""
+
+PDF_RENDER_DEFAULT_MAX_WORKERS = 4
+"""Render processes per app worker if PDF_RENDER_WORKERS is not set"""
+
+PDF_RENDER_MIN_PAGES_PER_CHUNK = 10
+"""Documents are only rendered in parallel if every worker gets this many pages"""
+
+PDF_SPOOL_MAX_SIZE = 4 * 1024 * 1024
+"""PDFs larger than this many bytes are written to a temporary file on disk"""
+
+INVOICE_CACHE_SIZE = 64
+"""Maximum number of rendered invoices cached per worker"""
+
+INVOICE_CACHE_MAX_SIZE = 1024 * 1024
+"""Invoices up to this many bytes are kept in the per-worker invoice cache
+
+Larger invoices are streamed from a temporary file or the stored invoice.
+"""
+
+RENDER_JOB_WORKERS = 2
+"""Number of render jobs processed at the same time per app worker"""
+
+RENDER_JOB_TTL = timedelta(hours=1)
+"""Render jobs and their results are deleted after this time"""
+
+RENDER_JOB_MAX_PER_USER = 5
+"""Maximum number of pending or running render jobs per user"""
+
+RENDER_JOB_STALE_AFTER = timedelta(minutes=15)
+"""Render jobs still pending or running after this time are marked as failed
+
+Their app worker was restarted, so they will never finish.
+"""
+
+IMPORT_JOB_WORKERS = 1
+"""Number of CSV imports processed at the same time per app worker"""
+
+IMPORT_JOB_BATCH_SIZE = 500
+"""Rows of a CSV import written and committed together"""
+
+IMPORT_JOB_MAX_ERRORS = 100
+"""Maximum number of faulty rows stored with their line number per import"""
+
+IMPORT_JOB_TTL = timedelta(days=1)
+"""Import jobs are deleted after this time"""
+
+IMPORT_JOB_MAX_PER_USER = 5
+"""Maximum number of pending or running import jobs per user"""
+
+IMPORT_JOB_STALE_AFTER = timedelta(hours=1)
+"""Import jobs still pending or running after this time are marked as failed
+
+Their app worker was restarted, so they will never finish.
+"""
+
+CSV_READ_CHUNK_SIZE = 64 * 1024
+"""Bytes read at once when CSV uploads are checked for their encoding"""
+
 REFRESH_TOKEN_DURATION = timedelta(days=365)
 REFRESH_TOKEN_COOKIE_NAME = "refresh_token"
 REFRESH_TOKEN_LENGTH = 64
 
+REFRESH_TOKEN_REUSE_GRACE_PERIOD = timedelta(seconds=10)
+"""Time in which a used refresh token is answered with its replacement instead of blocking the user
+
+Parallel requests (e.g. several browser tabs) send the same refresh token when the
+authentication token expired. Only the first one can rotate the token.
+"""
+
 HTTP_METHODS_TO_EXEMPT_ON_AUTH = ["OPTIONS"]
 """List of HTTP methods that do not require authentication
 
@@ -32,3 +105,14 @@ GEN_PASSWORD_ALPHABET = string.ascii_letters + string.digits + "#$%&*?@_"
 
 GEN_PASSWORD_LENGTH = 12
 """Length of generated passwords"""
+
+
+OLD_ORDER_PARTITION_MONTHS_AHEAD = 3
+"""Number of future months for which old_order partitions are created in advance"""
+
+
+PAGINATION_MAX_LIMIT = 1000
+"""Maximum number of items that can be requested per page on list endpoints"""
+
+STREAM_YIELD_PER = 500
+"""Number of rows fetched from the database at once when streaming responses"""
@@ -1,6 +1,8 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import DeclarativeBase
 
 
@@ -29,10 +31,35 @@ def init_db(app: Flask):
     import src.models.preorder
     import src.models.user
     import src.models.dish_price
-    import src.models.refresh_token_session  # noqa: F401
+    import src.models.refresh_token_session
+    import src.models.order_daily_rollup
+    import src.models.change_version
+    import src.models.render_job
+    import src.models.stored_invoice
+    import src.models.import_job  # noqa: F401
 
     db.init_app(app)
 
+    from src.utils.change_tracking import register_change_tracking
+
+    register_change_tracking()
+
+
+def dialect_insert(model):
+    """Create an INSERT statement for the dialect of the current database.
+
+    PostgreSQL and SQLite (used for testing) both support ``ON CONFLICT``
+    clauses, but SQLAlchemy only exposes them on the dialect-specific
+    insert constructs.
+
+    :param model: The model or table to insert into
+    :return: An insert statement supporting ``on_conflict_do_update``
+    """
+
+    if db.session.get_bind().dialect.name == "sqlite":
+        return sqlite_insert(model)
+    return postgresql_insert(model)
+
 
 def setup_test_db(app: Flask):
     """Setup a test database and create all tables."""
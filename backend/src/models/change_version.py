@@ -0,0 +1,31 @@
+"""Model to store how often the rows of a table (or a part of it) have changed."""
+
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database import db
+
+
+class ChangeVersion(db.Model):
+    """Model to represent the change version of a table or one location in a table
+
+    The version is increased in the same transaction as every write to a
+    tracked table (see src/utils/change_tracking.py). Clients can compare
+    versions (e.g. via ETags) instead of loading the data again.
+
+    Scopes:
+
+    - ``<table>``: any change in the table
+    - ``<table>@<location_id>``: a change of a row with this location
+    - ``<table>@*``: a bulk change that may affect every location
+
+    :param scope: The table or table and location the version belongs to
+    :param version: Number of changes in the scope
+    """
+
+    __tablename__ = "change_version"
+
+    scope: Mapped[str] = mapped_column(String(128), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ChangeVersion {self.scope!r} {self.version!r}>"
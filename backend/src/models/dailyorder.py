@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import date as date_type
 import uuid
 import sqlalchemy
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer
+from sqlalchemy import Boolean, Date, ForeignKey, Index, Integer, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.database import db
@@ -24,6 +24,13 @@ class DailyOrder(db.Model):
     :param person: A reference to the person that made the order
     """
 
+    # Eine Person kann pro Tag nur eine Bestellung haben.
+    __table_args__ = (
+        UniqueConstraint("person_id", "date", name="uq_dailyorder_person_date"),
+        Index("ix_dailyorder_location_date", "location_id", "date"),
+        Index("ix_dailyorder_date", "date"),
+    )
+
     # Felder der Tabelle:
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     person_id: Mapped[uuid.UUID] = mapped_column(
@@ -33,7 +40,6 @@ class DailyOrder(db.Model):
             onupdate="CASCADE",
             ondelete="CASCADE",
         ),
-        unique=True,
     )
     location_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey(
@@ -44,7 +50,7 @@ class DailyOrder(db.Model):
         ),
         nullable=False,
     )
-    date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    date: Mapped[date_type] = mapped_column(Date, nullable=False)
     nothing: Mapped[bool] = mapped_column(
         Boolean, name="nothing", nullable=True, quote=True
     )
@@ -62,7 +68,7 @@ class DailyOrder(db.Model):
         self,
         person_id: uuid.UUID,
         location_id: uuid.UUID,
-        date: datetime,
+        date: date_type,
         nothing: bool,
         main_dish: MainDish,
         salad_option: bool,
@@ -0,0 +1,115 @@
+"""Model to store background imports of employee CSV files."""
+
+import enum
+import uuid
+from datetime import datetime
+from typing import Optional
+
+import sqlalchemy
+from sqlalchemy import UUID, Boolean, DateTime, ForeignKey, Integer, JSON, String
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database import db
+
+
+class ImportJobStatus(enum.Enum):
+    """Enum to represent the state of an import job"""
+
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class ImportJob(db.Model):
+    """Model to represent the import of an employee CSV file
+
+    The job is created by the upload and processed by a background worker of
+    the same app worker. The counters are updated with every committed batch,
+    so the progress can be polled while the import is running.
+
+    :param id: The job's ID as UUID4
+    :param user_id: The user who uploaded the file (only this user can access the job)
+    :param file_name: The name of the uploaded file
+    :param mode: The import mode ("create" or "sync", see EmployeeCsvImportSchema)
+    :param hide_missing: Whether employees missing in the file are hidden (mode sync)
+    :param status: The state of the job
+    :param error: The error message if the job failed
+    :param rows_processed: Number of rows read so far (including faulty rows)
+    :param created_count: Number of created employees
+    :param updated_count: Number of updated employees
+    :param hidden_count: Number of hidden employees
+    :param unchanged_count: Number of rows whose employee already existed unchanged
+    :param error_count: Number of faulty rows
+    :param errors: The first faulty rows as list of {"line": ..., "message": ...}
+    :param created: The date and time when the job was created
+    :param finished: The date and time when the job was finished
+    :param expires: The date and time after which the job will be deleted
+    """
+
+    __tablename__ = "import_job"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey(
+            "user.id",
+            name="fk_importjob_user",
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        nullable=False,
+        index=True,
+    )
+    file_name: Mapped[str] = mapped_column(String(256), nullable=False)
+    mode: Mapped[str] = mapped_column(String(16), nullable=False)
+    hide_missing: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    status: Mapped[ImportJobStatus] = mapped_column(
+        sqlalchemy.Enum(ImportJobStatus), nullable=False
+    )
+    error: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    rows_processed: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    hidden_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    unchanged_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    error_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    errors: Mapped[list] = mapped_column(JSON, nullable=False)
+    created: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    finished: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    expires: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+    def __init__(
+        self,
+        user_id: uuid.UUID,
+        file_name: str,
+        mode: str,
+        hide_missing: bool,
+        expires: datetime,
+    ):
+        """Initialize a new pending import job
+
+        :param user_id: The user who uploaded the file
+        :param file_name: The name of the uploaded file
+        :param mode: The import mode ("create" or "sync")
+        :param hide_missing: Whether employees missing in the file are hidden
+        :param expires: The date and time after which the job will be deleted
+        """
+
+        self.user_id = user_id
+        self.file_name = file_name
+        self.mode = mode
+        self.hide_missing = hide_missing
+        self.status = ImportJobStatus.pending
+        self.rows_processed = 0
+        self.created_count = 0
+        self.updated_count = 0
+        self.hidden_count = 0
+        self.unchanged_count = 0
+        self.error_count = 0
+        self.errors = []
+        self.created = datetime.now()
+        self.expires = expires
+
+    def __repr__(self):
+        return f"<ImportJob {self.id!r} {self.mode!r} {self.status.value!r}>"
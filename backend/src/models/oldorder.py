@@ -1,7 +1,7 @@
 import uuid
 import sqlalchemy
-from datetime import datetime
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer
+from datetime import date as date_type
+from sqlalchemy import Boolean, Date, ForeignKey, Index, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.database import db
 from src.models.maindish import MainDish
@@ -21,6 +21,16 @@ class OldOrder(db.Model):
     :param person: A reference to the person that made the order
     """
 
+    __table_args__ = (
+        Index("ix_oldorder_person_date", "person_id", "date"),
+        Index("ix_oldorder_location_date", "location_id", "date"),
+        Index("ix_oldorder_date", "date"),
+    )
+
+    # In PostgreSQL ist die Tabelle monatlich nach "date" partitioniert (siehe
+    # Alembic-Migration a046ea727598), der Primärschlüssel ist dort (id, date).
+    # Das ORM identifiziert Bestellungen weiterhin allein über die id.
+
     # Felder der Tabelle:
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     person_id: Mapped[uuid.UUID] = mapped_column(
@@ -41,7 +51,7 @@ class OldOrder(db.Model):
         ),
         nullable=False,
     )
-    date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    date: Mapped[date_type] = mapped_column(Date, nullable=False)
     nothing: Mapped[bool] = mapped_column(
         Boolean, name="nothing", nullable=True, quote=True
     )
@@ -58,7 +68,7 @@ class OldOrder(db.Model):
     def __init__(
         self,
         location_id: uuid.UUID,
-        date: datetime,
+        date: date_type,
         nothing: bool,
         main_dish: MainDish,
         salad_option: bool,
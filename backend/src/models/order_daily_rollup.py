@@ -0,0 +1,47 @@
+"""Model to store the aggregated orders of closed days per location."""
+
+import uuid
+from datetime import date as date_type
+from sqlalchemy import Date, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database import db
+
+
+class OrderDailyRollup(db.Model):
+    """Model to represent the order counts of one location on one closed day
+
+    The rows are written by the cronjob when daily orders are moved to the
+    old orders table. Old orders are immutable, so reports over past dates
+    can read these counts instead of counting the old orders again.
+
+    :param date: The date of the orders
+    :param location_id: The location's ID (foreign key to the location table)
+    :param rot: Number of orders with main dish 'rot'
+    :param blau: Number of orders with main dish 'blau'
+    :param salad: Number of orders with a salad
+    :param nothing: Number of orders where nothing was ordered
+    :param handed_out: Number of orders that were handed out
+    """
+
+    __tablename__ = "order_daily_rollup"
+
+    date: Mapped[date_type] = mapped_column(Date, primary_key=True)
+    location_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey(
+            "location.id",
+            name="fk_orderdailyrollup_location",
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        primary_key=True,
+    )
+    rot: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    blau: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    salad: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    nothing: Mapped[int] = mapped_column(
+        Integer, name="nothing", nullable=False, default=0, quote=True
+    )
+    handed_out: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<OrderDailyRollup {self.date!r} {self.location_id!r} {self.rot!r} {self.blau!r} {self.salad!r}>"
@@ -1,7 +1,15 @@
 import uuid
 import sqlalchemy
-from datetime import datetime
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer
+from datetime import date as date_type, datetime
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.database import db
 from src.models.maindish import MainDish
@@ -22,6 +30,14 @@ class PreOrder(db.Model):
     :param person: A reference to the person that made the order
     """
 
+    # Eine Person kann pro Tag nur eine Vorbestellung haben.
+    # Wird auch für ON CONFLICT beim Bulk-Upsert benötigt.
+    __table_args__ = (
+        UniqueConstraint("person_id", "date", name="uq_preorder_person_date"),
+        Index("ix_preorder_location_date", "location_id", "date"),
+        Index("ix_preorder_date", "date"),
+    )
+
     # Felder der Tabelle:
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     person_id: Mapped[uuid.UUID] = mapped_column(
@@ -41,7 +57,7 @@ class PreOrder(db.Model):
         ),
         nullable=False
     )
-    date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    date: Mapped[date_type] = mapped_column(Date, nullable=False)
     nothing: Mapped[bool] = mapped_column(
         Boolean, name="nothing", nullable=True, quote=True
     )
@@ -59,7 +75,7 @@ class PreOrder(db.Model):
         self,
         person_id: uuid.UUID,
         location_id: uuid.UUID,
-        date: datetime,
+        date: date_type,
         nothing: bool,
         main_dish: MainDish,
         salad_option: bool,
@@ -23,6 +23,7 @@ class RefreshTokenSession(db.Model):
     :param created: The date and time when the token was created
     :param expires: The date and time when the token expires
     :param last_used: The date and time when the token was last used. None if never used
+    :param replaced_by: The refresh token that was issued when this token was used. None if never used
     """
 
     refresh_token: Mapped[str] = mapped_column(
@@ -41,6 +42,9 @@ class RefreshTokenSession(db.Model):
     created: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     expires: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     last_used: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    replaced_by: Mapped[str] = mapped_column(
+        String(REFRESH_TOKEN_LENGTH), nullable=True
+    )
 
     def __init__(self, refresh_token: str, user_id: uuid.UUID, expires: datetime):
         """Initialize a new refresh token session
@@ -55,6 +59,7 @@ class RefreshTokenSession(db.Model):
         self.created = datetime.now()
         self.expires = expires
         self.last_used = None
+        self.replaced_by = None
 
     def __repr__(self):
         return f"<RefreshTokenSession {self.refresh_token}>"
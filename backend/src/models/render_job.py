@@ -0,0 +1,108 @@
+"""Model to store asynchronous render jobs for reports, invoices and QR codes."""
+
+import enum
+import uuid
+from datetime import datetime
+from typing import Optional
+
+import sqlalchemy
+from sqlalchemy import UUID, DateTime, ForeignKey, JSON, LargeBinary, String
+from sqlalchemy.orm import Mapped, deferred, mapped_column
+from src.database import db
+
+
+class RenderJobType(enum.Enum):
+    """Enum to represent the documents that can be rendered asynchronously"""
+
+    # The values need to be lowercase for validation to work
+    location_report = "location_report"
+    invoice = "invoice"
+    group_qr_codes = "group_qr_codes"
+    employee_qr_codes = "employee_qr_codes"
+
+
+class RenderJobStatus(enum.Enum):
+    """Enum to represent the state of a render job"""
+
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class RenderJob(db.Model):
+    """Model to represent a render job
+
+    The job is created by a request and rendered by a background worker. The
+    result is stored in the database, so every app worker can serve it.
+
+    :param id: The job's ID as UUID4
+    :param user_id: The user who created the job (only this user can access it)
+    :param job_type: The document to render
+    :param params: The parameters of the document (e.g. date range, IDs)
+    :param status: The state of the job
+    :param error: The error message if the job failed
+    :param download_name: The file name of the result
+    :param mimetype: The mimetype of the result
+    :param result: The rendered file (deferred, only loaded for downloads)
+    :param created: The date and time when the job was created
+    :param finished: The date and time when the job was finished
+    :param expires: The date and time after which the job will be deleted
+    """
+
+    __tablename__ = "render_job"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey(
+            "user.id",
+            name="fk_renderjob_user",
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        nullable=False,
+        index=True,
+    )
+    job_type: Mapped[RenderJobType] = mapped_column(
+        sqlalchemy.Enum(RenderJobType), nullable=False
+    )
+    params: Mapped[dict] = mapped_column(JSON, nullable=False)
+    status: Mapped[RenderJobStatus] = mapped_column(
+        sqlalchemy.Enum(RenderJobStatus), nullable=False
+    )
+    error: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    download_name: Mapped[Optional[str]] = mapped_column(String(256), nullable=True)
+    mimetype: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    result: Mapped[Optional[bytes]] = deferred(
+        mapped_column(LargeBinary, nullable=True)
+    )
+    created: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    finished: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    expires: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+    def __init__(
+        self,
+        user_id: uuid.UUID,
+        job_type: RenderJobType,
+        params: dict,
+        expires: datetime,
+    ):
+        """Initialize a new pending render job
+
+        :param user_id: The user who created the job
+        :param job_type: The document to render
+        :param params: The parameters of the document
+        :param expires: The date and time after which the job will be deleted
+        """
+
+        self.user_id = user_id
+        self.job_type = job_type
+        self.params = params
+        self.status = RenderJobStatus.pending
+        self.created = datetime.now()
+        self.expires = expires
+
+    def __repr__(self):
+        return f"<RenderJob {self.id!r} {self.job_type.value!r} {self.status.value!r}>"
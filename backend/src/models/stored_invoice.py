@@ -0,0 +1,70 @@
+"""Model to store the invoices of closed months rendered by the month-end batch run."""
+
+import enum
+import uuid
+from datetime import date, datetime
+
+import sqlalchemy
+from sqlalchemy import (
+    UUID,
+    Date,
+    DateTime,
+    Integer,
+    LargeBinary,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import Mapped, deferred, mapped_column
+from src.database import db
+
+
+class InvoiceScope(enum.Enum):
+    """Enum to represent who an invoice is addressed to"""
+
+    # The values need to be lowercase for validation to work
+    person = "person"
+    group = "group"
+    location = "location"
+
+
+class StoredInvoice(db.Model):
+    """Model to represent a stored invoice of one month
+
+    The invoice is only valid as long as the data it was built from is
+    unchanged. This is checked with the change versions stored with it
+    (see ReportsService._get_invoice_versions).
+
+    :param id: The invoice's ID as UUID4
+    :param month: The first day of the billed month
+    :param scope: Whether the invoice is for a person, a group or a location
+    :param scope_id: The ID of the person, group or location
+    :param versions: The change versions of the data the invoice was built from
+    :param download_name: The file name of the invoice
+    :param size: The size of the PDF in bytes
+    :param content: The PDF (deferred, only loaded for downloads)
+    :param created: The date and time when the invoice was rendered
+    """
+
+    __tablename__ = "stored_invoice"
+    __table_args__ = (
+        UniqueConstraint(
+            "month", "scope", "scope_id", name="uq_storedinvoice_month_scope"
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    month: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    scope: Mapped[InvoiceScope] = mapped_column(
+        sqlalchemy.Enum(InvoiceScope), nullable=False
+    )
+    scope_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    versions: Mapped[str] = mapped_column(String(256), nullable=False)
+    download_name: Mapped[str] = mapped_column(String(256), nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    content: Mapped[bytes] = deferred(mapped_column(LargeBinary, nullable=False))
+    created: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<StoredInvoice {self.month!r} {self.scope.value!r} {self.scope_id!r}>"
@@ -0,0 +1,51 @@
+"""Repository to handle database operations for change versions."""
+
+from typing import Dict, Iterable
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from src.database import db, dialect_insert
+from src.models.change_version import ChangeVersion
+
+
+class ChangeVersionsRepository:
+    """Repository to handle database operations for change versions."""
+
+    @staticmethod
+    def get_versions(scopes: Iterable[str]) -> Dict[str, int]:
+        """Get the current versions of the given scopes
+
+        :param scopes: The scopes to get the versions for
+        :return: Version by scope, 0 for scopes that never changed
+        """
+        scopes = list(scopes)
+        versions = dict(
+            db.session.execute(
+                select(ChangeVersion.scope, ChangeVersion.version).where(
+                    ChangeVersion.scope.in_(scopes)
+                )
+            ).all()
+        )
+        return {scope: versions.get(scope, 0) for scope in scopes}
+
+    @staticmethod
+    def bump(session: Session, scopes: Iterable[str]) -> None:
+        """Increase the versions of the given scopes
+
+        Runs on the connection of the session, so the versions are increased
+        in the same transaction as the change itself. Does not flush or commit.
+
+        :param session: The session the change was made in
+        :param scopes: The scopes to increase the versions of
+        """
+        scopes = sorted(set(scopes))  # fixed order to avoid deadlocks
+        if not scopes:
+            return
+
+        stmt = dialect_insert(ChangeVersion.__table__).values(
+            [{"scope": scope, "version": 1} for scope in scopes]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ChangeVersion.__table__.c.scope],
+            set_={"version": ChangeVersion.__table__.c.version + 1},
+        )
+        session.connection().execute(stmt)
@@ -1,15 +1,20 @@
 """Repository to handle database operations for employee data."""
 
-from sqlalchemy import select, func, or_, and_
+from datetime import datetime
+from sqlalchemy import Row, delete, insert, select, update, func, or_, and_, true
 from src.database import db
-from uuid import UUID
+from uuid import UUID, uuid4
 from src.models.user import UserGroup
 from src.models.employee import Employee
+from src.models.dailyorder import DailyOrder
 from src.models.group import Group
+from src.models.person import Person
 from src.models.preorder import PreOrder
 from src.repositories.users_repository import UsersRepository
 from src.models.location import Location
-from typing import List, Optional
+from src.utils.pagination import Page, Pagination, paginate_query
+from src.utils.change_tracking import mark_changed
+from typing import Dict, List, Optional, Set, Tuple
 
 
 class EmployeesRepository:
@@ -34,13 +39,80 @@ class EmployeesRepository:
 
         :return: A list of all employees the user has access to and that fit the optional name parameters
         """
+        query = EmployeesRepository._employees_by_user_scope_query(
+            user_group,
+            user_id,
+            first_name=first_name,
+            last_name=last_name,
+            group_name=group_name,
+            group_id=group_id,
+            employee_number=employee_number,
+        )
+        if query is None:
+            return []
+
+        return db.session.scalars(query).all()
+
+    @staticmethod
+    def get_employees_page_by_user_scope(
+        user_group: UserGroup,
+        user_id: UUID,
+        pagination: Pagination,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        group_name: Optional[str] = None,
+        group_id: Optional[UUID] = None,
+        employee_number: Optional[int] = None,
+    ) -> Page[Employee]:
+        """Retrieve one page of the employees the user has access to, sorted by name.
+
+        :param user_group: The user group of the user
+        :param user_id: The ID of the user
+        :param pagination: The requested page
+
+        :return: A page of the employees the user has access to and that fit the optional parameters
+        """
+        query = EmployeesRepository._employees_by_user_scope_query(
+            user_group,
+            user_id,
+            first_name=first_name,
+            last_name=last_name,
+            group_name=group_name,
+            group_id=group_id,
+            employee_number=employee_number,
+        )
+        if query is None:
+            return Page([], total=0 if pagination.with_total else None)
+
+        return paginate_query(
+            query,
+            [Employee.last_name, Employee.first_name, Employee.id],
+            pagination,
+        )
+
+    @staticmethod
+    def _employees_by_user_scope_query(
+        user_group: UserGroup,
+        user_id: UUID,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        group_name: Optional[str] = None,
+        group_id: Optional[UUID] = None,
+        employee_number: Optional[int] = None,
+    ):
+        """Build the query for the employees the user has access to.
+
+        Hidden employees (e.g. missing in the HR export of a CSV sync) are excluded.
+
+        :return: Select of employees, None if the user has no access to any
+        """
         if user_group in [
             UserGroup.verwaltung,
             UserGroup.standortleitung,
             UserGroup.gruppenleitung,
             UserGroup.kuechenpersonal,
         ]:
-            query = select(Employee).join(Group)
+            query = select(Employee).join(Group).where(Employee.hidden.is_(False))
 
             if user_group == UserGroup.verwaltung:
                 query = query
@@ -51,7 +123,7 @@ class EmployeesRepository:
             elif user_group == UserGroup.kuechenpersonal:
                 user = UsersRepository.get_user_by_id(user_id)
                 if not user:
-                    return []
+                    return None
                 query = query.join(Location).filter(Location.id == user.location_id)
             elif user_group == UserGroup.gruppenleitung:
                 query = query.filter(
@@ -76,8 +148,8 @@ class EmployeesRepository:
             if employee_number:
                 query = query.filter(Employee.employee_number == employee_number)
 
-            return db.session.scalars(query).all()
-        return []
+            return query
+        return None
 
     @staticmethod
     def get_employee_by_number(employee_number: int) -> Employee | None:
@@ -115,23 +187,74 @@ class EmployeesRepository:
             )
         ).first()
 
+    @staticmethod
+    def get_group_ids_by_name_and_location() -> Dict[Tuple[str, str], UUID]:
+        """Retrieve the IDs of all groups at once (for imports)
+
+        :return: Group IDs by (group name, location name)
+        """
+        group_ids = {}
+        for group_name, location_name, group_id in db.session.execute(
+            select(Group.group_name, Location.location_name, Group.id).join(Location)
+        ):
+            group_ids.setdefault((group_name, location_name), group_id)
+
+        return group_ids
+
+    @staticmethod
+    def get_employee_numbers() -> Set[int]:
+        """Retrieve the employee numbers of all employees (for imports)
+
+        :return: The employee numbers
+        """
+        return set(db.session.scalars(select(Employee.employee_number)))
+
+    @staticmethod
+    def get_employee_sync_states() -> Dict[int, Row]:
+        """Retrieve the fields of all employees that a CSV sync compares
+
+        :return: Rows of (id, first_name, last_name, group_id, hidden) by employee number
+        """
+        states = {}
+        for state in db.session.execute(
+            select(
+                Employee.employee_number,
+                Employee.id,
+                Employee.first_name,
+                Employee.last_name,
+                Employee.group_id,
+                Employee.hidden,
+            )
+        ):
+            states.setdefault(state.employee_number, state)
+
+        return states
+
     @staticmethod
     def get_employee_by_id_by_user_scope(
-        employee_id: UUID, user_group: UserGroup, user_id: UUID
+        employee_id: UUID,
+        user_group: UserGroup,
+        user_id: UUID,
+        include_hidden: bool = False,
     ) -> Employee | None:
         """Retrieve an employee by their ID
 
         :param employee_id: The ID of the employee to retrieve
         :param user_group: The user group of the user
         :param user_id: The ID of the user
+        :param include_hidden: Also find hidden employees
 
         :return: The employee with the given ID or None if no employee was found
+            (hidden employees are not found unless include_hidden is set)
         """
+        shown = true() if include_hidden else Employee.hidden.is_(False)
+
         if user_group == UserGroup.verwaltung:
             return db.session.scalars(
                 select(Employee).where(
                     and_(
                         Employee.id == employee_id,
+                        shown,
                     )
                 )
             ).first()
@@ -148,6 +271,7 @@ class EmployeesRepository:
                 .where(
                     and_(
                         Employee.id == employee_id,
+                        shown,
                     )
                 )
             ).first()
@@ -158,7 +282,7 @@ class EmployeesRepository:
                 .join(Group)
                 .join(Location)
                 .filter(Location.user_id_location_leader == user_id)
-                .where(Employee.id == employee_id)
+                .where(Employee.id == employee_id, shown)
             ).first()
 
         elif user_group == UserGroup.gruppenleitung:
@@ -169,6 +293,7 @@ class EmployeesRepository:
                 .where(
                     and_(
                         Employee.id == employee_id,
+                        shown,
                     )
                 )
             ).first()
@@ -176,6 +301,99 @@ class EmployeesRepository:
         else:
             None
 
+    @staticmethod
+    def get_employee_ids_by_user_scope(
+        employee_ids: List[UUID],
+        user_group: UserGroup,
+        user_id: UUID,
+        include_hidden: bool = False,
+    ) -> Set[UUID]:
+        """Retrieve which of the given employees the user has access to
+
+        One query for all IDs, with the same scope as get_employee_by_id_by_user_scope.
+
+        :param employee_ids: The IDs of the employees
+        :param user_group: The user group of the user
+        :param user_id: The ID of the user
+        :param include_hidden: Also find hidden employees
+
+        :return: The IDs of the employees that exist in the scope of the user
+        """
+        if not employee_ids:
+            return set()
+
+        query = EmployeesRepository._employees_by_ids_by_user_scope_query(
+            select(Employee.id), employee_ids, user_group, user_id, include_hidden
+        )
+        if query is None:
+            return set()
+
+        return set(db.session.scalars(query))
+
+    @staticmethod
+    def get_employees_by_ids_by_user_scope(
+        employee_ids: List[UUID], user_group: UserGroup, user_id: UUID
+    ) -> List[Employee]:
+        """Retrieve the given employees the user has access to with one query
+
+        :param employee_ids: The IDs of the employees
+        :param user_group: The user group of the user
+        :param user_id: The ID of the user
+
+        :return: The employees in the order of the IDs (repeated IDs repeat the
+            employee), without the IDs that do not exist in the scope of the user
+        """
+        if not employee_ids:
+            return []
+
+        query = EmployeesRepository._employees_by_ids_by_user_scope_query(
+            select(Employee), employee_ids, user_group, user_id
+        )
+        if query is None:
+            return []
+
+        employees = {employee.id: employee for employee in db.session.scalars(query)}
+        return [employees[id] for id in employee_ids if id in employees]
+
+    @staticmethod
+    def _employees_by_ids_by_user_scope_query(
+        query,
+        employee_ids: List[UUID],
+        user_group: UserGroup,
+        user_id: UUID,
+        include_hidden: bool = False,
+    ):
+        """Restrict a select of employees to the IDs the user has access to
+
+        :return: The restricted select, None if the user has no access to any
+        """
+        query = query.where(Employee.id.in_(employee_ids))
+        if not include_hidden:
+            query = query.where(Employee.hidden.is_(False))
+
+        if user_group == UserGroup.verwaltung:
+            return query
+
+        elif user_group == UserGroup.kuechenpersonal:
+            user = UsersRepository.get_user_by_id(user_id)
+            if not user:
+                return None
+            return (
+                query.join(Group).join(Location).where(Location.id == user.location_id)
+            )
+
+        elif user_group == UserGroup.standortleitung:
+            return (
+                query.join(Group)
+                .join(Location)
+                .where(Location.user_id_location_leader == user_id)
+            )
+
+        elif user_group == UserGroup.gruppenleitung:
+            return query.join(Group).where(Group.user_id_group_leader == user_id)
+
+        return None
+
     @staticmethod
     def get_employee_by_name_by_user_scope(
         first_name: str, last_name: str, user_group: UserGroup, user_id: UUID
@@ -271,12 +489,89 @@ class EmployeesRepository:
         db.session.commit()
 
     @staticmethod
-    def bulk_create_employees(employees: Employee):
+    def delete_employees(employee_ids: List[UUID]):
+        """Delete employees and their open orders in one transaction
+
+        One DELETE per table instead of loading and deleting every employee.
+        The pre-orders and daily orders are deleted explicitly (like the ORM
+        cascade of Person does), so their change versions are increased as
+        well. Old orders keep the orders without person (ON DELETE SET NULL).
+
+        :param employee_ids: The IDs of the employees to delete
+        """
+        if not employee_ids:
+            return
+
+        db.session.execute(delete(PreOrder).where(PreOrder.person_id.in_(employee_ids)))
+        db.session.execute(
+            delete(DailyOrder).where(DailyOrder.person_id.in_(employee_ids))
+        )
+        # Ein DELETE auf Employee löscht nur aus der Tabelle employee
+        db.session.execute(delete(Employee).where(Employee.id.in_(employee_ids)))
+        db.session.execute(delete(Person).where(Person.id.in_(employee_ids)))
+        db.session.commit()
+
+    @staticmethod
+    def bulk_create_employees(employees: List[dict]):
         """Create a bunch of new employees in the database
 
-        :param employees: List of the Employees which will be created
+        All employees are inserted with one executemany INSERT per table
+        (person and employee) instead of one INSERT per object.
+
+        :param employees: The new employees as dicts with first_name, last_name,
+            employee_number and group_id
         """
-        for employee in employees:
-            db.session.add(employee)
+        if not employees:
+            return
 
+        EmployeesRepository._insert_employees(employees)
+        # Die Session-Events sehen bei Bulk-Inserts nur die Tabelle employee
+        mark_changed(db.session, ["person", "employee"])
         db.session.commit()
+
+    @staticmethod
+    def sync_employees(
+        created: List[dict], updated: List[dict], hidden_ids: List[UUID]
+    ):
+        """Apply the changes of a CSV sync in one transaction
+
+        :param created: New employees as dicts with first_name, last_name,
+            employee_number and group_id
+        :param updated: Changed employees as dicts with id, first_name, last_name,
+            group_id and hidden
+        :param hidden_ids: IDs of employees to hide
+        """
+        if not (created or updated or hidden_ids):
+            return
+
+        if created:
+            EmployeesRepository._insert_employees(created)
+        if updated:
+            # UPDATE nach Primärschlüssel, ein executemany je Tabelle
+            db.session.execute(update(Employee), updated)
+        if hidden_ids:
+            db.session.execute(
+                update(Person).where(Person.id.in_(hidden_ids)).values(hidden=True)
+            )
+
+        mark_changed(db.session, ["person", "employee"])
+        db.session.commit()
+
+    @staticmethod
+    def _insert_employees(employees: List[dict]):
+        now = datetime.now()
+        db.session.execute(
+            insert(Employee),
+            [
+                {
+                    "id": uuid4(),
+                    "first_name": employee["first_name"],
+                    "last_name": employee["last_name"],
+                    "employee_number": employee["employee_number"],
+                    "group_id": employee["group_id"],
+                    "created": now,
+                    "hidden": False,
+                }
+                for employee in employees
+            ],
+        )
@@ -0,0 +1,135 @@
+"""Repository to handle database operations for import jobs."""
+
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy import delete, func, select, update
+from src.database import db
+from src.models.import_job import ImportJob, ImportJobStatus
+
+
+class ImportJobsRepository:
+    """Repository to handle database operations for import jobs."""
+
+    @staticmethod
+    def get_job_by_id(job_id: UUID) -> Optional[ImportJob]:
+        """Retrieve an import job by its ID
+
+        :param job_id: The ID of the job
+
+        :return: The job or None if no job was found
+        """
+
+        return db.session.get(ImportJob, job_id)
+
+    @staticmethod
+    def get_job_of_user(job_id: UUID, user_id: UUID) -> Optional[ImportJob]:
+        """Retrieve an import job that belongs to a user
+
+        :param job_id: The ID of the job
+        :param user_id: The ID of the user
+
+        :return: The job or None if the user has no job with this ID
+        """
+
+        return db.session.scalars(
+            select(ImportJob).where(
+                ImportJob.id == job_id, ImportJob.user_id == user_id
+            )
+        ).first()
+
+    @staticmethod
+    def count_open_jobs_of_user(user_id: UUID, now: datetime) -> int:
+        """Count the jobs of a user that are pending or running and not expired yet
+
+        :param user_id: The ID of the user
+        :param now: The current date and time
+
+        :return: Number of jobs
+        """
+
+        return db.session.scalar(
+            select(func.count())
+            .select_from(ImportJob)
+            .where(
+                ImportJob.user_id == user_id,
+                ImportJob.status.in_(
+                    [ImportJobStatus.pending, ImportJobStatus.running]
+                ),
+                ImportJob.expires > now,
+            )
+        )
+
+    @staticmethod
+    def create_job(job: ImportJob):
+        """Create a new import job in the database
+
+        :param job: The job to create
+        """
+
+        db.session.add(job)
+        db.session.commit()
+
+    @staticmethod
+    def update_job(job: ImportJob):
+        """Update an import job in the database
+
+        :param job: The job to update
+        """
+
+        db.session.commit()
+
+    @staticmethod
+    def rollback():
+        """Discard a failed write, so the session can be used again"""
+
+        db.session.rollback()
+
+    @staticmethod
+    def fail_stale_jobs(
+        created_before: datetime, error: str, now: datetime
+    ) -> List[UUID]:
+        """Mark pending or running jobs created before a point in time as failed
+
+        :param created_before: Jobs created before are failed
+        :param error: The error message of the jobs
+        :param now: The current date and time
+
+        :return: The IDs of the failed jobs
+        """
+
+        job_ids = list(
+            db.session.scalars(
+                select(ImportJob.id).where(
+                    ImportJob.status.in_(
+                        [ImportJobStatus.pending, ImportJobStatus.running]
+                    ),
+                    ImportJob.created < created_before,
+                )
+            )
+        )
+        if not job_ids:
+            return []
+
+        db.session.execute(
+            update(ImportJob)
+            .where(ImportJob.id.in_(job_ids))
+            .values(status=ImportJobStatus.failed, error=error, finished=now)
+        )
+        db.session.commit()
+
+        return job_ids
+
+    @staticmethod
+    def delete_expired_jobs(now: datetime) -> int:
+        """Delete all expired jobs
+
+        :param now: The current date and time
+
+        :return: Number of deleted jobs
+        """
+
+        result = db.session.execute(delete(ImportJob).where(ImportJob.expires <= now))
+        db.session.commit()
+
+        return result.rowcount
@@ -1,19 +1,38 @@
 """Repository to handle database operations for order data."""
 
-from sqlalchemy import delete, insert, select, func, or_, and_, text
+from sqlalchemy import (
+    Row,
+    case,
+    delete,
+    insert,
+    literal,
+    select,
+    func,
+    or_,
+    and_,
+    text,
+    union_all,
+)
 from sqlalchemy.orm import joinedload, aliased
-from src.database import db
+from sqlalchemy.sql import quoted_name
+from src.database import db, dialect_insert
 from uuid import UUID
-from typing import List, Optional
-from datetime import date, datetime, time
+from typing import Dict, Iterator, List, Optional
+from datetime import date, datetime, timedelta
+from src.constants import OLD_ORDER_PARTITION_MONTHS_AHEAD, STREAM_YIELD_PER
 from flask import current_app as app
 from src.models.employee import Employee
 from src.models.group import Group
+from src.models.location import Location
 from src.models.preorder import PreOrder
 from src.models.dailyorder import DailyOrder
 from src.models.oldorder import OldOrder
+from src.models.order_daily_rollup import OrderDailyRollup
+from src.models.maindish import MainDish
 from src.models.user import UserGroup
 from src.repositories.users_repository import UsersRepository
+from src.utils.change_tracking import mark_changed
+from src.utils.pagination import Page, Pagination, paginate_query
 
 
 class OrdersFilters:
@@ -35,9 +54,9 @@ class OrdersFilters:
         person_id: Optional[UUID] = None,
         location_id: Optional[UUID] = None,
         group_id: Optional[UUID] = None,
-        date: Optional[datetime] = None,
-        date_start: Optional[datetime] = None,
-        date_end: Optional[datetime] = None,
+        date: Optional[date] = None,
+        date_start: Optional[date] = None,
+        date_end: Optional[date] = None,
     ):
         """
         Constructor
@@ -64,13 +83,45 @@ class OrdersRepository:
     """Repository to handle database operations for order data."""
 
     @staticmethod
-    def create_bulk_orders(bulk_orders: List[PreOrder], commit=True):
+    def upsert_bulk_preorders(orders: List[dict], commit=True):
         """
-        Create preorders
+        Create or update preorders with a single statement
 
-        :param orders: List of preorders
+        An existing preorder of the same person on the same date is overwritten
+        (INSERT ... ON CONFLICT (person_id, date) DO UPDATE).
+
+        :param orders: List of preorders as dicts, at most one per person and date
         """
-        db.session.bulk_save_objects(bulk_orders)
+        if not orders:
+            return
+
+        now = datetime.now()
+        stmt = dialect_insert(PreOrder).values(
+            [
+                {
+                    "person_id": order["person_id"],
+                    "location_id": order["location_id"],
+                    "date": order["date"],
+                    "nothing": order["nothing"],
+                    "main_dish": order["main_dish"],
+                    "salad_option": order["salad_option"],
+                    "last_changed": now,
+                }
+                for order in orders
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PreOrder.person_id, PreOrder.date],
+            set_={
+                "location_id": stmt.excluded.location_id,
+                "nothing": stmt.excluded.nothing,
+                "main_dish": stmt.excluded.main_dish,
+                "salad_option": stmt.excluded.salad_option,
+                "last_changed": stmt.excluded.last_changed,
+            },
+        )
+        db.session.execute(stmt)
+
         if commit:
             db.session.commit()
 
@@ -122,10 +173,10 @@ class OrdersRepository:
         db.session.commit()
 
     @staticmethod
-    def get_employees_to_order_for(user_id: UUID) -> List[UUID]:
-        """Get all employee ids of the groups the user has to do the orders for
+    def get_employee_locations_to_order_for(user_id: UUID) -> Dict[UUID, UUID]:
+        """Get all employees of the groups the user has to do the orders for
         :param user_id: User id
-        :return: List of employee ids
+        :return: Mapping of employee id to the location id of the employee's group
         """
         # Use a subquery to get group ids for the user
         group_ids_subquery = select(Group.id).filter(
@@ -138,33 +189,15 @@ class OrdersRepository:
             )
         )
 
-        # Use the group IDs to fetch all employee IDs
-        employee_ids = db.session.scalars(
-            select(Employee.id).filter(Employee.group_id.in_(group_ids_subquery))
+        # Fetch all shown employees of these groups together with their location
+        rows = db.session.execute(
+            select(Employee.id, Group.location_id)
+            .join(Group, Employee.group_id == Group.id)
+            .filter(Group.id.in_(group_ids_subquery))
+            .filter(Employee.hidden.is_(False))
         ).all()
 
-        return employee_ids
-
-    def employee_in_location(employee_id: UUID, location_id: UUID) -> bool:
-        """
-        Check if a person belongs to a location
-        :param person_id: Person id
-        :param location_id: Location id
-        :return: True if person belongs to location, False otherwise
-        """
-        return (
-            db.session.scalars(
-                select(func.count(Employee.id))
-                .join(Group, Employee.group_id == Group.id)
-                .filter(
-                    and_(
-                        (Employee.id == employee_id),
-                        (Group.location_id == location_id),
-                    )
-                )
-            ).one_or_none()
-            > 0
-        )
+        return {employee_id: location_id for employee_id, location_id in rows}
 
     ############################ PreOrders ############################
 
@@ -192,6 +225,44 @@ class OrdersRepository:
         :param filters: Filters for orders
         :return: List of pre orders
         """
+        query = OrdersRepository._pre_orders_query(
+            filters, user_id, user_group, prejoin_person, prejoin_location
+        )
+
+        return db.session.execute(query).scalars().all()
+
+    @staticmethod
+    def get_pre_orders_page(
+        filters: OrdersFilters,
+        user_id: UUID,
+        user_group: UserGroup,
+        pagination: Pagination,
+    ) -> Page[PreOrder]:
+        """
+        Get one page of pre orders based on filters, sorted by (date, id)
+
+        :param filters: Filters for orders
+        :param pagination: The requested page
+        :return: Page of pre orders
+        """
+        query = OrdersRepository._pre_orders_query(filters, user_id, user_group)
+
+        return paginate_query(query, [PreOrder.date, PreOrder.id], pagination)
+
+    @staticmethod
+    def _pre_orders_query(
+        filters: OrdersFilters,
+        user_id: UUID,
+        user_group: UserGroup,
+        prejoin_person: bool = False,
+        prejoin_location: bool = False,
+    ):
+        """
+        Build the query for pre orders in the scope of the user
+
+        :param filters: Filters for orders
+        :return: Select of pre orders
+        """
         query = select(PreOrder)
 
         user = UsersRepository.get_user_by_id(user_id)
@@ -246,7 +317,7 @@ class OrdersRepository:
         if prejoin_location:
             query = query.options(joinedload(PreOrder.location))
 
-        return db.session.execute(query).scalars().all()
+        return query
 
     @staticmethod
     def preorder_already_exists(person_id: UUID, date: date) -> Optional[PreOrder]:
@@ -256,13 +327,11 @@ class OrdersRepository:
         :return: Preorder if it exists else None
         """
 
-        dt = datetime.combine(date, time(0, 0))  # convert date to datetime
-
         return db.session.scalars(
             select((PreOrder)).filter(
                 and_(
                     (PreOrder.person_id == person_id),
-                    (PreOrder.date == dt),
+                    (PreOrder.date == date),
                 )
             )
         ).first()
@@ -276,13 +345,12 @@ class OrdersRepository:
         :param date: Date
         :return: Preorder if it exists else None
         """
-        dt = datetime.combine(date, time(0, 0))  # convert date to datetime
 
         return db.session.scalars(
             select((PreOrder)).filter(
                 and_(
                     (PreOrder.person_id == person_id),
-                    (PreOrder.date == dt),
+                    (PreOrder.date == date),
                     (PreOrder.id != id),
                 )
             )
@@ -377,18 +445,49 @@ class OrdersRepository:
 
         :return: Daily orders in a response schmea
         """
+        query = OrdersRepository._daily_orders_by_user_scope_query(user_id)
+        if query is None:
+            return []
+
+        return db.session.scalars(query).all()
+
+    @staticmethod
+    def get_daily_orders_page_filtered_by_user_scope(
+        user_id: UUID, pagination: Pagination
+    ) -> Page[DailyOrder]:
+        """
+        Get one page of daily orders based on user scope, sorted by id
+
+        :param user_id: UUID
+        :param pagination: The requested page
+
+        :return: Page of daily orders
+        """
+        query = OrdersRepository._daily_orders_by_user_scope_query(user_id)
+        if query is None:
+            return Page([], total=0 if pagination.with_total else None)
+
+        return paginate_query(query, [DailyOrder.id], pagination)
+
+    @staticmethod
+    def _daily_orders_by_user_scope_query(user_id: UUID):
+        """
+        Build the query for daily orders in the scope of the user
+
+        :param user_id: UUID
+
+        :return: Select of daily orders, None if the user has no access to any
+        """
         user = UsersRepository.get_user_by_id(user_id)
         if user.user_group == UserGroup.verwaltung:
-            return db.session.scalars(select(DailyOrder)).all()
+            return select(DailyOrder)
         elif (
             user.user_group == UserGroup.kuechenpersonal
             or user.user_group == UserGroup.standortleitung
         ):
-            return db.session.scalars(
-                select(DailyOrder).filter(DailyOrder.location_id == user.location_id)
-            ).all()
+            return select(DailyOrder).filter(DailyOrder.location_id == user.location_id)
         else:
-            return []
+            return None
 
     @staticmethod
     def get_daily_orders_for_group(group_id: UUID) -> List[DailyOrder]:
@@ -414,6 +513,8 @@ class OrdersRepository:
         """
 
         db.session.bulk_save_objects(daily_orders)
+        # bulk_save_objects löst keine Session-Events aus
+        mark_changed(db.session, ["daily_order"])
         db.session.commit()
 
     ############################ OldOrders ############################
@@ -423,35 +524,399 @@ class OrdersRepository:
         Get old orders based on filters
 
         :param filters: Filters for orders
-        :return: List of old orders
+        :return: List of old orders sorted by date
+        """
+        query = OrdersRepository._old_orders_query(filters).order_by(
+            OldOrder.date.asc(), OldOrder.id.asc()
+        )
+
+        return db.session.execute(query).scalars().all()
+
+    @staticmethod
+    def get_old_orders_page(
+        filters: OrdersFilters, pagination: Pagination
+    ) -> Page[OldOrder]:
+        """
+        Get one page of old orders based on filters, sorted by (date, id)
+
+        :param filters: Filters for orders
+        :param pagination: The requested page
+        :return: Page of old orders
+        """
+        return paginate_query(
+            OrdersRepository._old_orders_query(filters),
+            [OldOrder.date, OldOrder.id],
+            pagination,
+        )
+
+    @staticmethod
+    def stream_old_orders(filters: OrdersFilters) -> Iterator[OldOrder]:
+        """
+        Iterate over old orders based on filters
+
+        The orders are fetched in batches while iterating, so only one batch
+        is held in memory at a time.
+
+        :param filters: Filters for orders
+        :return: Iterator over old orders sorted by (date, id)
+        """
+        query = (
+            OrdersRepository._old_orders_query(filters)
+            .order_by(OldOrder.date.asc(), OldOrder.id.asc())
+            .execution_options(yield_per=STREAM_YIELD_PER)
+        )
+        yield from db.session.scalars(query)
+
+    @staticmethod
+    def get_old_order_invoice_ids(filters: OrdersFilters) -> Dict[str, List[UUID]]:
+        """
+        Get the persons, groups and locations that have old orders
+
+        Groups are those of the employees with old orders.
+
+        :param filters: Filters for orders (usually the billed date range)
+        :return: IDs by "person", "group" and "location"
+        """
+        orders = OrdersRepository._old_orders_query(filters).subquery()
+
+        persons = select(orders.c.person_id).distinct()
+        locations = select(orders.c.location_id).distinct()
+        groups = (
+            select(Employee.group_id)
+            .join(orders, orders.c.person_id == Employee.id)
+            .distinct()
+        )
+
+        return {
+            "person": db.session.scalars(persons).all(),
+            "group": db.session.scalars(groups).all(),
+            "location": db.session.scalars(locations).all(),
+        }
+
+    @staticmethod
+    def get_old_order_runs(filters: OrdersFilters) -> List[Row]:
+        """
+        Group the old orders of every person and month into runs
+
+        A run is a series of days that are either all "nothing" or all with a
+        meal, uninterrupted by the other kind (gaps and islands: the difference
+        of the row numbers over all days and over the days of one kind is the
+        same within a run). Days without any meal and without "nothing" are
+        ignored.
+
+        :param filters: Filters for orders
+        :return: Rows with the fields of src.utils.billing.OrderRun, sorted by
+            person, month and start of the run
+        """
+        year = func.extract("year", OldOrder.date)
+        month = func.extract("month", OldOrder.date)
+        nothing = case((OldOrder.nothing.is_(True), 1), else_=0)
+
+        days = OrdersRepository._filter_orders(
+            select(
+                OldOrder.person_id,
+                OldOrder.date,
+                OldOrder.main_dish,
+                OldOrder.salad_option,
+                year.label("year"),
+                month.label("month"),
+                nothing.label("is_nothing"),
+                (
+                    func.row_number().over(
+                        partition_by=[OldOrder.person_id, year, month],
+                        order_by=OldOrder.date,
+                    )
+                    - func.row_number().over(
+                        partition_by=[OldOrder.person_id, year, month, nothing],
+                        order_by=OldOrder.date,
+                    )
+                ).label("run"),
+            ).filter(
+                or_(
+                    OldOrder.nothing.is_(True),
+                    OldOrder.main_dish.is_not(None),
+                    OldOrder.salad_option.is_(True),
+                )
+            ),
+            OldOrder,
+            filters,
+        ).subquery()
+
+        main_day = case((days.c.main_dish.is_not(None), days.c.date))
+        salad_day = case((days.c.salad_option.is_(True), days.c.date))
+        start = func.min(days.c.date)
+
+        query = (
+            select(
+                days.c.person_id,
+                days.c.year,
+                days.c.month,
+                # "nothing" is a keyword in SQLite, so the label has to be quoted
+                (days.c.is_nothing == 1).label(quoted_name("nothing", True)),
+                start.label("start"),
+                func.max(days.c.date).label("end"),
+                func.count().label("days"),
+                func.count(main_day).label("main"),
+                func.min(main_day).label("main_start"),
+                func.max(main_day).label("main_end"),
+                func.count(salad_day).label("salad"),
+                func.min(salad_day).label("salad_start"),
+                func.max(salad_day).label("salad_end"),
+            )
+            .group_by(
+                days.c.person_id,
+                days.c.year,
+                days.c.month,
+                days.c.is_nothing,
+                days.c.run,
+            )
+            .order_by(days.c.person_id, days.c.year, days.c.month, start)
+        )
+
+        return db.session.execute(query).all()
+
+    @staticmethod
+    def _old_orders_query(filters: OrdersFilters):
+        return OrdersRepository._filter_orders(select(OldOrder), OldOrder, filters)
+
+    ############################ OldOrder Partitions ############################
+
+    @staticmethod
+    def create_old_order_partitions(
+        start: date, months: int = OLD_ORDER_PARTITION_MONTHS_AHEAD
+    ) -> List[str]:
+        """
+        Create the monthly partitions of the old_order table
+
+        The table is partitioned by month (PostgreSQL declarative partitioning).
+        Existing partitions are left untouched, other databases are skipped.
+
+        :param start: A date in the first month to create a partition for
+        :param months: Number of following months to create partitions for
+        :return: Names of all partitions that were ensured
+        """
+        if db.session.get_bind().dialect.name != "postgresql":
+            return []
+
+        partitions = []
+        month = start.replace(day=1)
+        for _ in range(months + 1):
+            next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+            name = OrdersRepository._old_order_partition_name(month)
+            db.session.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF old_order "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+                )
+            )
+            partitions.append(name)
+            month = next_month
+
+        db.session.commit()
+        return partitions
+
+    @staticmethod
+    def detach_old_order_partition(month: date) -> str:
+        """
+        Detach the partition of a month from the old_order table
+
+        The old orders of the month are kept in a standalone table that can be
+        archived or dropped, instead of deleting the rows one by one.
+        The daily rollup of the month stays untouched.
+
+        :param month: A date in the month to detach
+        :return: Name of the detached table
+        """
+        name = OrdersRepository._old_order_partition_name(month)
+        db.session.execute(text(f"ALTER TABLE old_order DETACH PARTITION {name}"))
+        db.session.commit()
+        return name
+
+    @staticmethod
+    def _old_order_partition_name(month: date) -> str:
+        return f"old_order_{month.year:04d}_{month.month:02d}"
+
+    ############################ Reports ############################
+
+    @staticmethod
+    def count_orders_by_date_and_location(
+        filters: OrdersFilters,
+        models: tuple = (PreOrder, DailyOrder, OldOrder),
+    ) -> List[Row]:
+        """
+        Count orders per date, location and main dish across the order tables
+
+        The counting is done by the database (UNION ALL + GROUP BY), so only
+        the count rows are transferred. Orders with 'nothing' are not counted.
+
+        :param filters: Filters for orders (person, location, group and dates)
+        :param models: Order tables to include in the count
+        :return: Rows of (date, location_id, main_dish, orders, salad_options)
+        """
+        selects = [
+            OrdersRepository._filter_orders(
+                select(
+                    model.id,
+                    model.date,
+                    model.location_id,
+                    model.main_dish,
+                    model.salad_option,
+                ).filter(model.nothing.is_not(True)),
+                model,
+                filters,
+            )
+            for model in models
+        ]
+        orders = (union_all(*selects) if len(selects) > 1 else selects[0]).subquery()
+
+        # keep the order in which the orders were placed
+        query = (
+            select(
+                orders.c.date,
+                orders.c.location_id,
+                orders.c.main_dish,
+                func.count().label("orders"),
+                func.sum(case((orders.c.salad_option.is_(True), 1), else_=0)).label(
+                    "salad_options"
+                ),
+            )
+            .group_by(orders.c.date, orders.c.location_id, orders.c.main_dish)
+            .order_by(orders.c.date, func.min(orders.c.id))
+        )
+
+        return db.session.execute(query).all()
+
+    @staticmethod
+    def get_daily_rollups(filters: OrdersFilters) -> List[OrderDailyRollup]:
+        """
+        Get the aggregated orders of closed days
+
+        :param filters: Filters for location_id, date, date_start and date_end
+        :return: List of daily rollups ordered by date
+        """
+        query = OrdersRepository._filter_rollups(select(OrderDailyRollup), filters)
+        query = query.order_by(OrderDailyRollup.date.asc())
+
+        return db.session.scalars(query).all()
+
+    @staticmethod
+    def stream_location_report_rows(filters: OrdersFilters) -> Iterator[Row]:
+        """
+        Iterate over the order counts per date and location for report exports
+
+        Open days are counted from the pre-orders and daily orders, closed days
+        are read from the daily rollup. The database sums up both in one query
+        and the rows are fetched in batches while iterating.
+
+        :param filters: Filters for location_id, date, date_start and date_end
+        :return: Iterator over rows of (date, location_name, rot, blau, salad),
+            sorted by date and location name, without rows of only zeros
+        """
+        open_days = [
+            OrdersRepository._filter_orders(
+                select(
+                    model.date,
+                    model.location_id,
+                    case((model.main_dish == MainDish.rot, 1), else_=0).label("rot"),
+                    case((model.main_dish == MainDish.blau, 1), else_=0).label("blau"),
+                    case((model.salad_option.is_(True), 1), else_=0).label("salad"),
+                ).filter(model.nothing.is_not(True)),
+                model,
+                filters,
+            )
+            for model in (PreOrder, DailyOrder)
+        ]
+        closed_days = OrdersRepository._filter_rollups(
+            select(
+                OrderDailyRollup.date,
+                OrderDailyRollup.location_id,
+                OrderDailyRollup.rot,
+                OrderDailyRollup.blau,
+                OrderDailyRollup.salad,
+            ),
+            filters,
+        )
+        counts = union_all(*open_days, closed_days).subquery()
+
+        rot = func.sum(counts.c.rot)
+        blau = func.sum(counts.c.blau)
+        salad = func.sum(counts.c.salad)
+        query = (
+            select(
+                counts.c.date,
+                Location.location_name,
+                rot.label("rot"),
+                blau.label("blau"),
+                salad.label("salad"),
+            )
+            .join(Location, Location.id == counts.c.location_id)
+            .group_by(counts.c.date, Location.id, Location.location_name)
+            .having(rot + blau + salad > 0)
+            .order_by(counts.c.date, Location.location_name)
+            .execution_options(yield_per=STREAM_YIELD_PER)
+        )
+        yield from db.session.execute(query)
+
+    @staticmethod
+    def _filter_rollups(query, filters: OrdersFilters):
         """
-        query = select(OldOrder)
+        Apply the location and date filters to a query on the daily rollup
+
+        :param query: The query to filter
+        :param filters: Filters for location_id, date, date_start and date_end
+        :return: The filtered query
+        """
+        if filters.location_id:
+            query = query.filter(OrderDailyRollup.location_id == filters.location_id)
+
+        if filters.date:
+            query = query.filter(OrderDailyRollup.date == filters.date)
+
+        if filters.date_start:
+            query = query.filter(OrderDailyRollup.date >= filters.date_start)
 
+        if filters.date_end:
+            query = query.filter(OrderDailyRollup.date <= filters.date_end)
+
+        return query
+
+    @staticmethod
+    def _filter_orders(
+        query,
+        model: type[PreOrder] | type[DailyOrder] | type[OldOrder],
+        filters: OrdersFilters,
+    ):
+        """
+        Apply order filters to a query on one of the order tables
+
+        :param query: The query to filter
+        :param model: The order model the query selects from
+        :param filters: Filters for orders
+        :return: The filtered query
+        """
         if filters.person_id:
-            query = query.filter(OldOrder.person_id == filters.person_id)
+            query = query.filter(model.person_id == filters.person_id)
 
         if filters.location_id:
-            query = query.filter(OldOrder.location_id == filters.location_id)
+            query = query.filter(model.location_id == filters.location_id)
 
         if filters.group_id:
             query = query.filter(
-                OldOrder.person_id.in_(
+                model.person_id.in_(
                     select(Employee.id).where(Employee.group_id == filters.group_id)
                 )
             )
 
         if filters.date:
-            query = query.filter(OldOrder.date == filters.date)
+            query = query.filter(model.date == filters.date)
 
         if filters.date_start:
-            query = query.filter(OldOrder.date >= filters.date_start)
+            query = query.filter(model.date >= filters.date_start)
 
         if filters.date_end:
-            query = query.filter(OldOrder.date <= filters.date_end)
-
-        query = query.order_by(OldOrder.date.asc())
+            query = query.filter(model.date <= filters.date_end)
 
-        return db.session.execute(query).scalars().all()
+        return query
 
     ############################ Migrations ############################
 
@@ -520,8 +985,16 @@ class OrdersRepository:
                     DailyOrder.handed_out,
                 ).filter(DailyOrder.date < today),
             )
+            # Only the moved months of cached invoices become invalid
+            .execution_options(
+                changed_months=OrdersRepository._months_of(
+                    DailyOrder, DailyOrder.date < today
+                )
+            )
         )
 
+        OrdersRepository._add_to_daily_rollup(DailyOrder, DailyOrder.date < today)
+
         result = db.session.execute(delete(DailyOrder).filter(DailyOrder.date < today))
         app.logger.info(f"Pushed {result.rowcount} daily orders to old orders table.")
 
@@ -557,9 +1030,80 @@ class OrdersRepository:
                     False,
                 ).filter(PreOrder.date < today),
             )
+            # Only the moved months of cached invoices become invalid
+            .execution_options(
+                changed_months=OrdersRepository._months_of(
+                    PreOrder, PreOrder.date < today
+                )
+            )
         )
 
+        OrdersRepository._add_to_daily_rollup(PreOrder, PreOrder.date < today)
+
         result = db.session.execute(delete(PreOrder).filter(PreOrder.date < today))
         app.logger.info(f"Pushed {result.rowcount} preorders to old orders table.")
 
         db.session.commit()
+
+    @staticmethod
+    def _months_of(model: type[PreOrder] | type[DailyOrder], condition) -> set[date]:
+        """
+        Get the months of the orders matching the condition
+
+        :param model: The order table
+        :param condition: Filter selecting the orders
+        :return: First day of every month with matching orders
+        """
+
+        dates = db.session.scalars(select(model.date).filter(condition).distinct())
+        return {order_date.replace(day=1) for order_date in dates}
+
+    @staticmethod
+    def _add_to_daily_rollup(model: type[PreOrder] | type[DailyOrder], condition):
+        """
+        Add the counts of the orders matching the condition to the daily rollup
+
+        Runs in the transaction of the caller, before the orders are moved.
+
+        :param model: The order table the orders are moved from
+        :param condition: Filter selecting the orders that are moved
+        """
+
+        def count_if(expression):
+            return func.sum(case((expression, 1), else_=0))
+
+        ordered = model.nothing.is_not(True)
+        handed_out = (
+            count_if(model.handed_out.is_(True)) if model is DailyOrder else literal(0)
+        )
+
+        stmt = dialect_insert(OrderDailyRollup).from_select(
+            [
+                OrderDailyRollup.date,
+                OrderDailyRollup.location_id,
+                OrderDailyRollup.rot,
+                OrderDailyRollup.blau,
+                OrderDailyRollup.salad,
+                OrderDailyRollup.nothing,
+                OrderDailyRollup.handed_out,
+            ],
+            select(
+                model.date,
+                model.location_id,
+                count_if(and_(ordered, model.main_dish == MainDish.rot)),
+                count_if(and_(ordered, model.main_dish == MainDish.blau)),
+                count_if(and_(ordered, model.salad_option.is_(True))),
+                count_if(model.nothing.is_(True)),
+                handed_out,
+            )
+            .filter(condition)
+            .group_by(model.date, model.location_id),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OrderDailyRollup.date, OrderDailyRollup.location_id],
+            set_={
+                column: getattr(OrderDailyRollup, column) + stmt.excluded[column]
+                for column in ["rot", "blau", "salad", "nothing", "handed_out"]
+            },
+        )
+        db.session.execute(stmt)
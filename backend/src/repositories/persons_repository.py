@@ -1,10 +1,13 @@
 """Repository to handle database operations for person data."""
 
-from sqlalchemy import select, func
+from typing import Iterable, List
+from sqlalchemy import Row, select, func
 from src.models.user import User
 from src.database import db
 from uuid import UUID
 from src.models.user import UserGroup
+from src.models.employee import Employee
+from src.models.group import Group
 from src.models.person import Person
 
 
@@ -20,3 +23,28 @@ class PersonsRepository:
         :return: The person with the given id or None if no person was found
         """
         return db.session.scalars(select(Person).where(Person.id == person_id)).first()
+
+    @staticmethod
+    def get_persons_with_group(person_ids: Iterable[UUID]) -> List[Row]:
+        """Retrieve the names and groups of persons (for invoices)
+
+        :param person_ids: The ids of the persons
+
+        :return: Rows (id, first_name, last_name, type, group_id, group_name),
+            group_id and group_name are None for persons who are no employees
+        """
+        employee = Employee.__table__
+
+        return db.session.execute(
+            select(
+                Person.id,
+                Person.first_name,
+                Person.last_name,
+                Person.type,
+                employee.c.group_id,
+                Group.group_name,
+            )
+            .outerjoin(employee, employee.c.id == Person.id)
+            .outerjoin(Group, Group.id == employee.c.group_id)
+            .where(Person.id.in_(list(person_ids)))
+        ).all()
@@ -1,8 +1,10 @@
 """Repository to handle database operations for refresh token sessions."""
 
+from datetime import datetime
 from sqlalchemy import delete, select
 from src.models.refresh_token_session import RefreshTokenSession
-from src.database import db
+from src.models.user import User
+from src.database import db, dialect_insert
 
 
 class RefreshTokenSessionRepository:
@@ -23,6 +25,82 @@ class RefreshTokenSessionRepository:
             )
         ).first()
 
+    @staticmethod
+    def get_token_with_user_for_update(
+        token: str,
+    ) -> tuple[RefreshTokenSession, User | None] | None:
+        """Retrieve a refresh token and its user, and lock the token until commit
+
+        Concurrent requests with the same token wait for each other
+        (SELECT ... FOR UPDATE), so only one of them can rotate it.
+
+        :param token: The refresh token to retrieve
+
+        :return: The refresh token and its user or None if no token was found
+        """
+
+        row = db.session.execute(
+            select(RefreshTokenSession, User)
+            .outerjoin(User, User.id == RefreshTokenSession.user_id)
+            .where(RefreshTokenSession.refresh_token == token)
+            .with_for_update(of=RefreshTokenSession)
+        ).first()
+
+        return tuple(row) if row else None
+
+    @staticmethod
+    def create_token_if_absent(token: RefreshTokenSession, commit=True) -> bool:
+        """Create a new refresh token unless the token already exists
+
+        Relies on the primary key instead of checking for the token first.
+
+        :param token: The refresh token to create
+        :param commit: Whether to commit the transaction
+
+        :return: True if the token was created, False if it already existed
+        """
+
+        stmt = (
+            dialect_insert(RefreshTokenSession)
+            .values(
+                refresh_token=token.refresh_token,
+                user_id=token.user_id,
+                created=token.created,
+                expires=token.expires,
+            )
+            .on_conflict_do_nothing(index_elements=["refresh_token"])
+            .returning(RefreshTokenSession.refresh_token)
+        )
+        created = db.session.execute(stmt).scalar() is not None
+
+        if commit:
+            db.session.commit()
+
+        return created
+
+    @staticmethod
+    def rotate_token(
+        token: RefreshTokenSession, new_token: RefreshTokenSession
+    ) -> bool:
+        """Mark a refresh token as used and create its replacement in one transaction
+
+        :param token: The used refresh token, locked with get_token_with_user_for_update
+        :param new_token: The refresh token replacing it
+
+        :return: True if rotated, False if the new token already existed (nothing is committed)
+        """
+
+        if not RefreshTokenSessionRepository.create_token_if_absent(
+            new_token, commit=False
+        ):
+            return False
+
+        token.last_used = datetime.now()
+        token.replaced_by = new_token.refresh_token
+        db.session.commit()
+
+        return True
+
     @staticmethod
     def create_token(token: RefreshTokenSession):
         """Create a new refresh token in the database
@@ -0,0 +1,125 @@
+"""Repository to handle database operations for render jobs."""
+
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import undefer
+from src.database import db
+from src.models.render_job import RenderJob, RenderJobStatus
+
+
+class RenderJobsRepository:
+    """Repository to handle database operations for render jobs."""
+
+    @staticmethod
+    def get_job_by_id(job_id: UUID) -> Optional[RenderJob]:
+        """Retrieve a render job by its ID (without the result)
+
+        :param job_id: The ID of the job
+
+        :return: The job or None if no job was found
+        """
+
+        return db.session.get(RenderJob, job_id)
+
+    @staticmethod
+    def get_job_of_user(
+        job_id: UUID, user_id: UUID, with_result: bool = False
+    ) -> Optional[RenderJob]:
+        """Retrieve a render job that belongs to a user
+
+        :param job_id: The ID of the job
+        :param user_id: The ID of the user
+        :param with_result: Whether to load the rendered file as well
+
+        :return: The job or None if the user has no job with this ID
+        """
+
+        query = select(RenderJob).where(
+            RenderJob.id == job_id, RenderJob.user_id == user_id
+        )
+        if with_result:
+            query = query.options(undefer(RenderJob.result))
+
+        return db.session.scalars(query).first()
+
+    @staticmethod
+    def count_open_jobs_of_user(user_id: UUID, now: datetime) -> int:
+        """Count the jobs of a user that are pending or running and not expired yet
+
+        :param user_id: The ID of the user
+        :param now: The current date and time
+
+        :return: Number of jobs
+        """
+
+        return db.session.scalar(
+            select(func.count())
+            .select_from(RenderJob)
+            .where(
+                RenderJob.user_id == user_id,
+                RenderJob.status.in_(
+                    [RenderJobStatus.pending, RenderJobStatus.running]
+                ),
+                RenderJob.expires > now,
+            )
+        )
+
+    @staticmethod
+    def create_job(job: RenderJob):
+        """Create a new render job in the database
+
+        :param job: The job to create
+        """
+
+        db.session.add(job)
+        db.session.commit()
+
+    @staticmethod
+    def update_job(job: RenderJob):
+        """Update a render job in the database
+
+        :param job: The job to update
+        """
+
+        db.session.commit()
+
+    @staticmethod
+    def fail_stale_jobs(created_before: datetime, error: str, now: datetime) -> int:
+        """Mark pending or running jobs created before a point in time as failed
+
+        :param created_before: Jobs created before are failed
+        :param error: The error message of the jobs
+        :param now: The current date and time
+
+        :return: Number of failed jobs
+        """
+
+        result = db.session.execute(
+            update(RenderJob)
+            .where(
+                RenderJob.status.in_(
+                    [RenderJobStatus.pending, RenderJobStatus.running]
+                ),
+                RenderJob.created < created_before,
+            )
+            .values(status=RenderJobStatus.failed, error=error, finished=now)
+        )
+        db.session.commit()
+
+        return result.rowcount
+
+    @staticmethod
+    def delete_expired_jobs(now: datetime) -> int:
+        """Delete all expired jobs including their results
+
+        :param now: The current date and time
+
+        :return: Number of deleted jobs
+        """
+
+        result = db.session.execute(delete(RenderJob).where(RenderJob.expires <= now))
+        db.session.commit()
+
+        return result.rowcount
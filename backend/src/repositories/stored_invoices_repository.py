@@ -0,0 +1,107 @@
+"""Repository to handle database operations for stored invoices."""
+
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+from src.database import db, dialect_insert
+from src.models.stored_invoice import InvoiceScope, StoredInvoice
+
+
+class StoredInvoicesRepository:
+    """Repository to handle database operations for stored invoices."""
+
+    @staticmethod
+    def get_invoices(
+        month: date, scope: Optional[InvoiceScope] = None
+    ) -> List[StoredInvoice]:
+        """Retrieve the stored invoices of a month (without their content)
+
+        :param month: The first day of the month
+        :param scope: Only invoices for persons, groups or locations (optional)
+
+        :return: The invoices ordered by scope and file name
+        """
+
+        query = select(StoredInvoice).where(StoredInvoice.month == month)
+        if scope is not None:
+            query = query.where(StoredInvoice.scope == scope)
+
+        query = query.order_by(StoredInvoice.scope, StoredInvoice.download_name)
+
+        return db.session.scalars(query).all()
+
+    @staticmethod
+    def get_invoice_by_id(invoice_id: UUID) -> Optional[StoredInvoice]:
+        """Retrieve a stored invoice including its content
+
+        :param invoice_id: The ID of the invoice
+
+        :return: The invoice or None if no invoice was found
+        """
+
+        return db.session.scalars(
+            select(StoredInvoice)
+            .where(StoredInvoice.id == invoice_id)
+            .options(undefer(StoredInvoice.content))
+        ).first()
+
+    @staticmethod
+    def get_invoice(
+        month: date, scope: InvoiceScope, scope_id: UUID, versions: str
+    ) -> Optional[StoredInvoice]:
+        """Retrieve a stored invoice that is still up to date, including its content
+
+        :param month: The first day of the month
+        :param scope: Whether the invoice is for a person, a group or a location
+        :param scope_id: The ID of the person, group or location
+        :param versions: The current change versions of the invoice's data
+
+        :return: The invoice or None if there is no up-to-date invoice
+        """
+
+        return db.session.scalars(
+            select(StoredInvoice)
+            .where(
+                StoredInvoice.month == month,
+                StoredInvoice.scope == scope,
+                StoredInvoice.scope_id == scope_id,
+                StoredInvoice.versions == versions,
+            )
+            .options(undefer(StoredInvoice.content))
+        ).first()
+
+    @staticmethod
+    def upsert_invoice(invoice: dict):
+        """Store an invoice, replacing an older one of the same month and scope
+
+        :param invoice: The columns of the invoice
+        """
+
+        stmt = dialect_insert(StoredInvoice).values(invoice)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[
+                StoredInvoice.month,
+                StoredInvoice.scope,
+                StoredInvoice.scope_id,
+            ],
+            set_={
+                column: stmt.excluded[column]
+                for column in [
+                    "versions",
+                    "download_name",
+                    "size",
+                    "content",
+                    "created",
+                ]
+            },
+        )
+        db.session.execute(stmt)
+        db.session.commit()
+
+    @staticmethod
+    def rollback():
+        """Discard a failed write, so the session can be used again"""
+
+        db.session.rollback()
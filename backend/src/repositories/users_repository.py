@@ -7,6 +7,7 @@ from src.models.location import Location
 from src.database import db
 from uuid import UUID
 from typing import Optional
+from src.utils.pagination import Page, Pagination, paginate_query
 
 
 class UsersRepository:
@@ -30,6 +31,22 @@ class UsersRepository:
 
         return db.session.scalars(select(User)).all()
 
+    @staticmethod
+    def get_users_page(
+        pagination: Pagination, user_group_filter: Optional[UserGroup] = None
+    ) -> Page[User]:
+        """Get one page of the users saved in the database, sorted by username
+
+        :param pagination: The requested page
+        :params user_group: optional filter for user group
+        :return: A page of users, optionally filtered by user group
+        """
+        query = select(User)
+        if user_group_filter:
+            query = query.where(User.user_group == user_group_filter)
+
+        return paginate_query(query, [User.username], pagination)
+
     @staticmethod
     def get_user_by_id(user_id: UUID) -> User | None:
         """Retrieve a user by their ID
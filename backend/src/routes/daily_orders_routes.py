@@ -2,7 +2,7 @@ from uuid import UUID
 
 from flask import Blueprint, jsonify, request, g
 from flasgger import swag_from
-from marshmallow import ValidationError
+from marshmallow import EXCLUDE, ValidationError
 
 from src.utils.exceptions import NotFoundError, AccessDeniedError, BadValueError
 from src.models.user import UserGroup
@@ -10,11 +10,14 @@ from src.schemas.daily_orders_schema import (
     DailyOrderFullSchema,
     DailyOrderHandedOutSchema,
 )
+from src.schemas.pagination_schemas import PAGINATION_PARAMETERS, PaginationSchema
 from src.schemas.reports_schemas import CountOrdersSchema
 from src.services.daily_orders_service import DailyOrdersService
 from src.services.reports_service import ReportsService
 from src.utils.auth_utils import login_required
 from src.utils.error import ErrMsg, abort_with_err
+from src.utils.etag_utils import conditional_get
+from src.utils.pagination import Pagination, set_pagination_headers
 
 daily_orders_routes = Blueprint("daily_orders_routes", __name__)
 
@@ -26,6 +29,7 @@ daily_orders_routes = Blueprint("daily_orders_routes", __name__)
 @swag_from(
     {
         "tags": ["daily_orders"],
+        "parameters": PAGINATION_PARAMETERS,
         "responses": {
             200: {
                 "description": "Returns daily orders filtered by user scope",
@@ -34,14 +38,48 @@ daily_orders_routes = Blueprint("daily_orders_routes", __name__)
                     "items": DailyOrderFullSchema,
                 },
             },
+            304: {"description": "Not modified since the ETag in If-None-Match"},
+            400: {"description": "Bad request"},
         },
     }
 )
+@conditional_get(lambda: DailyOrdersService.get_change_scopes(g.user_id))
 def get_daily_orders():
     """
     Get all daily orders filtered by location of the user
     """
 
+    try:
+        pagination = Pagination.pop_from(
+            PaginationSchema().load(request.args, unknown=EXCLUDE)
+        )
+    except ValidationError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Validierungsfehler",
+                description="Format der Daten in der Query nicht valide",
+                details=err.messages,
+            )
+        )
+
+    if pagination:
+        try:
+            page = DailyOrdersService.get_daily_orders_page_filtered_by_user_scope(
+                g.user_id, pagination
+            )
+        except BadValueError as err:
+            abort_with_err(
+                ErrMsg(
+                    status_code=400,
+                    title="Ungültiger Cursor",
+                    description="Der Cursor ist ungültig",
+                    details=str(err),
+                )
+            )
+        response = jsonify(DailyOrderFullSchema(many=True).dump(page.items))
+        return set_pagination_headers(response, page)
+
     daily_orders = DailyOrdersService.get_daily_orders_filtered_by_user_scope(g.user_id)
 
     return DailyOrderFullSchema(many=True).dump(daily_orders)
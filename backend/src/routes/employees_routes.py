@@ -1,15 +1,26 @@
 from uuid import UUID
 
-from flask import Blueprint, jsonify, request, g
+from flask import Blueprint, jsonify, make_response, request, g
 from flasgger import swag_from
-from marshmallow import ValidationError
+from marshmallow import EXCLUDE, ValidationError
+from werkzeug.datastructures import FileStorage
 
 from src.models.user import UserGroup
-from src.schemas.employee_schemas import EmployeeChangeSchema, EmployeeFullNestedSchema
+from src.schemas.employee_schemas import (
+    EmployeeChangeSchema,
+    EmployeeCsvImportSchema,
+    EmployeeFullNestedSchema,
+    EmployeeSyncResultSchema,
+)
+from src.schemas.import_jobs_schemas import ImportJobFullSchema
+from src.schemas.pagination_schemas import PAGINATION_PARAMETERS, PaginationSchema
 from src.services.employees_service import EmployeesService
+from src.services.import_jobs_service import ImportJobsService
 from src.utils.auth_utils import login_required
 from src.utils.error import ErrMsg, abort_with_err
+from src.utils.pagination import Pagination, set_pagination_headers
 from src.utils.exceptions import (
+    ActionNotPossibleError,
     AlreadyExistsError,
     BadValueError,
     NotFoundError,
@@ -56,6 +67,7 @@ employees_routes = Blueprint("employees_routes", __name__)
                 "required": False,
                 "schema": {"type": "string"},
             },
+            *PAGINATION_PARAMETERS,
         ],
         "responses": {
             200: {
@@ -64,7 +76,8 @@ employees_routes = Blueprint("employees_routes", __name__)
                     "type": "array",
                     "items": EmployeeFullNestedSchema,
                 },
-            }
+            },
+            400: {"description": "Bad request"},
         },
     }
 )
@@ -83,6 +96,45 @@ def get_employees():
     group_name = request.args.get("group_name")
     group_id = request.args.get("group_id")
     employee_number = request.args.get("employee_number")
+
+    try:
+        pagination = Pagination.pop_from(
+            PaginationSchema().load(request.args, unknown=EXCLUDE)
+        )
+    except ValidationError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Validierungsfehler",
+                description="Format der Daten in der Query nicht valide",
+                details=err.messages,
+            )
+        )
+
+    if pagination:
+        try:
+            page = EmployeesService.get_employees_page(
+                g.user_group,
+                g.user_id,
+                pagination,
+                first_name=first_name,
+                last_name=last_name,
+                group_name=group_name,
+                group_id=group_id,
+                employee_number=employee_number,
+            )
+        except BadValueError as err:
+            abort_with_err(
+                ErrMsg(
+                    status_code=400,
+                    title="Ungültiger Cursor",
+                    description="Der Cursor ist ungültig",
+                    details=str(err),
+                )
+            )
+        response = jsonify(EmployeeFullNestedSchema(many=True).dump(page.items))
+        return set_pagination_headers(response, page)
+
     employees = EmployeesService.get_employees(
         g.user_group,
         g.user_id,
@@ -230,10 +282,26 @@ def create_employee():
                 "required": True,
                 "description": "Die CSV-Datei, die hochgeladen werden soll.",
             },
+            {
+                "in": "query",
+                "name": "mode",
+                "description": "create (default): only add new employees, sync: also update changed ones",
+                "type": "string",
+                "enum": ["create", "sync"],
+                "required": False,
+            },
+            {
+                "in": "query",
+                "name": "hide-missing",
+                "description": "sync only: hide employees that are not in the file",
+                "type": "boolean",
+                "required": False,
+            },
         ],
         "responses": {
             200: {
-                "description": "File read in successfully",
+                "description": "File read in successfully, in mode sync with the number of changed employees",
+                "schema": EmployeeSyncResultSchema,
             },
             400: {"description": "Bad Request: No File in Request"},
             404: {"description": "Wrong file Format: Need CSV"},
@@ -242,41 +310,29 @@ def create_employee():
 )
 def csv_create():
     """Create Employees contained in a CSV File
-    Create Employees contained in a CSV File
+    Create Employees contained in a CSV File, or synchronize the employees with the file in mode sync
     ---
     """
 
-    if "file" not in request.files:
+    try:
+        params = EmployeeCsvImportSchema().load(request.args)
+    except ValidationError as err:
         abort_with_err(
             ErrMsg(
                 status_code=400,
-                title="Kein Dateiteil in der Anfrage",
-                description="In der Anfrage gab es keinen Dateibereich",
+                title="Validierungsfehler",
+                description="Format der Daten in der Query nicht valide",
+                details=err.messages,
             )
         )
 
-    file = request.files["file"]
-
-    if file.filename == "":
-        abort_with_err(
-            ErrMsg(
-                status_code=400,
-                title="Keine Datei ausgewählt",
-                description="Es wurde keine Datei hochgeladen",
-            )
-        )
+    file = _get_csv_file()
 
-    file.stream.seek(0)
-    if not ("." in file.filename and file.filename.rsplit(".", 1)[1].lower() == "csv"):
-        abort_with_err(
-            ErrMsg(
-                status_code=415,
-                title="Falsches Dateiformat",
-                description="Es werden nur .csv Dateien zugelassen",
-            )
-        )
     try:
-        EmployeesService.bulk_create_employees(file)
+        if params["mode"] == "sync":
+            result = EmployeesService.sync_employees(file, params["hide_missing"])
+        else:
+            EmployeesService.bulk_create_employees(file)
     except AlreadyExistsError:
         abort_with_err(
             ErrMsg(
@@ -303,9 +359,171 @@ def csv_create():
             )
         )
 
+    if params["mode"] == "sync":
+        return EmployeeSyncResultSchema().dump(result), 200
+
     return jsonify({"message": "Datei wurde erfolgreich eingelesen"}), 200
 
 
+@employees_routes.post("/api/employees_csv/jobs")
+@login_required(groups=[UserGroup.verwaltung])
+@swag_from(
+    {
+        "tags": ["employees"],
+        "parameters": [
+            {
+                "name": "file",
+                "in": "formData",
+                "type": "file",
+                "required": True,
+                "description": "Die CSV-Datei, die importiert werden soll.",
+            },
+            {
+                "in": "query",
+                "name": "mode",
+                "description": "create (default): only add new employees, sync: also update changed ones",
+                "type": "string",
+                "enum": ["create", "sync"],
+                "required": False,
+            },
+            {
+                "in": "query",
+                "name": "hide-missing",
+                "description": "sync only: hide employees that are not in the file (skipped if a row is faulty)",
+                "type": "boolean",
+                "required": False,
+            },
+        ],
+        "responses": {
+            202: {
+                "description": "Import queued, poll the progress with GET /api/employees_csv/jobs/<id>",
+                "schema": ImportJobFullSchema,
+            },
+            400: {"description": "Validation error or no file in request"},
+            415: {"description": "Wrong file format: need CSV"},
+            429: {"description": "User has too many pending or running import jobs"},
+        },
+    }
+)
+def create_csv_import_job():
+    """Import the employees of a CSV file in the background
+    Like POST /api/employees_csv, but the file is processed by a background worker
+    in batches. Faulty rows are skipped and reported with their line number.
+    ---
+    """
+
+    try:
+        params = EmployeeCsvImportSchema().load(request.args)
+    except ValidationError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Validierungsfehler",
+                description="Format der Daten in der Query nicht valide",
+                details=err.messages,
+            )
+        )
+
+    file = _get_csv_file()
+
+    try:
+        job = ImportJobsService.create_job(
+            file, params["mode"], params["hide_missing"], g.user_id
+        )
+    except ActionNotPossibleError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=429,
+                title="Zu viele Importe",
+                description="Bitte warten Sie, bis ältere Importe abgeschlossen sind",
+                details=str(err),
+            )
+        )
+
+    response = make_response(ImportJobFullSchema().dump(job), 202)
+    response.headers["Location"] = f"/api/employees_csv/jobs/{job.id}"
+    return response
+
+
+@employees_routes.get("/api/employees_csv/jobs/<uuid:job_id>")
+@login_required(groups=[UserGroup.verwaltung])
+@swag_from(
+    {
+        "tags": ["employees"],
+        "parameters": [
+            {
+                "in": "path",
+                "name": "job_id",
+                "required": True,
+                "schema": {"type": "string", "format": "uuid"},
+            }
+        ],
+        "responses": {
+            200: {
+                "description": "Progress and result of the import",
+                "schema": ImportJobFullSchema,
+            },
+            404: {"description": "Import job not found or expired"},
+        },
+    }
+)
+def get_csv_import_job(job_id: UUID):
+    """Get the progress of a CSV import
+    Rows processed so far, the number of changed employees and the faulty rows
+    ---
+    """
+
+    try:
+        job = ImportJobsService.get_job(job_id, g.user_id)
+    except NotFoundError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=404,
+                title="Import nicht gefunden",
+                description="Der Import existiert nicht oder ist abgelaufen",
+                details=str(err),
+            )
+        )
+
+    return ImportJobFullSchema().dump(job)
+
+
+def _get_csv_file() -> FileStorage:
+    """Get the uploaded CSV file of the request or abort"""
+
+    if "file" not in request.files:
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Kein Dateiteil in der Anfrage",
+                description="In der Anfrage gab es keinen Dateibereich",
+            )
+        )
+
+    file = request.files["file"]
+
+    if file.filename == "":
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Keine Datei ausgewählt",
+                description="Es wurde keine Datei hochgeladen",
+            )
+        )
+
+    file.stream.seek(0)
+    if not ("." in file.filename and file.filename.rsplit(".", 1)[1].lower() == "csv"):
+        abort_with_err(
+            ErrMsg(
+                status_code=415,
+                title="Falsches Dateiformat",
+                description="Es werden nur .csv Dateien zugelassen",
+            )
+        )
+
+    return file
+
+
 @employees_routes.put("/api/employees/<uuid:employee_id>")
 @login_required(groups=[UserGroup.verwaltung])
 @swag_from(
@@ -409,7 +627,7 @@ def delete_employee(employee_id: UUID):
     """
     try:
         employee = EmployeesService.get_employee_by_id(
-            employee_id, g.user_group, g.user_id
+            employee_id, g.user_group, g.user_id, include_hidden=True
         )
     except NotFoundError as err:
         abort_with_err(
@@ -441,7 +659,7 @@ def delete_employee(employee_id: UUID):
                         "employee_ids": {
                             "type": "array",
                             "items": {"type": "string", "format": "uuid"},
-                            "description": "List of employee IDs to generate QR codes for",
+                            "description": "List of employee IDs to delete",
                         }
                     },
                 },
@@ -455,7 +673,7 @@ def delete_employee(employee_id: UUID):
                     "properties": {"message": {"type": "string"}},
                 },
             },
-            404: {"description": "Employee not found"},
+            404: {"description": "Employee not found, no employee was deleted"},
         },
     }
 )
@@ -485,30 +703,26 @@ def delete_list_of_employees():
             )
         )
 
-    for employee_id in employee_ids:
-        try:
-            employee = EmployeesService.get_employee_by_id(
-                employee_id, g.user_group, g.user_id
-            )
-        except NotFoundError as err:
-            abort_with_err(
-                ErrMsg(
-                    status_code=404,
-                    title="Mitarbeiter:in nicht gefunden",
-                    description="Ein oder mehrere Mitarbeiter wurden nicht gefunden",
-                    details=str(err),
-                )
+    try:
+        EmployeesService.delete_employees(employee_ids, g.user_group, g.user_id)
+    except NotFoundError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=404,
+                title="Mitarbeiter:in nicht gefunden",
+                description="Ein oder mehrere Mitarbeiter wurden nicht gefunden",
+                details=str(err),
             )
-        except AccessDeniedError as err:
-            abort_with_err(
-                ErrMsg(
-                    status_code=403,
-                    title="Zugriff verweigert",
-                    description="Sie haben keine Berechtigung für diese Operation",
-                    details=str(err),
-                )
+        )
+    except AccessDeniedError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=403,
+                title="Zugriff verweigert",
+                description="Sie haben keine Berechtigung für diese Operation",
+                details=str(err),
             )
-        EmployeesService.delete_employee(employee)
+        )
 
     return jsonify({"message": "Mitarbeiter:innen erfolgreich gelöscht"})
 
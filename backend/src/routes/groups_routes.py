@@ -11,6 +11,7 @@ from src.schemas.group_schemas import (
 from src.services.groups_service import GroupsService
 from src.utils.auth_utils import login_required
 from src.utils.error import ErrMsg, abort_with_err
+from src.utils.etag_utils import conditional_get
 from src.utils.exceptions import AlreadyExistsError, NotFoundError, BadValueError
 
 groups_routes = Blueprint("groups_routes", __name__)
@@ -296,10 +297,12 @@ def get_group_by_id(group_id: UUID):
                     "type": "array",
                     "items": GroupFullNestedSchema,
                 },
-            }
+            },
+            304: {"description": "Not modified since the ETag in If-None-Match"},
         },
     }
 )
+@conditional_get(GroupsService.get_change_scopes)
 def get_groups():
     """Get all groups for respective user."""
 
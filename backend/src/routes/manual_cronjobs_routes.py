@@ -1,8 +1,10 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from flasgger import swag_from
 from flask import current_app as app
+from marshmallow import ValidationError
 
-from src.utils.cronjobs import push_orders_to_next_table
+from src.schemas.reports_schemas import StoredInvoicesFilterSchema
+from src.utils.cronjobs import push_orders_to_next_table, store_month_end_invoices
 from src.utils.auth_utils import login_required
 from src.utils.error import ErrMsg, abort_with_err
 from src.models.user import UserGroup
@@ -48,3 +50,70 @@ def write_pre_to_daily_to_old_order():
         )
 
     return jsonify({"message": "Bestellungen erfolgreich verschoben."}), 200
+
+
+@manual_cronjobs_routes.get("/api/batch/month-end-invoices")
+@login_required(groups=[UserGroup.verwaltung])
+@swag_from(
+    {
+        "tags": ["manual_cronjobs"],
+        "parameters": [
+            {
+                "in": "query",
+                "name": "month",
+                "description": "The month to bill (YYYY-MM), default: the last closed month",
+                "required": False,
+                "schema": {"type": "string"},
+                "example": "2024-12",
+            },
+        ],
+        "responses": {
+            200: {
+                "description": "Renders and stores all invoices of a month",
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "message": {"type": "string"},
+                        "stored": {"type": "integer"},
+                    },
+                },
+            },
+            400: {"description": "Validation error"},
+        },
+    }
+)
+def write_month_end_invoices():
+    """
+    Renders and stores all person, group and location invoices of a month
+    """
+
+    try:
+        query_params = StoredInvoicesFilterSchema(only=("month",), partial=True).load(
+            request.args
+        )
+    except ValidationError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Validierungsfehler",
+                description="Format der Daten in der Query nicht valide",
+                details=err.messages,
+            )
+        )
+
+    try:
+        stored = store_month_end_invoices(app, query_params.get("month"))
+    except Exception as e:
+        abort_with_err(
+            ErrMsg(
+                status_code=500,
+                title="Internal Server Error",
+                description="Rechnungen konnten nicht erstellt werden.",
+                details=str(e),
+            )
+        )
+
+    return (
+        jsonify({"message": "Rechnungen erfolgreich erstellt.", "stored": stored}),
+        200,
+    )
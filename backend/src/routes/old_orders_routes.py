@@ -1,12 +1,15 @@
 from marshmallow import ValidationError, Schema, fields
 from src.utils.auth_utils import login_required
 from src.utils.error import ErrMsg, abort_with_err
-from flask import Blueprint, jsonify, request
+import json
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flasgger import swag_from
 from src.services.old_orders_service import OrdersFilters, OldOrdersService
 from src.models.user import UserGroup
 from src.schemas.old_orders_schemas import OldOrderFilterSchema, OldOrderFullSchema
-from src.utils.exceptions import NotFoundError
+from src.utils.exceptions import BadValueError, NotFoundError
+from src.schemas.pagination_schemas import PAGINATION_PARAMETERS
+from src.utils.pagination import Pagination, set_pagination_headers
 
 
 old_orders_routes = Blueprint("old_orders_routes", __name__)
@@ -72,10 +75,19 @@ old_orders_routes = Blueprint("old_orders_routes", __name__)
                 "required": False,
                 "example": "2024-12-08",
             },
+            *PAGINATION_PARAMETERS,
+            {
+                "in": "query",
+                "name": "stream",
+                "description": "stream all orders as newline-delimited JSON (application/x-ndjson), limit and cursor are ignored",
+                "type": "boolean",
+                "required": False,
+                "example": False,
+            },
         ],
         "responses": {
             200: {
-                "description": "Returns a list of orders",
+                "description": "Returns a list of orders, sorted by date",
                 "schema": {
                     "type": "array",
                     "items": OldOrderFullSchema,
@@ -89,11 +101,14 @@ old_orders_routes = Blueprint("old_orders_routes", __name__)
 def get_old_orders():
     """Get all old-orders
     Returns a list of old-orders. You can (optionally) filter by person, location, specific date, date range, and group. Filters can be **combined**.
+    Large results can be fetched page by page with limit and cursor, or streamed with stream=true.
     ---
     """
 
     try:
         query_params = OldOrderFilterSchema().load(request.args)
+        pagination = Pagination.pop_from(query_params)
+        stream = query_params.pop("stream", False)
         filters = OrdersFilters(**query_params)
     except ValidationError as err:
         abort_with_err(
@@ -105,7 +120,21 @@ def get_old_orders():
             )
         )
     try:
-        orders = OldOrdersService.get_old_orders(filters)
+        if stream:
+            orders = OldOrdersService.stream_old_orders(filters)
+        elif pagination:
+            page = OldOrdersService.get_old_orders_page(filters, pagination)
+        else:
+            orders = OldOrdersService.get_old_orders(filters)
+    except BadValueError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Ungültiger Cursor",
+                description="Der Cursor ist ungültig",
+                details=str(err),
+            )
+        )
     except NotFoundError as err:
         abort_with_err(
             ErrMsg(
@@ -115,4 +144,20 @@ def get_old_orders():
                 details=str(err),
             )
         )
+
+    if stream:
+        return Response(
+            stream_with_context(_to_ndjson(orders)), mimetype="application/x-ndjson"
+        )
+
+    if pagination:
+        response = jsonify(OldOrderFullSchema(many=True).dump(page.items))
+        return set_pagination_headers(response, page)
+
     return OldOrderFullSchema(many=True).dump(orders)
+
+
+def _to_ndjson(orders):
+    schema = OldOrderFullSchema()
+    for order in orders:
+        yield json.dumps(schema.dump(order)) + "\n"
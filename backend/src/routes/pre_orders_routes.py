@@ -1,8 +1,8 @@
 from uuid import UUID
 from marshmallow import ValidationError
 from src.schemas.pre_orders_schemas import (
-    OrdersFilterSchema,
     PreOrderFullSchema,
+    PreOrdersFilterSchema,
     PreOrdersByGroupLeaderSchema,
 )
 from src.utils.exceptions import (
@@ -12,7 +12,10 @@ from src.utils.exceptions import (
     BadValueError,
     AlreadyExistsError,
 )
+from src.schemas.pagination_schemas import PAGINATION_PARAMETERS
 from src.utils.auth_utils import login_required
+from src.utils.etag_utils import conditional_get
+from src.utils.pagination import Pagination, set_pagination_headers
 from src.utils.error import ErrMsg, abort_with_err
 from flask import Blueprint, jsonify, request, g
 from flasgger import swag_from
@@ -90,6 +93,7 @@ pre_orders_routes = Blueprint("pre_orders_routes", __name__)
                 "required": False,
                 "example": "2024-12-08",
             },
+            *PAGINATION_PARAMETERS,
         ],
         "responses": {
             200: {
@@ -99,10 +103,12 @@ pre_orders_routes = Blueprint("pre_orders_routes", __name__)
                     "items": PreOrderFullSchema,
                 },
             },
+            304: {"description": "Not modified since the ETag in If-None-Match"},
             400: {"description": "Bad request"},
         },
     }
 )
+@conditional_get(lambda: PreOrdersService.get_change_scopes(g.user_id, g.user_group))
 def get_pre_orders():
     """Get all pre-orders
     Returns a list of pre-orders. You can (optionally) filter by person, location, specific date, date range, and group. Filters can be **combined**.
@@ -110,7 +116,8 @@ def get_pre_orders():
     """
 
     try:
-        query_params = OrdersFilterSchema().load(request.args)
+        query_params = PreOrdersFilterSchema().load(request.args)
+        pagination = Pagination.pop_from(query_params)
         filters = OrdersFilters(**query_params)
     except ValidationError as err:
         abort_with_err(
@@ -122,6 +129,22 @@ def get_pre_orders():
             )
         )
 
+    if pagination:
+        try:
+            page = PreOrdersService.get_pre_orders_page(
+                filters, g.user_id, g.user_group, pagination
+            )
+        except BadValueError as err:
+            abort_with_err(
+                ErrMsg(
+                    status_code=400,
+                    title="Ungültiger Cursor",
+                    description="Der Cursor ist ungültig",
+                    details=str(err),
+                )
+            )
+        return set_pagination_headers(jsonify(page.items), page), 200
+
     pre_orders = PreOrdersService.get_pre_orders(filters, g.user_id, g.user_group)
     return jsonify(pre_orders), 200
 
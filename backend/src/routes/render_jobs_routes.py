@@ -0,0 +1,220 @@
+from io import BytesIO
+from uuid import UUID
+from flask import Blueprint, g, make_response, request, send_file
+from flasgger import swag_from
+from marshmallow import ValidationError
+
+from src.schemas.render_jobs_schemas import RenderJobCreateSchema, RenderJobFullSchema
+from src.services.render_jobs_service import RenderJobsService
+from src.utils.auth_utils import login_required
+from src.utils.error import ErrMsg, abort_with_err
+from src.utils.exceptions import (
+    AccessDeniedError,
+    ActionNotPossibleError,
+    BadValueError,
+    NotFoundError,
+)
+
+
+render_jobs_routes = Blueprint("render_jobs_routes", __name__)
+
+
+@render_jobs_routes.post("/api/render-jobs")
+@login_required()
+@swag_from(
+    {
+        "tags": ["render_jobs"],
+        "parameters": [
+            {
+                "in": "body",
+                "name": "body",
+                "required": True,
+                "schema": RenderJobCreateSchema,
+            }
+        ],
+        "responses": {
+            202: {
+                "description": "Render job created, poll the status with GET /api/render-jobs/<id>",
+                "schema": RenderJobFullSchema,
+            },
+            400: {"description": "Validation error"},
+            403: {"description": "User is not allowed to render this document"},
+            429: {"description": "User has too many pending or running render jobs"},
+        },
+    }
+)
+def create_render_job():
+    """Create a job to render a report, an invoice or QR codes in the background
+
+    The same user groups as for the synchronous endpoints are allowed.
+
+    Authentication: required
+    Authorization: depends on the job type
+    ---
+    """
+
+    try:
+        body = RenderJobCreateSchema().load(request.json)
+    except ValidationError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Validierungsfehler",
+                description="Format der Daten im Request-Body nicht valide",
+                details=err.messages,
+            )
+        )
+
+    job_type = body.pop("job_type")
+
+    try:
+        job = RenderJobsService.create_job(
+            job_type=job_type,
+            params=body,
+            user_id=g.user_id,
+            user_group=g.user_group,
+        )
+    except BadValueError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Validierungsfehler",
+                description="Parameter für den Auftrag nicht valide",
+                details=str(err),
+            )
+        )
+    except AccessDeniedError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=403,
+                title="Zugriff verweigert",
+                description="Sie haben keine Berechtigung, dieses Dokument zu erstellen",
+                details=str(err),
+            )
+        )
+    except ActionNotPossibleError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=429,
+                title="Zu viele Aufträge",
+                description="Bitte warten Sie, bis ältere Aufträge abgeschlossen sind",
+                details=str(err),
+            )
+        )
+
+    response = make_response(RenderJobFullSchema().dump(job), 202)
+    response.headers["Location"] = f"/api/render-jobs/{job.id}"
+    return response
+
+
+@render_jobs_routes.get("/api/render-jobs/<uuid:job_id>")
+@login_required()
+@swag_from(
+    {
+        "tags": ["render_jobs"],
+        "parameters": [
+            {
+                "in": "path",
+                "name": "job_id",
+                "required": True,
+                "schema": {"type": "string"},
+            }
+        ],
+        "responses": {
+            200: {
+                "description": "Status of the render job",
+                "schema": RenderJobFullSchema,
+            },
+            404: {"description": "Render job not found or expired"},
+        },
+    }
+)
+def get_render_job(job_id: UUID):
+    """Get the status of a render job
+
+    Authentication: required
+    Authorization: Only the user who created the job
+    ---
+    """
+
+    try:
+        job = RenderJobsService.get_job(job_id, g.user_id)
+    except NotFoundError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=404,
+                title="Auftrag nicht gefunden",
+                description="Der Auftrag existiert nicht oder ist abgelaufen",
+                details=str(err),
+            )
+        )
+
+    return RenderJobFullSchema().dump(job)
+
+
+@render_jobs_routes.get("/api/render-jobs/<uuid:job_id>/download")
+@login_required()
+@swag_from(
+    {
+        "tags": ["render_jobs"],
+        "parameters": [
+            {
+                "in": "path",
+                "name": "job_id",
+                "required": True,
+                "schema": {"type": "string"},
+            }
+        ],
+        "responses": {
+            200: {
+                "description": "The rendered document",
+                "content": {
+                    "application/pdf": {
+                        "schema": {"type": "string", "format": "binary"}
+                    }
+                },
+            },
+            404: {"description": "Render job not found or expired"},
+            409: {"description": "Render job is not finished or failed"},
+        },
+    }
+)
+def download_render_job(job_id: UUID):
+    """Download the document of a finished render job
+
+    Authentication: required
+    Authorization: Only the user who created the job
+    ---
+    """
+
+    try:
+        job = RenderJobsService.get_job_result(job_id, g.user_id)
+    except NotFoundError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=404,
+                title="Auftrag nicht gefunden",
+                description="Der Auftrag existiert nicht oder ist abgelaufen",
+                details=str(err),
+            )
+        )
+    except ActionNotPossibleError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=409,
+                title="Dokument nicht verfügbar",
+                description="Der Auftrag ist noch nicht abgeschlossen oder fehlgeschlagen",
+                details=str(err),
+            )
+        )
+
+    response = make_response(
+        send_file(
+            BytesIO(job.result),
+            mimetype=job.mimetype,
+            as_attachment=True,
+            download_name=job.download_name,
+        )
+    )
+    response.headers["Access-Control-Expose-Headers"] = "Content-Disposition"
+    return response
@@ -4,11 +4,18 @@ from src.utils.error import ErrMsg, abort_with_err
 from flask import Blueprint, request, g
 from flasgger import swag_from
 from datetime import datetime
+from uuid import UUID
 from src.models.user import UserGroup
 from src.repositories.orders_repository import OrdersFilters
 from src.services.reports_service import ReportsService
 from src.utils.exceptions import NotFoundError, AccessDeniedError, BadValueError
+from src.utils.report_export import CSV_MIMETYPE, EXPORT_FORMATS, XLSX_MIMETYPE
 from src.schemas.pre_orders_schemas import OrdersFilterSchema
+from src.schemas.reports_schemas import (
+    InvoiceSummarySchema,
+    StoredInvoiceSchema,
+    StoredInvoicesFilterSchema,
+)
 
 reports_routes = Blueprint("reports_routes", __name__)
 
@@ -47,6 +54,14 @@ reports_routes = Blueprint("reports_routes", __name__)
                 "required": True,
                 "example": "2024-12-08",
             },
+            {
+                "in": "query",
+                "name": "format",
+                "description": "pdf (default), or csv/xlsx with one row per date and location",
+                "type": "string",
+                "enum": ["pdf", *EXPORT_FORMATS],
+                "required": False,
+            },
         ],
         "responses": {
             200: {
@@ -54,7 +69,9 @@ reports_routes = Blueprint("reports_routes", __name__)
                 "content": {
                     "application/pdf": {
                         "schema": {"type": "string", "format": "binary"}
-                    }
+                    },
+                    CSV_MIMETYPE: {"schema": {"type": "string"}},
+                    XLSX_MIMETYPE: {"schema": {"type": "string", "format": "binary"}},
                 },
             },
             400: {"description": "Validation error"},
@@ -66,6 +83,17 @@ def get_report():
 
     ds_str = request.args.get("date-start")
     de_str = request.args.get("date-end")
+    export_format = request.args.get("format", "pdf")
+
+    if export_format != "pdf" and export_format not in EXPORT_FORMATS:
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Validierungsfehler",
+                description="Unbekanntes Format für den Bericht",
+                details=f"Erlaubt sind pdf, {', '.join(EXPORT_FORMATS)}",
+            )
+        )
 
     try:
         location_id = request.args.get("location_id")
@@ -91,6 +119,7 @@ def get_report():
             filters=filters,
             user_id=g.user_id,
             user_group=g.user_group,
+            export_format=export_format,
         )
 
     except BadValueError as err:
@@ -234,3 +263,211 @@ def get_invoices():
                 details=err.messages,
             )
         )
+
+
+@reports_routes.get("/api/invoices/summary")
+@login_required(groups=[UserGroup.verwaltung])
+@swag_from(
+    {
+        "tags": ["reports"],
+        "parameters": [
+            {
+                "in": "query",
+                "name": "location-id",
+                "description": "Choose the location for the invoice",
+                "required": False,
+                "schema": {"type": "string", "format": "uuid"},
+            },
+            {
+                "in": "query",
+                "name": "group-id",
+                "description": "Choose the group for the invoice",
+                "required": False,
+                "schema": {"type": "string", "format": "uuid"},
+            },
+            {
+                "in": "query",
+                "name": "person-id",
+                "description": "Choose the person for the invoice",
+                "required": False,
+                "schema": {"type": "string", "format": "uuid"},
+            },
+            {
+                "in": "query",
+                "name": "date-start",
+                "description": "Insert the start date for the invoice",
+                "required": True,
+                "schema": {"type": "string", "format": "date"},
+                "example": "2024-12-01",
+            },
+            {
+                "in": "query",
+                "name": "date-end",
+                "description": "Insert the end date for the invoice",
+                "required": True,
+                "schema": {"type": "string", "format": "date"},
+                "example": "2024-12-31",
+            },
+        ],
+        "responses": {
+            200: {
+                "description": "Line items and totals of the invoice",
+                "schema": InvoiceSummarySchema,
+            },
+            400: {"description": "Validation error"},
+            404: {"description": "Person, group or location not found"},
+        },
+    }
+)
+def get_invoice_summary():
+    """Get the line items and totals of an invoice as JSON, without rendering the PDF
+
+    Authentication: required
+    Authorization: Verwaltung
+    ---
+    """
+
+    try:
+        query_params = OrdersFilterSchema().load(request.args)
+    except ValidationError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Validierungsfehler",
+                description="Format der Daten in der Query nicht valide",
+                details=err.messages,
+            )
+        )
+
+    try:
+        summary = ReportsService.get_invoice_summary(OrdersFilters(**query_params))
+    except BadValueError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Validierungsfehler",
+                description="Es müssen Start- und Enddatum und genau eine ID übergeben werden. (Standort, Gruppe oder Person)",
+                details=str(err),
+            )
+        )
+    except NotFoundError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=404,
+                title="Wurde nicht gefunden",
+                description="Die übergebene ID wurde nicht gefunden",
+                details=str(err),
+            )
+        )
+
+    return InvoiceSummarySchema().dump(summary)
+
+
+@reports_routes.get("/api/invoices/stored")
+@login_required(groups=[UserGroup.verwaltung])
+@swag_from(
+    {
+        "tags": ["reports"],
+        "parameters": [
+            {
+                "in": "query",
+                "name": "month",
+                "description": "The billed month (YYYY-MM)",
+                "required": True,
+                "schema": {"type": "string"},
+                "example": "2024-12",
+            },
+            {
+                "in": "query",
+                "name": "scope",
+                "description": "Only invoices for persons, groups or locations",
+                "required": False,
+                "schema": {
+                    "type": "string",
+                    "enum": ["person", "group", "location"],
+                },
+            },
+        ],
+        "responses": {
+            200: {
+                "description": "Invoices stored by the month-end batch run",
+                "schema": {"type": "array", "items": StoredInvoiceSchema},
+            },
+            400: {"description": "Validation error"},
+        },
+    }
+)
+def get_stored_invoices():
+    """Get the invoices of a closed month that were rendered by the month-end batch run
+
+    Authentication: required
+    Authorization: Verwaltung
+    ---
+    """
+
+    try:
+        query_params = StoredInvoicesFilterSchema().load(request.args)
+    except ValidationError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Validierungsfehler",
+                description="Format der Daten in der Query nicht valide",
+                details=err.messages,
+            )
+        )
+
+    invoices = ReportsService.get_stored_invoices(
+        query_params["month"], query_params.get("scope")
+    )
+    return StoredInvoiceSchema(many=True).dump(invoices)
+
+
+@reports_routes.get("/api/invoices/stored/<uuid:invoice_id>")
+@login_required(groups=[UserGroup.verwaltung])
+@swag_from(
+    {
+        "tags": ["reports"],
+        "parameters": [
+            {
+                "in": "path",
+                "name": "invoice_id",
+                "required": True,
+                "schema": {"type": "string", "format": "uuid"},
+            }
+        ],
+        "responses": {
+            200: {
+                "description": "The stored invoice",
+                "content": {
+                    "application/pdf": {
+                        "schema": {"type": "string", "format": "binary"}
+                    }
+                },
+            },
+            404: {"description": "Invoice not found"},
+        },
+    }
+)
+def get_stored_invoice(invoice_id: UUID):
+    """Download an invoice stored by the month-end batch run
+
+    The file is served as it was rendered, use up_to_date of the list to check
+    whether it is still valid.
+
+    Authentication: required
+    Authorization: Verwaltung
+    ---
+    """
+
+    try:
+        return ReportsService.get_stored_invoice_file(invoice_id)
+    except NotFoundError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=404,
+                title="Rechnung nicht gefunden",
+                description="Es wurde keine gespeicherte Rechnung mit dieser ID gefunden",
+                details=str(err),
+            )
+        )
@@ -2,7 +2,7 @@ from uuid import UUID
 
 from flask import Blueprint, g, jsonify, request
 from flasgger import swag_from
-from marshmallow import ValidationError
+from marshmallow import EXCLUDE, ValidationError
 
 from src.services.locations_service import LocationsService
 from src.schemas.users_schemas import (
@@ -11,14 +11,17 @@ from src.schemas.users_schemas import (
     UserFullSchema,
 )
 from src.models.user import UserGroup
+from src.schemas.pagination_schemas import PAGINATION_PARAMETERS, PaginationSchema
 from src.services.users_service import UsersService
 from src.utils.exceptions import (
     NotFoundError,
     AlreadyExistsError,
     ActionNotPossibleError,
+    BadValueError,
 )
 from src.utils.auth_utils import login_required
 from src.utils.error import ErrMsg, abort_with_err
+from src.utils.pagination import Pagination, set_pagination_headers
 
 
 users_routes = Blueprint("users_routes", __name__)
@@ -32,12 +35,14 @@ users_routes = Blueprint("users_routes", __name__)
         "tags": ["users"],
         "parameters": [
             {"in": "query", "name": "user_group_filter", "schema": {"type": "string"}},
+            *PAGINATION_PARAMETERS,
         ],
         "responses": {
             200: {
                 "description": "Returns a list of all users",
                 "schema": {"type": "array", "items": UserFullSchema},
-            }
+            },
+            400: {"description": "Bad request"},
         },
     }
 )
@@ -50,6 +55,36 @@ def get_users():
     ---
     """
     user_group_filter = request.args.get("user_group_filter")
+
+    try:
+        pagination = Pagination.pop_from(
+            PaginationSchema().load(request.args, unknown=EXCLUDE)
+        )
+    except ValidationError as err:
+        abort_with_err(
+            ErrMsg(
+                status_code=400,
+                title="Validierungsfehler",
+                description="Format der Daten in der Query nicht valide",
+                details=err.messages,
+            )
+        )
+
+    if pagination:
+        try:
+            page = UsersService.get_users_page(pagination, user_group_filter)
+        except BadValueError as err:
+            abort_with_err(
+                ErrMsg(
+                    status_code=400,
+                    title="Ungültiger Cursor",
+                    description="Der Cursor ist ungültig",
+                    details=str(err),
+                )
+            )
+        response = jsonify(UserFullSchema(many=True).dump(page.items))
+        return set_pagination_headers(response, page)
+
     users = UsersService.get_users(user_group_filter)
 
     return UserFullSchema(many=True).dump(users)
@@ -1,5 +1,5 @@
 from flasgger import Schema, fields
-from marshmallow.validate import Length
+from marshmallow.validate import Length, OneOf
 
 
 class EmployeeBaseSchema(Schema):
@@ -34,3 +34,31 @@ class EmployeeFullNestedSchema(EmployeeBaseSchema):
 
     group = fields.Nested("GroupLocationNestedSchema", required=True, dump_only=True)
     created = fields.DateTime(required=True, format="timestamp", dump_only=True)
+
+
+class EmployeeCsvImportSchema(Schema):
+    """Query parameters of the employee CSV import
+
+    In mode "create" new employee numbers are added and existing ones are
+    skipped. In mode "sync" the file is the full list of employees: changed
+    names and groups are updated and, with hide-missing, employees missing in
+    the file are hidden. Hidden employees are left out of all employee lists
+    and lookups, so they can no longer be ordered for. A sync shows them again
+    when their number is back in the file, Verwaltung can delete them by ID.
+    """
+
+    mode = fields.String(
+        required=False, load_default="create", validate=OneOf(["create", "sync"])
+    )
+    hide_missing = fields.Boolean(
+        data_key="hide-missing", required=False, load_default=False
+    )
+
+
+class EmployeeSyncResultSchema(Schema):
+    """Number of employees changed by a CSV sync"""
+
+    created = fields.Integer(required=True)
+    updated = fields.Integer(required=True)
+    hidden = fields.Integer(required=True)
+    unchanged = fields.Integer(required=True)
@@ -0,0 +1,33 @@
+from flasgger import Schema, fields
+
+from src.models.import_job import ImportJobStatus
+
+
+class ImportJobErrorSchema(Schema):
+    """Schema representing a row of a CSV file that could not be imported"""
+
+    line = fields.Integer(required=True, dump_only=True)
+    message = fields.String(required=True, dump_only=True)
+
+
+class ImportJobFullSchema(Schema):
+    """Schema representing the progress and the result of an import job"""
+
+    id = fields.UUID(required=True, dump_only=True)
+    file_name = fields.String(required=True, dump_only=True)
+    mode = fields.String(required=True, dump_only=True)
+    hide_missing = fields.Boolean(required=True, dump_only=True)
+    status = fields.Enum(ImportJobStatus, required=True, dump_only=True)
+    error = fields.String(required=False, dump_only=True)
+    rows_processed = fields.Integer(required=True, dump_only=True)
+    created_count = fields.Integer(required=True, dump_only=True)
+    updated_count = fields.Integer(required=True, dump_only=True)
+    hidden_count = fields.Integer(required=True, dump_only=True)
+    unchanged_count = fields.Integer(required=True, dump_only=True)
+    error_count = fields.Integer(required=True, dump_only=True)
+    errors = fields.List(
+        fields.Nested(ImportJobErrorSchema), required=True, dump_only=True
+    )
+    created = fields.DateTime(required=True, dump_only=True)
+    finished = fields.DateTime(required=False, dump_only=True)
+    expires = fields.DateTime(required=True, dump_only=True)
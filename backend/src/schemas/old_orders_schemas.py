@@ -3,9 +3,10 @@ from uuid import UUID
 from marshmallow.validate import Length
 
 from src.models.maindish import MainDish
+from src.schemas.pagination_schemas import PaginationSchema
 
 
-class OldOrderFilterSchema(Schema):
+class OldOrderFilterSchema(PaginationSchema):
     """
     Schema for the GET /api/old-orders endpoint
     Uses ISO 8601-formatted date strings (YYYY-MM-DD)
@@ -17,6 +18,7 @@ class OldOrderFilterSchema(Schema):
     date = fields.Date(data_key="date", required=False)
     date_start = fields.Date(data_key="date-start", required=False)
     date_end = fields.Date(data_key="date-end", required=False)
+    stream = fields.Boolean(required=False)
 
 
 class OldOrderBaseSchema(Schema):
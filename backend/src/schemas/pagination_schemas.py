@@ -0,0 +1,46 @@
+from flasgger import Schema, fields
+from marshmallow.validate import Range
+
+from src.constants import PAGINATION_MAX_LIMIT
+
+
+class PaginationSchema(Schema):
+    """
+    Query parameters shared by all paginated list endpoints
+
+    Without limit, the full list is returned.
+    """
+
+    limit = fields.Integer(
+        required=False, validate=Range(min=1, max=PAGINATION_MAX_LIMIT)
+    )
+    cursor = fields.String(required=False)
+    with_total = fields.Boolean(data_key="with-total", required=False)
+
+
+PAGINATION_PARAMETERS = [
+    {
+        "in": "query",
+        "name": "limit",
+        "description": "maximum number of items to return. The cursor of the next page is returned in the `X-Next-Cursor` header",
+        "type": "integer",
+        "required": False,
+        "example": 100,
+    },
+    {
+        "in": "query",
+        "name": "cursor",
+        "description": "cursor from the `X-Next-Cursor` header of the previous page",
+        "type": "string",
+        "required": False,
+    },
+    {
+        "in": "query",
+        "name": "with-total",
+        "description": "return the total number of items in the `X-Total-Count` header (only with limit)",
+        "type": "boolean",
+        "required": False,
+        "example": False,
+    },
+]
+"""Swagger documentation of the PaginationSchema query parameters"""
@@ -2,6 +2,7 @@ from flasgger import Schema, fields  # this is a wrapper for marshmallow schemas
 
 from src.schemas.employee_schemas import EmployeeBaseSchema
 from src.models.maindish import MainDish
+from src.schemas.pagination_schemas import PaginationSchema
 
 
 class OrdersFilterSchema(Schema):
@@ -19,6 +20,14 @@ class OrdersFilterSchema(Schema):
     date_end = fields.Date(data_key="date-end", required=False)
 
 
+class PreOrdersFilterSchema(OrdersFilterSchema, PaginationSchema):
+    """
+    Query parameters for the GET /api/pre-orders endpoint
+
+    Filters for orders plus limit, cursor and with-total for pagination.
+    """
+
+
 class PreOrderBaseSchema(Schema):
     """Schema representing data returned for every pre-order"""
 
@@ -0,0 +1,42 @@
+from flasgger import Schema, fields
+
+from src.models.render_job import RenderJobStatus, RenderJobType
+
+
+class RenderJobParamsSchema(Schema):
+    """Schema representing the parameters of a render job
+
+    Which parameters are needed depends on the job type:
+
+    - location_report: date_start, date_end, optional location_id
+    - invoice: date_start, date_end and one of location_id, group_id, person_id
+    - group_qr_codes: group_id
+    - employee_qr_codes: optional employee_ids (default: all employees in scope)
+    """
+
+    date_start = fields.Date(required=False)
+    date_end = fields.Date(required=False)
+    location_id = fields.UUID(required=False)
+    group_id = fields.UUID(required=False)
+    person_id = fields.UUID(required=False)
+    employee_ids = fields.List(fields.UUID(), required=False)
+
+
+class RenderJobCreateSchema(RenderJobParamsSchema):
+    """Schema representing the body to create a render job"""
+
+    job_type = fields.Enum(RenderJobType, required=True)
+
+
+class RenderJobFullSchema(Schema):
+    """Schema representing a render job (without the rendered file)"""
+
+    id = fields.UUID(required=True, dump_only=True)
+    job_type = fields.Enum(RenderJobType, required=True, dump_only=True)
+    params = fields.Dict(required=True, dump_only=True)
+    status = fields.Enum(RenderJobStatus, required=True, dump_only=True)
+    error = fields.String(required=False, dump_only=True)
+    download_name = fields.String(required=False, dump_only=True)
+    created = fields.DateTime(required=True, dump_only=True)
+    finished = fields.DateTime(required=False, dump_only=True)
+    expires = fields.DateTime(required=True, dump_only=True)
@@ -1,6 +1,8 @@
 from flasgger import Schema, fields
 from uuid import UUID
 
+from src.models.stored_invoice import InvoiceScope, StoredInvoice
+
 
 class CountOrdersObject:
     def __init__(self, location_id: UUID, rot: int, blau: int, salad_option: int):
@@ -15,3 +17,100 @@ class CountOrdersSchema(Schema):
     rot = fields.Integer(required=True)
     blau = fields.Integer(required=True)
     salad_option = fields.Integer(required=True)
+
+
+class StoredInvoiceObject:
+    def __init__(self, invoice: StoredInvoice, up_to_date: bool):
+        self.id = invoice.id
+        self.month = invoice.month
+        self.scope = invoice.scope
+        self.scope_id = invoice.scope_id
+        self.download_name = invoice.download_name
+        self.size = invoice.size
+        self.created = invoice.created
+        self.up_to_date = up_to_date
+
+
+class StoredInvoicesFilterSchema(Schema):
+    """Query parameters for the list of stored invoices"""
+
+    month = fields.Date(format="%Y-%m", required=True)
+    scope = fields.Enum(InvoiceScope, required=False)
+
+
+class StoredInvoiceSchema(Schema):
+    """Schema representing an invoice stored by the month-end batch run
+
+    up_to_date is false if orders, prices, persons, groups or locations were
+    changed after the invoice was rendered. It is rendered anew on demand then.
+    """
+
+    id = fields.UUID(required=True, dump_only=True)
+    month = fields.Date(format="%Y-%m", required=True, dump_only=True)
+    scope = fields.Enum(InvoiceScope, required=True, dump_only=True)
+    scope_id = fields.UUID(required=True, dump_only=True)
+    download_name = fields.String(required=True, dump_only=True)
+    size = fields.Integer(required=True, dump_only=True)
+    created = fields.DateTime(required=True, dump_only=True)
+    up_to_date = fields.Boolean(required=True, dump_only=True)
+
+
+class InvoiceLineSchema(Schema):
+    """Schema representing a line item of an invoice (a run of days)"""
+
+    kind = fields.String(required=True, dump_only=True)
+    start = fields.Date(required=True, dump_only=True)
+    end = fields.Date(required=True, dump_only=True)
+    count = fields.Integer(required=True, dump_only=True)
+    price = fields.Float(required=True, dump_only=True)
+    total = fields.Float(required=True, dump_only=True)
+
+
+class InvoiceTotalsSchema(Schema):
+    """Counts and amounts, amount is charges minus prepayment"""
+
+    main = fields.Integer(required=True, dump_only=True)
+    salad = fields.Integer(required=True, dump_only=True)
+    nothing = fields.Integer(required=True, dump_only=True)
+    charges = fields.Float(required=True, dump_only=True)
+    prepayment = fields.Float(required=True, dump_only=True)
+    amount = fields.Float(required=True, dump_only=True)
+
+
+class InvoiceMonthSchema(InvoiceTotalsSchema):
+    """Schema representing the line items of a person in one month"""
+
+    year = fields.Integer(required=True, dump_only=True)
+    month = fields.Integer(required=True, dump_only=True)
+    lines = fields.List(fields.Nested(InvoiceLineSchema), required=True, dump_only=True)
+
+
+class BillingPersonSchema(Schema):
+    id = fields.UUID(required=True, dump_only=True)
+    first_name = fields.String(required=True, dump_only=True)
+    last_name = fields.String(required=True, dump_only=True)
+    group_id = fields.UUID(required=False, allow_none=True, dump_only=True)
+    group_name = fields.String(required=False, allow_none=True, dump_only=True)
+
+
+class PersonInvoiceSchema(InvoiceTotalsSchema):
+    """Schema representing the invoice of one person"""
+
+    person = fields.Nested(BillingPersonSchema, required=True, dump_only=True)
+    months = fields.List(
+        fields.Nested(InvoiceMonthSchema), required=True, dump_only=True
+    )
+
+
+class InvoiceSummarySchema(InvoiceTotalsSchema):
+    """Schema representing the computed invoices of a person, group or location
+
+    Groups and locations are billed as the sum of the invoices of the persons
+    with orders in the period.
+    """
+
+    date_start = fields.Date(required=True, dump_only=True)
+    date_end = fields.Date(required=True, dump_only=True)
+    persons = fields.List(
+        fields.Nested(PersonInvoiceSchema), required=True, dump_only=True
+    )
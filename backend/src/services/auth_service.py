@@ -1,17 +1,21 @@
 """Service for authorization and session management."""
 
 from uuid import UUID
+import hashlib
 import jwt
 import secrets
 from datetime import datetime, timezone
 from argon2 import PasswordHasher
+from prometheus_client import Counter
 from src.constants import (
     AUTHENTICATION_TOKEN_AUDIENCE,
+    AUTHENTICATION_TOKEN_CACHE_SIZE,
     AUTHENTICATION_TOKEN_DURATION,
     GEN_PASSWORD_ALPHABET,
     GEN_PASSWORD_LENGTH,
     REFRESH_TOKEN_DURATION,
     REFRESH_TOKEN_LENGTH,
+    REFRESH_TOKEN_REUSE_GRACE_PERIOD,
 )
 from src.repositories.refresh_token_session_repository import (
     RefreshTokenSessionRepository,
@@ -25,9 +29,23 @@ from src.utils.exceptions import (
     InvalidCredentialsException,
     UnauthenticatedException,
 )
+from src.utils.lru_cache import LRUCache
 from flask import current_app as app
 
 
+auth_token_cache_hit_counter = Counter(
+    "flask_auth_token_cache_hit_counter",
+    "Total number of authentication tokens found in the verified token cache",
+)
+auth_token_cache_miss_counter = Counter(
+    "flask_auth_token_cache_miss_counter",
+    "Total number of authentication tokens that had to be decoded and verified",
+)
+
+# Bereits geprüfte Auth-Tokens (pro Worker) bis zu ihrem Ablauf ("exp")
+verified_auth_tokens = LRUCache(AUTHENTICATION_TOKEN_CACHE_SIZE)
+
+
 class AuthService:
     """Service to handle user authentication"""
 
@@ -88,10 +106,13 @@ class AuthService:
 
         Otherwise, the refresh token is used to generate a new authentication token.
         A rotation of refresh tokens is implemented to prevent replay attacks. Both
-        new tokens are returned to be stored on the clients side.
+        new tokens are returned to be stored on the clients side. The old token is
+        marked as used and the new one is created in a single transaction.
 
         If the refresh token is simply invalid, an UnauthenticatedException is raised.
         When the refresh token was used before, the user account will be locked.
+        Tokens used by a parallel request within the last few seconds are answered
+        with the token that replaced them instead.
 
         :param auth_token: The authentication token
         :param refresh_token: The refresh token
@@ -110,6 +131,13 @@ class AuthService:
 
         # Validate auth token
         if auth_token is not None:
+            cache_key = AuthService.__auth_token_cache_key(auth_token, jwt_secret)
+            user_info = verified_auth_tokens.get(cache_key)
+            if user_info is not None:
+                auth_token_cache_hit_counter.inc()
+                return dict(user_info), None, None
+
+            auth_token_cache_miss_counter.inc()
             try:
                 payload = AuthService.__verify_auth_token(auth_token, jwt_secret)
 
@@ -121,6 +149,10 @@ class AuthService:
                     "last_name": payload.get("app-last-name"),
                 }
 
+                verified_auth_tokens.set(
+                    cache_key, dict(user_info), expires_at=payload["exp"]
+                )
+
                 return user_info, None, None
             except jwt.PyJWTError:
                 # Auth token is invalid
@@ -132,41 +164,43 @@ class AuthService:
         if refresh_token is None:
             raise UnauthenticatedException("No refresh token provided")
 
-        session = RefreshTokenSessionRepository.get_token(refresh_token)
+        # Locks the token until the end of the transaction
+        result = RefreshTokenSessionRepository.get_token_with_user_for_update(
+            refresh_token
+        )
 
-        if session is None:
+        if result is None:
             raise UnauthenticatedException("Refresh token not found in DB")
 
+        session, user = result
+
         if session.expires < datetime.now():
             raise UnauthenticatedException("Refresh token expired")
 
-        if session.has_been_used():
-            # Block user
-            user = UsersRepository.get_user_by_id(session.user_id)
-            if user is None:
-                raise UnauthenticatedException("Nutzer nicht gefunden.")
-            user.blocked = True
-            UsersRepository.update_user(user)
-            app.logger.warning(
-                f"User account '{user.username}' with id '{session.user_id}' blocked due to repeated refresh token usage"
-            )
-            raise UserBlockedError("Refresh Token wurde bereits verwendet.")
-
-        # Generate new tokens
-        user = UsersRepository.get_user_by_id(session.user_id)
-
         if user is None:
             raise UnauthenticatedException("Nutzer nicht gefunden.")
 
+        new_refresh_token = None
+        if session.has_been_used():
+            # A parallel request may just have rotated the token
+            new_refresh_token = AuthService.__get_replacement_token(session)
+
+            if new_refresh_token is None:
+                # Block user
+                user.blocked = True
+                UsersRepository.update_user(user)
+                app.logger.warning(
+                    f"User account '{user.username}' with id '{session.user_id}' blocked due to repeated refresh token usage"
+                )
+                raise UserBlockedError("Refresh Token wurde bereits verwendet.")
+
         if user.blocked:
             raise UserBlockedError("Account von Nutzer:in ist gesperrt.")
 
+        # Generate new tokens
         new_auth_token = AuthService.__make_auth_token(user, jwt_secret)
-        new_refresh_token = AuthService.__make_refresh_token(user)
-
-        # Mark old refresh token as used
-        session.last_used = datetime.now()
-        RefreshTokenSessionRepository.update_token(session)
+        if new_refresh_token is None:
+            new_refresh_token = AuthService.__rotate_refresh_token(session, user)
 
         user_info = {
             "id": user.id,
@@ -352,6 +386,20 @@ class AuthService:
             },
         )
 
+    @staticmethod
+    def __auth_token_cache_key(encoded: str, jwt_secret: str) -> bytes:
+        """Key of an authentication token in the verified token cache
+
+        The secret is part of the key, so tokens are verified again when it changes.
+
+        :param encoded: The JWT token
+        :param jwt_secret: The secret the token is verified with
+
+        :return: The digest of secret and token
+        """
+
+        return hashlib.sha256(f"{jwt_secret}\0{encoded}".encode()).digest()
+
     @staticmethod
     def __make_refresh_token(user: User) -> str:
         """Create a refresh token for a user
@@ -361,19 +409,64 @@ class AuthService:
         :return: The refresh token
         """
 
-        # Generate random token
-        token = secrets.token_hex(REFRESH_TOKEN_LENGTH // 2)
+        # Regenerate token if it already exists
+        session = AuthService.__new_refresh_token_session(user)
+        while not RefreshTokenSessionRepository.create_token_if_absent(session):
+            session = AuthService.__new_refresh_token_session(user)
+
+        return session.refresh_token
+
+    @staticmethod
+    def __rotate_refresh_token(session: RefreshTokenSession, user: User) -> str:
+        """Replace a refresh token with a new one
+
+        :param session: The refresh token session to replace (locked)
+        :param user: The user the token belongs to
+
+        :return: The new refresh token
+        """
 
         # Regenerate token if it already exists
-        while RefreshTokenSessionRepository.get_token(token) is not None:
-            token = secrets.token_hex(REFRESH_TOKEN_LENGTH // 2)
+        new_session = AuthService.__new_refresh_token_session(user)
+        while not RefreshTokenSessionRepository.rotate_token(session, new_session):
+            new_session = AuthService.__new_refresh_token_session(user)
+
+        return new_session.refresh_token
+
+    @staticmethod
+    def __get_replacement_token(session: RefreshTokenSession) -> str | None:
+        """Get the token that replaced a recently used refresh token
+
+        :param session: The used refresh token session
+
+        :return: The replacing refresh token or None if the token was not used
+            within the grace period or the replacement was used as well
+        """
 
+        if (
+            session.replaced_by is None
+            or session.last_used < datetime.now() - REFRESH_TOKEN_REUSE_GRACE_PERIOD
+        ):
+            return None
+
+        replacement = RefreshTokenSessionRepository.get_token(session.replaced_by)
+        if replacement is None or replacement.has_been_used():
+            return None
+
+        return replacement.refresh_token
+
+    @staticmethod
+    def __new_refresh_token_session(user: User) -> RefreshTokenSession:
+        """Create a refresh token session with a random token (not saved yet)
+
+        :param user: The user to create the token for
+
+        :return: The refresh token session
+        """
+
+        token = secrets.token_hex(REFRESH_TOKEN_LENGTH // 2)
         expires = datetime.now() + REFRESH_TOKEN_DURATION
 
-        session = RefreshTokenSession(
+        return RefreshTokenSession(
             refresh_token=token, user_id=user.id, expires=expires
         )
-
-        RefreshTokenSessionRepository.create_token(session)
-
-        return session.refresh_token
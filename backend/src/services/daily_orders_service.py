@@ -2,11 +2,14 @@ from typing import List
 from uuid import UUID
 
 from src.models.dailyorder import DailyOrder
+from src.models.user import UserGroup
 from src.repositories.groups_repository import GroupsRepository
 from src.repositories.orders_repository import OrdersRepository
 from src.repositories.users_repository import UsersRepository
 from src.schemas.daily_orders_schema import DailyOrderFullSchema
 from src.utils.exceptions import AccessDeniedError, NotFoundError, BadValueError
+from src.utils.change_tracking import ALL_LOCATIONS, location_scope, table_scope
+from src.utils.pagination import Page, Pagination
 
 
 class DailyOrdersService:
@@ -79,6 +82,29 @@ class DailyOrdersService:
 
         return OrdersRepository.get_daily_orders_filtered_by_user_scope(user_id)
 
+    @staticmethod
+    def get_change_scopes(user_id: UUID) -> List[str]:
+        """Get the change scopes the daily orders visible to the user depend on"""
+
+        user = UsersRepository.get_user_by_id(user_id)
+        if user.user_group in [UserGroup.standortleitung, UserGroup.kuechenpersonal]:
+            return [
+                location_scope("daily_order", user.location_id),
+                location_scope("daily_order", ALL_LOCATIONS),
+            ]
+
+        return [table_scope("daily_order")]
+
+    @staticmethod
+    def get_daily_orders_page_filtered_by_user_scope(
+        user_id: UUID, pagination: Pagination
+    ) -> Page[DailyOrder]:
+        """Get one page of daily orders filtered by user scope"""
+
+        return OrdersRepository.get_daily_orders_page_filtered_by_user_scope(
+            user_id, pagination
+        )
+
     @staticmethod
     def get_daily_orders_for_group(group_id: UUID, user_id: UUID) -> List[DailyOrder]:
         """Get daily orders for a group
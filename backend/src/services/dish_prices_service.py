@@ -3,6 +3,7 @@ from datetime import datetime
 from src.utils.exceptions import BadValueError, NotFoundError
 from src.models.dish_price import DishPrice
 from src.repositories.dish_prices_repository import DishPricesRepository
+from src.utils.dish_price_cache import CachedDishPrice, DishPriceCache
 
 
 class DishPricesService:
@@ -15,18 +16,18 @@ class DishPricesService:
         return DishPricesRepository.get_prices()
 
     @staticmethod
-    def get_price_valid_at_date(date: datetime) -> DishPrice | None:
-        """Retrieve a dish price by its date
+    def get_price_valid_at_date(date: datetime) -> CachedDishPrice | None:
+        """Retrieve the dish price valid at a date from the cached price timeline
 
         :param date: The date of the dish price to retrieve
 
-        :return: The dish price with the given date or None if no dish price was found
+        :return: The dish price valid at the given date or None if no dish price was found
         """
 
-        return DishPricesRepository.get_price_valid_at_date(date)
+        return DishPriceCache.get_timeline().get_price_valid_at_date(date)
 
     @staticmethod
-    def get_current_price() -> DishPrice | None:
+    def get_current_price() -> CachedDishPrice | None:
         """Retrieve the dish price for today
 
         :return: The dish price for today or None if no dish price was found
@@ -65,6 +66,7 @@ class DishPricesService:
             prepayment=prepayment,
         )
         DishPricesRepository.create_price(price)
+        DishPriceCache.invalidate()
 
         return price
 
@@ -106,6 +108,7 @@ class DishPricesService:
         price.prepayment = prepayment
 
         DishPricesRepository.update_price(price)
+        DishPriceCache.invalidate()
 
         return price
 
@@ -122,3 +125,4 @@ class DishPricesService:
             raise NotFoundError(f"Dish price for date {date} does not exist")
 
         DishPricesRepository.delete_price(price)
+        DishPriceCache.invalidate()
@@ -1,16 +1,45 @@
 """Service for handling employee management."""
 
+import codecs
 import csv
 import re
 from uuid import UUID
+from src.constants import CSV_READ_CHUNK_SIZE
 from src.models.user import UserGroup
 from src.models.employee import Employee
 from src.repositories.employees_repository import EmployeesRepository
 from src.utils.error import ErrMsg, abort_with_err
-from typing import Optional, List
+from typing import BinaryIO, Dict, Iterator, Optional, List, Set, Tuple
 from src.utils.exceptions import AlreadyExistsError, NotFoundError, BadValueError
+from src.utils.pagination import Page, Pagination
 from src.utils.pdf_creator import PDFCreationUtils
 
+CSV_FIELDS = (
+    "Kunden-Nr.",
+    "Kürzel",
+    "Bereich",
+    "Gruppe-Nr.",
+    "Gruppen-Name 1",
+    "Gruppen-Name 2",
+)
+"""Columns of the HR export that must be filled in every row"""
+
+_NAME_PART = r"[A-ZÄÖÜ][a-zäöüß0-9]+(?:[-][A-ZÄÖÜ][a-zäöüß0-9]+)*"
+
+NAME_PATTERN = re.compile(
+    rf"({_NAME_PART})({_NAME_PART})?({_NAME_PART})?({_NAME_PART})?({_NAME_PART})?"
+    r"((?:[A-Z][a-zäöüß0-9]+)(?:[-][A-Za-z0-9äöüß]+)*)"
+)
+"""Splits the "Kürzel" (e.g. MaxMustermann) into up to five first names and the last name"""
+
+GROUP_WITH_SUFFIX_PATTERN = re.compile(r"^(.*) - [^-]+$")
+"""Group name without the suffix after the last " - " """
+
+GROUP_NAME_PATTERN = re.compile(
+    r"^([A-Za-zäöüÄÖÜß']+(?:[\s][A-Za-zäöüÄÖÜß']+)*)(\s-\s)*+"
+)
+"""Group name up to the first " - " (fallback if the first one does not exist)"""
+
 
 class EmployeesService:
     """Service for handling employee management."""
@@ -37,19 +66,47 @@ class EmployeesService:
             employee_number=employee_number,
         )
 
+    @staticmethod
+    def get_employees_page(
+        user_group: UserGroup,
+        user_id: UUID,
+        pagination: Pagination,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        group_name: Optional[str] = None,
+        group_id: Optional[UUID] = None,
+        employee_number: Optional[int] = None,
+    ) -> Page[Employee]:
+        """Get one page of the employees the user has access to based on their user group and id."""
+
+        return EmployeesRepository.get_employees_page_by_user_scope(
+            user_group,
+            user_id,
+            pagination,
+            first_name=first_name,
+            last_name=last_name,
+            group_name=group_name,
+            group_id=group_id,
+            employee_number=employee_number,
+        )
+
     @staticmethod
     def get_employee_by_id(
-        employee_id: UUID, user_group: UserGroup, user_id: UUID
+        employee_id: UUID,
+        user_group: UserGroup,
+        user_id: UUID,
+        include_hidden: bool = False,
     ) -> Employee:
         """Retrieve an employee by their ID
 
         :param employee_id: The ID of the employee to retrieve
+        :param include_hidden: Also find hidden employees (e.g. to delete them)
 
         :return: The employee with the given ID or None if no employee was found
         """
 
         employee = EmployeesRepository.get_employee_by_id_by_user_scope(
-            employee_id, user_group, user_id
+            employee_id, user_group, user_id, include_hidden=include_hidden
         )
         if not employee:
             raise NotFoundError(f"Mitarbeiter:in mit ID {employee_id}")
@@ -137,102 +194,177 @@ class EmployeesService:
 
         EmployeesRepository.delete_employee(employee)
 
+    @staticmethod
+    def delete_employees(
+        employee_ids: List[UUID], user_group: UserGroup, user_id: UUID
+    ):
+        """Delete several employees, either all of them or none
+
+        Hidden employees can be deleted as well.
+
+        :param employee_ids: The IDs of the employees to delete
+        :param user_group: The user group of the user
+        :param user_id: The ID of the user
+
+        :raises NotFoundError: If any of the employees is not in the scope of the user
+        """
+
+        employee_ids = list(dict.fromkeys(employee_ids))
+        found = EmployeesRepository.get_employee_ids_by_user_scope(
+            employee_ids, user_group, user_id, include_hidden=True
+        )
+        missing = [str(id) for id in employee_ids if id not in found]
+        if missing:
+            raise NotFoundError(f"Mitarbeiter:innen mit IDs {', '.join(missing)}")
+
+        EmployeesRepository.delete_employees(employee_ids)
+
     @staticmethod
     def bulk_create_employees(file):
         """Creates new Emplyoees from a csv-file with utf-8 and komma or iso-8859-1 with semicolons
 
+        The groups and the existing employee numbers are loaded once, the new
+        employees are inserted with one statement. Employees whose number
+        already exists are skipped.
+
         :param reader: The File in csv-format
         """
 
+        csv_import = EmployeeCsvImport()
+        for _, row in EmployeesService.read_csv(file.stream):
+            csv_import.add_row(row)
+
+        employees, _ = csv_import.take_changes()
+        EmployeesRepository.bulk_create_employees(employees)
+
+        return {
+            "message": "Mitarbeiter:innen erfolgreich erstellt",
+            "count": len(employees),
+        }
+
+    @staticmethod
+    def sync_employees(file, hide_missing: bool = False) -> Dict[str, int]:
+        """Synchronize the employees with a full CSV export of the HR system
+
+        Every row is compared with the current employee of the same number by
+        the fields the export contains (names and group). Only new and changed
+        employees are written, all changes in one transaction. Hidden employees
+        that are in the file again are shown again.
+
+        :param file: The File in csv-format
+        :param hide_missing: Hide employees whose number is not in the file
+        :return: Number of created, updated, hidden and unchanged employees
+        """
+
+        csv_import = EmployeeCsvImport(sync=True)
+        for _, row in EmployeesService.read_csv(file.stream):
+            csv_import.add_row(row)
+
+        created, updated = csv_import.take_changes()
+        hidden_ids = csv_import.get_missing_ids() if hide_missing else []
+        EmployeesRepository.sync_employees(created, updated, hidden_ids)
+
+        return {
+            "created": csv_import.created_count,
+            "updated": csv_import.updated_count,
+            "hidden": len(hidden_ids),
+            "unchanged": csv_import.unchanged_count,
+        }
+
+    @staticmethod
+    def read_csv(stream: BinaryIO) -> Iterator[Tuple[int, Dict[str, str]]]:
+        """Read a csv-file with utf-8 and komma or iso-8859-1 with semicolons
+
+        The file is decoded line by line and never held in memory as a whole.
+
+        :param stream: The file opened in binary mode
+        :return: Iterator over the rows and the line number each row ends in
+        """
+
+        encoding, delimiter = EmployeesService._detect_csv_encoding(stream)
+        reader = csv.DictReader(
+            (line.decode(encoding) for line in stream), delimiter=delimiter
+        )
+        for row in reader:
+            yield reader.line_num, row
+
+    @staticmethod
+    def _detect_csv_encoding(stream: BinaryIO) -> Tuple[str, str]:
+        """Get the encoding and the delimiter of a csv-file and rewind it
+
+        A single invalid byte anywhere decides against utf-8, so the whole file
+        is checked in chunks before the first row is read.
+        """
+
+        stream.seek(0)
+        decoder = codecs.getincrementaldecoder("utf-8")()
         try:
-            file.stream.seek(0)
-            reader = csv.DictReader(file.stream.read().decode("utf-8").splitlines())
+            while chunk := stream.read(CSV_READ_CHUNK_SIZE):
+                decoder.decode(chunk)
+            decoder.decode(b"", final=True)
+            encoding = ("utf-8", ",")
         except UnicodeDecodeError:
-            file.stream.seek(0)
-            reader = csv.DictReader(
-                file.stream.read().decode("iso-8859-1").splitlines(), delimiter=";"
-            )
+            encoding = ("iso-8859-1", ";")
 
-        employees = []
+        stream.seek(0)
+        return encoding
 
-        for row in reader:
-            if (
-                not row.get("Kunden-Nr.")
-                or not row.get("Kürzel")
-                or not row.get("Bereich")
-                or not row.get("Gruppe-Nr.")
-                or not row.get("Gruppen-Name 1")
-                or not row.get("Gruppen-Name 2")
-            ):
-                raise BadValueError("Ein oder mehrere Felder in der CSV-Datei fehlen")
-
-            match = re.match(
-                r"([A-ZÄÖÜ][a-zäöüß0-9]+(?:[-][A-ZÄÖÜ][a-zäöüß0-9]+)*)([A-ZÄÖÜ][a-zäöüß0-9]+(?:[-][A-ZÄÖÜ][a-zäöüß0-9]+)*)?([A-ZÄÖÜ][a-zäöüß0-9]+(?:[-][A-ZÄÖÜ][a-zäöüß0-9]+)*)?([A-ZÄÖÜ][a-zäöüß0-9]+(?:[-][A-ZÄÖÜ][a-zäöüß0-9]+)*)?([A-ZÄÖÜ][a-zäöüß0-9]+(?:[-][A-ZÄÖÜ][a-zäöüß0-9]+)*)?((?:[A-Z][a-zäöüß0-9]+)(?:[-][A-Za-z0-9äöüß]+)*)",
-                row["Kürzel"],
+    @staticmethod
+    def _parse_csv_row(row: Dict[str, str], group_ids: Dict[Tuple[str, str], UUID]):
+        """Read an employee from a row of the HR export
+
+        :param row: The row with the columns of CSV_FIELDS
+        :param group_ids: Group IDs by group name and location name
+        :return: Dict with first_name, last_name, employee_number and group_id
+
+        :raises BadValueError: If a field is missing or a name can not be read
+        :raises NotFoundError: If the group does not exist at the location
+        """
+
+        if any(not row.get(field) for field in CSV_FIELDS):
+            raise BadValueError("Ein oder mehrere Felder in der CSV-Datei fehlen")
+
+        match = NAME_PATTERN.match(row["Kürzel"])
+        if not match:
+            raise BadValueError(
+                "Format unpassend. Es konnte kein eindeutiger Vor- und Nachname erkannt werden."
+            )
+        # Die Gruppen 1 bis 5 sind Vornamen, bis zur ersten fehlenden
+        first_names = []
+        for name in match.groups()[:5]:
+            if not name:
+                break
+            first_names.append(name)
+        firstname = " ".join(first_names)
+        lastname = match.group(6)
+
+        if len(firstname) >= 64 or len(lastname) >= 64:
+            raise BadValueError(
+                "Vorname und Nachname dürfen jeweils nicht länger als 64 Zeichen sein."
             )
-            if match:
-                firstname = match.group(1)
-                if match.group(2):
-                    firstname += " " + match.group(2)
-                    if match.group(3):
-                        firstname += " " + match.group(3)
-                        if match.group(4):
-                            firstname += " " + match.group(4)
-                            if match.group(5):
-                                firstname += " " + match.group(5)
-                lastname = match.group(6)
-            else:
-                raise BadValueError(
-                    "Format unpassend. Es konnte kein eindeutiger Vor- und Nachname erkannt werden."
-                )
-
-            if len(firstname) < 64 and len(lastname) < 64:
-                try:
-                    group_name = (
-                        re.search(r"^(.*) - [^-]+$", row["Gruppen-Name 1"])
-                    ).group(1)
-                except AttributeError:
-                    group_name = row["Gruppen-Name 1"]
-                print(group_name, " : ", row["Bereich"])
-                group = EmployeesRepository.get_group_by_name_and_location(
-                    group_name=group_name.strip(), location_name=row["Bereich"].strip()
-                )
-                if group is None:
-                    print("Gruppe nicht gefunden 1")
-                    group_name = (
-                        re.match(
-                            r"^([A-Za-zäöüÄÖÜß']+(?:[\s][A-Za-zäöüÄÖÜß']+)*)(\s-\s)*+",
-                            row["Gruppen-Name 1"],
-                        )
-                    ).group(1)
-                    group = EmployeesRepository.get_group_by_name_and_location(
-                        group_name=group_name.strip(),
-                        location_name=row["Bereich"].strip(),
-                    )
-                    if group is None:
-                        print("Gruppe nicht gefunden 2")
-                        raise NotFoundError(f"Gruppe {row['Gruppen-Name 1']}")
-
-                if EmployeesRepository.get_employee_by_number(row["Kunden-Nr."]):
-                    continue
-
-                employee = Employee(
-                    first_name=firstname,
-                    last_name=lastname,
-                    employee_number=row["Kunden-Nr."],
-                    group_id=group.id,
-                )
-                employees.append(employee)
-            else:
-                raise BadValueError(
-                    "Vorname und Nachname dürfen jeweils nicht länger als 64 Zeichen sein."
-                )
 
-        EmployeesRepository.bulk_create_employees(employees)
+        try:
+            employee_number = int(row["Kunden-Nr."])
+        except ValueError:
+            raise BadValueError(f"Kunden-Nr. {row['Kunden-Nr.']} ist keine Zahl")
+
+        location_name = row["Bereich"].strip()
+        group_match = GROUP_WITH_SUFFIX_PATTERN.search(row["Gruppen-Name 1"])
+        group_name = group_match.group(1) if group_match else row["Gruppen-Name 1"]
+        group_id = group_ids.get((group_name.strip(), location_name))
+
+        if group_id is None:
+            group_match = GROUP_NAME_PATTERN.match(row["Gruppen-Name 1"])
+            if group_match:
+                group_id = group_ids.get((group_match.group(1).strip(), location_name))
+            if group_id is None:
+                raise NotFoundError(f"Gruppe {row['Gruppen-Name 1']}")
 
         return {
-            "message": "Mitarbeiter:innen erfolgreich erstellt",
-            "count": len(employees),
+            "first_name": firstname,
+            "last_name": lastname,
+            "employee_number": employee_number,
+            "group_id": group_id,
         }
 
     @staticmethod
@@ -250,16 +382,104 @@ class EmployeesService:
     def get_qr_code_for_employees_list(
         employee_ids: List[UUID], user_group: UserGroup, user_id: UUID
     ):
-        employees: List[Employee] = []
+        employees = EmployeesRepository.get_employees_by_ids_by_user_scope(
+            employee_ids, user_group=user_group, user_id=user_id
+        )
 
-        for id in employee_ids:
-            employee = EmployeesRepository.get_employee_by_id_by_user_scope(
-                employee_id=id, user_group=user_group, user_id=user_id
-            )
-            if not employee:
-                raise NotFoundError(f"Mitarbeiter:in mit ID {id}")
-            employees.append(employee)
+        found = {employee.id for employee in employees}
+        missing = [str(id) for id in dict.fromkeys(employee_ids) if id not in found]
+        if missing:
+            raise NotFoundError(f"Mitarbeiter:innen mit IDs {', '.join(missing)}")
 
         if not employees:
             raise NotFoundError("Leere List oder Mitarbeiter:innen")
         return PDFCreationUtils.create_batch_qr_codes(employees=employees)
+
+
+class EmployeeCsvImport:
+    """Sort the rows of an HR export into new and changed employees
+
+    The groups and the current employees are loaded once when the import is
+    created. Rows can then be added one by one and the collected changes be
+    taken and written in batches.
+
+    :param sync: Update changed employees (mode sync) instead of skipping every
+        existing employee number (mode create)
+    """
+
+    def __init__(self, sync: bool = False):
+        self.sync = sync
+        self.group_ids = EmployeesRepository.get_group_ids_by_name_and_location()
+        if sync:
+            self.current = EmployeesRepository.get_employee_sync_states()
+        else:
+            self.current = dict.fromkeys(EmployeesRepository.get_employee_numbers())
+
+        self.seen: Set[int] = set()
+        self.created: List[dict] = []
+        self.updated: List[dict] = []
+        self.created_count = 0
+        self.updated_count = 0
+        self.unchanged_count = 0
+
+    def add_row(self, row: Dict[str, str]):
+        """Read an employee from a row and compare it with the current one
+
+        Rows with an employee number that was already added are skipped.
+
+        :param row: The row with the columns of CSV_FIELDS
+
+        :raises BadValueError: If a field is missing or a name can not be read
+        :raises NotFoundError: If the group does not exist at the location
+        """
+
+        employee = EmployeesService._parse_csv_row(row, self.group_ids)
+        number = employee["employee_number"]
+        if number in self.seen:
+            return
+        self.seen.add(number)
+
+        if number not in self.current:
+            self.created.append(employee)
+            self.created_count += 1
+            return
+
+        state = self.current[number]
+        if not self.sync or (
+            state.first_name,
+            state.last_name,
+            state.group_id,
+            state.hidden,
+        ) == (
+            employee["first_name"],
+            employee["last_name"],
+            employee["group_id"],
+            False,
+        ):
+            self.unchanged_count += 1
+            return
+
+        self.updated.append({**employee, "id": state.id, "hidden": False})
+        self.updated_count += 1
+
+    def take_changes(self) -> Tuple[List[dict], List[dict]]:
+        """Take the employees to create and to update added since the last call
+
+        :return: The new employees and the changed employees (mode sync)
+        """
+
+        changes = (self.created, self.updated)
+        self.created, self.updated = [], []
+        return changes
+
+    def get_missing_ids(self) -> List[UUID]:
+        """Get the IDs of the shown employees that were not in any added row (mode sync)
+
+        :return: The IDs of the employees to hide
+        """
+
+        return [
+            state.id
+            for number, state in self.current.items()
+            if number not in self.seen and not state.hidden
+        ]
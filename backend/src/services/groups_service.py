@@ -5,6 +5,7 @@ from src.repositories.groups_repository import GroupsRepository
 from src.repositories.users_repository import UsersRepository
 from src.repositories.locations_repository import LocationsRepository
 from src.repositories.employees_repository import EmployeesRepository
+from src.utils.change_tracking import table_scope
 from src.utils.exceptions import AlreadyExistsError, NotFoundError, BadValueError
 from src.utils.pdf_creator import PDFCreationUtils
 
@@ -98,6 +99,16 @@ class GroupsService:
         """Get all groups for respective user."""
         return GroupsRepository.get_groups_by_userscope(user_id, user_group)
 
+    @staticmethod
+    def get_change_scopes() -> list[str]:
+        """Get the change scopes the groups with their leaders and locations depend on."""
+        return [
+            table_scope("group"),
+            table_scope("person"),
+            table_scope("user"),
+            table_scope("location"),
+        ]
+
     @staticmethod
     def delete_group(group_id: UUID):
         """Delete a group by its ID."""
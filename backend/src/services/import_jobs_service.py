@@ -0,0 +1,216 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from flask import Flask, current_app as app
+from werkzeug.datastructures import FileStorage
+
+from src.constants import (
+    IMPORT_JOB_BATCH_SIZE,
+    IMPORT_JOB_MAX_ERRORS,
+    IMPORT_JOB_MAX_PER_USER,
+    IMPORT_JOB_STALE_AFTER,
+    IMPORT_JOB_TTL,
+    IMPORT_JOB_WORKERS,
+)
+from src.models.import_job import ImportJob, ImportJobStatus
+from src.repositories.employees_repository import EmployeesRepository
+from src.repositories.import_jobs_repository import ImportJobsRepository
+from src.services.employees_service import EmployeeCsvImport, EmployeesService
+from src.utils.exceptions import ActionNotPossibleError, BadValueError, NotFoundError
+
+# The upload is kept in a temporary file of the app worker that received it,
+# so the job is processed by a thread of the same worker
+import_job_executor = ThreadPoolExecutor(
+    max_workers=IMPORT_JOB_WORKERS, thread_name_prefix="import-job"
+)
+
+
+class ImportJobsService:
+    """Import employee CSV files in the background"""
+
+    @staticmethod
+    def create_job(
+        file: FileStorage, mode: str, hide_missing: bool, user_id: UUID
+    ) -> ImportJob:
+        """Store an uploaded CSV file and queue its import for the background worker
+
+        :param file: The uploaded CSV file
+        :param mode: The import mode ("create" or "sync", see EmployeeCsvImportSchema)
+        :param hide_missing: Hide employees that are not in the file (mode sync)
+        :param user_id: The ID of the user who uploads the file
+
+        :return: The created job
+        """
+
+        now = datetime.now()
+        if (
+            ImportJobsRepository.count_open_jobs_of_user(user_id, now)
+            >= IMPORT_JOB_MAX_PER_USER
+        ):
+            raise ActionNotPossibleError(
+                f"Es sind bereits {IMPORT_JOB_MAX_PER_USER} Importe in Bearbeitung."
+            )
+
+        job = ImportJob(
+            user_id=user_id,
+            file_name=file.filename[:256],
+            mode=mode,
+            hide_missing=hide_missing,
+            expires=now + IMPORT_JOB_TTL,
+        )
+        job.id = uuid4()
+
+        path = ImportJobsService._get_upload_path(job.id)
+        file.save(path)
+        try:
+            ImportJobsRepository.create_job(job)
+        except Exception:
+            os.remove(path)
+            raise
+
+        import_job_executor.submit(
+            ImportJobsService.run_job, app._get_current_object(), job.id
+        )
+
+        return job
+
+    @staticmethod
+    def get_job(job_id: UUID, user_id: UUID) -> ImportJob:
+        """Get an import job of a user
+
+        :param job_id: The ID of the job
+        :param user_id: The ID of the user
+
+        :return: The job
+        """
+
+        job = ImportJobsRepository.get_job_of_user(job_id, user_id)
+        if job is None or job.expires <= datetime.now():
+            raise NotFoundError(f"Import mit ID {job_id}")
+
+        return job
+
+    @staticmethod
+    def run_job(flask_app: Flask, job_id: UUID):
+        """Import the uploaded file of a job (runs in a worker thread)
+
+        The file is read row by row. Every IMPORT_JOB_BATCH_SIZE rows the
+        collected employees are written and committed together with the
+        progress of the job. Faulty rows are skipped and stored with their
+        line number. Missing employees are only hidden (mode sync with
+        hide_missing) if every row could be read, because a faulty row might
+        belong to an existing employee.
+
+        :param flask_app: The Flask app (there is no app context in worker threads)
+        :param job_id: The ID of the job (the upload is deleted afterwards)
+        """
+
+        path = ImportJobsService._get_upload_path(job_id)
+        with flask_app.app_context():
+            try:
+                job = ImportJobsRepository.get_job_by_id(job_id)
+                if job is None or job.status != ImportJobStatus.pending:
+                    return
+
+                job.status = ImportJobStatus.running
+                ImportJobsRepository.update_job(job)
+
+                try:
+                    ImportJobsService._import_file(job, path)
+                    job.status = ImportJobStatus.done
+                except Exception as err:
+                    flask_app.logger.exception(f"Import job {job_id} failed: {err}")
+                    # The counters fall back to the last committed batch
+                    ImportJobsRepository.rollback()
+                    job.status = ImportJobStatus.failed
+                    job.error = "Interner Fehler beim Import der Datei."
+
+                job.finished = datetime.now()
+                job.expires = job.finished + IMPORT_JOB_TTL
+                ImportJobsRepository.update_job(job)
+            finally:
+                ImportJobsService._remove_upload(job_id)
+
+    @staticmethod
+    def fail_stale_jobs() -> int:
+        """Mark jobs as failed that were lost by a restart of their app worker
+
+        The jobs are only held in the executor of the app worker that received
+        the upload. Jobs that are still pending or running after
+        IMPORT_JOB_STALE_AFTER will never finish, their uploads are deleted.
+
+        :return: Number of failed jobs
+        """
+
+        now = datetime.now()
+        job_ids = ImportJobsRepository.fail_stale_jobs(
+            now - IMPORT_JOB_STALE_AFTER,
+            "Der Import wurde abgebrochen, bitte die Datei erneut hochladen.",
+            now,
+        )
+        for job_id in job_ids:
+            ImportJobsService._remove_upload(job_id)
+
+        return len(job_ids)
+
+    @staticmethod
+    def delete_expired_jobs() -> int:
+        """Delete expired jobs
+
+        :return: Number of deleted jobs
+        """
+
+        return ImportJobsRepository.delete_expired_jobs(datetime.now())
+
+    @staticmethod
+    def _get_upload_path(job_id: UUID) -> str:
+        """The temporary file with the upload of a job"""
+
+        return os.path.join(tempfile.gettempdir(), f"employee-import-{job_id}.csv")
+
+    @staticmethod
+    def _remove_upload(job_id: UUID):
+        """Delete the upload of a job if it is still present"""
+
+        try:
+            os.remove(ImportJobsService._get_upload_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _import_file(job: ImportJob, path: str):
+        csv_import = EmployeeCsvImport(sync=job.mode == "sync")
+        errors = []
+
+        def commit_batch(hidden_ids=()):
+            created, updated = csv_import.take_changes()
+            job.created_count = csv_import.created_count
+            job.updated_count = csv_import.updated_count
+            job.unchanged_count = csv_import.unchanged_count
+            job.hidden_count = len(hidden_ids)
+            # JSON columns only notice new lists
+            job.errors = list(errors)
+            EmployeesRepository.sync_employees(created, updated, list(hidden_ids))
+            ImportJobsRepository.update_job(job)
+
+        with open(path, "rb") as stream:
+            for line, row in EmployeesService.read_csv(stream):
+                try:
+                    csv_import.add_row(row)
+                except (BadValueError, NotFoundError) as err:
+                    job.error_count += 1
+                    if len(errors) < IMPORT_JOB_MAX_ERRORS:
+                        errors.append({"line": line, "message": str(err)})
+
+                job.rows_processed += 1
+                if job.rows_processed % IMPORT_JOB_BATCH_SIZE == 0:
+                    commit_batch()
+
+        hidden_ids = []
+        if job.mode == "sync" and job.hide_missing and job.error_count == 0:
+            hidden_ids = csv_import.get_missing_ids()
+
+        commit_batch(hidden_ids)
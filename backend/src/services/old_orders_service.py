@@ -1,7 +1,8 @@
-from typing import List
+from typing import Iterator, List
 from src.models.oldorder import OldOrder
 from src.repositories.orders_repository import OrdersFilters, OrdersRepository
 from src.utils.exceptions import NotFoundError
+from src.utils.pagination import Page, Pagination
 
 
 class OldOrdersService:
@@ -19,3 +20,41 @@ class OldOrdersService:
             raise NotFoundError("No old orders found")
         else:
             return old_orders
+
+    @staticmethod
+    def get_old_orders_page(
+        filters: OrdersFilters, pagination: Pagination
+    ) -> Page[OldOrder]:
+        """
+        Get one page of orders
+        :param filters: Filters for old orders
+        :param pagination: The requested page
+
+        :return: Page of old orders
+        :raises BadValueError: If the cursor is invalid
+        """
+        page = OrdersRepository.get_old_orders_page(filters, pagination)
+        if page.items == [] and not pagination.cursor:
+            raise NotFoundError("No old orders found")
+
+        return page
+
+    @staticmethod
+    def stream_old_orders(filters: OrdersFilters) -> Iterator[OldOrder]:
+        """
+        Get orders one by one
+        :param filters: Filters for old orders
+
+        :return: Iterator over old orders
+        :raises NotFoundError: If no old orders match, before anything is yielded
+        """
+        old_orders = OrdersRepository.stream_old_orders(filters)
+        first = next(old_orders, None)
+        if first is None:
+            raise NotFoundError("No old orders found")
+
+        def orders() -> Iterator[OldOrder]:
+            yield first
+            yield from old_orders
+
+        return orders()
@@ -17,7 +17,7 @@ class PersonsService:
         """
 
         person = PersonsRepository.get_person_by_id(person_id)
-        if not person:
+        if not person or person.hidden:
             raise NotFoundError(f"Person mit ID {person_id}")
 
         return PDFCreationUtils.create_qr_code_person(person)
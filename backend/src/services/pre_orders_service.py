@@ -13,6 +13,8 @@ from src.schemas.pre_orders_schemas import (
 from src.models.preorder import PreOrder
 from src.models.user import UserGroup
 from src.repositories.orders_repository import OrdersFilters, OrdersRepository
+from src.utils.change_tracking import ALL_LOCATIONS, location_scope, table_scope
+from src.utils.pagination import Page, Pagination
 from src.utils.exceptions import (
     NotFoundError,
     ActionNotPossibleError,
@@ -104,23 +106,74 @@ class PreOrdersService:
         preorders = OrdersRepository.get_pre_orders(filters, user_id, user_group)
         return PreOrderFullSchema(many=True).dump(preorders)
 
+    @staticmethod
+    def get_change_scopes(user_id: UUID, user_group: UserGroup) -> List[str]:
+        """
+        Get the change scopes the pre-orders visible to the user depend on
+        :param user_id: Id of the user
+        :param user_group: User group of the user
+        :return: List of change scopes
+        """
+
+        if user_group in [UserGroup.standortleitung, UserGroup.kuechenpersonal]:
+            user = UsersRepository.get_user_by_id(user_id)
+            return [
+                location_scope("pre_order", user.location_id),
+                location_scope("pre_order", ALL_LOCATIONS),
+            ]
+
+        if user_group == UserGroup.gruppenleitung:
+            # Der Scope hängt von den Gruppen und ihren Mitarbeiter:innen ab
+            return [
+                table_scope("pre_order"),
+                table_scope("group"),
+                table_scope("employee"),
+            ]
+
+        return [table_scope("pre_order")]
+
+    @staticmethod
+    def get_pre_orders_page(
+        filters: OrdersFilters,
+        user_id: UUID,
+        user_group: UserGroup,
+        pagination: Pagination,
+    ) -> Page[PreOrderFullSchema]:
+        """
+        Get one page of orders
+        :param filters: Filters for orders
+        :param pagination: The requested page
+        :return: Page of orders
+        """
+
+        page = OrdersRepository.get_pre_orders_page(
+            filters, user_id, user_group, pagination
+        )
+        page.items = PreOrderFullSchema(many=True).dump(page.items)
+        return page
+
     @staticmethod
     def create_update_bulk_preorders(orders: List[dict], user_id: UUID) -> None:
         """
         Create orders for employees in bulk
 
-        :param orders: List of orders
-        :param group_id: Group id of the user
+        Runs a constant number of queries regardless of the number of orders.
 
-        :return: List of order ids
+        :param orders: List of orders
+        :param user_id: Id of the group leader placing the orders
         """
 
-        bulk_orders = []
-        employee_ids = OrdersRepository.get_employees_to_order_for(user_id)
+        # Alle Mitarbeiter:innen der Gruppen mit ihrem Standort in einer Abfrage laden
+        employee_locations = OrdersRepository.get_employee_locations_to_order_for(
+            user_id
+        )
 
         today = datetime.now(timezone).date()
         current_time = datetime.now(timezone).time()
 
+        # Pro Person und Tag gilt die zuletzt übergebene Bestellung
+        bulk_orders = {}
+
         for order in orders:
             if order["date"] < today:
                 raise BadValueError(
@@ -140,14 +193,12 @@ class PreOrdersService:
             if order["date"].weekday() >= 5:  # 0 = Montag, 6 = Sonntag
                 raise BadValueError(f"Datum {order['date']} ist kein Werktag.")
 
-            if order["person_id"] not in employee_ids:
+            if order["person_id"] not in employee_locations:
                 raise ActionNotPossibleError(
                     f"Mitarbeiter:in {order["person_id"]} gehört zu keiner der Gruppen von {user_id}"
                 )
 
-            if not OrdersRepository.employee_in_location(
-                order["person_id"], order["location_id"]
-            ):
+            if employee_locations[order["person_id"]] != order["location_id"]:
                 raise ActionNotPossibleError(
                     f"Person {order["person_id"]} gehört nicht zum Standort {order["location_id"]}"
                 )
@@ -159,29 +210,10 @@ class PreOrdersService:
                     "Wenn 'nichts' ausgewählt ist, dürfen keine Essensoptionen ausgewählt werden."
                 )
 
-            # Überprüfen, ob die Bestellung bereits existiert. Falls ja, aktualisiere oder lösche diese
-            order_exists = OrdersRepository.preorder_already_exists(
-                order["person_id"], order["date"]
-            )
+            bulk_orders[(order["person_id"], order["date"])] = order
 
-            # Überprüfe, ob die Bestellung bereits hinzugefügt wird, wenn ja aktualisiere diese
-            for bulk_order in bulk_orders:
-                if (
-                    bulk_order.person_id == order["person_id"]
-                    and bulk_order.date == order["date"]
-                ):
-                    order_exists = bulk_order
-
-            if order_exists:
-                order_exists.nothing = order["nothing"]
-                order_exists.main_dish = order["main_dish"]
-                order_exists.salad_option = order["salad_option"]
-                order_exists.location_id = order["location_id"]
-            else:
-                bulk_orders.append(PreOrder(**order))
-
-        OrdersRepository.create_bulk_orders(bulk_orders)
-        OrdersRepository.update_order()
+        # Neue Bestellungen anlegen, bestehende überschreiben (ein Statement)
+        OrdersRepository.upsert_bulk_preorders(list(bulk_orders.values()))
         return
 
     @staticmethod
@@ -0,0 +1,276 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict
+from uuid import UUID
+
+from flask import Flask, Response, current_app as app
+from werkzeug.http import parse_options_header
+
+from src.constants import (
+    RENDER_JOB_MAX_PER_USER,
+    RENDER_JOB_STALE_AFTER,
+    RENDER_JOB_TTL,
+    RENDER_JOB_WORKERS,
+)
+from src.models.render_job import RenderJob, RenderJobStatus, RenderJobType
+from src.models.user import UserGroup
+from src.repositories.orders_repository import OrdersFilters
+from src.repositories.render_jobs_repository import RenderJobsRepository
+from src.repositories.users_repository import UsersRepository
+from src.schemas.render_jobs_schemas import RenderJobParamsSchema
+from src.services.employees_service import EmployeesService
+from src.services.groups_service import GroupsService
+from src.services.reports_service import ReportsService
+from src.utils.exceptions import (
+    AccessDeniedError,
+    ActionNotPossibleError,
+    BadValueError,
+    NotFoundError,
+)
+
+# Each app worker renders its jobs in its own threads
+render_job_executor = ThreadPoolExecutor(
+    max_workers=RENDER_JOB_WORKERS, thread_name_prefix="render-job"
+)
+
+# Same groups as the synchronous endpoints of the documents
+RENDER_JOB_GROUPS: Dict[RenderJobType, list[UserGroup]] = {
+    RenderJobType.location_report: [UserGroup.kuechenpersonal],
+    RenderJobType.invoice: [UserGroup.verwaltung],
+    RenderJobType.group_qr_codes: [UserGroup.verwaltung],
+    RenderJobType.employee_qr_codes: [
+        UserGroup.verwaltung,
+        UserGroup.standortleitung,
+        UserGroup.gruppenleitung,
+    ],
+}
+
+
+class RenderJobsService:
+    """Render reports, invoices and QR codes in the background"""
+
+    @staticmethod
+    def create_job(
+        job_type: RenderJobType, params: dict, user_id: UUID, user_group: UserGroup
+    ) -> RenderJob:
+        """Create a render job and queue it for the background workers
+
+        :param job_type: The document to render
+        :param params: The loaded parameters of the document (RenderJobParamsSchema)
+        :param user_id: The ID of the user who creates the job
+        :param user_group: The group of the user who creates the job
+
+        :return: The created job
+        """
+
+        if user_group not in RENDER_JOB_GROUPS[job_type]:
+            raise AccessDeniedError(f"Dokumente vom Typ {job_type.value}")
+
+        RenderJobsService._check_params(job_type, params)
+
+        now = datetime.now()
+        if (
+            RenderJobsRepository.count_open_jobs_of_user(user_id, now)
+            >= RENDER_JOB_MAX_PER_USER
+        ):
+            raise ActionNotPossibleError(
+                f"Es sind bereits {RENDER_JOB_MAX_PER_USER} Aufträge in Bearbeitung."
+            )
+
+        job = RenderJob(
+            user_id=user_id,
+            job_type=job_type,
+            params=RenderJobParamsSchema().dump(params),
+            expires=now + RENDER_JOB_TTL,
+        )
+        RenderJobsRepository.create_job(job)
+
+        render_job_executor.submit(
+            RenderJobsService.run_job, app._get_current_object(), job.id
+        )
+
+        return job
+
+    @staticmethod
+    def get_job(job_id: UUID, user_id: UUID) -> RenderJob:
+        """Get a render job of a user
+
+        :param job_id: The ID of the job
+        :param user_id: The ID of the user
+
+        :return: The job
+        """
+
+        job = RenderJobsRepository.get_job_of_user(job_id, user_id)
+        if job is None or job.expires <= datetime.now():
+            raise NotFoundError(f"Auftrag mit ID {job_id}")
+
+        return job
+
+    @staticmethod
+    def get_job_result(job_id: UUID, user_id: UUID) -> RenderJob:
+        """Get a finished render job of a user including the rendered file
+
+        :param job_id: The ID of the job
+        :param user_id: The ID of the user
+
+        :return: The job with its result
+        """
+
+        job = RenderJobsRepository.get_job_of_user(job_id, user_id, with_result=True)
+        if job is None or job.expires <= datetime.now():
+            raise NotFoundError(f"Auftrag mit ID {job_id}")
+
+        if job.status != RenderJobStatus.done:
+            raise ActionNotPossibleError(
+                f"Auftrag hat den Status {job.status.value}, es gibt keine Datei."
+            )
+
+        return job
+
+    @staticmethod
+    def run_job(flask_app: Flask, job_id: UUID):
+        """Render the document of a job and store it (runs in a worker thread)
+
+        :param flask_app: The Flask app (there is no app context in worker threads)
+        :param job_id: The ID of the job
+        """
+
+        with flask_app.app_context():
+            job = RenderJobsRepository.get_job_by_id(job_id)
+            if job is None or job.status != RenderJobStatus.pending:
+                return
+
+            job.status = RenderJobStatus.running
+            RenderJobsRepository.update_job(job)
+
+            try:
+                user = UsersRepository.get_user_by_id(job.user_id)
+                if user is None:
+                    raise NotFoundError(f"Nutzer:in mit ID {job.user_id}")
+
+                params = RenderJobParamsSchema().load(job.params)
+                render = RenderJobsService._get_renderer(job.job_type)
+
+                # send_file needs a request context
+                with flask_app.test_request_context():
+                    response = render(params, user.id, user.user_group)
+                    response.direct_passthrough = False
+                    job.result = response.get_data()
+
+                job.mimetype = response.mimetype
+                job.download_name = RenderJobsService._get_download_name(response)
+                job.status = RenderJobStatus.done
+            except (
+                AccessDeniedError,
+                BadValueError,
+                NotFoundError,
+                ValueError,
+            ) as err:
+                job.status = RenderJobStatus.failed
+                job.error = str(err)[:512]
+            except Exception as err:
+                flask_app.logger.exception(f"Render job {job_id} failed: {err}")
+                job.status = RenderJobStatus.failed
+                job.error = "Interner Fehler beim Erstellen des Dokuments."
+
+            job.finished = datetime.now()
+            job.expires = job.finished + RENDER_JOB_TTL
+            RenderJobsRepository.update_job(job)
+
+    @staticmethod
+    def fail_stale_jobs() -> int:
+        """Mark jobs as failed that were lost by a restart of their app worker
+
+        The jobs are only held in the executor of the app worker that created
+        them. Jobs that are still pending or running after RENDER_JOB_STALE_AFTER
+        will never finish.
+
+        :return: Number of failed jobs
+        """
+
+        now = datetime.now()
+        return RenderJobsRepository.fail_stale_jobs(
+            now - RENDER_JOB_STALE_AFTER,
+            "Der Auftrag wurde abgebrochen, bitte erneut erstellen.",
+            now,
+        )
+
+    @staticmethod
+    def delete_expired_jobs() -> int:
+        """Delete expired jobs and their results
+
+        :return: Number of deleted jobs
+        """
+
+        return RenderJobsRepository.delete_expired_jobs(datetime.now())
+
+    @staticmethod
+    def _check_params(job_type: RenderJobType, params: dict):
+        """Reject jobs that would fail anyway because of missing parameters"""
+
+        if job_type in (RenderJobType.location_report, RenderJobType.invoice):
+            if not params.get("date_start") or not params.get("date_end"):
+                raise BadValueError("Start- und Enddatum müssen angegeben werden.")
+
+        if job_type == RenderJobType.invoice:
+            ids = [params.get(key) for key in ("location_id", "group_id", "person_id")]
+            if len([id for id in ids if id]) != 1:
+                raise BadValueError(
+                    "Es muss genau eine ID übergeben werden. (Standort, Gruppe oder Person)"
+                )
+
+        if job_type == RenderJobType.group_qr_codes and not params.get("group_id"):
+            raise BadValueError("Es wurde keine Gruppen-ID übergeben.")
+
+    @staticmethod
+    def _get_renderer(
+        job_type: RenderJobType,
+    ) -> Callable[[dict, UUID, UserGroup], Response]:
+        """Get the function that renders a document type like its endpoint does"""
+
+        def location_report(params, user_id, user_group):
+            filters = OrdersFilters(
+                date_start=params.get("date_start"),
+                date_end=params.get("date_end"),
+                location_id=params.get("location_id"),
+            )
+            return ReportsService.get_location_report(
+                filters=filters, user_id=user_id, user_group=user_group
+            )
+
+        def invoice(params, user_id, user_group):
+            filters = OrdersFilters(
+                date_start=params.get("date_start"),
+                date_end=params.get("date_end"),
+                location_id=params.get("location_id"),
+                group_id=params.get("group_id"),
+                person_id=params.get("person_id"),
+            )
+            return ReportsService.get_printed_invoice(filters=filters)
+
+        def group_qr_codes(params, user_id, user_group):
+            return GroupsService.create_batch_qr_codes(
+                params["group_id"], user_id, user_group
+            )
+
+        def employee_qr_codes(params, user_id, user_group):
+            if params.get("employee_ids"):
+                return EmployeesService.get_qr_code_for_employees_list(
+                    params["employee_ids"], user_group=user_group, user_id=user_id
+                )
+            return EmployeesService.get_qr_code_for_all_employees_by_user_scope(
+                user_group=user_group, user_id=user_id
+            )
+
+        return {
+            RenderJobType.location_report: location_report,
+            RenderJobType.invoice: invoice,
+            RenderJobType.group_qr_codes: group_qr_codes,
+            RenderJobType.employee_qr_codes: employee_qr_codes,
+        }[job_type]
+
+    @staticmethod
+    def _get_download_name(response: Response) -> str:
+        _, options = parse_options_header(response.headers.get("Content-Disposition"))
+        return options.get("filename", "dokument.pdf")[:256]
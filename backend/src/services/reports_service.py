@@ -1,11 +1,19 @@
-from datetime import datetime, timedelta, time, date
-import pytz
-from typing import List, Union, Dict
-from uuid import UUID
-from flask import Response
+import calendar
+import time
+from datetime import date, datetime
+from typing import List, Optional, Tuple, Union, Dict
+from uuid import UUID, uuid4
+from flask import Response, current_app as app
+from prometheus_client import Counter, Gauge, Histogram
+
+from src.constants import INVOICE_CACHE_MAX_SIZE, INVOICE_CACHE_SIZE
+from src.repositories.change_versions_repository import ChangeVersionsRepository
+from src.repositories.groups_repository import GroupsRepository
 
 from src.repositories.orders_repository import OrdersRepository, OrdersFilters
 from src.repositories.locations_repository import LocationsRepository
+from src.repositories.persons_repository import PersonsRepository
+from src.repositories.stored_invoices_repository import StoredInvoicesRepository
 from src.repositories.users_repository import UsersRepository
 
 from src.models.maindish import MainDish
@@ -13,11 +21,68 @@ from src.models.user import UserGroup
 from src.models.preorder import PreOrder
 from src.models.dailyorder import DailyOrder
 from src.models.oldorder import OldOrder
-
-from src.schemas.reports_schemas import CountOrdersObject, CountOrdersSchema
+from src.models.stored_invoice import InvoiceScope
+
+from src.schemas.reports_schemas import (
+    CountOrdersObject,
+    CountOrdersSchema,
+    StoredInvoiceObject,
+)
+from src.utils.billing import (
+    BillingEngine,
+    BillingPerson,
+    InvoiceSummary,
+)
+from src.utils.change_tracking import month_scopes, table_scope
+from src.utils.dish_price_cache import DishPriceCache
 from src.utils.exceptions import AccessDeniedError, NotFoundError, BadValueError
-from src.utils.pdf_creator import PDFCreationUtils
-from src.utils.error import ErrMsg, abort_with_err
+from src.utils.lru_cache import LRUCache
+from src.utils.pdf_creator import (
+    InvoiceJob,
+    PDFCreationUtils,
+    RenderedPDF,
+    RenderedPDFFile,
+)
+from src.utils.report_export import ReportExportUtils
+
+
+invoice_cache_hit_counter = Counter(
+    "flask_invoice_cache_hit_counter",
+    "Total number of invoices served from the rendered invoice cache",
+)
+invoice_cache_miss_counter = Counter(
+    "flask_invoice_cache_miss_counter",
+    "Total number of invoices that had to be rendered",
+)
+stored_invoice_hit_counter = Counter(
+    "flask_stored_invoice_hit_counter",
+    "Total number of invoices served from the month-end batch run",
+)
+
+invoice_batch_total_gauge = Gauge(
+    "flask_invoice_batch_total",
+    "Number of invoices to render in the current or last month-end batch run",
+)
+invoice_batch_done_gauge = Gauge(
+    "flask_invoice_batch_done",
+    "Number of invoices processed in the current or last month-end batch run",
+)
+invoice_batch_failed_counter = Counter(
+    "flask_invoice_batch_failed_counter",
+    "Total number of invoices the month-end batch run failed to render",
+)
+invoice_batch_render_seconds = Histogram(
+    "flask_invoice_batch_render_seconds",
+    "Time the month-end batch run waited to render and store one invoice",
+    ["scope"],
+)
+invoice_batch_duration_gauge = Gauge(
+    "flask_invoice_batch_duration_seconds",
+    "Duration of the last month-end batch run",
+)
+
+# Gerenderte Rechnungen (pro Worker), der Schlüssel enthält die Änderungsversionen
+rendered_invoices = LRUCache(INVOICE_CACHE_SIZE)
 
 
 class ReportsService:
@@ -28,31 +93,27 @@ class ReportsService:
     ) -> List[CountOrdersSchema]:
         """Function for daily_orders_routes"""
 
-        daily_orders: List[DailyOrder] = []
         if user_group == UserGroup.kuechenpersonal:
             user = UsersRepository.get_user_by_id(user_id)
-            daily_orders = OrdersRepository.get_all_daily_orders(
-                OrdersFilters(location_id=user.location_id)
-            )
+            filters = OrdersFilters(location_id=user.location_id)
         elif user_group == UserGroup.verwaltung:
-            daily_orders = OrdersRepository.get_all_daily_orders()
+            filters = OrdersFilters()
         else:
             raise AccessDeniedError(f"Nutzer:in {user_id}")
 
-        if not daily_orders:
+        location_counts = ReportsService._count_location_orders_by_date(
+            filters, models=(DailyOrder,)
+        )
+
+        if not location_counts:
             returnMessage = [
                 CountOrdersObject(
-                    location_id=user.location_id, rot=0, blau=0, salad_option=0
+                    location_id=filters.location_id, rot=0, blau=0, salad_option=0
                 )
             ]
             return CountOrdersSchema(many=True).dump(returnMessage)
 
-        location_counts = ReportsService._count_location_orders_by_date(daily_orders)
-        datum = (
-            (daily_orders[0].date).date()
-            if isinstance(daily_orders[0].date, datetime)
-            else daily_orders[0].date
-        )
+        datum = min(location_counts)
 
         orders = [
             CountOrdersObject(
@@ -73,73 +134,45 @@ class ReportsService:
         filters: OrdersFilters,
         user_id: UUID,
         user_group: UserGroup,
+        export_format: str = "pdf",
     ) -> Union[Response, None]:
         """
         Create a orders report filterd by date and location
+
+        CSV and XLSX exports are streamed row by row from one aggregate query.
+
         :param filters: Filters for date_start, date_end and location_id
-        :return: a pdf file with the report or None if no orders were found
+        :param export_format: "pdf" or one of the EXPORT_FORMATS
+        :return: a pdf file with the report or the streamed export
         """
-        if filters.location_id:
-            if (
-                not filters.location_id
-                or not filters.date_start
-                or not filters.date_end
-            ):
-                raise ValueError("Keine Standort-ID oder Datum übergeben")
-
-            all_locations = False
-            orders = ReportsService._get_reports_orders_by_location(
-                fil=filters, user_id=user_id, user_group=user_group
-            )
-        else:
-            if not filters.date_start or not filters.date_end:
-                raise ValueError("Keine Standort-ID oder Datum übergeben")
-            all_locations = True
-            orders = ReportsService._get_reports_orders_by_location(
-                fil=filters, user_id=user_id, user_group=user_group
+        if not filters.date_start or not filters.date_end:
+            raise ValueError("Keine Standort-ID oder Datum übergeben")
+
+        if filters.date_start > filters.date_end:
+            raise ValueError("Kein valides Start- und/oder Enddatum.")
+
+        if not ReportsService._check_user_access_to_location(
+            filters.location_id, user_id, user_group
+        ):
+            raise AccessDeniedError(f"Nutzer:in {user_id}")
+
+        if export_format != "pdf":
+            return ReportExportUtils.create_location_report(
+                OrdersRepository.stream_location_report_rows(filters),
+                export_format,
+                f"Report_{filters.date_start}_{filters.date_end}",
             )
 
         date_location_counts: Dict[dict] = (
-            ReportsService._count_location_orders_by_date(orders)
+            ReportsService._count_location_orders_by_date(filters)
         )
 
         return PDFCreationUtils.create_pdf_report(
             filters=filters,
             date_location_counts=date_location_counts,
-            all_locations=all_locations,
+            all_locations=not filters.location_id,
         )
 
-    def _get_reports_orders_by_location(
-        fil: OrdersFilters,
-        user_id: UUID,
-        user_group: UserGroup,
-    ) -> List[PreOrder | DailyOrder | OldOrder]:
-
-        orders: List[PreOrder | DailyOrder | OldOrder] = []
-
-        if fil.date_start and fil.date_end and (fil.date_start <= fil.date_end):
-            if ReportsService._check_user_access_to_location(
-                fil.location_id, user_id, user_group
-            ):
-                orders.extend(
-                    OrdersRepository.get_pre_orders(
-                        fil,
-                        user_group=(
-                            UserGroup.verwaltung
-                            if user_group == UserGroup.kuechenpersonal
-                            else user_group
-                        ),
-                        user_id=user_id,
-                    )
-                )
-                orders.extend(OrdersRepository.get_all_daily_orders(fil))
-                orders.extend(OrdersRepository.get_old_orders(fil))
-            else:
-                raise AccessDeniedError(f"Nutzer:in {user_id}")
-        else:
-            raise ValueError("Kein valides Start- und/oder Enddatum.")
-        return orders
-
     def _check_user_access_to_location(
         location_id: UUID, user_id: UUID, user_group: UserGroup
     ) -> bool:
@@ -159,39 +192,70 @@ class ReportsService:
             return False
 
     def _count_location_orders_by_date(
-        orders: Union[List[PreOrder], List[DailyOrder], List[OldOrder]],
+        filters: OrdersFilters,
+        models: tuple = (PreOrder, DailyOrder, OldOrder),
     ) -> Dict:
+        """
+        Count the orders per date and location
 
-        date_location_counts = {}
+        The database returns one count row per date, location and main dish,
+        the locations are loaded once for all rows. Closed days are read from
+        the daily rollup instead of the old orders, unless the filters need
+        single persons or groups.
 
-        for order in orders:
-            if order.nothing:
-                continue
+        :param filters: Filters for orders
+        :param models: Order tables to include in the count
+        :return: Dict of date -> location -> counts for rot, blau and salad_option
+        """
+
+        use_rollup = (
+            OldOrder in models and not filters.person_id and not filters.group_id
+        )
+        if use_rollup:
+            models = tuple(model for model in models if model is not OldOrder)
+
+        rows = (
+            OrdersRepository.count_orders_by_date_and_location(filters, models)
+            if models
+            else []
+        )
+        rollups = OrdersRepository.get_daily_rollups(filters) if use_rollup else []
+
+        if not rows and not rollups:
+            return {}
+
+        locations = {
+            location.id: location for location in LocationsRepository.get_locations()
+        }
+
+        date_location_counts = {}
 
-            location = LocationsRepository.get_location_by_id(order.location_id)
+        def get_counts(order_date, location_id) -> Dict:
+            location = locations.get(location_id)
             if not location:
-                raise NotFoundError(f"Standort mit ID {order.location_id}")
+                raise NotFoundError(f"Standort mit ID {location_id}")
 
-            order_date = order.date
-            if isinstance(order_date, datetime):
-                order_date = order_date.date()
+            return date_location_counts.setdefault(order_date, {}).setdefault(
+                location, {"rot": 0, "blau": 0, "salad_option": 0}
+            )
+
+        for rollup in rollups:
+            if not (rollup.rot or rollup.blau or rollup.salad):
+                continue
 
-            if order_date not in date_location_counts:
-                date_location_counts[order_date] = {}
+            counts = get_counts(rollup.date, rollup.location_id)
+            counts["rot"] += rollup.rot
+            counts["blau"] += rollup.blau
+            counts["salad_option"] += rollup.salad
 
-            if location not in date_location_counts[order_date]:
-                date_location_counts[order_date][location] = {
-                    "rot": 0,
-                    "blau": 0,
-                    "salad_option": 0,
-                }
+        for order_date, location_id, main_dish, count, salad_count in rows:
+            counts = get_counts(order_date, location_id)
 
-            if order.main_dish == MainDish.rot:
-                date_location_counts[order_date][location]["rot"] += 1
-            elif order.main_dish == MainDish.blau:
-                date_location_counts[order_date][location]["blau"] += 1
-            if order.salad_option:
-                date_location_counts[order_date][location]["salad_option"] += 1
+            if main_dish == MainDish.rot:
+                counts["rot"] += count
+            elif main_dish == MainDish.blau:
+                counts["blau"] += count
+            counts["salad_option"] += salad_count
 
         return date_location_counts
 
@@ -203,10 +267,226 @@ class ReportsService:
     ) -> Union[Response]:
         """
         Get an invoice report filterd by date and location
+
+        Invoices of a whole closed month are served from the month-end batch
+        run if the data they were built from has not changed since.
+
         :param filters: Filters for old orders
         :return: a pdf file with the report or None if no orders were found
         """
 
+        scope, scope_id = ReportsService._get_invoice_scope(filters)
+
+        # Versions are read before the orders, so a concurrent change is never missed
+        versions = ReportsService._get_invoice_versions(
+            filters.date_start, filters.date_end
+        )
+        cache_key = (
+            scope.value,
+            str(scope_id),
+            filters.date_start,
+            filters.date_end,
+            versions,
+        )
+
+        pdf: Optional[RenderedPDF] = rendered_invoices.get(cache_key)
+        if pdf is not None:
+            invoice_cache_hit_counter.inc()
+            return PDFCreationUtils.pdf_response(pdf)
+
+        month = ReportsService._get_whole_month(filters.date_start, filters.date_end)
+        stored = (
+            StoredInvoicesRepository.get_invoice(
+                month, scope, scope_id, ReportsService._format_versions(versions)
+            )
+            if month
+            else None
+        )
+
+        if stored is not None:
+            stored_invoice_hit_counter.inc()
+            pdf = RenderedPDF(
+                content=stored.content, download_name=stored.download_name
+            )
+            if stored.size <= INVOICE_CACHE_MAX_SIZE:
+                rendered_invoices.set(cache_key, pdf)
+            return PDFCreationUtils.pdf_response(pdf)
+
+        invoice_cache_miss_counter.inc()
+        pdf_file = ReportsService._render_invoice(
+            scope, scope_id, filters.date_start, filters.date_end
+        )
+        # Große Rechnungen werden nur aus der temporären Datei gestreamt
+        if pdf_file.size <= INVOICE_CACHE_MAX_SIZE:
+            rendered_invoices.set(cache_key, pdf_file.read())
+
+        return PDFCreationUtils.pdf_file_response(pdf_file)
+
+    @staticmethod
+    def render_month_end_invoices(month: date) -> int:
+        """
+        Render and store the person, group and location invoices of a month
+
+        The invoices are prepared from the database in the app process and
+        rendered in parallel worker processes. Every invoice is committed on
+        its own, so finished invoices can already be downloaded while the run
+        continues. A failing invoice is logged and skipped, it is rendered on
+        demand when it is requested.
+
+        :param month: Any day of the month to bill
+        :return: Number of stored invoices
+        """
+
+        month = month.replace(day=1)
+        date_start = month
+        date_end = month.replace(day=calendar.monthrange(month.year, month.month)[1])
+
+        # Versions are read before the orders, like for invoices on demand
+        versions = ReportsService._format_versions(
+            ReportsService._get_invoice_versions(date_start, date_end)
+        )
+        invoice_ids = OrdersRepository.get_old_order_invoice_ids(
+            OrdersFilters(date_start=date_start, date_end=date_end)
+        )
+
+        invoices = [
+            (scope, scope_id)
+            for scope in InvoiceScope
+            for scope_id in invoice_ids[scope.value]
+            if scope_id is not None
+        ]
+
+        invoice_batch_total_gauge.set(len(invoices))
+        invoice_batch_done_gauge.set(0)
+        batch_start = time.perf_counter()
+
+        def failed(scope: InvoiceScope, scope_id: UUID, err: Exception):
+            StoredInvoicesRepository.rollback()
+            invoice_batch_failed_counter.inc()
+            app.logger.error(
+                f"Rechnung {scope.value} {scope_id} für {month:%Y-%m} "
+                f"konnte nicht erstellt werden: {err}"
+            )
+
+        prepared = []
+        for scope, scope_id in invoices:
+            try:
+                job = ReportsService._prepare_invoice(
+                    scope, scope_id, date_start, date_end
+                )
+                prepared.append((scope, scope_id, job))
+            except Exception as err:
+                failed(scope, scope_id, err)
+                invoice_batch_done_gauge.inc()
+
+        stored = 0
+        start = time.perf_counter()
+        rendered = PDFCreationUtils.render_invoices([job for _, _, job in prepared])
+        for (scope, scope_id, _), pdf in zip(prepared, rendered):
+            try:
+                if isinstance(pdf, Exception):
+                    raise pdf
+                StoredInvoicesRepository.upsert_invoice(
+                    {
+                        "id": uuid4(),
+                        "month": month,
+                        "scope": scope,
+                        "scope_id": scope_id,
+                        "versions": versions,
+                        "download_name": pdf.download_name,
+                        "size": len(pdf.content),
+                        "content": pdf.content,
+                        "created": datetime.now(),
+                    }
+                )
+                stored += 1
+            except Exception as err:
+                failed(scope, scope_id, err)
+
+            # Time the run waited for this invoice, the workers render in parallel
+            invoice_batch_render_seconds.labels(scope=scope.value).observe(
+                time.perf_counter() - start
+            )
+            start = time.perf_counter()
+            invoice_batch_done_gauge.inc()
+
+        invoice_batch_duration_gauge.set(time.perf_counter() - batch_start)
+
+        return stored
+
+    @staticmethod
+    def get_stored_invoices(
+        month: date, scope: Optional[InvoiceScope] = None
+    ) -> List[StoredInvoiceObject]:
+        """
+        Get the invoices of a month stored by the month-end batch run
+
+        :param month: Any day of the month
+        :param scope: Only invoices for persons, groups or locations (optional)
+        :return: The stored invoices and whether they are still up to date
+        """
+
+        month = month.replace(day=1)
+        date_end = month.replace(day=calendar.monthrange(month.year, month.month)[1])
+        versions = ReportsService._format_versions(
+            ReportsService._get_invoice_versions(month, date_end)
+        )
+
+        return [
+            StoredInvoiceObject(invoice, up_to_date=invoice.versions == versions)
+            for invoice in StoredInvoicesRepository.get_invoices(month, scope)
+        ]
+
+    @staticmethod
+    def get_stored_invoice_file(invoice_id: UUID) -> Response:
+        """
+        Get the PDF of a stored invoice
+
+        :param invoice_id: The ID of the stored invoice
+        :return: The PDF as it was stored by the batch run
+        """
+
+        invoice = StoredInvoicesRepository.get_invoice_by_id(invoice_id)
+        if invoice is None:
+            raise NotFoundError(f"Rechnung mit ID {invoice_id}")
+
+        return PDFCreationUtils.pdf_response(
+            RenderedPDF(content=invoice.content, download_name=invoice.download_name)
+        )
+
+    @staticmethod
+    def get_invoice_summary(filters: OrdersFilters) -> InvoiceSummary:
+        """
+        Compute the line items and totals of an invoice without rendering it
+
+        :param filters: Date range and exactly one of person, group or location
+        :return: The invoices of all billed persons with their totals
+        """
+
+        scope, scope_id = ReportsService._get_invoice_scope(filters)
+
+        exists = {
+            InvoiceScope.person: PersonsRepository.get_person_by_id,
+            InvoiceScope.location: LocationsRepository.get_location_by_id,
+            InvoiceScope.group: GroupsRepository.get_group_by_id,
+        }[scope]
+        if exists(scope_id) is None:
+            raise NotFoundError(f"{scope.value} mit ID {scope_id}")
+
+        return ReportsService._compute_invoice(
+            scope, scope_id, filters.date_start, filters.date_end
+        )
+
+    @staticmethod
+    def _get_invoice_scope(filters: OrdersFilters) -> Tuple[InvoiceScope, UUID]:
+        """Check the filters of an invoice and get whom it is for"""
+
+        if not filters.date_start or not filters.date_end:
+            raise BadValueError("Start- und Enddatum müssen angegeben werden.")
+
+        if filters.date_start > filters.date_end:
+            raise BadValueError("Das Startdatum muss vor dem Enddatum liegen.")
+
         if (
             (filters.person_id and filters.location_id)
             or (filters.person_id and filters.group_id)
@@ -216,21 +496,121 @@ class ReportsService:
                 "Nur eine UUID von Standort, Gruppe ODER Person kann verwendet werden"
             )
 
-        orders: List[OldOrder] = OrdersRepository.get_old_orders(filters)
-
         if filters.person_id:
-            return PDFCreationUtils.create_pdf_invoice_person(
-                filters.date_start, filters.date_end, orders, filters.person_id
-            )
+            return InvoiceScope.person, filters.person_id
         elif filters.location_id:
-            return PDFCreationUtils.create_pdf_invoice_location(
-                filters.date_start, filters.date_end, orders, filters.location_id
-            )
+            return InvoiceScope.location, filters.location_id
         elif filters.group_id:
-            return PDFCreationUtils.create_pdf_invoice_group(
-                filters.date_start, filters.date_end, orders, filters.group_id
+            return InvoiceScope.group, filters.group_id
+
+        raise BadValueError("Keine Standort-ID, Gruppen-ID oder Personen-ID übergeben")
+
+    @staticmethod
+    def _compute_invoice(
+        scope: InvoiceScope, scope_id: UUID, date_start: date, date_end: date
+    ) -> InvoiceSummary:
+        filters = OrdersFilters(
+            person_id=scope_id if scope == InvoiceScope.person else None,
+            location_id=scope_id if scope == InvoiceScope.location else None,
+            group_id=scope_id if scope == InvoiceScope.group else None,
+            date_start=date_start,
+            date_end=date_end,
+        )
+
+        # A person is billed the prepayment even without orders
+        include_person_ids = [scope_id] if scope == InvoiceScope.person else []
+
+        runs = OrdersRepository.get_old_order_runs(filters)
+        persons = {
+            row.id: BillingPerson(*row)
+            for row in PersonsRepository.get_persons_with_group(
+                {run.person_id for run in runs} | set(include_person_ids)
             )
+        }
+        prices = DishPriceCache.get_timeline().billing_prices
+
+        return BillingEngine.compute(
+            date_start,
+            date_end,
+            runs,
+            persons,
+            prices,
+            include_person_ids=include_person_ids,
+        )
+
+    @staticmethod
+    def _render_invoice(
+        scope: InvoiceScope, scope_id: UUID, date_start: date, date_end: date
+    ) -> RenderedPDFFile:
+        render = {
+            InvoiceScope.person: PDFCreationUtils.render_pdf_invoice_person,
+            InvoiceScope.location: PDFCreationUtils.render_pdf_invoice_location,
+            InvoiceScope.group: PDFCreationUtils.render_pdf_invoice_group,
+        }[scope]
+
+        summary = ReportsService._compute_invoice(scope, scope_id, date_start, date_end)
+        return render(summary, scope_id)
+
+    @staticmethod
+    def _prepare_invoice(
+        scope: InvoiceScope, scope_id: UUID, date_start: date, date_end: date
+    ) -> InvoiceJob:
+        prepare = {
+            InvoiceScope.person: PDFCreationUtils.prepare_invoice_person,
+            InvoiceScope.location: PDFCreationUtils.prepare_invoice_location,
+            InvoiceScope.group: PDFCreationUtils.prepare_invoice_group,
+        }[scope]
+
+        summary = ReportsService._compute_invoice(scope, scope_id, date_start, date_end)
+        return prepare(summary, scope_id)
+
+    @staticmethod
+    def _get_invoice_versions(
+        date_start: Optional[date], date_end: Optional[date]
+    ) -> tuple:
+        """
+        Get the change versions of everything an invoice is built from
+
+        These are the old orders of the billed months, the dish prices and the
+        names and memberships of persons, groups and locations. Any change
+        creates new versions, so outdated invoices are never served.
+
+        :param date_start: Start of the billed period
+        :param date_end: End of the billed period
+        :return: The versions
+        """
+
+        if date_start and date_end:
+            order_scopes = month_scopes("old_order", date_start, date_end)
         else:
-            raise BadValueError(
-                "Keine Standort-ID, Gruppen-ID oder Personen-ID übergeben"
-            )
+            order_scopes = [table_scope("old_order")]
+
+        scopes = [
+            table_scope("dish_price"),
+            table_scope("person"),
+            table_scope("group"),
+            table_scope("location"),
+            *order_scopes,
+        ]
+        versions = ChangeVersionsRepository.get_versions(scopes)
+
+        return tuple(versions[version_scope] for version_scope in scopes)
+
+    @staticmethod
+    def _format_versions(versions: tuple) -> str:
+        return ".".join(str(version) for version in versions)
+
+    @staticmethod
+    def _get_whole_month(
+        date_start: Optional[date], date_end: Optional[date]
+    ) -> Optional[date]:
+        """The first day of the month if exactly one whole month is billed"""
+
+        if not date_start or not date_end or date_start.day != 1:
+            return None
+
+        last_day = calendar.monthrange(date_start.year, date_start.month)[1]
+        if date_end != date_start.replace(day=last_day):
+            return None
+
+        return date_start
@@ -12,6 +12,7 @@ from src.utils.exceptions import (
     AlreadyExistsError,
     ActionNotPossibleError,
 )
+from src.utils.pagination import Page, Pagination
 
 
 class UsersService:
@@ -22,6 +23,13 @@ class UsersService:
         """Get all users saved in the database."""
         return UsersRepository.get_users(user_group_filter)
 
+    @staticmethod
+    def get_users_page(
+        pagination: Pagination, user_group_filter: Optional[UserGroup] = None
+    ) -> Page[User]:
+        """Get one page of the users saved in the database."""
+        return UsersRepository.get_users_page(pagination, user_group_filter)
+
     @staticmethod
     def get_user_by_id(user_id: UUID) -> User | None:
         """Retrieve a user by their ID
@@ -0,0 +1,313 @@
+"""Compute invoices from old orders without touching the database or reportlab
+
+The database groups the old orders of every person and month into runs (see
+OrdersRepository.get_old_order_runs). A run is a series of days that are
+either all "nothing" or all with a meal, uninterrupted by the other kind.
+Every meal run becomes one main dish and one salad line item, every nothing
+run one nothing line item.
+
+Prices are valid from the month of their date on, they are looked up with a
+bisect on the sorted months. Amounts are Decimals rounded to cents.
+"""
+
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from uuid import UUID
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+Month = Tuple[int, int]
+"""(year, month)"""
+
+
+class Prices(NamedTuple):
+    main_dish_price: Decimal
+    salad_price: Decimal
+    prepayment: Decimal
+
+
+DEFAULT_PRICES = Prices(Decimal("4.10"), Decimal("1.50"), Decimal("70.00"))
+"""Prices used for months before the first entered dish price"""
+
+
+class BillingPerson(NamedTuple):
+    id: UUID
+    first_name: str
+    last_name: str
+    type: str
+    group_id: Optional[UUID] = None
+    group_name: Optional[str] = None
+
+
+class OrderRun(NamedTuple):
+    """One run of old orders of a person in a month
+
+    :param main: Number of days with a main dish
+    :param main_start: First day with a main dish (None if main is 0)
+    :param salad: Number of days with a salad
+    """
+
+    person_id: UUID
+    year: int
+    month: int
+    nothing: bool
+    start: date
+    end: date
+    days: int
+    main: int
+    main_start: Optional[date]
+    main_end: Optional[date]
+    salad: int
+    salad_start: Optional[date]
+    salad_end: Optional[date]
+
+
+class InvoiceLine(NamedTuple):
+    kind: str  # "main", "salad" or "nothing"
+    start: date
+    end: date
+    count: int
+    price: Decimal
+    total: Decimal
+
+
+class InvoiceMonth(NamedTuple):
+    """The line items of a person in one month
+
+    :param ordered: Whether the person has orders in this month
+    :param amount: charges - prepayment (negative if the prepayment was higher)
+    """
+
+    year: int
+    month: int
+    lines: List[InvoiceLine]
+    main: int
+    salad: int
+    nothing: int
+    charges: Decimal
+    prepayment: Decimal
+    amount: Decimal
+
+    @property
+    def ordered(self) -> bool:
+        return bool(self.lines)
+
+
+class PersonInvoice(NamedTuple):
+    person: BillingPerson
+    months: List[InvoiceMonth]
+    main: int
+    salad: int
+    nothing: int
+    charges: Decimal
+    prepayment: Decimal
+    amount: Decimal
+
+
+class InvoiceSummary(NamedTuple):
+    """All person invoices of a period
+
+    The totals of a group or location are the sums of the invoices of the
+    persons with orders in the period.
+    """
+
+    date_start: date
+    date_end: date
+    months: List[Month]
+    persons: List[PersonInvoice]
+    main: int
+    salad: int
+    nothing: int
+    charges: Decimal
+    prepayment: Decimal
+    amount: Decimal
+
+    def get_person(self, person_id: UUID) -> Optional[PersonInvoice]:
+        return next(
+            (invoice for invoice in self.persons if invoice.person.id == person_id),
+            None,
+        )
+
+
+class PriceTimeline:
+    """Look up the dish prices valid in a month
+
+    :param prices: (date, main_dish_price, salad_price, prepayment) in any order
+    :param default: Prices for months before the first entry
+    """
+
+    def __init__(
+        self,
+        prices: Iterable[tuple],
+        default: Prices = DEFAULT_PRICES,
+    ):
+        by_month: Dict[Month, Prices] = {}
+        # The latest price of a month is valid for the whole month
+        for valid_from, main_dish_price, salad_price, prepayment in sorted(
+            prices, key=lambda price: price[0]
+        ):
+            by_month[(valid_from.year, valid_from.month)] = Prices(
+                _money(main_dish_price), _money(salad_price), _money(prepayment)
+            )
+
+        self._months: List[Month] = sorted(by_month)
+        self._prices: List[Prices] = [by_month[month] for month in self._months]
+        self._default = default
+
+    def get(self, year: int, month: int) -> Prices:
+        index = bisect_right(self._months, (year, month)) - 1
+        if index < 0:
+            return self._default
+        return self._prices[index]
+
+
+class BillingEngine:
+    """Turn order runs and prices into invoices"""
+
+    @staticmethod
+    def months_between(date_start: date, date_end: date) -> List[Month]:
+        """All months from date_start to date_end, both included"""
+
+        months = []
+        year, month = date_start.year, date_start.month
+        while (year, month) <= (date_end.year, date_end.month):
+            months.append((year, month))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return months
+
+    @staticmethod
+    def compute(
+        date_start: date,
+        date_end: date,
+        runs: Iterable[OrderRun],
+        persons: Dict[UUID, BillingPerson],
+        prices: PriceTimeline,
+        include_person_ids: Sequence[UUID] = (),
+    ) -> InvoiceSummary:
+        """Compute the invoices of all persons with order runs in one pass
+
+        Every person is billed the prepayment of every month in the period,
+        also for months without orders, like on the invoice of the person.
+
+        :param date_start: Start of the billed period
+        :param date_end: End of the billed period
+        :param runs: The order runs, sorted by person, month and start
+        :param persons: Name and group of every person with runs
+        :param prices: The dish prices
+        :param include_person_ids: Persons to bill even without any runs
+        :return: The invoices
+        """
+
+        months = BillingEngine.months_between(date_start, date_end)
+        month_index = {month: index for index, month in enumerate(months)}
+
+        lines: Dict[UUID, List[List[InvoiceLine]]] = {
+            person_id: [[] for _ in months] for person_id in include_person_ids
+        }
+        for run in runs:
+            person_lines = lines.get(run.person_id)
+            if person_lines is None:
+                person_lines = lines[run.person_id] = [[] for _ in months]
+
+            month_lines = person_lines[month_index[(int(run.year), int(run.month))]]
+            month_prices = prices.get(int(run.year), int(run.month))
+
+            if run.nothing:
+                month_lines.append(
+                    InvoiceLine("nothing", run.start, run.end, run.days, ZERO, ZERO)
+                )
+                continue
+            if run.main:
+                month_lines.append(
+                    BillingEngine._line(
+                        "main",
+                        run.main_start,
+                        run.main_end,
+                        run.main,
+                        month_prices.main_dish_price,
+                    )
+                )
+            if run.salad:
+                month_lines.append(
+                    BillingEngine._line(
+                        "salad",
+                        run.salad_start,
+                        run.salad_end,
+                        run.salad,
+                        month_prices.salad_price,
+                    )
+                )
+
+        invoices = [
+            BillingEngine._person_invoice(
+                persons.get(person_id) or BillingPerson(person_id, "", "", "person"),
+                months,
+                person_lines,
+                prices,
+            )
+            for person_id, person_lines in lines.items()
+        ]
+
+        return InvoiceSummary(
+            date_start=date_start,
+            date_end=date_end,
+            months=months,
+            persons=invoices,
+            main=sum(invoice.main for invoice in invoices),
+            salad=sum(invoice.salad for invoice in invoices),
+            nothing=sum(invoice.nothing for invoice in invoices),
+            charges=sum((invoice.charges for invoice in invoices), ZERO),
+            prepayment=sum((invoice.prepayment for invoice in invoices), ZERO),
+            amount=sum((invoice.amount for invoice in invoices), ZERO),
+        )
+
+    @staticmethod
+    def _line(kind: str, start: date, end: date, count: int, price: Decimal):
+        return InvoiceLine(kind, start, end, count, price, price * count)
+
+    @staticmethod
+    def _person_invoice(
+        person: BillingPerson,
+        months: List[Month],
+        lines: List[List[InvoiceLine]],
+        prices: PriceTimeline,
+    ) -> PersonInvoice:
+        invoice_months = []
+        for (year, month), month_lines in zip(months, lines):
+            counts = {"main": 0, "salad": 0, "nothing": 0}
+            for line in month_lines:
+                counts[line.kind] += line.count
+
+            charges = sum((line.total for line in month_lines), ZERO)
+            prepayment = prices.get(year, month).prepayment
+            invoice_months.append(
+                InvoiceMonth(
+                    year=year,
+                    month=month,
+                    lines=month_lines,
+                    main=counts["main"],
+                    salad=counts["salad"],
+                    nothing=counts["nothing"],
+                    charges=charges,
+                    prepayment=prepayment,
+                    amount=charges - prepayment,
+                )
+            )
+
+        return PersonInvoice(
+            person=person,
+            months=invoice_months,
+            main=sum(month.main for month in invoice_months),
+            salad=sum(month.salad for month in invoice_months),
+            nothing=sum(month.nothing for month in invoice_months),
+            charges=sum((month.charges for month in invoice_months), ZERO),
+            prepayment=sum((month.prepayment for month in invoice_months), ZERO),
+            amount=sum((month.amount for month in invoice_months), ZERO),
+        )
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value)).quantize(CENT)
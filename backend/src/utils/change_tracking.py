@@ -0,0 +1,145 @@
+"""Track writes to tables whose lists are polled by the frontend.
+
+Every write to a tracked table increases its change version in the same
+transaction (see ChangeVersion). Writes through the unit of work (add, update,
+delete of objects) also increase the version of the affected locations.
+Bulk statements (insert/update/delete statements on a model) do not know the
+affected rows, so they increase the version of all locations.
+
+Writes that bypass the session events (e.g. ``bulk_save_objects``) have to
+call ``mark_changed`` themselves.
+
+Tables in MONTHLY_TABLES additionally have a version per month of their
+``date`` column. Bulk statements increase the version of all months, unless
+they name the affected months in the execution option ``changed_months``.
+"""
+
+from datetime import date, timedelta
+from typing import Iterable, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, ORMExecuteState
+from src.database import db
+from src.repositories.change_versions_repository import ChangeVersionsRepository
+
+
+TRACKED_TABLES = {
+    "pre_order",
+    "daily_order",
+    "group",
+    "person",
+    "user",
+    "employee",
+    "location",
+    "dish_price",
+    "old_order",
+}
+"""Tables with a change version"""
+
+MONTHLY_TABLES = {"old_order"}
+"""Tracked tables that also have a change version per month"""
+
+ALL_LOCATIONS = "*"
+ALL_MONTHS = "*"
+
+
+def table_scope(table: str) -> str:
+    """Scope of all changes in a table"""
+    return table
+
+
+def location_scope(table: str, location_id) -> str:
+    """Scope of changes of rows with the location in a table"""
+    return f"{table}@{location_id}"
+
+
+def month_scope(table: str, month: date | str) -> str:
+    """Scope of changes of rows with a date in the month in a table"""
+    if isinstance(month, date):
+        month = month.strftime("%Y-%m")
+    return f"{table}#{month}"
+
+
+def month_scopes(table: str, date_start: date, date_end: date) -> list[str]:
+    """Scopes of all months from date_start to date_end, including all months"""
+    scopes = [month_scope(table, ALL_MONTHS)]
+    month = date_start.replace(day=1)
+    while month <= date_end:
+        scopes.append(month_scope(table, month))
+        month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return scopes
+
+
+def register_change_tracking() -> None:
+    """Register the session events that increase the change versions."""
+
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
+        event.listen(db.session, "do_orm_execute", _do_orm_execute)
+
+
+def mark_changed(
+    session: Session,
+    tables: Iterable[str],
+    months: Optional[Iterable[date]] = None,
+) -> None:
+    """Increase the change versions of tables changed outside of session events
+
+    :param session: The session the change was made in
+    :param tables: Names of the changed tables
+    :param months: The changed months of monthly tracked tables, None for all months
+    """
+    scopes = set()
+    for table in tables:
+        if table in TRACKED_TABLES:
+            scopes.add(table_scope(table))
+            scopes.add(location_scope(table, ALL_LOCATIONS))
+        if table in MONTHLY_TABLES:
+            if months is None:
+                scopes.add(month_scope(table, ALL_MONTHS))
+            else:
+                scopes.update(month_scope(table, month) for month in months)
+    ChangeVersionsRepository.bump(session, scopes)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    scopes = set()
+    changed = list(session.new) + list(session.deleted)
+    changed += [obj for obj in session.dirty if session.is_modified(obj)]
+
+    for obj in changed:
+        state = inspect(obj)
+        tables = [t.name for t in state.mapper.tables if t.name in TRACKED_TABLES]
+        if not tables:
+            continue
+
+        location_ids = set()
+        if "location_id" in state.mapper.attrs:
+            history = state.attrs.location_id.history
+            location_ids.update(history.added or history.unchanged or ())
+            location_ids.update(history.deleted or ())
+
+        dates = set()
+        if "date" in state.mapper.attrs:
+            history = state.attrs.date.history
+            dates.update(history.added or history.unchanged or ())
+            dates.update(history.deleted or ())
+
+        for table in tables:
+            scopes.add(table_scope(table))
+            for location_id in location_ids:
+                if location_id is not None:
+                    scopes.add(location_scope(table, location_id))
+            if table in MONTHLY_TABLES:
+                scopes.update(month_scope(table, d) for d in dates if d is not None)
+
+    ChangeVersionsRepository.bump(session, scopes)
+
+
+def _do_orm_execute(state: ORMExecuteState) -> None:
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+
+    table = getattr(state.statement.table, "name", None)
+    if table in TRACKED_TABLES:
+        months = state.execution_options.get("changed_months")
+        mark_changed(state.session, [table], months)
@@ -1,8 +1,12 @@
 import pytz
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from typing import Optional
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from src.repositories.orders_repository import OrdersRepository
+from src.services.import_jobs_service import ImportJobsService
+from src.services.render_jobs_service import RenderJobsService
+from src.services.reports_service import ReportsService
 
 
 def register_cronjobs(app):
@@ -20,6 +24,36 @@ def register_cronjobs(app):
         timezone="Europe/Berlin",
     )
 
+    scheduler.add_job(
+        lambda: create_old_order_partitions(app),
+        "cron",
+        hour="0",
+        minute="05",
+        timezone="Europe/Berlin",
+    )
+
+    # After the orders of the last day of the month were pushed to the old orders
+    scheduler.add_job(
+        lambda: store_month_end_invoices(app),
+        "cron",
+        day="1",
+        hour="8",
+        minute="30",
+        timezone="Europe/Berlin",
+    )
+
+    scheduler.add_job(
+        lambda: delete_expired_render_jobs(app),
+        "interval",
+        minutes=10,
+    )
+
+    scheduler.add_job(
+        lambda: delete_expired_import_jobs(app),
+        "interval",
+        minutes=10,
+    )
+
     scheduler.start()
     scheduler.print_jobs()
 
@@ -40,3 +74,84 @@ def push_orders_to_next_table(app):
         except Exception as e:
             app.logger.error(f"Error while pushing orders to next table: {e}")
             raise e
+
+
+def create_old_order_partitions(app):
+    """Create the monthly old_order partitions for the current and the upcoming months."""
+
+    with app.app_context():
+        timezone = pytz.timezone("Europe/Berlin")
+        today = datetime.now(timezone).date()
+
+        app.logger.info("Running cronjob to create old order partitions.")
+
+        try:
+            partitions = OrdersRepository.create_old_order_partitions(today)
+        except Exception as e:
+            app.logger.error(f"Error while creating old order partitions: {e}")
+            raise e
+
+        if partitions:
+            app.logger.info(f"Ensured old order partitions {', '.join(partitions)}.")
+
+
+def delete_expired_render_jobs(app):
+    """Delete render jobs and their documents after their TTL, fail orphaned jobs."""
+
+    with app.app_context():
+        try:
+            failed = RenderJobsService.fail_stale_jobs()
+            deleted = RenderJobsService.delete_expired_jobs()
+        except Exception as e:
+            app.logger.error(f"Error while deleting expired render jobs: {e}")
+            raise e
+
+        if failed:
+            app.logger.warning(f"Marked {failed} orphaned render jobs as failed.")
+        if deleted:
+            app.logger.info(f"Deleted {deleted} expired render jobs.")
+
+
+def delete_expired_import_jobs(app):
+    """Delete CSV import jobs after their TTL, fail orphaned jobs."""
+
+    with app.app_context():
+        try:
+            failed = ImportJobsService.fail_stale_jobs()
+            deleted = ImportJobsService.delete_expired_jobs()
+        except Exception as e:
+            app.logger.error(f"Error while deleting expired import jobs: {e}")
+            raise e
+
+        if failed:
+            app.logger.warning(f"Marked {failed} orphaned import jobs as failed.")
+        if deleted:
+            app.logger.info(f"Deleted {deleted} expired import jobs.")
+
+
+def store_month_end_invoices(app, month: Optional[date] = None):
+    """Render and store all person, group and location invoices of a month.
+
+    :param month: Any day of the month to bill (default: the month that just closed)
+    """
+
+    with app.app_context():
+        if month is None:
+            timezone = pytz.timezone("Europe/Berlin")
+            today = datetime.now(timezone).date()
+            month = today.replace(day=1) - timedelta(days=1)
+
+        app.logger.info(f"Running cronjob to store the invoices of {month:%Y-%m}.")
+
+        start = datetime.now()
+        try:
+            stored = ReportsService.render_month_end_invoices(month)
+        except Exception as e:
+            app.logger.error(f"Error while storing month-end invoices: {e}")
+            raise e
+
+        app.logger.info(
+            f"Stored {stored} invoices of {month:%Y-%m} in "
+            f"{(datetime.now() - start).total_seconds():.1f} seconds."
+        )
+        return stored
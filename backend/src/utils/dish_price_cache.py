@@ -0,0 +1,100 @@
+"""Cache for the dish price timeline
+
+Every dish price is valid from its date until the date of the next price.
+The prices are loaded once per worker, sorted by date and looked up with a
+bisect, so resolving the price of a date does not query the database.
+
+Every write to the dish prices increases the change version "dish_price" in
+the same transaction (see change_tracking). The cache compares this version
+on every access and reloads the prices when another worker changed them.
+The worker that changed them invalidates its cache right away.
+"""
+
+from bisect import bisect_right
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from src.repositories.change_versions_repository import ChangeVersionsRepository
+from src.repositories.dish_prices_repository import DishPricesRepository
+from src.utils.billing import PriceTimeline
+from src.utils.change_tracking import table_scope
+
+DISH_PRICE_SCOPE = table_scope("dish_price")
+
+
+class CachedDishPrice(NamedTuple):
+    """A dish price that outlives the database session it was loaded in"""
+
+    date: datetime
+    main_dish_price: float
+    salad_price: float
+    prepayment: float
+
+
+class DishPriceTimeline:
+    """Dish prices sorted by their date
+
+    :param prices: The dish prices in any order
+    """
+
+    def __init__(self, prices: Iterable[CachedDishPrice]):
+        self.prices: List[CachedDishPrice] = sorted(
+            prices, key=lambda price: price.date
+        )
+        self._dates = [price.date for price in self.prices]
+        self.billing_prices = PriceTimeline(self.prices)
+
+    def get_price_valid_at_date(self, date: datetime) -> Optional[CachedDishPrice]:
+        """Get the dish price that was or will be valid at a date
+
+        :param date: The date to get the price for
+        :return: The latest price starting at or before the date, None if there is none
+        """
+
+        index = bisect_right(self._dates, date) - 1
+        if index < 0:
+            return None
+        return self.prices[index]
+
+
+_cached: Optional[Tuple[int, DishPriceTimeline]] = None
+
+
+class DishPriceCache:
+    """Get the dish price timeline, load it only if the prices changed"""
+
+    @staticmethod
+    def get_timeline() -> DishPriceTimeline:
+        """Get the timeline of the current dish prices
+
+        :return: The timeline
+        """
+
+        global _cached
+
+        # Read the version before the prices: a change committed in between
+        # leaves an older version behind and the next access reloads again
+        version = ChangeVersionsRepository.get_versions([DISH_PRICE_SCOPE])[
+            DISH_PRICE_SCOPE
+        ]
+
+        cached = _cached
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        timeline = DishPriceTimeline(
+            CachedDishPrice(
+                price.date, price.main_dish_price, price.salad_price, price.prepayment
+            )
+            for price in DishPricesRepository.get_prices()
+        )
+        _cached = (version, timeline)
+        return timeline
+
+    @staticmethod
+    def invalidate():
+        """Drop the cached timeline of this worker"""
+
+        global _cached
+
+        _cached = None
@@ -0,0 +1,58 @@
+"""Conditional GET for list endpoints based on change versions"""
+
+import functools
+import hashlib
+from typing import Callable, List
+
+from flask import g, make_response, request
+
+from src.repositories.change_versions_repository import ChangeVersionsRepository
+
+
+def conditional_get(scopes_of: Callable[[], List[str]]):
+    """Decorator to answer unchanged polls of a list with 304 Not Modified
+
+    The ETag is derived from the change versions of the scopes, the user and
+    the requested URL. If the client sends a matching If-None-Match header,
+    the view function is not called at all.
+
+    The versions are read before the view runs. A change committed in
+    between leads to a new ETag on the next request, never to stale data.
+
+    :param scopes_of: Function returning the change scopes the response depends on.
+        It is called within the request, after authentication.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            etag = _compute_etag(scopes_of())
+
+            if request.if_none_match.contains(etag):
+                response = make_response("", 304)
+                response.set_etag(etag)
+                return response
+
+            response = make_response(func(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+                response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _compute_etag(scopes: List[str]) -> str:
+    versions = ChangeVersionsRepository.get_versions(scopes)
+
+    key = "|".join(
+        [
+            str(g.user_id),
+            str(g.user_group),
+            request.full_path,
+            *[f"{scope}={version}" for scope, version in sorted(versions.items())],
+        ]
+    )
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
@@ -0,0 +1,83 @@
+"""A small thread-safe LRU cache with optional expiry per entry"""
+
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """Bounded in-process cache that evicts the least recently used entry
+
+    Each gunicorn worker has its own instance. Entries can have an expiry
+    time, expired entries are treated as missing.
+
+    :param maxsize: Maximum number of entries
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, tuple[Any, Optional[float]]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get an entry and mark it as recently used
+
+        :param key: The key of the entry
+        :return: The value, None if it is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        """Add or replace an entry
+
+        :param key: The key of the entry
+        :param value: The value to store
+        :param expires_at: Unix timestamp after which the entry is expired
+        """
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        """Remove an entry if it exists"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_caches: "weakref.WeakSet[LRUCache]" = weakref.WeakSet()
+
+
+def _reset_locks_after_fork():
+    """A forked child must not inherit a lock that another thread was holding"""
+    for cache in _caches:
+        cache._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_locks_after_fork)
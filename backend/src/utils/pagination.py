@@ -0,0 +1,202 @@
+"""Utilities for keyset (cursor) pagination of list endpoints.
+
+A cursor is an opaque, URL-safe string that encodes the sort key of the last
+item of a page. The next page starts directly after this key, so the database
+can seek with an index instead of counting skipped rows like OFFSET does.
+
+All paginated endpoints share the same contract:
+
+- ``limit``: page size, without it the full list is returned
+- ``cursor``: value of the ``X-Next-Cursor`` header of the previous page
+- ``with-total``: also return the total number of items in ``X-Total-Count``
+"""
+
+import base64
+import json
+import uuid
+from datetime import date
+from typing import Any, Generic, List, Optional, TypeVar
+
+from flask import Response
+from sqlalchemy import Select, func, literal, select, tuple_
+
+from src.database import db
+from src.utils.exceptions import BadValueError
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+T = TypeVar("T")
+
+_CURSOR_TYPES = {
+    date: date.fromisoformat,
+    int: int,
+    str: str,
+    uuid.UUID: uuid.UUID,
+}
+"""Functions to convert cursor values back, by python type of the sort column"""
+
+
+class Pagination:
+    """
+    Requested page of a paginated list
+
+    :param limit: Maximum number of items on the page
+    :param cursor: Cursor of the page, None for the first page
+    :param with_total: Whether the total number of items should be counted
+    """
+
+    def __init__(
+        self, limit: int, cursor: Optional[str] = None, with_total: bool = False
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.with_total = with_total
+
+    @staticmethod
+    def pop_from(query_params: dict) -> Optional["Pagination"]:
+        """
+        Remove the pagination parameters from loaded query parameters
+
+        :param query_params: Query parameters loaded with a PaginationSchema
+        :return: The requested pagination, None if no limit was given
+        """
+        limit = query_params.pop("limit", None)
+        cursor = query_params.pop("cursor", None)
+        with_total = query_params.pop("with_total", False)
+
+        if limit is None:
+            return None
+        return Pagination(limit, cursor, with_total)
+
+
+class Page(Generic[T]):
+    """
+    One page of a paginated list
+
+    :param items: The items of the page
+    :param next_cursor: Cursor for the next page, None if this is the last page
+    :param total: Total number of items over all pages, None if not requested
+    """
+
+    def __init__(
+        self,
+        items: List[T],
+        next_cursor: Optional[str] = None,
+        total: Optional[int] = None,
+    ):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of an item as cursor
+
+    :param values: The values of the sort key (converted to strings)
+    :return: The cursor
+    """
+    payload = json.dumps([str(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """
+    Decode a cursor created by encode_cursor
+
+    :param cursor: The cursor
+    :param types: Callables converting the strings back, one per value
+    :return: The values of the sort key
+    :raises BadValueError: If the cursor is invalid
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("Unexpected number of values")
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (ValueError, TypeError) as err:
+        raise BadValueError(f"Ungültiger Cursor: {cursor}") from err
+
+
+def paginate(items: List[T], limit: int, cursor_of) -> Page[T]:
+    """
+    Create a page from the result of a keyset query
+
+    The query has to fetch limit + 1 items, the additional item only
+    shows that there is a next page.
+
+    :param items: The items fetched with limit + 1
+    :param limit: The requested page size
+    :param cursor_of: Function returning the sort key values of an item
+    :return: The page
+    """
+    if len(items) <= limit:
+        return Page(items)
+
+    items = items[:limit]
+    return Page(items, next_cursor=encode_cursor(*cursor_of(items[-1])))
+
+
+def paginate_query(query: Select, keys: list, pagination: Pagination) -> Page:
+    """
+    Fetch one page of a query with keyset pagination
+
+    The query must not be ordered yet, it is ordered by the keys.
+    The keys have to identify a row uniquely (e.g. end with the primary key).
+
+    :param query: The filtered select of the model
+    :param keys: Columns of the model to sort and paginate by
+    :param pagination: The requested page
+    :return: The page
+    :raises BadValueError: If the cursor is invalid
+    """
+    total = None
+    if pagination.with_total:
+        total = db.session.scalar(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
+
+    if pagination.cursor:
+        after = decode_cursor(
+            pagination.cursor, *[_CURSOR_TYPES[key.type.python_type] for key in keys]
+        )
+        query = query.filter(
+            tuple_(*keys)
+            > tuple_(*[literal(value, key.type) for key, value in zip(keys, after)])
+        )
+
+    query = query.order_by(*keys).limit(pagination.limit + 1)
+    items = db.session.scalars(query).unique().all()
+
+    page = paginate(
+        items,
+        pagination.limit,
+        lambda item: [getattr(item, key.key) for key in keys],
+    )
+    page.total = total
+    return page
+
+
+def set_pagination_headers(response: Response, page: Page) -> Response:
+    """
+    Add the cursor of the next page and the total count to a response
+
+    The body stays a plain list, so clients that do not paginate keep working.
+
+    :param response: The response to add the headers to
+    :param page: The page contained in the response
+    :return: The response
+    """
+    exposed = []
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+        exposed.append(NEXT_CURSOR_HEADER)
+    if page.total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(page.total)
+        exposed.append(TOTAL_COUNT_HEADER)
+    if exposed:
+        response.headers["Access-Control-Expose-Headers"] = ", ".join(exposed)
+    return response
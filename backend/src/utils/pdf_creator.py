@@ -1,9 +1,17 @@
-from typing import List, Optional
+import os
+from tempfile import SpooledTemporaryFile
+from typing import (
+    IO,
+    Callable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Union,
+)
 from flask import send_file, Response, make_response
-import qrcode
-from datetime import datetime
 from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
 from io import BytesIO
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -20,16 +28,18 @@ from reportlab.platypus import (
 from src.models.person import Person  # noqa: F401
 from src.models.employee import Employee
 from src.models.group import Group
-from src.models.oldorder import OldOrder
 from src.models.dish_price import DishPrice  # noqa: F401
 
 from src.repositories.orders_repository import OrdersFilters
 from src.repositories.locations_repository import LocationsRepository
 from src.repositories.persons_repository import PersonsRepository
 from src.repositories.groups_repository import GroupsRepository
-from src.repositories.dish_prices_repository import DishPricesRepository
 
+from src.constants import PDF_SPOOL_MAX_SIZE, QR_CODE_RENDER_MODE
+from src.utils.billing import InvoiceSummary
 from src.utils.exceptions import NotFoundError
+from src.utils.pdf_render_pool import PDFRenderPool
+from src.utils.qr_code_cache import QRCodeCache
 
 
 FONT_NORMAL = "Helvetica"
@@ -64,46 +74,158 @@ MONATE = [
     "Dezember",
 ]
 
+QR_SHEET_SIZE = 150
+QR_SHEET_HORIZONTAL_MARGIN = 30
+QR_SHEET_VERTICAL_MARGIN = 50
+QR_SHEET_COLS = 3
+QR_SHEET_ROWS = (
+    int(
+        (A4[1] - 2 * QR_SHEET_VERTICAL_MARGIN - QR_SHEET_SIZE)
+        // (QR_SHEET_SIZE + 2 * QR_SHEET_VERTICAL_MARGIN)
+    )
+    + 1
+)
+QR_CODES_PER_PAGE = QR_SHEET_COLS * QR_SHEET_ROWS
+
 NUMMER_VORRAUSZAHLUNG = "3001"
 NUMMER_HAUPTGERICHT = "3000"
 NUMMER_SALAT = "3000"
 NUMMER_NICHTESSER = "3000"
 
 
+class RenderedPDF(NamedTuple):
+    """A rendered PDF file that can be cached and sent later
+
+    :param content: The PDF
+    :param download_name: The file name for the download
+    """
+
+    content: bytes
+    download_name: str
+
+
+class RenderedPDFFile(NamedTuple):
+    """A rendered PDF in a temporary file, see PDFCreationUtils._new_pdf_file
+
+    :param file: The binary file with the PDF
+    :param size: The size of the PDF in bytes
+    :param download_name: The file name for the download
+    """
+
+    file: IO[bytes]
+    size: int
+    download_name: str
+
+    def read(self) -> RenderedPDF:
+        """Read the PDF into memory, e.g. to cache it"""
+
+        self.file.seek(0)
+        return RenderedPDF(content=self.file.read(), download_name=self.download_name)
+
+
+class InvoiceJob(NamedTuple):
+    """An invoice prepared for rendering in worker processes
+
+    The database is only used to prepare the invoice. The chunks hold
+    everything the render function needs and are pickled to the workers.
+
+    :param render: Function that renders one chunk to PDF bytes
+    :param chunks: The arguments for the render function, one per chunk
+    :param download_name: The file name for the download
+    """
+
+    render: Callable[..., bytes]
+    chunks: list
+    download_name: str
+
+
+class InvoiceTableChunk(NamedTuple):
+    """Whole pages of a group or location invoice
+
+    :param head: (title, date_start, date_end) of the first page, None later on
+    :param header: The column titles, only on the first page
+    :param rows: The table rows
+    :param total_font: Font of the total in the last row, only in the last chunk
+    """
+
+    head: Optional[tuple]
+    header: Optional[list]
+    rows: list
+    total_font: Optional[str]
+
+
 class PDFCreationUtils:
 
-    ################################# QR-Code PDF #################################
     @staticmethod
-    def create_qr_code_person(person: Person):
-        # QR-Code generieren
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
+    def pdf_response(pdf: RenderedPDF) -> Response:
+        """Send a rendered PDF as download
 
-        qr.add_data(person.id)
-        qr.make(fit=True)
-        img = qr.make_image(fill="black", back_color="white")
+        :param pdf: The rendered PDF
+        :return: The response with the PDF as attachment
+        """
 
-        # QR-Code-Bild in einem BytesIO-Objekt im Speicher speichern
-        qr_buffer = BytesIO()
-        img.save(qr_buffer, format="PNG")
-        qr_buffer.seek(0)
+        return PDFCreationUtils._file_response(BytesIO(pdf.content), pdf.download_name)
 
-        pdf_buffer = BytesIO()
+    @staticmethod
+    def pdf_file_response(pdf: RenderedPDFFile) -> Response:
+        """Stream a rendered PDF file as download
+
+        :param pdf: The rendered PDF file, it is closed with the response
+        :return: The response with the PDF as attachment
+        """
+
+        return PDFCreationUtils._file_response(pdf.file, pdf.download_name)
+
+    @staticmethod
+    def _new_pdf_file() -> SpooledTemporaryFile:
+        """Create a file to render a PDF into
+
+        The file stays in memory up to PDF_SPOOL_MAX_SIZE and is moved to a
+        temporary file on disk when it grows larger.
+        """
+
+        return SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_SIZE)
+
+    @staticmethod
+    def _file_response(file: IO[bytes], download_name: str) -> Response:
+        """Stream a PDF file as download
+
+        The file is sent in chunks and closed when the response is closed.
+
+        :param file: The binary file with the PDF
+        :param download_name: The file name for the download
+        :return: The response with the PDF as attachment
+        """
+
+        size = file.seek(0, os.SEEK_END)
+        file.seek(0)
+
+        response = make_response(
+            send_file(
+                file,
+                mimetype="application/pdf",
+                as_attachment=True,
+                download_name=download_name,
+            )
+        )
+        response.content_length = size
+        # Explicitly expose the Content-Disposition header for the frontend
+        response.headers["Access-Control-Expose-Headers"] = "Content-Disposition"
+        return response
+
+    ################################# QR-Code PDF #################################
+    @staticmethod
+    def create_qr_code_person(person: Person):
+        pdf_file = PDFCreationUtils._new_pdf_file()
         page_width, page_height = A4
-        c = canvas.Canvas(pdf_buffer, pagesize=A4)
+        c = canvas.Canvas(pdf_file, pagesize=A4)
 
         # Position für den QR-Code
         qr_size = 150
         x_center = (page_width - qr_size) / 2
         y_position = (page_height / 2) + 180  # Position in der oberen Hälfte
 
-        # BytesIO-Objekt in ein ImageReader-Objekt umwandeln, um das QR-Code-Bild in die Canvas einzubetten
-        qr_image = ImageReader(qr_buffer)
-        c.drawImage(qr_image, x_center, y_position, width=qr_size, height=qr_size)
+        PDFCreationUtils._draw_qr_code(c, person.id, x_center, y_position, qr_size)
 
         # Text unterhalb des QR-Codes hinzufügen
         text_y_position = y_position - 20
@@ -114,102 +236,130 @@ class PDFCreationUtils:
             f"{person.first_name} {person.last_name}",
         )
         c.save()
-        pdf_buffer.seek(0)
 
-        response = make_response(
-            send_file(
-                pdf_buffer,
-                mimetype="application/pdf",
-                as_attachment=True,
-                download_name=f"qr-code_{person.first_name}{person.last_name}.pdf",
-            )
+        return PDFCreationUtils._file_response(
+            pdf_file, f"qr-code_{person.first_name}{person.last_name}.pdf"
         )
-        # Explicitly expose the Content-Disposition header for the frontend
-        response.headers["Access-Control-Expose-Headers"] = "Content-Disposition"
-        return response
     
     @staticmethod
     def create_batch_qr_codes(employees: List[Employee], group: Optional[Group] = None):
         """Create a PDF with QR codes for a list of employees.
 
+        Large documents are rendered in parallel worker processes. The PDF is
+        spooled to a temporary file and streamed to the client.
+
         :param employees: List of employee objects to create QR codes for
         :return: The PDF with QR codes as a Response object
         """
 
+        labels = [
+            (employee.id, f"{employee.first_name} {employee.last_name}")
+            for employee in employees
+        ]
+        chunks = PDFRenderPool.split(labels, QR_CODES_PER_PAGE)
+        pdf_file = PDFCreationUtils._new_pdf_file()
+        PDFRenderPool.render(PDFCreationUtils._render_qr_code_pages, chunks, pdf_file)
+
+        if group:
+            download_name = f"{group.group_name}_qr_codes.pdf"
+        else:
+            download_name = "batch_qr_codes.pdf"
+
+        return PDFCreationUtils._file_response(pdf_file, download_name)
+
+    @staticmethod
+    def _render_qr_code_pages(labels: List[tuple]) -> bytes:
+        """Render pages with QR codes (runs in a worker process)
+
+        :param labels: List of (ID, name) tuples
+        :return: The PDF
+        """
+
         pdf_buffer = BytesIO()
         _, page_height = A4
         c = canvas.Canvas(pdf_buffer, pagesize=A4)
 
-        qr_size = 150
-        horizontal_margin = 30
-        vertical_margin = 50
-        cols = 3
-        x_start = horizontal_margin
-        y_start = page_height - vertical_margin - qr_size
+        x_start = QR_SHEET_HORIZONTAL_MARGIN
+        y_start = page_height - QR_SHEET_VERTICAL_MARGIN - QR_SHEET_SIZE
 
         x_position = x_start
         y_position = y_start
 
-        for idx, employee in enumerate(employees):
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
+        for idx, (content, name) in enumerate(labels):
+            PDFCreationUtils._draw_qr_code(
+                c, content, x_position, y_position, QR_SHEET_SIZE
             )
-            qr.add_data(employee.id)
-            qr.make(fit=True)
-            img = qr.make_image(fill="black", back_color="white")
-
-            qr_buffer = BytesIO()
-            img.save(qr_buffer, format="PNG")
-            qr_buffer.seek(0)
-            qr_image = ImageReader(qr_buffer)
-
-            c.drawImage(qr_image, x_position, y_position, width=qr_size, height=qr_size)
             c.setFont("Helvetica", 10)
             c.drawCentredString(
-                x_position + qr_size / 2,
+                x_position + QR_SHEET_SIZE / 2,
                 y_position - 12,
-                f"{employee.first_name} {employee.last_name}",
+                name,
             )
 
-            x_position += qr_size + horizontal_margin
+            x_position += QR_SHEET_SIZE + QR_SHEET_HORIZONTAL_MARGIN
 
-            if (idx + 1) % cols == 0:
+            if (idx + 1) % QR_SHEET_COLS == 0:
                 x_position = x_start
-                y_position -= qr_size + 2 * vertical_margin
+                y_position -= QR_SHEET_SIZE + 2 * QR_SHEET_VERTICAL_MARGIN
 
-                if y_position < vertical_margin:
+                if y_position < QR_SHEET_VERTICAL_MARGIN:
                     c.showPage()
                     y_position = y_start
 
         c.save()
-        pdf_buffer.seek(0)
+        return pdf_buffer.getvalue()
 
-        if group:
-            download_name = f"{group.group_name}_qr_codes.pdf"
-        else:
-            download_name = "batch_qr_codes.pdf"
+    @staticmethod
+    def _draw_qr_code(c: canvas.Canvas, content, x: float, y: float, size: float):
+        """Draw a QR code onto a canvas
+
+        :param c: The canvas to draw on
+        :param content: The content of the QR code
+        :param x: Left edge of the QR code
+        :param y: Bottom edge of the QR code
+        :param size: Width and height of the QR code including the border
+        """
 
-        response = make_response(
-            send_file(
-                pdf_buffer,
-                mimetype="application/pdf",
-                as_attachment=True,
-                download_name=download_name,
-            )
-        )
-        response.headers["Access-Control-Expose-Headers"] = "Content-Disposition"
-        return response
+        if QR_CODE_RENDER_MODE != "vector":
+            # QR-Code aus dem Cache holen (wird nur beim ersten Mal generiert)
+            qr_image = QRCodeCache.get_image(content)
+            c.drawImage(qr_image, x, y, width=size, height=size)
+            return
+
+        # Dunkle Module als Rechtecke zeichnen, nebeneinanderliegende werden zusammengefasst
+        matrix = QRCodeCache.get_matrix(content)
+        module_size = size / len(matrix)
+        path = c.beginPath()
+
+        for row_idx, row in enumerate(matrix):
+            row_y = y + size - (row_idx + 1) * module_size
+            col_idx = 0
+            while col_idx < len(row):
+                if not row[col_idx]:
+                    col_idx += 1
+                    continue
+                run_start = col_idx
+                while col_idx < len(row) and row[col_idx]:
+                    col_idx += 1
+                path.rect(
+                    x + run_start * module_size,
+                    row_y,
+                    (col_idx - run_start) * module_size,
+                    module_size,
+                )
+
+        c.saveState()
+        c.setFillColor(colors.black)
+        c.drawPath(path, stroke=0, fill=1)
+        c.restoreState()
 
     ################################# Reports PDF #################################
 
     @staticmethod
     def create_pdf_report(filters: OrdersFilters, date_location_counts: dict, all_locations: bool = False) -> Response:
 
-        buffer = BytesIO()
-        pdf = SimpleDocTemplate(buffer, pagesize=A4)
+        pdf_file = PDFCreationUtils._new_pdf_file()
+        pdf = SimpleDocTemplate(pdf_file, pagesize=A4)
         styles = getSampleStyleSheet()
         elements = []
 
@@ -247,19 +397,8 @@ class PDFCreationUtils:
 
 
         pdf.build(elements)
-        buffer.seek(0)
-
-        response = make_response(
-            send_file(
-                buffer,
-                mimetype="application/pdf",
-                as_attachment=True,
-                download_name=f"Report_{date_str}.pdf",
-            )
-        )
-        response.headers["Access-Control-Expose-Headers"] = "Content-Disposition"
 
-        return response
+        return PDFCreationUtils._file_response(pdf_file, f"Report_{date_str}.pdf")
 
     def _get_date_string(filters: OrdersFilters) -> str:
 
@@ -383,46 +522,95 @@ class PDFCreationUtils:
 
     ################################# Invoice PDF Helper #################################
     @staticmethod
-    def _sort_orders(orders: List[OldOrder], start, end) -> List[OldOrder]:
+    def _format_number(value) -> str:
+        """Format a count or an amount with two decimals and a decimal comma"""
+
+        return f"{value:.2f}".replace(".", ",")
+
+    @staticmethod
+    def _append_month_sum(data: list, summary: InvoiceSummary, index, year, month):
+        """Append the monthly sum of a group or location invoice to the table"""
+
+        data.append(
+            [
+                "",
+                "____________________________________________________________",
+                "",
+                "",
+            ]
+        )
+        main = sum(invoice.months[index].main for invoice in summary.persons)
+        salad = sum(invoice.months[index].salad for invoice in summary.persons)
+        monatalsname = MONATE[month - 1]
+        StringMonat = f"Summe {monatalsname} {year}"
+        data.append(
+            [
+                "",
+                StringMonat,
+                PDFCreationUtils._format_number(main),
+                PDFCreationUtils._format_number(salad),
+            ]
+        )
+        data.append(["", "", "", ""])
+
+    @staticmethod
+    def _render_invoice(job: InvoiceJob) -> RenderedPDFFile:
+        """Render a prepared invoice, large invoices in parallel worker processes
+
+        The PDF is spooled to a temporary file, so it can be streamed.
         """
-        This function sorts the orders by months.
+
+        pdf_file = PDFCreationUtils._new_pdf_file()
+        PDFRenderPool.render(job.render, job.chunks, pdf_file)
+
+        return RenderedPDFFile(
+            file=pdf_file,
+            size=pdf_file.seek(0, os.SEEK_END),
+            download_name=job.download_name,
+        )
+
+    @staticmethod
+    def render_invoices(
+        jobs: Sequence[InvoiceJob],
+    ) -> Iterator[Union[RenderedPDF, Exception]]:
+        """Render many prepared invoices in parallel worker processes
+
+        Every invoice is rendered by one worker. The invoices are yielded in
+        order as soon as they are ready. A failing invoice yields its exception
+        instead of aborting the others.
+
+        :param jobs: The prepared invoices
+        :return: The rendered invoices or the exceptions of failed invoices
         """
-        current_month = start.month
-        current_year = start.year
-        end_year = end.year
-        end_month = end.month
-        months = []
-
-        while True:
-            months.append([current_month, current_year])
-            if current_month == end_month and current_year == end_year:
-                break
-            current_month += 1
-            if current_month == 13:
-                current_month = 1
-                current_year += 1
-
-        orderarray = []
-        for month, year in months:
-            montharray = []
-            for order in orders:
-                if order.date.month == month and order.date.year == year:
-                    montharray.append(order)
-            orderarray.append(montharray)
-
-        return orderarray, months
 
-    ################################# Person PDF Helper ##################################
+        pdfs = PDFRenderPool.map(PDFCreationUtils._render_invoice_pages, jobs)
+        for job, pdf in zip(jobs, pdfs):
+            if isinstance(pdf, Exception):
+                yield pdf
+            else:
+                yield RenderedPDF(content=pdf, download_name=job.download_name)
+
     @staticmethod
-    def _get_PDFHead(person, style) -> List:
-        Name = person.first_name + " " + person.last_name
-        if person.type == "employee":
-            Gruppenname = person.group.group_name
-            Locationname = person.group.location.location_name
-        else:
-            Gruppenname = "Gruppenleiter am Standort:"
-            Locationname = person.location.location_name
+    def _render_invoice_pages(job: InvoiceJob) -> Union[bytes, Exception]:
+        """Render all chunks of an invoice (runs in a worker process)
+
+        :param job: The prepared invoice
+        :return: The PDF or the exception if rendering failed
+        """
 
+        try:
+            if len(job.chunks) == 1:
+                return job.render(job.chunks[0])
+
+            output = BytesIO()
+            PDFRenderPool.merge((job.render(chunk) for chunk in job.chunks), output)
+            return output.getvalue()
+        except Exception as err:
+            return err
+
+    ################################# Person PDF Helper ##################################
+    @staticmethod
+    def _get_PDFHead(Name, Gruppenname, Locationname, style) -> List:
         header_data = [
             ["", "", FIRMENNAME],
             ["", "", STRASSE],
@@ -490,198 +678,95 @@ class PDFCreationUtils:
     ################################# Invoice PDF Person #################################
 
     @staticmethod
-    def create_pdf_invoice_person(
-        start, end, orders: List[OldOrder], personid
-    ) -> Response:
+    def render_pdf_invoice_person(summary: InvoiceSummary, personid) -> RenderedPDFFile:
         """
-        This function creates an invoice for the orders given in the array orders. The invoice is returned as a PDF File.
+        This function creates the invoice of a person from the computed line items. The invoice is returned as a PDF File.
         """
 
-        styles = getSampleStyleSheet()
-        small_style = styles["Normal"]
-        small_style.fontName = FONT_NORMAL
-        small_style.fontSize = 6
+        return PDFCreationUtils._render_invoice(
+            PDFCreationUtils.prepare_invoice_person(summary, personid)
+        )
 
-        buffer = BytesIO()
-        pdf = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        elements = []
+    @staticmethod
+    def prepare_invoice_person(summary: InvoiceSummary, personid) -> InvoiceJob:
+        """Look up the address of a person for the invoice
+
+        The invoice is rendered in one chunk, because the footer numbers the pages.
+        """
 
         person = PersonsRepository.get_person_by_id(personid)
         if not person:
             raise NotFoundError(
                 f"Es wurde keine Person mit angegebener UUID {personid} gefunden"
             )
-        else:
-            elements.append(PDFCreationUtils._get_PDFHead(person, small_style))
 
-        result = PDFCreationUtils._sort_orders(orders, start, end)
-        orders_sorted_array = result[0]
-        months = result[1]
+        if person.type == "employee":
+            Gruppenname = person.group.group_name
+            Locationname = person.group.location.location_name
+        else:
+            Gruppenname = "Gruppenleiter am Standort:"
+            Locationname = person.location.location_name
+        head = (person.first_name + " " + person.last_name, Gruppenname, Locationname)
 
-        prices = DishPricesRepository.get_prices()
-        payment = []
-        payment.append(
-            [
-                datetime.strptime("01.01.1900", "%d.%m.%Y"),
-                41,
-                15,
-                70,
-            ]
+        return InvoiceJob(
+            render=PDFCreationUtils._render_person_invoice_pages,
+            chunks=[(head, summary.get_person(person.id))],
+            download_name=f"Rechnung_{summary.date_start}_bis_{summary.date_end}_{person.first_name}_{person.last_name}.pdf",
         )
-        if prices:
-            prices.sort(key=lambda x: x.date)
-            for price in prices:
-                if (
-                    price.date.year < end.year
-                    or price.date.month <= end.month
-                    and price.date.year <= end.year
-                ):
-                    payment.append(
-                        [
-                            price.date,
-                            price.main_dish_price * 10,
-                            price.salad_price * 10,
-                            price.prepayment,
-                        ]
-                    )
-        orderarray = []
 
-        main = 0
-        mainstart = ""
-        mainend = ""
-        salad = 0
-        saladstart = ""
-        saladend = ""
-        nothing = 0
-        nothingstart = ""
-        nothingend = ""
+    @staticmethod
+    def _render_person_invoice_pages(chunk: tuple) -> bytes:
+        """Render the invoice of a person (runs in a worker process)
+
+        :param chunk: (name, group name, location name) for the head and the invoice
+        :return: The PDF
+        """
 
-        credit = 0
+        head, invoice = chunk
+
+        styles = getSampleStyleSheet()
+        small_style = styles["Normal"]
+        small_style.fontName = FONT_NORMAL
+        small_style.fontSize = 6
+
+        buffer = BytesIO()
+        pdf = SimpleDocTemplate(buffer, pagesize=A4)
+        elements = [PDFCreationUtils._get_PDFHead(*head, small_style)]
+
+        line_texts = {
+            "main": (NUMMER_HAUPTGERICHT, "Mittagessen WfbM"),
+            "salad": (NUMMER_SALAT, "Mittagessen WfbM Salat"),
+            "nothing": (NUMMER_NICHTESSER, "Mittagessen WfbM Nichtesser"),
+        }
 
         data = [["Leistungsnr./-art", "", "Zeitraum", "Preis", "Anzahl", "Gesamtpreis"]]
-        for month, year in months:
-            index = months.index([month, year])
-            for order in orders_sorted_array[index]:
-                date = order.date
-                if order.nothing is True:
-                    if nothing > 0:
-                        nothing += 1
-                        nothingend = date
-                    else:
-                        if main != 0:
-                            orderarray.append(["main", mainstart, mainend, main])
-                            main = 0
-                        if salad != 0:
-                            orderarray.append(["salad", saladstart, saladend, salad])
-                            salad = 0
-                        nothingstart = date
-                        nothingend = date
-                        nothing = 1
-                else:
-                    if order.salad_option is True:
-                        if salad > 0:
-                            salad += 1
-                            saladend = date
-                        else:
-                            if nothing != 0:
-                                orderarray.append(
-                                    ["nothing", nothingstart, nothingend, nothing]
-                                )
-                                nothing = 0
-                            saladstart = date
-                            saladend = date
-                            salad = 1
-                    if order.main_dish is not None:
-                        if main > 0:
-                            main += 1
-                            mainend = date
-                        else:
-                            if nothing != 0:
-                                orderarray.append(
-                                    ["nothing", nothingstart, nothingend, nothing]
-                                )
-                                nothing = 0
-                            mainstart = date
-                            mainend = date
-                            main = 1
-            month_payment = payment[0]
-            for new_entry in payment:
-                if (
-                    new_entry[0].year < year
-                    or new_entry[0].month <= month
-                    and new_entry[0].year <= year
-                ):
-                    month_payment = new_entry
-            mainprice = month_payment[1]
-            saladprice = month_payment[2]
-            prepayment = month_payment[3]
-            if nothing != 0:
-                orderarray.append(["nothing", nothingstart, nothingend, nothing])
-                nothing = 0
-            else:
-                if main != 0:
-                    orderarray.append(["main", mainstart, mainend, main])
-                    main = 0
-                if salad != 0:
-                    orderarray.append(["salad", saladstart, saladend, salad])
-                    salad = 0
+        for month in invoice.months:
+            prepayment = PDFCreationUtils._format_number(month.prepayment)
             data.append(
                 [
                     NUMMER_VORRAUSZAHLUNG,
                     "Abzug Vorrauszahlung",
-                    f"{month}.{year}",
-                    f"{prepayment:.2f}".replace(".", ","),
+                    f"{month.month}.{month.year}",
+                    prepayment,
                     "1,00",
-                    f"{prepayment:.2f}".replace(".", ","),
+                    prepayment,
                 ]
             )
             data.append(["", "Mittagessen", "", "", "", ""])
-            credit -= prepayment
-            monthly = -prepayment
-            for type, start, end, count in orderarray:
-                start = start.strftime("%d.%m.%Y").replace(f"{year}", "")
-                end = end.strftime("%d.%m.%Y")
-                if type == "main":
-                    price = (count * mainprice) / 10
-                    credit += price
-                    monthly += price
-                    data.append(
-                        [
-                            NUMMER_HAUPTGERICHT,
-                            "Mittagessen WfbM",
-                            f"{start} - {end}",
-                            f"{mainprice/10:.2f}".replace(".", ","),
-                            f"{count:.2f}".replace(".", ","),
-                            f"{price:.2f}".replace(".", ","),
-                        ]
-                    )
-                if type == "salad":
-                    price = (count * (saladprice)) / 10
-                    credit += price
-                    monthly += price
-                    data.append(
-                        [
-                            NUMMER_SALAT,
-                            "Mittagessen WfbM Salat",
-                            f"{start} - {end}",
-                            f"{saladprice/10:.2f}".replace(".", ","),
-                            f"{count:.2f}".replace(".", ","),
-                            f"{price:.2f}".replace(".", ","),
-                        ]
-                    )
-                if type == "nothing":
-                    data.append(
-                        [
-                            NUMMER_NICHTESSER,
-                            "Mittagessen WfbM Nichtesser",
-                            f"{start} - {end}",
-                            "0,00",
-                            f"{count:.2f}".replace(".", ","),
-                            "0,00",
-                        ]
-                    )
-            orderarray = []
+            for line in month.lines:
+                number, text = line_texts[line.kind]
+                start = line.start.strftime("%d.%m.%Y").replace(f"{month.year}", "")
+                end = line.end.strftime("%d.%m.%Y")
+                data.append(
+                    [
+                        number,
+                        text,
+                        f"{start} - {end}",
+                        PDFCreationUtils._format_number(line.price),
+                        PDFCreationUtils._format_number(line.count),
+                        PDFCreationUtils._format_number(line.total),
+                    ]
+                )
             data.append(
                 [
                     "",
@@ -692,8 +777,8 @@ class PDFCreationUtils:
                     "",
                 ]
             )
-            month_name = MONATE[month - 1]
-            StringMonat = f"Summe {month_name} {year}"
+            month_name = MONATE[month.month - 1]
+            StringMonat = f"Summe {month_name} {month.year}"
             data.append(
                 [
                     "",
@@ -701,7 +786,7 @@ class PDFCreationUtils:
                     StringMonat,
                     "",
                     "",
-                    f"{monthly:.2f}".replace(".", ","),
+                    PDFCreationUtils._format_number(month.amount),
                 ]
             )
             data.append(["", "", "", "", "", ""])
@@ -713,7 +798,7 @@ class PDFCreationUtils:
                 "Rechnungsbetrag:",
                 "",
                 "",
-                f"{credit:.2f} €".replace(".", ","),
+                f"{PDFCreationUtils._format_number(invoice.amount)} €",
             ]
         )
 
@@ -746,19 +831,8 @@ class PDFCreationUtils:
             onFirstPage=PDFCreationUtils._create_footer,
             onLaterPages=PDFCreationUtils._create_footer_and_header,
         )
-        buffer.seek(0)
 
-        response = make_response(
-            send_file(
-                buffer,
-                mimetype="application/pdf",
-                as_attachment=True,
-                download_name=f"Rechnung_{start}_bis_{end}_{person.first_name}_{person.last_name}.pdf",
-            )
-        )
-        response.headers["Access-Control-Expose-Headers"] = "Content-Disposition"
-
-        return response
+        return buffer.getvalue()
 
     ############################ Group/Location PDF Header #################################
 
@@ -794,165 +868,208 @@ class PDFCreationUtils:
         )
         return tableHead
 
-    ################################# Location Invoice PDF #################################
+    @staticmethod
+    def _create_table_g_l(data: list, header: bool, total_font: Optional[str]):
+        """Create the table of a group or location invoice
 
-    def create_pdf_invoice_location(
-        start_date, end_date, orders: List[OldOrder], locationid
-    ) -> Response:
-        location = LocationsRepository.get_location_by_id(locationid)
-        if not location:
-            raise NotFoundError(
-                f"Es wurde kein Standort mit angegebener UUID: {locationid} gefunden"
-            )
+        :param data: The rows of the table
+        :param header: Whether the first row holds the column titles
+        :param total_font: Font of the total in the last row, None if it is not included
+        """
+
+        style = [
+            ("FONTNAME", (0, 0), (3, -1), FONT_NORMAL),
+            ("FONTSIZE", (0, 0), (3, -1), FONT_SIZE_NORMAL),
+            ("BACKGROUND", (-1, -1), (-1, -1), colors.white),
+            ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
+            ("ALIGN", (0, 0), (0, -1), "LEFT"),
+            ("ALIGN", (2, 0), (3, -1), "RIGHT"),
+            ("ALIGN", (1, 0), (1, -1), "LEFT"),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+            ("TOPPADDING", (0, 0), (-1, -1), 0),
+        ]
+        if header:
+            style += [
+                ("LINEABOVE", (0, 0), (-1, 0), 0.7, colors.black),
+                ("LINEBELOW", (0, 0), (-1, 0), 0.7, colors.black),
+                ("FONTNAME", (0, 0), (3, 0), FONT_BOLD),
+            ]
+        if total_font:
+            style += [
+                ("LINEABOVE", (0, -1), (-1, -1), 0.7, colors.black),
+                ("LINEBELOW", (1, -1), (-1, -1), 1, colors.black),
+                ("FONTNAME", (0, -1), (-1, -1), total_font),
+                ("TOPPADDING", (0, -1), (-1, -1), 2),
+            ]
+
+        table = Table(data, colWidths=[225, 100, 90, 90])  # Gesamt: 505
+        table.setStyle(TableStyle(style))
+        return table
+
+    @staticmethod
+    def _prepare_invoice_g_l(
+        summary: InvoiceSummary,
+        title: str,
+        header: list,
+        data: list,
+        total_font: str,
+        download_name: str,
+    ) -> InvoiceJob:
+        """Split the rows of a group or location invoice into chunks of whole pages
+
+        All rows have the same height, so the rows per page are measured once.
+        The chunks end at the page breaks of the complete table, the merged
+        PDF looks the same as if it was rendered at once.
+
+        :param summary: The computed invoice
+        :param title: The title in the head of the first page
+        :param header: The column titles
+        :param data: The table rows including the total
+        :param total_font: Font of the total
+        :param download_name: The file name for the download
+        """
+
+        head = (title, summary.date_start, summary.date_end)
+
+        # SimpleDocTemplate rückt den Inhalt im Rahmen um 6pt ein
+        frame_height = SimpleDocTemplate(BytesIO(), pagesize=A4).height - 2 * 6
+        _, head_height = PDFCreationUtils._create_PDFHead_g_l(*head).wrap(A4[0], A4[1])
+        _, row_height = PDFCreationUtils._create_table_g_l(
+            [header], header=True, total_font=None
+        ).wrap(A4[0], A4[1])
+        rows_per_page = int(frame_height // row_height)
+        first_page_rows = int((frame_height - head_height) // row_height) - 1
+
+        # Kopf und Spaltentitel belegen auf Seite 1 den Platz von `offset` Zeilen
+        offset = rows_per_page - first_page_rows
+        chunks = PDFRenderPool.split([None] * offset + data, rows_per_page)
+        chunks[0] = chunks[0][offset:]
+
+        return InvoiceJob(
+            render=PDFCreationUtils._render_invoice_table_pages,
+            chunks=[
+                InvoiceTableChunk(
+                    head=head if index == 0 else None,
+                    header=header if index == 0 else None,
+                    rows=rows,
+                    total_font=total_font if index == len(chunks) - 1 else None,
+                )
+                for index, rows in enumerate(chunks)
+            ],
+            download_name=download_name,
+        )
+
+    @staticmethod
+    def _render_invoice_table_pages(chunk: InvoiceTableChunk) -> bytes:
+        """Render pages of a group or location invoice (runs in a worker process)
+
+        :param chunk: The rows to render
+        :return: The PDF
+        """
 
         buffer = BytesIO()
         pdf = SimpleDocTemplate(buffer, pagesize=A4)
         elements = []
 
+        data = list(chunk.rows)
+        if chunk.head:
+            elements.append(PDFCreationUtils._create_PDFHead_g_l(*chunk.head))
+            data.insert(0, chunk.header)
+
         elements.append(
-            PDFCreationUtils._create_PDFHead_g_l(
-                f"Standort: {location.location_name}", start_date, end_date
+            PDFCreationUtils._create_table_g_l(
+                data, header=bool(chunk.head), total_font=chunk.total_font
             )
         )
 
-        data = [["Gruppe", "", "Hauptgericht Anzahl", "Salat Anzahl"]]
-
-        result = PDFCreationUtils._sort_orders(orders, start_date, end_date)
-        orders_sorted_array = result[0]
-        months = result[1]
-
-        allmain = 0
-        allsalad = 0
-        for month, year in months:
-            index = months.index([month, year])
-            monthly_main = 0
-            monthly_salad = 0
-            groups = []
-            persons = []
-            foodgroups = []
-            foodusers = []
-            for order in orders_sorted_array[index]:
-                if order.date.month == month and order.date.year == year:
-                    if order.person.type == "employee":
-                        if order.person.group not in groups:
-                            groups.append(order.person.group)
-                            foodgroups.append([order.person.group, 0, 0])
-                        if order.main_dish is not None:
-                            foodgroups[groups.index(order.person.group)][1] += 1
-                            monthly_main += 1
-                        if order.salad_option is True:
-                            foodgroups[groups.index(order.person.group)][2] += 1
-                            monthly_salad += 1
-                    else:
-                        if order.person not in persons:
-                            persons.append(order.person)
-                            foodusers.append([order.person, 0, 0])
-                        if order.main_dish is not None:
-                            foodusers[persons.index(order.person)][1] += 1
-                            monthly_main += 1
-                        if order.salad_option is True:
-                            foodusers[persons.index(order.person)][2] += 1
-                            monthly_salad += 1
-            allmain += monthly_main
-            allsalad += monthly_salad
-            groupsreplica = groups.copy()
-            groups.sort(key=lambda x: x.group_name)
-            personsreplica = persons.copy()
-            persons.sort(key=lambda x: x.last_name)
-            for user in persons:
-                index = personsreplica.index(user)
+        pdf.build(elements)
+
+        return buffer.getvalue()
+
+    ################################# Location Invoice PDF #################################
+
+    def render_pdf_invoice_location(
+        summary: InvoiceSummary, locationid
+    ) -> RenderedPDFFile:
+        return PDFCreationUtils._render_invoice(
+            PDFCreationUtils.prepare_invoice_location(summary, locationid)
+        )
+
+    def prepare_invoice_location(summary: InvoiceSummary, locationid) -> InvoiceJob:
+        location = LocationsRepository.get_location_by_id(locationid)
+        if not location:
+            raise NotFoundError(
+                f"Es wurde kein Standort mit angegebener UUID: {locationid} gefunden"
+            )
+
+        data = []
+
+        for index, (year, month) in enumerate(summary.months):
+            # Employees are summed up per group, group leaders are listed by name
+            groups = {}
+            users = []
+            for invoice in summary.persons:
+                person_month = invoice.months[index]
+                if not person_month.ordered:
+                    continue
+                if invoice.person.type == "employee":
+                    counts = groups.setdefault(
+                        invoice.person.group_id, [invoice.person.group_name, 0, 0]
+                    )
+                    counts[1] += person_month.main
+                    counts[2] += person_month.salad
+                else:
+                    users.append((invoice.person, person_month))
+
+            users.sort(key=lambda user: user[0].last_name)
+            for user, person_month in users:
                 data.append(
                     [
                         f"Gruppenleiter: {user.last_name}, {user.first_name}",
                         "",
-                        f"{foodusers[index][1]:.2f}".replace(".", ","),
-                        f"{foodusers[index][2]:.2f}".replace(".", ","),
+                        PDFCreationUtils._format_number(person_month.main),
+                        PDFCreationUtils._format_number(person_month.salad),
                     ]
                 )
-            for group in groups:
-                index = groupsreplica.index(group)
+            for group_name, main, salad in sorted(
+                groups.values(), key=lambda group: group[0]
+            ):
                 data.append(
                     [
-                        f"Gruppe: {group.group_name}",
+                        f"Gruppe: {group_name}",
                         "",
-                        f"{foodgroups[index][1]:.2f}".replace(".", ","),
-                        f"{foodgroups[index][2]:.2f}".replace(".", ","),
+                        PDFCreationUtils._format_number(main),
+                        PDFCreationUtils._format_number(salad),
                     ]
                 )
-            data.append(
-                [
-                    "",
-                    "____________________________________________________________",
-                    "",
-                    "",
-                ]
-            )
-            monatalsname = MONATE[month - 1]
-            StringMonat = f"Summe {monatalsname} {year}"
-            data.append(
-                [
-                    "",
-                    StringMonat,
-                    f"{monthly_main:.2f}".replace(".", ","),
-                    f"{monthly_salad:.2f}".replace(".", ","),
-                ]
-            )
-            data.append(["", "", "", ""])
+            PDFCreationUtils._append_month_sum(data, summary, index, year, month)
 
         data.append(
             [
                 "",
                 "Gesamt:",
-                f"{allmain:.2f}".replace(".", ","),
-                f"{allsalad:.2f}".replace(".", ","),
+                PDFCreationUtils._format_number(summary.main),
+                PDFCreationUtils._format_number(summary.salad),
             ]
         )
 
-        table = Table(data, colWidths=[225, 100, 90, 90])  # Gesamt: 505
-        table.setStyle(
-            TableStyle(
-                [
-                    ("LINEABOVE", (0, 0), (-1, 0), 0.7, colors.black),
-                    ("LINEBELOW", (0, 0), (-1, 0), 0.7, colors.black),
-                    ("FONTNAME", (0, 0), (3, 0), FONT_BOLD),
-                    ("FONTNAME", (0, 1), (3, -1), FONT_NORMAL),
-                    ("FONTSIZE", (0, 0), (3, -1), FONT_SIZE_NORMAL),
-                    ("BACKGROUND", (-1, -1), (-1, -1), colors.white),
-                    ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
-                    ("ALIGN", (0, 0), (0, -1), "LEFT"),
-                    ("ALIGN", (2, 0), (3, -1), "RIGHT"),
-                    ("ALIGN", (1, 0), (1, -1), "LEFT"),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
-                    ("TOPPADDING", (0, 0), (-1, -1), 0),
-                    ("LINEABOVE", (0, -1), (-1, -1), 0.7, colors.black),
-                    ("LINEBELOW", (1, -1), (-1, -1), 1, colors.black),
-                    ("FONTNAME", (0, -1), (-1, -1), FONT_NORMAL),
-                    ("TOPPADDING", (0, -1), (-1, -1), 2),
-                ]
-            )
+        return PDFCreationUtils._prepare_invoice_g_l(
+            summary,
+            f"Standort: {location.location_name}",
+            ["Gruppe", "", "Hauptgericht Anzahl", "Salat Anzahl"],
+            data,
+            FONT_NORMAL,
+            f"Rechnung_{summary.date_start}_bis_{summary.date_end}_{location.location_name}.pdf",
         )
-        elements.append(table)
 
-        pdf.build(elements)
-        buffer.seek(0)
+    ################################# Group Invoice PDF #################################
 
-        response = make_response(
-            send_file(
-                buffer,
-                mimetype="application/pdf",
-                as_attachment=True,
-                download_name=f"Rechnung_{start_date}_bis_{end_date}_{location.location_name}.pdf",
-            )
+    def render_pdf_invoice_group(summary: InvoiceSummary, groupid) -> RenderedPDFFile:
+        return PDFCreationUtils._render_invoice(
+            PDFCreationUtils.prepare_invoice_group(summary, groupid)
         )
-        response.headers["Access-Control-Expose-Headers"] = "Content-Disposition"
 
-        return response
-
-    ################################# Group Invoice PDF #################################
-
-    def create_pdf_invoice_group(
-        start_date, end_date, orders: List[OldOrder], groupid
-    ) -> Response:
+    def prepare_invoice_group(summary: InvoiceSummary, groupid) -> InvoiceJob:
 
         group = GroupsRepository.get_group_by_id(groupid)
         if not group:
@@ -960,120 +1077,40 @@ class PDFCreationUtils:
                 f"Es wurde keine Gruppe mit angegebener UUID: {groupid} gefunden"
             )
 
-        buffer = BytesIO()
-        pdf = SimpleDocTemplate(buffer, pagesize=A4)
-        elements = []
-
-        elements.append(
-            PDFCreationUtils._create_PDFHead_g_l(
-                f"Gruppe: {group.group_name}", start_date, end_date
-            )
-        )
+        data = []
 
-        data = [["Mitarbeiter", "", "Hauptgericht Anzahl", "Salat Anzahl"]]
-
-        result = PDFCreationUtils._sort_orders(orders, start_date, end_date)
-        orders_sorted_array = result[0]
-        months = result[1]
-
-        allmain = 0
-        allsalad = 0
-        for month, year in months:
-            index = months.index([month, year])
-            monthly_main = 0
-            monthly_salad = 0
-            persons = []
-            foodgroups = []
-            for order in orders_sorted_array[index]:
-                if order.date.month == month and order.date.year == year:
-                    if order.person not in persons:
-                        persons.append(order.person)
-                        foodgroups.append([order.person, 0, 0])
-                    if order.main_dish is not None:
-                        foodgroups[persons.index(order.person)][1] += 1
-                        monthly_main += 1
-                    if order.salad_option is True:
-                        foodgroups[persons.index(order.person)][2] += 1
-                        monthly_salad += 1
-            allmain += monthly_main
-            allsalad += monthly_salad
-            personsreplica = persons.copy()
-            persons.sort(key=lambda x: x.first_name)
-            for person in persons:
-                index = personsreplica.index(person)
+        for index, (year, month) in enumerate(summary.months):
+            persons = [
+                (invoice.person, invoice.months[index])
+                for invoice in summary.persons
+                if invoice.months[index].ordered
+            ]
+            persons.sort(key=lambda person: person[0].first_name)
+            for person, person_month in persons:
                 data.append(
                     [
                         f"{person.first_name} {person.last_name}",
                         "",
-                        f"{foodgroups[index][1]:.2f}".replace(".", ","),
-                        f"{foodgroups[index][2]:.2f}".replace(".", ","),
+                        PDFCreationUtils._format_number(person_month.main),
+                        PDFCreationUtils._format_number(person_month.salad),
                     ]
                 )
-            data.append(
-                [
-                    "",
-                    "____________________________________________________________",
-                    "",
-                    "",
-                ]
-            )
-            monatalsname = MONATE[month - 1]
-            StringMonat = f"Summe {monatalsname} {year}"
-            data.append(
-                [
-                    "",
-                    StringMonat,
-                    f"{monthly_main:.2f}".replace(".", ","),
-                    f"{monthly_salad:.2f}".replace(".", ","),
-                ]
-            )
-            data.append(["", "", "", ""])
+            PDFCreationUtils._append_month_sum(data, summary, index, year, month)
 
         data.append(
             [
                 "",
                 "Gesamt:",
-                f"{allmain:.2f}".replace(".", ","),
-                f"{allsalad:.2f}".replace(".", ","),
+                PDFCreationUtils._format_number(summary.main),
+                PDFCreationUtils._format_number(summary.salad),
             ]
         )
 
-        table = Table(data, colWidths=[225, 100, 90, 90])  # Gesamt: 505
-        table.setStyle(
-            TableStyle(
-                [
-                    ("LINEABOVE", (0, 0), (-1, 0), 0.7, colors.black),
-                    ("LINEBELOW", (0, 0), (-1, 0), 0.7, colors.black),
-                    ("FONTNAME", (0, 0), (3, 0), FONT_BOLD),
-                    ("FONTNAME", (0, 1), (3, -1), FONT_NORMAL),
-                    ("FONTSIZE", (0, 0), (3, -1), FONT_SIZE_NORMAL),
-                    ("BACKGROUND", (-1, -1), (-1, -1), colors.white),
-                    ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
-                    ("ALIGN", (0, 0), (0, -1), "LEFT"),
-                    ("ALIGN", (2, 0), (3, -1), "RIGHT"),
-                    ("ALIGN", (1, 0), (1, -1), "LEFT"),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
-                    ("TOPPADDING", (0, 0), (-1, -1), 0),
-                    ("LINEABOVE", (0, -1), (-1, -1), 0.7, colors.black),
-                    ("LINEBELOW", (1, -1), (-1, -1), 1, colors.black),
-                    ("FONTNAME", (0, -1), (-1, -1), FONT_BOLD),
-                    ("TOPPADDING", (0, -1), (-1, -1), 2),
-                ]
-            )
-        )
-        elements.append(table)
-
-        pdf.build(elements)
-        buffer.seek(0)
-
-        response = make_response(
-            send_file(
-                buffer,
-                mimetype="application/pdf",
-                as_attachment=True,
-                download_name=f"Rechnung_{start_date}_bis_{end_date}_{group.group_name}.pdf",
-            )
+        return PDFCreationUtils._prepare_invoice_g_l(
+            summary,
+            f"Gruppe: {group.group_name}",
+            ["Mitarbeiter", "", "Hauptgericht Anzahl", "Salat Anzahl"],
+            data,
+            FONT_BOLD,
+            f"Rechnung_{summary.date_start}_bis_{summary.date_end}_{group.group_name}.pdf",
         )
-        response.headers["Access-Control-Expose-Headers"] = "Content-Disposition"
-
-        return response
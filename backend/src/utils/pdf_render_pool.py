@@ -0,0 +1,190 @@
+"""Render large PDFs in parallel worker processes
+
+A document is split into chunks of whole pages. Every chunk is rendered to a
+separate PDF by a worker process and the results are merged in order.
+
+All documents of an app worker share one pool, so concurrent requests and
+render jobs queue for the same processes instead of forking their own. The
+number of processes is read once from the environment variable
+PDF_RENDER_WORKERS (default: number of CPU cores, at most
+PDF_RENDER_DEFAULT_MAX_WORKERS; 1 disables the pool).
+
+The workers are forked from the current process, so the render functions must
+not use the database or the Flask app. Their arguments and results are pickled.
+"""
+
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import IO, Callable, Iterable, Iterator, Optional, Sequence
+
+from pypdf import PdfWriter
+
+from src.constants import (
+    PDF_RENDER_DEFAULT_MAX_WORKERS,
+    PDF_RENDER_MIN_PAGES_PER_CHUNK,
+)
+
+PDF_RENDER_WORKERS_ENV = "PDF_RENDER_WORKERS"
+
+
+def _read_worker_count() -> int:
+    """Read the number of render processes from the environment
+
+    :return: The configured worker count, at least 1
+    """
+
+    workers = os.getenv(PDF_RENDER_WORKERS_ENV)
+    if not workers:
+        return max(1, min(os.cpu_count() or 1, PDF_RENDER_DEFAULT_MAX_WORKERS))
+
+    try:
+        count = int(workers)
+    except ValueError:
+        count = 0
+    if count < 1:
+        raise Exception(
+            f"Invalid {PDF_RENDER_WORKERS_ENV}: {workers!r}. Please use a positive number."
+        )
+    return count
+
+
+PDF_RENDER_WORKERS = _read_worker_count()
+"""Maximum number of render processes of this app worker"""
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class PDFRenderPool:
+    """Render PDF chunks in parallel and merge them"""
+
+    @staticmethod
+    def get_worker_count() -> int:
+        """Number of render processes shared by all documents of this app worker
+
+        :return: The configured worker count, at least 1
+        """
+
+        return PDF_RENDER_WORKERS
+
+    @staticmethod
+    def _get_executor() -> ProcessPoolExecutor:
+        """Get the process pool of this app worker, create it on first use
+
+        :return: The shared process pool
+        """
+
+        global _executor
+        with _executor_lock:
+            if _executor is None:
+                # Fork instead of spawn: importing the src package would start the whole app
+                _executor = ProcessPoolExecutor(
+                    max_workers=PDFRenderPool.get_worker_count(),
+                    mp_context=multiprocessing.get_context("fork"),
+                )
+            return _executor
+
+    @staticmethod
+    def _discard_executor(executor: ProcessPoolExecutor):
+        """Replace a broken process pool with a new one on the next use
+
+        :param executor: The broken process pool
+        """
+
+        global _executor
+        with _executor_lock:
+            if _executor is executor:
+                _executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def split(items: Sequence, items_per_page: int) -> list[list]:
+        """Split items into chunks of whole pages, one chunk per worker
+
+        Chunks have at least PDF_RENDER_MIN_PAGES_PER_CHUNK pages, so small
+        documents are rendered in a single chunk.
+
+        :param items: The items to render
+        :param items_per_page: How many items fit on one page
+
+        :return: The chunks, at least one (possibly empty) chunk
+        """
+
+        pages = math.ceil(len(items) / items_per_page)
+        pages_per_chunk = max(
+            PDF_RENDER_MIN_PAGES_PER_CHUNK,
+            math.ceil(pages / PDFRenderPool.get_worker_count()),
+        )
+        chunk_size = pages_per_chunk * items_per_page
+
+        chunks = [
+            list(items[i : i + chunk_size]) for i in range(0, len(items), chunk_size)
+        ]
+        return chunks or [[]]
+
+    @staticmethod
+    def map(render: Callable[..., bytes], chunks: Sequence) -> Iterator[bytes]:
+        """Render every chunk to a PDF
+
+        The PDFs are yielded in order as soon as they are ready, so a caller
+        that processes them one by one never holds all of them in memory.
+
+        :param render: Module level function that renders one chunk to PDF bytes
+        :param chunks: The arguments for the render function, one per chunk
+
+        :return: The rendered PDFs in the order of the chunks
+        """
+
+        if PDFRenderPool.get_worker_count() <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                yield render(chunk)
+            return
+
+        executor = PDFRenderPool._get_executor()
+        futures = []
+        try:
+            futures = [executor.submit(render, chunk) for chunk in chunks]
+            for future in futures:
+                yield future.result()
+        except BrokenProcessPool:
+            # A render process died (e.g. out of memory), the pool is unusable
+            PDFRenderPool._discard_executor(executor)
+            raise
+        finally:
+            # Free the pool for other documents if the caller stops early
+            for future in futures:
+                future.cancel()
+
+    @staticmethod
+    def render(render: Callable[..., bytes], chunks: Sequence, output: IO[bytes]):
+        """Render every chunk and write the merged PDF to a file
+
+        :param render: Module level function that renders one chunk to PDF bytes
+        :param chunks: The arguments for the render function, one per chunk
+        :param output: The binary file to write the PDF to
+        """
+
+        if len(chunks) == 1:
+            output.write(render(chunks[0]))
+            return
+
+        PDFRenderPool.merge(PDFRenderPool.map(render, chunks), output)
+
+    @staticmethod
+    def merge(pdfs: Iterable[bytes], output: IO[bytes]):
+        """Merge PDFs into one document
+
+        :param pdfs: The PDFs to merge in order
+        :param output: The binary file to write the merged PDF to
+        """
+
+        writer = PdfWriter()
+        for pdf in pdfs:
+            writer.append(BytesIO(pdf))
+
+        writer.write(output)
@@ -0,0 +1,154 @@
+"""Cache for rendered QR code images
+
+The QR codes only contain the immutable ID of a person, so a rendered image
+never changes. Images are cached as PNG in memory (per worker) and, if the
+environment variable QR_CODE_CACHE_DIR is set, in that directory so they
+survive restarts and are shared between workers.
+
+For vector rendering only the module matrix is needed, it is cached in memory.
+"""
+
+import hashlib
+import os
+from io import BytesIO
+from typing import Optional
+
+import qrcode
+from flask import current_app as app
+from reportlab.lib.utils import ImageReader
+
+from src.constants import QR_CODE_CACHE_SIZE
+from src.utils.lru_cache import LRUCache
+
+QR_CODE_CACHE_DIR_ENV = "QR_CODE_CACHE_DIR"
+
+QR_VERSION = 1
+QR_ERROR_CORRECTION = qrcode.constants.ERROR_CORRECT_L
+QR_BOX_SIZE = 10
+QR_BORDER = 4
+
+rendered_qr_codes = LRUCache(QR_CODE_CACHE_SIZE)
+qr_code_matrices = LRUCache(QR_CODE_CACHE_SIZE)
+
+
+class QRCodeCache:
+    """Get QR code images, render them only if they are not cached yet"""
+
+    @staticmethod
+    def get_image(content) -> ImageReader:
+        """Get a QR code image that can be drawn on a reportlab canvas
+
+        :param content: The content of the QR code (e.g. a person's ID)
+
+        :return: The QR code image
+        """
+
+        return ImageReader(BytesIO(QRCodeCache.get_png(content)))
+
+    @staticmethod
+    def get_png(content) -> bytes:
+        """Get a QR code as PNG
+
+        :param content: The content of the QR code (e.g. a person's ID)
+
+        :return: The PNG data
+        """
+
+        key = QRCodeCache._cache_key(str(content))
+
+        png = rendered_qr_codes.get(key)
+        if png is not None:
+            return png
+
+        png = QRCodeCache._read_from_disk(key)
+        if png is None:
+            png = QRCodeCache._render_png(str(content))
+            QRCodeCache._write_to_disk(key, png)
+
+        rendered_qr_codes.set(key, png)
+        return png
+
+    @staticmethod
+    def get_matrix(content) -> tuple[tuple[bool, ...], ...]:
+        """Get the modules of a QR code including the border
+
+        :param content: The content of the QR code (e.g. a person's ID)
+
+        :return: Rows of modules from top to bottom, True for dark modules
+        """
+
+        key = QRCodeCache._cache_key(str(content))
+
+        matrix = qr_code_matrices.get(key)
+        if matrix is None:
+            qr = QRCodeCache._make_qr_code(str(content))
+            matrix = tuple(tuple(row) for row in qr.get_matrix())
+            qr_code_matrices.set(key, matrix)
+
+        return matrix
+
+    @staticmethod
+    def _cache_key(content: str) -> str:
+        """The key depends on the content and all render options"""
+
+        options = f"{QR_VERSION}:{QR_ERROR_CORRECTION}:{QR_BOX_SIZE}:{QR_BORDER}"
+        return hashlib.sha256(f"{options}\0{content}".encode()).hexdigest()
+
+    @staticmethod
+    def _make_qr_code(content: str) -> qrcode.QRCode:
+        qr = qrcode.QRCode(
+            version=QR_VERSION,
+            error_correction=QR_ERROR_CORRECTION,
+            box_size=QR_BOX_SIZE,
+            border=QR_BORDER,
+        )
+        qr.add_data(content)
+        qr.make(fit=True)
+        return qr
+
+    @staticmethod
+    def _render_png(content: str) -> bytes:
+        qr = QRCodeCache._make_qr_code(content)
+        img = qr.make_image(fill="black", back_color="white")
+
+        buffer = BytesIO()
+        img.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    @staticmethod
+    def _disk_path(key: str) -> Optional[str]:
+        directory = os.getenv(QR_CODE_CACHE_DIR_ENV)
+        if not directory:
+            return None
+        return os.path.join(directory, f"{key}.png")
+
+    @staticmethod
+    def _read_from_disk(key: str) -> Optional[bytes]:
+        path = QRCodeCache._disk_path(key)
+        if path is None:
+            return None
+
+        try:
+            with open(path, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            app.logger.warning(f"QR-Code-Cache konnte nicht gelesen werden: {e}")
+            return None
+
+    @staticmethod
+    def _write_to_disk(key: str, png: bytes):
+        path = QRCodeCache._disk_path(key)
+        if path is None:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first, so other workers never read half a file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(png)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            app.logger.warning(f"QR-Code-Cache konnte nicht geschrieben werden: {e}")
@@ -0,0 +1,205 @@
+"""Stream reports as CSV or XLSX
+
+The rows are written one by one while the response is sent, so exports of
+long periods neither wait for the whole result nor hold it in memory.
+
+XLSX files are written with the standard library: a zip archive with the
+minimal parts of a workbook and one worksheet with inline strings.
+"""
+
+import csv
+import io
+import zipfile
+from datetime import date
+from typing import Iterable, Iterator, Sequence
+from xml.sax.saxutils import escape
+
+from flask import Response, stream_with_context
+
+EXPORT_FORMATS = ("csv", "xlsx")
+"""Formats reports can be exported in besides PDF"""
+
+CSV_MIMETYPE = "text/csv"
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+LOCATION_REPORT_HEADER = ("Datum", "Standort", "Rot", "Blau", "Salat")
+
+_EXCEL_EPOCH = date(1899, 12, 30)
+_DATE_STYLE = 1  # index of the date format in _STYLES
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\
+<Default Extension="xml" ContentType="application/xml"/>\
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>\
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>\
+</Types>"""
+
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>\
+</Relationships>"""
+
+_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" \
+xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">\
+<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets>\
+</workbook>"""
+
+_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>\
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>\
+</Relationships>"""
+
+# Style 0 is the default, style 1 shows numbers as dates (dd.mm.yyyy)
+_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">\
+<numFmts count="1"><numFmt numFmtId="164" formatCode="dd.mm.yyyy"/></numFmts>\
+<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>\
+<fills count="2"><fill><patternFill patternType="none"/></fill>\
+<fill><patternFill patternType="gray125"/></fill></fills>\
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>\
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>\
+<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>\
+<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>\
+</cellXfs>\
+</styleSheet>"""
+
+_SHEET_START = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>"""
+
+_SHEET_END = "</sheetData></worksheet>"
+
+
+class ReportExportUtils:
+
+    @staticmethod
+    def create_location_report(
+        rows: Iterable[Sequence], export_format: str, download_name: str
+    ) -> Response:
+        """Stream the order counts per date and location as download
+
+        :param rows: Rows of (date, location_name, rot, blau, salad)
+        :param export_format: One of EXPORT_FORMATS
+        :param download_name: The file name for the download without extension
+        :return: The streamed response
+        """
+
+        if export_format == "csv":
+            content = ReportExportUtils.stream_csv(LOCATION_REPORT_HEADER, rows)
+            mimetype = CSV_MIMETYPE
+        elif export_format == "xlsx":
+            content = ReportExportUtils.stream_xlsx(
+                LOCATION_REPORT_HEADER, rows, sheet_name="Bestellungen"
+            )
+            mimetype = XLSX_MIMETYPE
+        else:
+            raise ValueError(f"Unbekanntes Format {export_format}")
+
+        response = Response(stream_with_context(content), mimetype=mimetype)
+        response.headers.set(
+            "Content-Disposition",
+            "attachment",
+            filename=f"{download_name}.{export_format}",
+        )
+        response.headers["Access-Control-Expose-Headers"] = "Content-Disposition"
+        return response
+
+    @staticmethod
+    def stream_csv(header: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+        """Write rows as CSV for Excel with German locale (semicolons, BOM)
+
+        :param header: The column names
+        :param rows: The rows, dates are written as YYYY-MM-DD
+        :return: Iterator over the lines of the file
+        """
+
+        line = io.StringIO()
+        writer = csv.writer(line, delimiter=";", lineterminator="\r\n")
+
+        writer.writerow(header)
+        yield "\ufeff" + ReportExportUtils._pop(line)
+
+        for row in rows:
+            writer.writerow(row)
+            yield ReportExportUtils._pop(line)
+
+    @staticmethod
+    def stream_xlsx(
+        header: Sequence[str], rows: Iterable[Sequence], sheet_name: str
+    ) -> Iterator[bytes]:
+        """Write rows as workbook with one worksheet
+
+        :param header: The column names
+        :param rows: The rows with strings, numbers and dates
+        :param sheet_name: The name of the worksheet
+        :return: Iterator over the chunks of the file
+        """
+
+        output = _ChunkWriter()
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+            archive.writestr("_rels/.rels", _ROOT_RELS)
+            archive.writestr(
+                "xl/workbook.xml",
+                _WORKBOOK.format(sheet_name=escape(sheet_name, {'"': "&quot;"})),
+            )
+            archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+            archive.writestr("xl/styles.xml", _STYLES)
+
+            with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+                sheet.write(_SHEET_START.encode())
+                sheet.write(ReportExportUtils._xlsx_row(1, header))
+                for index, row in enumerate(rows, start=2):
+                    sheet.write(ReportExportUtils._xlsx_row(index, row))
+                    chunk = output.pop()
+                    if chunk:
+                        yield chunk
+                sheet.write(_SHEET_END.encode())
+
+        yield output.pop()
+
+    @staticmethod
+    def _xlsx_row(index: int, values: Sequence) -> bytes:
+        cells = []
+        for value in values:
+            if isinstance(value, date):
+                serial = value.toordinal() - _EXCEL_EPOCH.toordinal()
+                cells.append(f'<c s="{_DATE_STYLE}"><v>{serial}</v></c>')
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                cells.append(f"<c><v>{value}</v></c>")
+            elif value is None:
+                cells.append("<c/>")
+            else:
+                text = escape(str(value))
+                cells.append(f'<c t="inlineStr"><is><t>{text}</t></is></c>')
+
+        return f'<row r="{index}">{"".join(cells)}</row>'.encode()
+
+    @staticmethod
+    def _pop(buffer: io.StringIO) -> str:
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+
+class _ChunkWriter(io.RawIOBase):
+    """Unseekable file that collects the written bytes until they are popped"""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
@@ -12,11 +12,12 @@ from argon2 import PasswordHasher
 from .helper import *  # for fixtures # noqa: F403
 from .helper import PASSWORD, JWT_SECRET
 from src.constants import AUTHENTICATION_TOKEN_AUDIENCE
+from src.models.refresh_token_session import RefreshTokenSession
 from src.repositories.refresh_token_session_repository import (
     RefreshTokenSessionRepository,
 )
 from src.repositories.users_repository import UsersRepository
-from src.services.auth_service import AuthService
+from src.services.auth_service import AuthService, verified_auth_tokens
 from src.utils.exceptions import (
     InvalidCredentialsException,
     NotFoundError,
@@ -171,6 +172,57 @@ def describe_authenticate():
             assert new_auth_token is None
             assert new_refresh_token is None
 
+    def it_verifies_cached_auth_token_only_once(app, user_verwaltung, mocker):
+        with app.app_context():
+            verified_auth_tokens.clear()
+            auth_token = AuthService._AuthService__make_auth_token(
+                user_verwaltung, JWT_SECRET
+            )
+            verify_spy = mocker.spy(AuthService, "_AuthService__verify_auth_token")
+
+            first, _, _ = AuthService.authenticate(auth_token, None)
+            second, _, _ = AuthService.authenticate(auth_token, None)
+
+            assert first == second
+            assert str(second["id"]) == str(user_verwaltung.id)
+            verify_spy.assert_called_once()
+
+    def it_does_not_use_cached_auth_token_after_expiry(app, user_verwaltung, mocker):
+        with app.app_context():
+            verified_auth_tokens.clear()
+            auth_token = AuthService._AuthService__make_auth_token(
+                user_verwaltung, JWT_SECRET
+            )
+            AuthService.authenticate(auth_token, None)
+
+            expires_at = jwt.decode(auth_token, options={"verify_signature": False})[
+                "exp"
+            ]
+            mocker.patch("time.time", return_value=expires_at + 1)
+            mocker.patch.object(
+                AuthService,
+                "_AuthService__verify_auth_token",
+                side_effect=jwt.ExpiredSignatureError,
+            )
+
+            with pytest.raises(UnauthenticatedException):
+                AuthService.authenticate(auth_token, None)
+
+    def it_does_not_use_cached_auth_token_for_other_secret(app, user_verwaltung):
+        with app.app_context():
+            verified_auth_tokens.clear()
+            auth_token = AuthService._AuthService__make_auth_token(
+                user_verwaltung, JWT_SECRET
+            )
+            AuthService.authenticate(auth_token, None)
+
+            app.config["JWT_SECRET"] = "other_secret"
+            try:
+                with pytest.raises(UnauthenticatedException):
+                    AuthService.authenticate(auth_token, None)
+            finally:
+                app.config["JWT_SECRET"] = JWT_SECRET
+
     def it_throws_error_on_invalid_auth_token_and_no_refresh_token(app):
         with app.app_context():
             with pytest.raises(UnauthenticatedException):
@@ -184,18 +236,22 @@ def describe_authenticate():
     def it_requests_refresh_token_on_invalid_auth_token(app, mocker):
         with app.app_context():
             mock_get_token = mocker.patch.object(
-                RefreshTokenSessionRepository, "get_token", return_value=None
+                RefreshTokenSessionRepository,
+                "get_token_with_user_for_update",
+                return_value=None,
             )
 
             with pytest.raises(UnauthenticatedException):
                 AuthService.authenticate("invalid_auth_token", "invalid_refresh_token")
-                mock_get_token.assert_called_once_with("invalid_refresh_token")
+            mock_get_token.assert_called_once_with("invalid_refresh_token")
 
-    def it_throws_error_on_expired_refresh_token(app, mocker, session):
+    def it_throws_error_on_expired_refresh_token(app, mocker, session, user_verwaltung):
         with app.app_context():
             session.expires = datetime.now() - timedelta(days=1)
             mocker.patch.object(
-                RefreshTokenSessionRepository, "get_token", return_value=session
+                RefreshTokenSessionRepository,
+                "get_token_with_user_for_update",
+                return_value=(session, user_verwaltung),
             )
 
             try:
@@ -212,10 +268,9 @@ def describe_authenticate():
         with app.app_context():
             session.last_used = datetime.now() - timedelta(days=1)
             mocker.patch.object(
-                RefreshTokenSessionRepository, "get_token", return_value=session
-            )
-            mocker.patch.object(
-                UsersRepository, "get_user_by_id", return_value=user_verwaltung
+                RefreshTokenSessionRepository,
+                "get_token_with_user_for_update",
+                return_value=(session, user_verwaltung),
             )
             mocker.patch.object(UsersRepository, "update_user")
 
@@ -231,10 +286,9 @@ def describe_authenticate():
         with app.app_context():
             session.last_used = datetime.now() - timedelta(days=1)
             mocker.patch.object(
-                RefreshTokenSessionRepository, "get_token", return_value=session
-            )
-            mocker.patch.object(
-                UsersRepository, "get_user_by_id", return_value=user_verwaltung
+                RefreshTokenSessionRepository,
+                "get_token_with_user_for_update",
+                return_value=(session, user_verwaltung),
             )
             mock_update_user = mocker.patch.object(UsersRepository, "update_user")
 
@@ -247,12 +301,75 @@ def describe_authenticate():
             assert user_verwaltung.blocked
             mock_update_user.assert_called_once()
 
+    def it_blocks_user_when_replacement_was_used_too(
+        app, mocker, session, user_verwaltung
+    ):
+        with app.app_context():
+            replacement = RefreshTokenSession(
+                refresh_token="replacement",
+                user_id=user_verwaltung.id,
+                expires=datetime.now() + timedelta(days=1),
+            )
+            replacement.last_used = datetime.now()
+            session.last_used = datetime.now()
+            session.replaced_by = replacement.refresh_token
+            mocker.patch.object(
+                RefreshTokenSessionRepository,
+                "get_token_with_user_for_update",
+                return_value=(session, user_verwaltung),
+            )
+            mocker.patch.object(
+                RefreshTokenSessionRepository, "get_token", return_value=replacement
+            )
+            mocker.patch.object(UsersRepository, "update_user")
+
+            with pytest.raises(UserBlockedError):
+                AuthService.authenticate("invalid_auth_token", session.refresh_token)
+
+            assert user_verwaltung.blocked
+
+    def it_returns_replacement_when_used_within_grace_period(
+        app, mocker, session, user_verwaltung
+    ):
+        with app.app_context():
+            replacement = RefreshTokenSession(
+                refresh_token="replacement",
+                user_id=user_verwaltung.id,
+                expires=datetime.now() + timedelta(days=1),
+            )
+            session.last_used = datetime.now()
+            session.replaced_by = replacement.refresh_token
+            mocker.patch.object(
+                RefreshTokenSessionRepository,
+                "get_token_with_user_for_update",
+                return_value=(session, user_verwaltung),
+            )
+            mocker.patch.object(
+                RefreshTokenSessionRepository, "get_token", return_value=replacement
+            )
+            mock_rotate_token = mocker.patch.object(
+                RefreshTokenSessionRepository, "rotate_token"
+            )
+            mock_update_user = mocker.patch.object(UsersRepository, "update_user")
+
+            user_info, new_auth_token, new_refresh_token = AuthService.authenticate(
+                "invalid_auth_token", session.refresh_token
+            )
+
+            assert str(user_info["id"]) == str(user_verwaltung.id)
+            assert new_auth_token is not None
+            assert new_refresh_token == "replacement"
+            assert not user_verwaltung.blocked
+            mock_rotate_token.assert_not_called()
+            mock_update_user.assert_not_called()
+
     def it_throws_when_user_not_found(app, mocker, session):
         with app.app_context():
             mocker.patch.object(
-                RefreshTokenSessionRepository, "get_token", return_value=session
+                RefreshTokenSessionRepository,
+                "get_token_with_user_for_update",
+                return_value=(session, None),
             )
-            mocker.patch.object(UsersRepository, "get_user_by_id", return_value=None)
 
             try:
                 AuthService.authenticate("invalid_auth_token", session.refresh_token)
@@ -264,10 +381,9 @@ def describe_authenticate():
         with app.app_context():
             user_verwaltung.blocked = True
             mocker.patch.object(
-                RefreshTokenSessionRepository, "get_token", return_value=session
-            )
-            mocker.patch.object(
-                UsersRepository, "get_user_by_id", return_value=user_verwaltung
+                RefreshTokenSessionRepository,
+                "get_token_with_user_for_update",
+                return_value=(session, user_verwaltung),
             )
 
             with pytest.raises(UserBlockedError):
@@ -276,22 +392,18 @@ def describe_authenticate():
     def it_generates_new_tokens_on_success(app, mocker, session, user_verwaltung):
         with app.app_context():
             mocker.patch.object(
-                RefreshTokenSessionRepository, "get_token", return_value=session
-            )
-            mocker.patch.object(
-                UsersRepository, "get_user_by_id", return_value=user_verwaltung
+                RefreshTokenSessionRepository,
+                "get_token_with_user_for_update",
+                return_value=(session, user_verwaltung),
             )
             mock_make_auth_token = mocker.patch.object(
                 AuthService,
                 "_AuthService__make_auth_token",
                 return_value="new_auth_token",
             )
-            mock_make_refresh_token = mocker.patch.object(
-                AuthService,
-                "_AuthService__make_refresh_token",
-                return_value="new_refresh_token",
+            mock_rotate_token = mocker.patch.object(
+                RefreshTokenSessionRepository, "rotate_token", return_value=True
             )
-            mocker.patch.object(RefreshTokenSessionRepository, "update_token")
 
             user_info, new_auth_token, new_refresh_token = AuthService.authenticate(
                 "invalid_auth_token", session.refresh_token
@@ -303,10 +415,34 @@ def describe_authenticate():
             assert user_info["first_name"] == user_verwaltung.first_name
             assert user_info["last_name"] == user_verwaltung.last_name
             assert new_auth_token == "new_auth_token"
-            assert new_refresh_token == "new_refresh_token"
-            assert session.last_used is not None
+            assert len(new_refresh_token) > 0
             mock_make_auth_token.assert_called_once()
-            mock_make_refresh_token.assert_called_once()
+            mock_rotate_token.assert_called_once()
+            old_token, new_token = mock_rotate_token.call_args.args
+            assert old_token is session
+            assert new_token.refresh_token == new_refresh_token
+
+    def it_retries_rotation_on_existing_token(app, mocker, session, user_verwaltung):
+        with app.app_context():
+            mocker.patch.object(
+                RefreshTokenSessionRepository,
+                "get_token_with_user_for_update",
+                return_value=(session, user_verwaltung),
+            )
+            mock_rotate_token = mocker.patch.object(
+                RefreshTokenSessionRepository,
+                "rotate_token",
+                side_effect=[False, True],
+            )
+
+            _, _, new_refresh_token = AuthService.authenticate(
+                "invalid_auth_token", session.refresh_token
+            )
+
+            assert mock_rotate_token.call_count == 2
+            assert (
+                mock_rotate_token.call_args.args[1].refresh_token == new_refresh_token
+            )
 
 
 def describe_logout():
@@ -600,13 +736,8 @@ def describe_verify_auth_token():
 
 def describe_make_refresh_token():
     def it_generates_a_token(mocker, user_verwaltung):
-        mocker.patch.object(
-            RefreshTokenSessionRepository,
-            "get_token",
-            return_value=None,
-        )
         mock_create_token = mocker.patch.object(
-            RefreshTokenSessionRepository, "create_token"
+            RefreshTokenSessionRepository, "create_token_if_absent", return_value=True
         )
 
         token = AuthService._AuthService__make_refresh_token(user_verwaltung)
@@ -614,15 +745,14 @@ def describe_make_refresh_token():
         assert len(token) > 0
         mock_create_token.assert_called_once()
 
-    def it_generates_a_new_token_on_existing_token(mocker, user_verwaltung, session):
-        mock_get_token = mocker.patch.object(
+    def it_generates_a_new_token_on_existing_token(mocker, user_verwaltung):
+        mock_create_token = mocker.patch.object(
             RefreshTokenSessionRepository,
-            "get_token",
-            side_effect=[session, None],
+            "create_token_if_absent",
+            side_effect=[False, True],
         )
-        mocker.patch.object(RefreshTokenSessionRepository, "create_token")
 
         token = AuthService._AuthService__make_refresh_token(user_verwaltung)
 
-        assert mock_get_token.call_count == 2
+        assert mock_create_token.call_count == 2
         assert len(token) > 0
@@ -0,0 +1,175 @@
+"""Tests for the billing engine"""
+
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from src.utils.billing import (
+    DEFAULT_PRICES,
+    BillingEngine,
+    BillingPerson,
+    OrderRun,
+    PriceTimeline,
+)
+
+PERSON_ID = uuid.uuid4()
+OTHER_PERSON_ID = uuid.uuid4()
+
+
+def _meal_run(person_id, start, end, main, salad, main_days=None, salad_days=None):
+    main_start, main_end = main_days or (start, end)
+    salad_start, salad_end = salad_days or (start, end)
+    return OrderRun(
+        person_id=person_id,
+        year=start.year,
+        month=start.month,
+        nothing=False,
+        start=start,
+        end=end,
+        days=max(main, salad),
+        main=main,
+        main_start=main_start if main else None,
+        main_end=main_end if main else None,
+        salad=salad,
+        salad_start=salad_start if salad else None,
+        salad_end=salad_end if salad else None,
+    )
+
+
+def _nothing_run(person_id, start, end, days):
+    return OrderRun(
+        person_id=person_id,
+        year=start.year,
+        month=start.month,
+        nothing=True,
+        start=start,
+        end=end,
+        days=days,
+        main=0,
+        main_start=None,
+        main_end=None,
+        salad=0,
+        salad_start=None,
+        salad_end=None,
+    )
+
+
+def describe_price_timeline():
+    def it_uses_default_prices_before_the_first_entry():
+        prices = PriceTimeline([(datetime(2025, 3, 1), 5.0, 2.0, 80.0)])
+
+        assert prices.get(2025, 2) == DEFAULT_PRICES
+
+    def it_applies_prices_from_the_month_of_their_date():
+        prices = PriceTimeline([(datetime(2025, 3, 20), 5.0, 2.0, 80.0)])
+
+        assert prices.get(2025, 3).main_dish_price == Decimal("5.00")
+        assert prices.get(2026, 1).prepayment == Decimal("80.00")
+
+    def it_uses_the_latest_price_of_a_month():
+        prices = PriceTimeline(
+            [
+                (datetime(2025, 3, 20), 6.0, 2.0, 80.0),
+                (datetime(2025, 3, 1), 5.0, 2.0, 80.0),
+                (datetime(2025, 1, 1), 4.0, 1.0, 70.0),
+            ]
+        )
+
+        assert prices.get(2025, 2).main_dish_price == Decimal("4.00")
+        assert prices.get(2025, 3).main_dish_price == Decimal("6.00")
+
+    def it_rounds_float_prices_to_cents():
+        prices = PriceTimeline([(datetime(2025, 1, 1), 4.35, 1.15, 65.5)])
+
+        assert prices.get(2025, 1).main_dish_price * 3 == Decimal("13.05")
+
+
+def describe_billing_engine():
+    def describe_months_between():
+        def it_includes_both_months_across_years():
+            months = BillingEngine.months_between(date(2024, 11, 30), date(2025, 2, 1))
+
+            assert months == [(2024, 11), (2024, 12), (2025, 1), (2025, 2)]
+
+    def it_creates_line_items_per_run():
+        runs = [
+            _meal_run(
+                PERSON_ID,
+                date(2025, 3, 3),
+                date(2025, 3, 5),
+                main=3,
+                salad=1,
+                salad_days=(date(2025, 3, 4), date(2025, 3, 4)),
+            ),
+            _nothing_run(PERSON_ID, date(2025, 3, 6), date(2025, 3, 7), days=2),
+        ]
+        prices = PriceTimeline([(datetime(2025, 1, 1), 4.5, 1.5, 70.0)])
+
+        summary = BillingEngine.compute(
+            date(2025, 3, 1), date(2025, 3, 31), runs, {}, prices
+        )
+
+        month = summary.persons[0].months[0]
+        lines = [(line.kind, line.start, line.end, line.count) for line in month.lines]
+        assert lines == [
+            ("main", date(2025, 3, 3), date(2025, 3, 5), 3),
+            ("salad", date(2025, 3, 4), date(2025, 3, 4), 1),
+            ("nothing", date(2025, 3, 6), date(2025, 3, 7), 2),
+        ]
+        assert month.charges == Decimal("15.00")
+        assert month.amount == Decimal("-55.00")
+        assert (month.main, month.salad, month.nothing) == (3, 1, 2)
+
+    def it_bills_the_prepayment_of_every_month():
+        runs = [
+            _meal_run(PERSON_ID, date(2025, 2, 3), date(2025, 2, 3), main=1, salad=0)
+        ]
+        prices = PriceTimeline([(datetime(2025, 3, 1), 5.0, 2.0, 80.0)])
+
+        summary = BillingEngine.compute(
+            date(2025, 1, 15), date(2025, 3, 10), runs, {}, prices
+        )
+
+        invoice = summary.persons[0]
+        assert [month.prepayment for month in invoice.months] == [
+            Decimal("70.00"),
+            Decimal("70.00"),
+            Decimal("80.00"),
+        ]
+        assert invoice.charges == Decimal("4.10")
+        assert invoice.amount == Decimal("4.10") - Decimal("220.00")
+
+    def it_includes_requested_persons_without_orders():
+        summary = BillingEngine.compute(
+            date(2025, 3, 1),
+            date(2025, 3, 31),
+            [],
+            {},
+            PriceTimeline([]),
+            include_person_ids=[PERSON_ID],
+        )
+
+        assert summary.get_person(PERSON_ID).months[0].ordered is False
+        assert summary.amount == Decimal("-70.00")
+
+    def it_sums_up_all_persons():
+        runs = [
+            _meal_run(PERSON_ID, date(2025, 3, 3), date(2025, 3, 4), main=2, salad=2),
+            _meal_run(
+                OTHER_PERSON_ID, date(2025, 3, 3), date(2025, 3, 3), main=1, salad=0
+            ),
+        ]
+        persons = {
+            PERSON_ID: BillingPerson(PERSON_ID, "A", "B", "employee"),
+            OTHER_PERSON_ID: BillingPerson(OTHER_PERSON_ID, "C", "D", "user"),
+        }
+
+        summary = BillingEngine.compute(
+            date(2025, 3, 1), date(2025, 3, 31), runs, persons, PriceTimeline([])
+        )
+
+        names = [invoice.person.first_name for invoice in summary.persons]
+        assert names == ["A", "C"]
+        assert (summary.main, summary.salad) == (3, 2)
+        assert summary.charges == Decimal("15.30")
+        assert summary.prepayment == Decimal("140.00")
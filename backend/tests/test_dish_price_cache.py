@@ -0,0 +1,89 @@
+"""Tests for the cached dish price timeline"""
+
+from datetime import datetime
+
+import pytest
+
+from src.repositories.change_versions_repository import ChangeVersionsRepository
+from src.repositories.dish_prices_repository import DishPricesRepository
+from src.utils.dish_price_cache import (
+    DISH_PRICE_SCOPE,
+    CachedDishPrice,
+    DishPriceCache,
+    DishPriceTimeline,
+)
+
+JANUARY = CachedDishPrice(datetime(2025, 1, 1), 4.0, 1.0, 70.0)
+MARCH = CachedDishPrice(datetime(2025, 3, 15), 5.0, 2.0, 80.0)
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    DishPriceCache.invalidate()
+    yield
+    DishPriceCache.invalidate()
+
+
+def describe_dish_price_timeline():
+    def it_returns_the_latest_price_at_the_date():
+        timeline = DishPriceTimeline([MARCH, JANUARY])
+
+        assert timeline.get_price_valid_at_date(datetime(2025, 3, 14)) == JANUARY
+        assert timeline.get_price_valid_at_date(datetime(2025, 3, 15)) == MARCH
+        assert timeline.get_price_valid_at_date(datetime(2026, 1, 1)) == MARCH
+
+    def it_returns_none_before_the_first_price():
+        timeline = DishPriceTimeline([JANUARY])
+
+        assert timeline.get_price_valid_at_date(datetime(2024, 12, 31)) is None
+
+    def it_provides_the_prices_for_billing():
+        timeline = DishPriceTimeline([JANUARY, MARCH])
+
+        assert timeline.billing_prices.get(2025, 2).prepayment == 70
+        assert timeline.billing_prices.get(2025, 3).prepayment == 80
+
+
+def describe_get_timeline():
+    def _mock_version(mocker, version):
+        return mocker.patch.object(
+            ChangeVersionsRepository,
+            "get_versions",
+            return_value={DISH_PRICE_SCOPE: version},
+        )
+
+    def it_loads_the_prices_only_once_per_version(mocker):
+        _mock_version(mocker, 1)
+        get_prices = mocker.patch.object(
+            DishPricesRepository, "get_prices", return_value=[JANUARY]
+        )
+
+        DishPriceCache.get_timeline()
+        timeline = DishPriceCache.get_timeline()
+
+        assert timeline.prices == [JANUARY]
+        get_prices.assert_called_once()
+
+    def it_reloads_when_another_worker_changed_the_prices(mocker):
+        _mock_version(mocker, 1)
+        mocker.patch.object(DishPricesRepository, "get_prices", return_value=[JANUARY])
+        DishPriceCache.get_timeline()
+
+        _mock_version(mocker, 2)
+        mocker.patch.object(
+            DishPricesRepository, "get_prices", return_value=[JANUARY, MARCH]
+        )
+
+        assert DishPriceCache.get_timeline().prices == [JANUARY, MARCH]
+
+    def it_reloads_after_invalidate(mocker):
+        _mock_version(mocker, 1)
+        get_prices = mocker.patch.object(
+            DishPricesRepository, "get_prices", return_value=[JANUARY]
+        )
+
+        DishPriceCache.get_timeline()
+        DishPriceCache.invalidate()
+        DishPriceCache.get_timeline()
+
+        assert get_prices.call_count == 2
@@ -6,9 +6,20 @@ from datetime import datetime, timedelta
 from src.utils.exceptions import BadValueError, NotFoundError
 from src.services.dish_prices_service import DishPricesService
 from src.repositories.dish_prices_repository import DishPricesRepository
+from src.utils.dish_price_cache import (
+    CachedDishPrice,
+    DishPriceCache,
+    DishPriceTimeline,
+)
 from .helper import *  # for fixtures # noqa: F403
 
 
+def _cached(price) -> CachedDishPrice:
+    return CachedDishPrice(
+        price.date, price.main_dish_price, price.salad_price, price.prepayment
+    )
+
+
 def describe_get_prices():
     def it_returns_all_prices(mocker, dish_price):
         mocker.patch.object(
@@ -21,17 +32,15 @@ def describe_get_prices():
 
 
 def describe_get_price_valid_at_date():
-    def it_calls_repository(mocker, dish_price):
-        mock_get_price_valid_at_date = mocker.patch.object(
-            DishPricesRepository, "get_price_valid_at_date", return_value=dish_price
-        )
+    def it_looks_up_the_cached_timeline(mocker, dish_price):
+        timeline = DishPriceTimeline([_cached(dish_price)])
+        mocker.patch.object(DishPriceCache, "get_timeline", return_value=timeline)
 
-        date = datetime.now()
+        date = dish_price.date + timedelta(days=1)
 
         price = DishPricesService.get_price_valid_at_date(date)
 
-        assert price == dish_price
-        mock_get_price_valid_at_date.assert_called_once_with(date)
+        assert price == _cached(dish_price)
 
 
 def describe_get_current_price():
@@ -97,6 +106,7 @@ def describe_create_price():
             DishPricesRepository, "get_price_by_date", return_value=None
         )
         mock_create_price = mocker.patch.object(DishPricesRepository, "create_price")
+        mock_invalidate = mocker.patch.object(DishPriceCache, "invalidate")
 
         price = DishPricesService.create_price(dish_price.date, 10, 10, 10)
 
@@ -105,6 +115,7 @@ def describe_create_price():
         assert price.salad_price == 10
         assert price.prepayment == 10
         mock_create_price.assert_called_once_with(price)
+        mock_invalidate.assert_called_once()
 
 
 def describe_update_price():
@@ -204,7 +215,9 @@ def describe_delete_price():
             DishPricesRepository, "get_price_by_date", return_value=dish_price
         )
         mock_delete_price = mocker.patch.object(DishPricesRepository, "delete_price")
+        mock_invalidate = mocker.patch.object(DishPriceCache, "invalidate")
 
         DishPricesService.delete_price(dish_price.date)
 
         mock_delete_price.assert_called_once_with(dish_price)
+        mock_invalidate.assert_called_once()
@@ -7,7 +7,7 @@ from src.models.user import UserGroup
 from src.models.employee import Employee
 from src.services.employees_service import EmployeesService
 from src.repositories.employees_repository import EmployeesRepository
-from src.utils.exceptions import AlreadyExistsError, NotFoundError
+from src.utils.exceptions import AlreadyExistsError, BadValueError, NotFoundError
 from src.utils.pdf_creator import PDFCreationUtils
 from .helper import *  # for fixtures # noqa: F403
 
@@ -79,7 +79,7 @@ def describe_get_employee_by_id():
 
         assert result == employee
         mock_employee_by_id.assert_called_once_with(
-            employee.id, UserGroup.verwaltung, user_verwaltung.id
+            employee.id, UserGroup.verwaltung, user_verwaltung.id, include_hidden=False
         )
 
     def it_raises_not_found_error_if_employee_not_found(mocker, user_verwaltung):
@@ -216,11 +216,104 @@ def describe_delete_employee():
         mock_delete.assert_called_once_with(employee)
 
 
+def describe_delete_employees():
+    def it_deletes_all_employees_in_scope(mocker, user_verwaltung):
+        employee_ids = [uuid4(), uuid4()]
+        mocker.patch.object(
+            EmployeesRepository,
+            "get_employee_ids_by_user_scope",
+            return_value=set(employee_ids),
+        )
+        mock_delete = mocker.patch.object(EmployeesRepository, "delete_employees")
+
+        EmployeesService.delete_employees(
+            employee_ids + [employee_ids[0]], UserGroup.verwaltung, user_verwaltung.id
+        )
+
+        mock_delete.assert_called_once_with(employee_ids)
+
+    def it_deletes_nothing_if_any_employee_is_missing(mocker, user_verwaltung):
+        found_id, missing_id, other_missing_id = uuid4(), uuid4(), uuid4()
+        mocker.patch.object(
+            EmployeesRepository,
+            "get_employee_ids_by_user_scope",
+            return_value={found_id},
+        )
+        mock_delete = mocker.patch.object(EmployeesRepository, "delete_employees")
+
+        with pytest.raises(NotFoundError) as err:
+            EmployeesService.delete_employees(
+                [found_id, missing_id, other_missing_id],
+                UserGroup.verwaltung,
+                user_verwaltung.id,
+            )
+
+        assert str(missing_id) in str(err.value)
+        assert str(other_missing_id) in str(err.value)
+        mock_delete.assert_not_called()
+
+
 def describe_bulk_create_employees():
     # These tests need to be run in an environment with Flask request context
     pass
 
 
+def describe_parse_csv_row():
+    GROUP_ID = uuid4()
+    GROUP_IDS = {("Küche", "Standort A"): GROUP_ID}
+
+    def _row(**fields):
+        row = {
+            "Kunden-Nr.": "1234",
+            "Kürzel": "MaxMustermann",
+            "Bereich": "Standort A ",
+            "Gruppe-Nr.": "1",
+            "Gruppen-Name 1": "Küche",
+            "Gruppen-Name 2": "Test",
+        }
+        row.update(fields)
+        return row
+
+    def it_reads_the_employee():
+        employee = EmployeesService._parse_csv_row(_row(), GROUP_IDS)
+
+        assert employee == {
+            "first_name": "Max",
+            "last_name": "Mustermann",
+            "employee_number": 1234,
+            "group_id": GROUP_ID,
+        }
+
+    def it_splits_several_first_names():
+        employee = EmployeesService._parse_csv_row(
+            _row(**{"Kürzel": "AnnaLenaMaria-TheresMüller"}), GROUP_IDS
+        )
+
+        assert employee["first_name"] == "Anna Lena Maria-Theres"
+        assert employee["last_name"] == "Müller"
+
+    def it_strips_the_group_suffix():
+        employee = EmployeesService._parse_csv_row(
+            _row(**{"Gruppen-Name 1": "Küche - Frühschicht"}), GROUP_IDS
+        )
+
+        assert employee["group_id"] == GROUP_ID
+
+    def it_raises_for_missing_fields():
+        with pytest.raises(BadValueError):
+            EmployeesService._parse_csv_row(_row(**{"Bereich": ""}), GROUP_IDS)
+
+    def it_raises_for_unknown_groups():
+        with pytest.raises(NotFoundError):
+            EmployeesService._parse_csv_row(
+                _row(**{"Gruppen-Name 1": "Garten"}), GROUP_IDS
+            )
+
+    def it_raises_for_invalid_employee_numbers():
+        with pytest.raises(BadValueError):
+            EmployeesService._parse_csv_row(_row(**{"Kunden-Nr.": "12a"}), GROUP_IDS)
+
+
 def describe_get_qr_code_for_all_employees_by_user_scope():
     def it_returns_pdf_for_employees(mocker, user_verwaltung, employee):
         mocker.patch.object(
@@ -257,8 +350,8 @@ def describe_get_qr_code_for_employees_list():
     def it_returns_pdf_for_specified_employees(mocker, user_verwaltung, employee):
         mocker.patch.object(
             EmployeesRepository,
-            "get_employee_by_id_by_user_scope",
-            return_value=employee,
+            "get_employees_by_ids_by_user_scope",
+            return_value=[employee],
         )
         pdf_bytes = b"mock pdf content"
         mocker.patch.object(
@@ -276,7 +369,7 @@ def describe_get_qr_code_for_employees_list():
 
     def it_raises_if_employee_not_found(mocker, user_verwaltung):
         mocker.patch.object(
-            EmployeesRepository, "get_employee_by_id_by_user_scope", return_value=None
+            EmployeesRepository, "get_employees_by_ids_by_user_scope", return_value=[]
         )
 
         with pytest.raises(NotFoundError):
@@ -284,6 +377,25 @@ def describe_get_qr_code_for_employees_list():
                 [uuid4()], UserGroup.verwaltung, user_verwaltung.id
             )
 
+    def it_reports_all_missing_employees_together(mocker, user_verwaltung, employee):
+        mocker.patch.object(
+            EmployeesRepository,
+            "get_employees_by_ids_by_user_scope",
+            return_value=[employee],
+        )
+        mock_pdf = mocker.patch.object(PDFCreationUtils, "create_batch_qr_codes")
+        missing_ids = [uuid4(), uuid4()]
+
+        with pytest.raises(NotFoundError) as err:
+            EmployeesService.get_qr_code_for_employees_list(
+                [missing_ids[0], employee.id, missing_ids[1]],
+                UserGroup.verwaltung,
+                user_verwaltung.id,
+            )
+
+        assert all(str(id) in str(err.value) for id in missing_ids)
+        mock_pdf.assert_not_called()
+
     def it_raises_if_empty_list(mocker, user_verwaltung):
         with pytest.raises(NotFoundError):
             EmployeesService.get_qr_code_for_employees_list(
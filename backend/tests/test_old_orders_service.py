@@ -6,6 +6,7 @@ from .helper import *  # for fixtures # noqa: F403
 from src.services.old_orders_service import OldOrdersService
 from src.repositories.orders_repository import OrdersRepository, OrdersFilters
 from src.utils.exceptions import NotFoundError
+from src.utils.pagination import Page, Pagination
 
 
 def describe_get_old_orders():
@@ -32,3 +33,37 @@ def describe_get_old_orders():
             OldOrdersService.get_old_orders(filters)
 
         mock_get_orders.assert_called_once_with(filters)
+
+
+def describe_get_old_orders_page():
+    def it_returns_page_of_old_orders(mocker, old_orders):
+        page = Page(old_orders[:2], next_cursor="cursor")
+        mock_get_page = mocker.patch.object(
+            OrdersRepository, "get_old_orders_page", return_value=page
+        )
+
+        filters = OrdersFilters()
+        pagination = Pagination(2)
+        res = OldOrdersService.get_old_orders_page(filters, pagination)
+
+        assert res == page
+        mock_get_page.assert_called_once_with(filters, pagination)
+
+    def it_raises_not_found_error_if_first_page_is_empty(mocker):
+        mocker.patch.object(
+            OrdersRepository, "get_old_orders_page", return_value=Page([])
+        )
+
+        with pytest.raises(NotFoundError, match="No old orders found"):
+            OldOrdersService.get_old_orders_page(OrdersFilters(), Pagination(2))
+
+    def it_returns_empty_page_after_last_page(mocker):
+        mocker.patch.object(
+            OrdersRepository, "get_old_orders_page", return_value=Page([])
+        )
+
+        res = OldOrdersService.get_old_orders_page(
+            OrdersFilters(), Pagination(2, cursor="cursor")
+        )
+
+        assert res.items == []
@@ -0,0 +1,259 @@
+"""Tests for the parallel PDF rendering"""
+
+import uuid
+from datetime import date
+from io import BytesIO
+
+import pytest
+from pypdf import PdfReader
+
+from .helper import *  # for fixtures # noqa: F403
+from src.constants import PDF_RENDER_DEFAULT_MAX_WORKERS
+from src.models.employee import Employee
+from src.utils.billing import InvoiceSummary
+from src.utils.pdf_creator import (
+    FONT_BOLD,
+    QR_CODES_PER_PAGE,
+    InvoiceTableChunk,
+    PDFCreationUtils,
+)
+from src.utils import pdf_render_pool
+from src.utils.pdf_render_pool import PDF_RENDER_WORKERS_ENV, PDFRenderPool
+
+
+@pytest.fixture(autouse=True)
+def shared_pool():
+    yield
+    # Every test starts with a new pool of its configured size
+    if pdf_render_pool._executor is not None:
+        pdf_render_pool._executor.shutdown()
+        pdf_render_pool._executor = None
+
+
+def _set_workers(mocker, count: int):
+    mocker.patch("src.utils.pdf_render_pool.PDF_RENDER_WORKERS", count)
+
+
+def _page_count(pdf: bytes) -> int:
+    return len(PdfReader(BytesIO(pdf)).pages)
+
+
+def _labels(count: int) -> list[tuple]:
+    return [(uuid.uuid4(), f"Vorname{i} Nachname{i}") for i in range(count)]
+
+
+def _employee() -> Employee:
+    employee = Employee("Vorname", "Nachname", 1, uuid.uuid4())
+    employee.id = uuid.uuid4()
+    return employee
+
+
+def _page_texts(pdf: bytes) -> list[str]:
+    return [page.extract_text() for page in PdfReader(BytesIO(pdf)).pages]
+
+
+def _summary() -> InvoiceSummary:
+    return InvoiceSummary(date(2025, 3, 1), date(2025, 3, 31), [], [], 0, 0, 0, 0, 0, 0)
+
+
+def _invoice_rows(count: int) -> list[list]:
+    rows = [[f"Vorname{i} Nachname{i}", "", "1,00", "1,00"] for i in range(count)]
+    return rows + [["", "Gesamt:", f"{count},00", f"{count},00"]]
+
+
+def _prepare_group_invoice(rows: list[list]):
+    return PDFCreationUtils._prepare_invoice_g_l(
+        _summary(),
+        "Gruppe: Test",
+        ["Mitarbeiter", "", "Hauptgericht Anzahl", "Salat Anzahl"],
+        rows,
+        FONT_BOLD,
+        "Rechnung.pdf",
+    )
+
+
+def _render(chunks) -> bytes:
+    output = BytesIO()
+    PDFRenderPool.render(PDFCreationUtils._render_qr_code_pages, chunks, output)
+    return output.getvalue()
+
+
+def describe_split():
+    def it_keeps_small_documents_in_one_chunk(mocker):
+        _set_workers(mocker, 4)
+
+        chunks = PDFRenderPool.split(list(range(25)), 9)
+
+        assert chunks == [list(range(25))]
+
+    def it_splits_at_page_boundaries(mocker):
+        _set_workers(mocker, 4)
+        mocker.patch("src.utils.pdf_render_pool.PDF_RENDER_MIN_PAGES_PER_CHUNK", 1)
+
+        chunks = PDFRenderPool.split(list(range(25)), 9)
+
+        assert [len(chunk) for chunk in chunks] == [9, 9, 7]
+        assert sum(chunks, []) == list(range(25))
+
+    def it_returns_one_empty_chunk_for_no_items():
+        assert PDFRenderPool.split([], 9) == [[]]
+
+
+def describe_read_worker_count():
+    def it_caps_the_default_worker_count(monkeypatch, mocker):
+        monkeypatch.delenv(PDF_RENDER_WORKERS_ENV, raising=False)
+        mocker.patch("src.utils.pdf_render_pool.os.cpu_count", return_value=64)
+
+        assert pdf_render_pool._read_worker_count() == PDF_RENDER_DEFAULT_MAX_WORKERS
+
+    def it_reads_the_configured_worker_count(monkeypatch, mocker):
+        monkeypatch.setenv(PDF_RENDER_WORKERS_ENV, "8")
+        mocker.patch("src.utils.pdf_render_pool.os.cpu_count", return_value=2)
+
+        assert pdf_render_pool._read_worker_count() == 8
+
+    def it_rejects_invalid_worker_counts(monkeypatch):
+        for workers in ("viele", "0", "-2"):
+            monkeypatch.setenv(PDF_RENDER_WORKERS_ENV, workers)
+
+            with pytest.raises(Exception, match=PDF_RENDER_WORKERS_ENV):
+                pdf_render_pool._read_worker_count()
+
+
+def describe_render():
+    def it_renders_chunks_in_worker_processes(mocker):
+        _set_workers(mocker, 2)
+        chunks = [_labels(QR_CODES_PER_PAGE * 2), _labels(1)]
+
+        pdf = _render(chunks)
+
+        assert _page_count(pdf) == 3
+        assert "Vorname0" in PdfReader(BytesIO(pdf)).pages[2].extract_text()
+
+    def it_renders_in_process_with_one_worker(mocker):
+        _set_workers(mocker, 1)
+        executor = mocker.patch("src.utils.pdf_render_pool.ProcessPoolExecutor")
+
+        pdf = _render([_labels(1), _labels(1)])
+
+        assert _page_count(pdf) == 2
+        executor.assert_not_called()
+
+    def it_shares_one_pool_between_documents(mocker):
+        _set_workers(mocker, 2)
+        executor = mocker.spy(pdf_render_pool, "ProcessPoolExecutor")
+
+        first = _render([_labels(1), _labels(1)])
+        second = _render([_labels(1), _labels(1), _labels(1)])
+
+        assert _page_count(first) == 2
+        assert _page_count(second) == 3
+        executor.assert_called_once()
+        assert executor.call_args.kwargs["max_workers"] == 2
+
+
+def describe_render_qr_code_pages():
+    def it_fills_whole_pages():
+        pdf = PDFCreationUtils._render_qr_code_pages(_labels(QR_CODES_PER_PAGE))
+        assert _page_count(pdf) == 1
+
+        pdf = PDFCreationUtils._render_qr_code_pages(_labels(QR_CODES_PER_PAGE + 1))
+        assert _page_count(pdf) == 2
+
+
+def describe_create_batch_qr_codes():
+    def it_streams_the_pdf_with_its_length(app):
+        with app.test_request_context():
+            response = PDFCreationUtils.create_batch_qr_codes(
+                [_employee() for _ in range(QR_CODES_PER_PAGE + 1)]
+            )
+            response.direct_passthrough = False
+            pdf = response.get_data()
+
+        assert response.content_length == len(pdf)
+        assert _page_count(pdf) == 2
+
+    def it_spools_large_pdfs_to_disk(app, mocker):
+        mocker.patch("src.utils.pdf_creator.PDF_SPOOL_MAX_SIZE", 1024)
+        spooled_files = []
+        new_pdf_file = PDFCreationUtils._new_pdf_file
+
+        def _track_new_pdf_file():
+            spooled_files.append(new_pdf_file())
+            return spooled_files[-1]
+
+        mocker.patch.object(PDFCreationUtils, "_new_pdf_file", _track_new_pdf_file)
+
+        with app.test_request_context():
+            response = PDFCreationUtils.create_batch_qr_codes([_employee()])
+
+            assert spooled_files[0]._rolled
+            response.direct_passthrough = False
+            assert _page_count(response.get_data()) == 1
+            response.close()
+
+        assert spooled_files[0].closed
+
+
+def describe_invoice_tables():
+    def it_splits_at_the_page_breaks_of_the_whole_table(mocker):
+        _set_workers(mocker, 2)
+        mocker.patch("src.utils.pdf_render_pool.PDF_RENDER_MIN_PAGES_PER_CHUNK", 1)
+        rows = _invoice_rows(150)
+        summary = _summary()
+
+        job = _prepare_group_invoice(rows)
+        pdf = PDFCreationUtils._render_invoice(job).read().content
+        whole = PDFCreationUtils._render_invoice_table_pages(
+            InvoiceTableChunk(
+                head=("Gruppe: Test", summary.date_start, summary.date_end),
+                header=["Mitarbeiter", "", "Hauptgericht Anzahl", "Salat Anzahl"],
+                rows=rows,
+                total_font=FONT_BOLD,
+            )
+        )
+
+        assert len(job.chunks) == 2
+        assert sum((chunk.rows for chunk in job.chunks), []) == rows
+        assert _page_count(pdf) == 3
+        assert _page_texts(pdf) == _page_texts(whole)
+
+    def it_spools_the_invoice_to_a_file(mocker):
+        mocker.patch("src.utils.pdf_creator.PDF_SPOOL_MAX_SIZE", 1024)
+
+        pdf_file = PDFCreationUtils._render_invoice(
+            _prepare_group_invoice(_invoice_rows(10))
+        )
+
+        assert pdf_file.file._rolled
+        pdf = pdf_file.read()
+        assert len(pdf.content) == pdf_file.size
+        assert _page_count(pdf.content) == 1
+        pdf_file.file.close()
+
+    def it_keeps_small_invoices_in_one_chunk():
+        job = _prepare_group_invoice(_invoice_rows(10))
+
+        assert len(job.chunks) == 1
+        assert job.chunks[0].head is not None
+        assert job.chunks[0].total_font == FONT_BOLD
+
+
+def describe_render_invoices():
+    def it_yields_failures_without_aborting_the_others(mocker):
+        _set_workers(mocker, 2)
+        broken = _prepare_group_invoice(_invoice_rows(1))
+        broken.chunks[0] = broken.chunks[0]._replace(rows=None)
+
+        first, failed, last = PDFCreationUtils.render_invoices(
+            [
+                _prepare_group_invoice(_invoice_rows(1)),
+                broken,
+                _prepare_group_invoice(_invoice_rows(2)),
+            ]
+        )
+
+        assert _page_count(first.content) == 1
+        assert first.download_name == "Rechnung.pdf"
+        assert isinstance(failed, TypeError)
+        assert "Vorname1" in _page_texts(last.content)[0]
@@ -335,20 +335,19 @@ def describe_get_pre_orders():
 
 
 def describe_create_update_bulk_preorders():
-    def it_creates_new_preorders(mocker, pre_orders, user_gruppenleitung, employees):
+    def it_creates_new_preorders(
+        mocker, pre_orders, user_gruppenleitung, employees, location
+    ):
 
-        employees_ids = [employee.id for employee in employees]
-        mocker.patch.object(
-            OrdersRepository, "get_employees_to_order_for", return_value=employees_ids
-        )
-        mocker.patch.object(OrdersRepository, "employee_in_location", return_value=True)
+        employee_locations = {employee.id: location.id for employee in employees}
         mocker.patch.object(
-            OrdersRepository, "preorder_already_exists", return_value=None
+            OrdersRepository,
+            "get_employee_locations_to_order_for",
+            return_value=employee_locations,
         )
-        mock_create = mocker.patch.object(
-            OrdersRepository, "create_bulk_orders", return_value=None
+        mock_upsert = mocker.patch.object(
+            OrdersRepository, "upsert_bulk_preorders", return_value=None
         )
-        mocker.patch.object(OrdersRepository, "update_order", return_value=None)
 
         dict_pre_orders = [
             {
@@ -365,69 +364,55 @@ def describe_create_update_bulk_preorders():
         res = PreOrdersService.create_update_bulk_preorders(
             dict_pre_orders, user_gruppenleitung.id
         )
-        mock_create.assert_called_once()
+        mock_upsert.assert_called_once_with(dict_pre_orders)
         assert res == None  # noqa: E711
 
-    def it_updates_existing_preorders(
-        mocker, pre_orders, user_gruppenleitung, employees
+    def it_keeps_only_last_order_per_person_and_date(
+        mocker, pre_orders, user_gruppenleitung, employees, location
     ):
 
-        employees_ids = [employee.id for employee in employees]
-        mocker.patch.object(
-            OrdersRepository, "get_employees_to_order_for", return_value=employees_ids
-        )
-        mocker.patch.object(OrdersRepository, "employee_in_location", return_value=True)
+        employee_locations = {employee.id: location.id for employee in employees}
         mocker.patch.object(
             OrdersRepository,
-            "preorder_already_exists",
-            side_effect=[
-                pre_orders[0],
-                pre_orders[1],
-                pre_orders[2],
-                pre_orders[3],
-                pre_orders[4],
-            ],
+            "get_employee_locations_to_order_for",
+            return_value=employee_locations,
         )
-        mock_create = mocker.patch.object(
-            OrdersRepository, "create_bulk_orders", return_value=None
-        )
-        mock_update = mocker.patch.object(
-            OrdersRepository, "update_order", return_value=None
+        mock_upsert = mocker.patch.object(
+            OrdersRepository, "upsert_bulk_preorders", return_value=None
         )
 
         dict_pre_orders = [
             {
                 "date": pre_order.date,
                 "location_id": pre_order.location_id,
-                "main_dish": pre_order.main_dish,
+                "main_dish": main_dish,
                 "nothing": pre_order.nothing,
                 "person_id": pre_order.person_id,
                 "salad_option": pre_order.salad_option,
             }
+            for main_dish in [MainDish.rot, MainDish.blau]
             for pre_order in pre_orders
         ]
 
         res = PreOrdersService.create_update_bulk_preorders(
             dict_pre_orders, user_gruppenleitung.id
         )
-        mock_create.assert_called_once_with([])
-        mock_update.assert_called_once()
+        mock_upsert.assert_called_once_with(dict_pre_orders[len(pre_orders) :])
         assert res == None  # noqa: E711
 
     def it_raises_bad_value_error_if_date_in_past(
-        mocker, pre_orders, user_gruppenleitung, employees
+        mocker, pre_orders, user_gruppenleitung, employees, location
     ):
 
-        employees_ids = [employee.id for employee in employees]
+        employee_locations = {employee.id: location.id for employee in employees}
         mocker.patch.object(
-            OrdersRepository, "get_employees_to_order_for", return_value=employees_ids
+            OrdersRepository,
+            "get_employee_locations_to_order_for",
+            return_value=employee_locations,
         )
-        mocker.patch.object(OrdersRepository, "employee_in_location", return_value=True)
         mocker.patch.object(
-            OrdersRepository, "preorder_already_exists", return_value=None
+            OrdersRepository, "upsert_bulk_preorders", return_value=None
         )
-        mocker.patch.object(OrdersRepository, "create_bulk_orders", return_value=None)
-        mocker.patch.object(OrdersRepository, "update_order", return_value=None)
 
         dict_pre_orders = [
             {
@@ -449,19 +434,18 @@ def describe_create_update_bulk_preorders():
             assert "liegt in der Vergangenheit." in str(e)
 
     def it_raises_bad_value_error_if_date_more_than_14_days_in_future(
-        mocker, pre_orders, user_gruppenleitung, employees
+        mocker, pre_orders, user_gruppenleitung, employees, location
     ):
 
-        employees_ids = [employee.id for employee in employees]
+        employee_locations = {employee.id: location.id for employee in employees}
         mocker.patch.object(
-            OrdersRepository, "get_employees_to_order_for", return_value=employees_ids
+            OrdersRepository,
+            "get_employee_locations_to_order_for",
+            return_value=employee_locations,
         )
-        mocker.patch.object(OrdersRepository, "employee_in_location", return_value=True)
         mocker.patch.object(
-            OrdersRepository, "preorder_already_exists", return_value=None
+            OrdersRepository, "upsert_bulk_preorders", return_value=None
         )
-        mocker.patch.object(OrdersRepository, "create_bulk_orders", return_value=None)
-        mocker.patch.object(OrdersRepository, "update_order", return_value=None)
 
         dict_pre_orders = [
             {
@@ -483,19 +467,18 @@ def describe_create_update_bulk_preorders():
             assert "liegt mehr als 14 Tage in der Zukunft." in str(e)
 
     def it_raises_bad_value_error_if_today_after_8_pm(
-        mocker, pre_orders, user_gruppenleitung, employees
+        mocker, pre_orders, user_gruppenleitung, employees, location
     ):
 
-        employees_ids = [employee.id for employee in employees]
+        employee_locations = {employee.id: location.id for employee in employees}
         mocker.patch.object(
-            OrdersRepository, "get_employees_to_order_for", return_value=employees_ids
+            OrdersRepository,
+            "get_employee_locations_to_order_for",
+            return_value=employee_locations,
         )
-        mocker.patch.object(OrdersRepository, "employee_in_location", return_value=True)
         mocker.patch.object(
-            OrdersRepository, "preorder_already_exists", return_value=None
+            OrdersRepository, "upsert_bulk_preorders", return_value=None
         )
-        mocker.patch.object(OrdersRepository, "create_bulk_orders", return_value=None)
-        mocker.patch.object(OrdersRepository, "update_order", return_value=None)
 
         dict_pre_orders = [
             {
@@ -517,19 +500,18 @@ def describe_create_update_bulk_preorders():
             assert "Es ist nach 8 Uhr. Bestellungen sind nicht mehr möglich." in str(e)
 
     def it_raises_bad_value_error_if_weekend(
-        mocker, pre_orders, user_gruppenleitung, employees
+        mocker, pre_orders, user_gruppenleitung, employees, location
     ):
 
-        employees_ids = [employee.id for employee in employees]
+        employee_locations = {employee.id: location.id for employee in employees}
         mocker.patch.object(
-            OrdersRepository, "get_employees_to_order_for", return_value=employees_ids
+            OrdersRepository,
+            "get_employee_locations_to_order_for",
+            return_value=employee_locations,
         )
-        mocker.patch.object(OrdersRepository, "employee_in_location", return_value=True)
         mocker.patch.object(
-            OrdersRepository, "preorder_already_exists", return_value=None
+            OrdersRepository, "upsert_bulk_preorders", return_value=None
         )
-        mocker.patch.object(OrdersRepository, "create_bulk_orders", return_value=None)
-        mocker.patch.object(OrdersRepository, "update_order", return_value=None)
 
         wochentag = datetime.today().weekday()
         forward = 6 - wochentag
@@ -556,18 +538,15 @@ def describe_create_update_bulk_preorders():
             assert "ist kein Werktag." in str(e)
 
     def it_raises_action_not_possible_if_person_not_in_employees(
-        mocker, pre_orders, user_gruppenleitung, employees
+        mocker, pre_orders, user_gruppenleitung, employees, location
     ):
 
         mocker.patch.object(
-            OrdersRepository, "get_employees_to_order_for", return_value=[]
+            OrdersRepository, "get_employee_locations_to_order_for", return_value={}
         )
-        mocker.patch.object(OrdersRepository, "employee_in_location", return_value=True)
         mocker.patch.object(
-            OrdersRepository, "preorder_already_exists", return_value=None
+            OrdersRepository, "upsert_bulk_preorders", return_value=None
         )
-        mocker.patch.object(OrdersRepository, "create_bulk_orders", return_value=None)
-        mocker.patch.object(OrdersRepository, "update_order", return_value=None)
 
         dict_pre_orders = [
             {
@@ -592,18 +571,15 @@ def describe_create_update_bulk_preorders():
         mocker, pre_orders, user_gruppenleitung, employees
     ):
 
-        employees_ids = [employee.id for employee in employees]
-        mocker.patch.object(
-            OrdersRepository, "get_employees_to_order_for", return_value=employees_ids
-        )
+        employee_locations = {employee.id: uuid.uuid4() for employee in employees}
         mocker.patch.object(
-            OrdersRepository, "employee_in_location", return_value=False
+            OrdersRepository,
+            "get_employee_locations_to_order_for",
+            return_value=employee_locations,
         )
         mocker.patch.object(
-            OrdersRepository, "preorder_already_exists", return_value=None
+            OrdersRepository, "upsert_bulk_preorders", return_value=None
         )
-        mocker.patch.object(OrdersRepository, "create_bulk_orders", return_value=None)
-        mocker.patch.object(OrdersRepository, "update_order", return_value=None)
 
         dict_pre_orders = [
             {
@@ -625,19 +601,18 @@ def describe_create_update_bulk_preorders():
             assert "gehört nicht zum Standort" in str(e)
 
     def it_raises_bad_value_if_nothing_is_true_but_main_dish_or_salad_is_not_none(
-        mocker, pre_orders, user_gruppenleitung, employees
+        mocker, pre_orders, user_gruppenleitung, employees, location
     ):
 
-        employees_ids = [employee.id for employee in employees]
+        employee_locations = {employee.id: location.id for employee in employees}
         mocker.patch.object(
-            OrdersRepository, "get_employees_to_order_for", return_value=employees_ids
+            OrdersRepository,
+            "get_employee_locations_to_order_for",
+            return_value=employee_locations,
         )
-        mocker.patch.object(OrdersRepository, "employee_in_location", return_value=True)
         mocker.patch.object(
-            OrdersRepository, "preorder_already_exists", return_value=None
+            OrdersRepository, "upsert_bulk_preorders", return_value=None
         )
-        mocker.patch.object(OrdersRepository, "create_bulk_orders", return_value=None)
-        mocker.patch.object(OrdersRepository, "update_order", return_value=None)
 
         dict_pre_orders = [
             {
@@ -0,0 +1,123 @@
+"""Tests for the QR code cache"""
+
+import os
+import uuid
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from reportlab.pdfgen import canvas
+
+from .helper import *  # for fixtures # noqa: F403
+from src.utils.pdf_creator import PDFCreationUtils
+from src.utils.qr_code_cache import (
+    QR_BOX_SIZE,
+    QR_CODE_CACHE_DIR_ENV,
+    QRCodeCache,
+    qr_code_matrices,
+    rendered_qr_codes,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(monkeypatch):
+    monkeypatch.delenv(QR_CODE_CACHE_DIR_ENV, raising=False)
+    rendered_qr_codes.clear()
+    qr_code_matrices.clear()
+    yield
+    rendered_qr_codes.clear()
+    qr_code_matrices.clear()
+
+
+def describe_get_png():
+    def it_renders_a_png(app):
+        with app.app_context():
+            png = QRCodeCache.get_png(uuid.uuid4())
+
+        assert png.startswith(b"\x89PNG")
+
+    def it_renders_each_content_only_once(app, mocker):
+        render = mocker.spy(QRCodeCache, "_render_png")
+        person_id = uuid.uuid4()
+
+        with app.app_context():
+            first = QRCodeCache.get_png(person_id)
+            second = QRCodeCache.get_png(str(person_id))
+            QRCodeCache.get_png(uuid.uuid4())
+
+        assert first == second
+        assert render.call_count == 2
+
+    def it_stores_images_on_disk_if_configured(app, mocker, monkeypatch, tmp_path):
+        monkeypatch.setenv(QR_CODE_CACHE_DIR_ENV, str(tmp_path))
+        render = mocker.spy(QRCodeCache, "_render_png")
+        person_id = uuid.uuid4()
+
+        with app.app_context():
+            png = QRCodeCache.get_png(person_id)
+            assert len(os.listdir(tmp_path)) == 1
+
+            # Another worker only has the disk cache
+            rendered_qr_codes.clear()
+            assert QRCodeCache.get_png(person_id) == png
+
+        assert render.call_count == 1
+
+    def it_renders_if_disk_cache_is_not_writable(app, monkeypatch, tmp_path):
+        not_a_directory = tmp_path / "file"
+        not_a_directory.write_text("")
+        monkeypatch.setenv(QR_CODE_CACHE_DIR_ENV, str(not_a_directory))
+
+        with app.app_context():
+            png = QRCodeCache.get_png(uuid.uuid4())
+
+        assert png.startswith(b"\x89PNG")
+
+
+def describe_get_matrix():
+    def it_matches_the_rendered_png(app):
+        person_id = uuid.uuid4()
+
+        with app.app_context():
+            matrix = QRCodeCache.get_matrix(person_id)
+            png = Image.open(BytesIO(QRCodeCache.get_png(person_id)))
+
+        assert png.size == (len(matrix) * QR_BOX_SIZE, len(matrix) * QR_BOX_SIZE)
+        for row_idx, row in enumerate(matrix):
+            for col_idx, dark in enumerate(row):
+                pixel = png.getpixel(
+                    (col_idx * QR_BOX_SIZE + 1, row_idx * QR_BOX_SIZE + 1)
+                )
+                assert (pixel == 0) == dark
+
+    def it_caches_the_matrix(app, mocker):
+        make_qr_code = mocker.spy(QRCodeCache, "_make_qr_code")
+        person_id = uuid.uuid4()
+
+        with app.app_context():
+            assert QRCodeCache.get_matrix(person_id) is QRCodeCache.get_matrix(
+                person_id
+            )
+
+        assert make_qr_code.call_count == 1
+
+
+def describe_draw_qr_code():
+    def _draw(content, mode, mocker):
+        mocker.patch("src.utils.pdf_creator.QR_CODE_RENDER_MODE", mode)
+        buffer = BytesIO()
+        c = canvas.Canvas(buffer)
+        PDFCreationUtils._draw_qr_code(c, content, 0, 0, 150)
+        c.save()
+        return buffer.getvalue()
+
+    def it_draws_vector_graphics_without_images(app, mocker):
+        person_id = uuid.uuid4()
+
+        with app.app_context():
+            vector_pdf = _draw(person_id, "vector", mocker)
+            image_pdf = _draw(person_id, "image", mocker)
+
+        assert b"/Subtype /Image" not in vector_pdf
+        assert b"/Subtype /Image" in image_pdf
+        assert len(vector_pdf) < len(image_pdf)